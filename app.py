@@ -6,7 +6,11 @@ import base64
 import os
 import numpy as np
 import traceback
+import itertools
+import threading
+import uuid
 from datetime import datetime
+from types import SimpleNamespace
 
 # Set environment variable to avoid matplotlib issues
 os.environ['MPLBACKEND'] = 'Agg'
@@ -17,15 +21,80 @@ try:
     from utils.data_processing import BhopalDataProcessor
     from utils.visualization_plotly import DataVisualizerPlotly
     from config.nasa_config import NASAConfig
+    from utils.circuit_breaker import get_breaker_states
+    from utils.response_cache import get_response_caches
+    from utils.single_flight import get_single_flights
+    from utils.memo import get_memos
+    from utils.snapshot import SnapshotScheduler
+    from utils.snapshot_store import SharedSnapshotStore
+    from utils.area_registry import get_area_registry
+    from utils.cities import get_city
+    from utils.simulation import SimulationEngine
     print("✅ Utility modules imported successfully")
 except ImportError as e:
     print(f"⚠️ Some utility imports failed: {e}")
     # Create fallback classes
+    class NASAConfig:
+        SNAPSHOT_SHARED = False
+        HISTORY_ROLLING_WINDOW = 3
+        HISTORY_BACKFILL_PER_BUILD = 0
+        FIRMS_NEARBY_KM = 10
+        TILE_MAX_ZOOM = 18
+    
     class NASAAPI:
+        def __init__(self, *args, **kwargs): pass
         def get_urban_heat_island_data(self): return {}
         def calculate_urban_sustainability_score(self, data): return 50
     
+    class FallbackGraph:
+        """Unmemoized stand-in for DependencyGraph"""
+        def __init__(self):
+            self.nodes = {}
+            self.inputs = {}
+        def add_node(self, name, func, deps=()): self.nodes[name] = (func, list(deps))
+        def set_inputs(self, values):
+            self.inputs.update(values)
+            return list(values)
+        def get(self, name):
+            if name in self.inputs:
+                return self.inputs[name]
+            func, deps = self.nodes[name]
+            return func(*(self.get(dep) for dep in deps))
+        def get_many(self, names): return {name: self.get(name) for name in names}
+        def get_stats(self): return {}
+        def get_trace(self, clear=False): return []
+    
+    class FallbackHistory:
+        def missing(self, dates): return []
+        def trend_summary(self): return {}
+        def export(self): return {'dates': [], 'area_keys': [], 'values': {}}
+    
     class BhopalDataProcessor:
+        HISTORY_METRICS = []
+        
+        def __init__(self):
+            self.areas = self.generate_area_analysis(None)
+        
+        def fetch_area_sources(self, nasa_api): return {}
+        def history_dates(self): return []
+        def history_window(self, date): return None
+        def analyze_history(self, api_for_date, dates=None, store=None, limit=None): return FallbackHistory()
+        
+        def build_analysis_graph(self):
+            graph = FallbackGraph()
+            for area_key, area_data in self.areas.items():
+                graph.add_node(f'{area_key}/result', lambda area_data=area_data: area_data)
+            graph.add_node('raster', lambda: None)
+            return graph
+        
+        def update_analysis_graph(self, graph, area_sources, extra_inputs=None):
+            return graph.set_inputs(dict(extra_inputs or {}))
+        
+        def export_to_geojson(self, analysis_data, properties=None): return {'type': 'FeatureCollection', 'features': []}
+        def stream_geojson(self, analysis_data, properties=None, chunk_size=None): yield json.dumps(self.export_to_geojson(analysis_data))
+        def export_geoparquet(self, analysis_data, target=None, properties=None): raise RuntimeError('GeoParquet export unavailable')
+        def export_flatgeobuf(self, analysis_data, target=None, properties=None): raise RuntimeError('FlatGeobuf export unavailable')
+        
         def generate_area_analysis(self, nasa_api): 
             return {
                 'old_bhopal': {
@@ -67,7 +136,7 @@ except ImportError as e:
         def generate_interactive_map(self, data): return "<div>Map placeholder</div>"
         def generate_radar_chart_comparison(self, data): return "<div>Chart placeholder - Radar</div>"
         def generate_correlation_matrix(self, data): return "<div>Chart placeholder - Correlation</div>"
-        def generate_trend_analysis(self, data): return "<div>Chart placeholder - Trend</div>"
+        def generate_trend_analysis(self, data, trends=None): return "<div>Chart placeholder - Trend</div>"
         def generate_radar_chart(self, data): return "<div>Chart placeholder - Radar Single</div>"
         def generate_energy_breakdown_chart(self, data): return "<div>Chart placeholder - Energy</div>"
         def generate_transportation_chart(self, data): return "<div>Chart placeholder - Transport</div>"
@@ -77,6 +146,97 @@ except ImportError as e:
         def generate_benchmark_comparison_chart(self, data, all_data): return "<div>Chart placeholder - Benchmark</div>"
         def generate_heat_map(self, data, metric): return "<div>Heatmap placeholder</div>"
         def generate_cesium_map(self, data): return "<div>3D Map placeholder</div>"
+    
+    def get_breaker_states(): return {}
+    def get_response_caches(): return {}
+    def get_single_flights(): return {}
+    def get_memos(): return {}
+    
+    class SnapshotScheduler:
+        """Builds one snapshot inline on first use and keeps serving it"""
+        def __init__(self, build_fn, interval, store=None):
+            self.build_fn = build_fn
+            self.snapshot = None
+        def current(self):
+            if self.snapshot is None:
+                self.snapshot = SimpleNamespace(version=1, **self.build_fn())
+            return self.snapshot
+        def refresh(self): pass
+        def get_stats(self): return {}
+    
+    SharedSnapshotStore = None
+    
+    class SimulationEngine:
+        """Mid-range area details in place of the seeded simulation"""
+        def __init__(self, seed=None, date=None): pass
+        def area_details(self, lats, lons):
+            ranges = {
+                'cloud_cover': (5, 20), 'forest_cover': (15, 60), 'agricultural_land': (10, 40), 'green_spaces': (5, 25),
+                'built_up_area': (30, 85), 'road_density': (5, 20), 'building_height_avg': (8, 25),
+                'air_quality_index': (50, 150), 'water_quality_index': (60, 95), 'noise_pollution': (45, 80),
+                'carbon_sequestration': (50, 200), 'public_transport_coverage': (40, 90), 'renewable_energy_capacity': (5, 25),
+                'waste_management_efficiency': (50, 95), 'water_supply_coverage': (70, 98)
+            }
+            return {name: np.full(len(lats), (low + high) // 2) for name, (low, high) in ranges.items()}
+    
+    class FallbackAreas(dict):
+        def mappings(self): return {}
+    
+    def get_city(key=None): return SimpleNamespace(key='bhopal', areas_file=None, bounds={})
+    def get_area_registry(areas_file): return FallbackAreas()
+
+# Optional feature modules: their routes answer with an error when a module is missing
+try:
+    from utils.geo_export import iter_geojson, write_geoparquet, write_flatgeobuf
+except ImportError as e:
+    print(f"⚠️ geo_export not available: {e}")
+    def iter_geojson(analysis_data, properties=None): raise RuntimeError('GeoJSON export unavailable')
+    def write_geoparquet(analysis_data, target=None, properties=None): raise RuntimeError('GeoParquet export unavailable')
+    def write_flatgeobuf(analysis_data, target=None, properties=None): raise RuntimeError('FlatGeobuf export unavailable')
+
+try:
+    from utils.history import HistoryStore, get_history_stores
+    from utils.raster import ScoreRaster
+except ImportError as e:
+    print(f"⚠️ history/raster not available: {e}")
+    HistoryStore = None
+    ScoreRaster = None
+    def get_history_stores(): return {}
+
+try:
+    from utils.landsat import INDEX_NAMES, get_scene_indices
+    from utils.zonal import get_zonal_engines, get_zonal_stats
+except ImportError as e:
+    print(f"⚠️ zonal statistics not available: {e}")
+    INDEX_NAMES = ()
+    def get_scene_indices(): return None
+    def get_zonal_engines(): return {}
+    def get_zonal_stats(registry): raise RuntimeError('Zonal statistics unavailable')
+
+try:
+    from utils.tiles import TILE_LAYERS, get_tile_server
+except ImportError as e:
+    print(f"⚠️ map tiles not available: {e}")
+    TILE_LAYERS = {}
+    class FallbackTileServer:
+        def tile(self, raster, layer, z, x, y): raise RuntimeError('Map tiles unavailable')
+        def publish(self, raster): pass
+        def get_stats(self): return {}
+    def get_tile_server(): return FallbackTileServer()
+
+try:
+    from utils.firms import get_fire_stores
+except ImportError as e:
+    print(f"⚠️ FIRMS store not available: {e}")
+    def get_fire_stores(): return {}
+
+try:
+    from utils.land_cover import IGBP_CLASSES, find_land_cover_file, get_land_cover_breakdown, get_land_cover_breakdowns, grid_class_fractions
+except ImportError as e:
+    print(f"⚠️ land cover breakdown not available: {e}")
+    IGBP_CLASSES = {}
+    def find_land_cover_file(): return None
+    def get_land_cover_breakdowns(): return {}
 
 # Solution imports with comprehensive error handling
 SOLUTION_MODULES = {}
@@ -193,109 +353,73 @@ def fallback_urban_recommendations(data):
 app = Flask(__name__)
 
 # Enhanced area mappings with detailed information
-AREA_MAPPINGS = {
-    'old_bhopal': {
-        'name': 'Old Bhopal Heritage',
-        'description': 'Historic city center with traditional architecture and cultural significance',
-        'type': 'Heritage & Commercial',
-        'coordinates': [23.2599, 77.4126]
-    },
-    'new_bhopal': {
-        'name': 'New Bhopal Development',
-        'description': 'Modern planned areas with contemporary infrastructure',
-        'type': 'Residential & Commercial',
-        'coordinates': [23.2278, 77.4357]
-    },
-    'shahpura': {
-        'name': 'Shahpura Sector',
-        'description': 'Mixed residential and commercial sector with good connectivity',
-        'type': 'Mixed Use',
-        'coordinates': [23.3000, 77.3667]
-    },
-    'kolar': {
-        'name': 'Kolar Residential Zone',
-        'description': 'Suburban residential area with growing infrastructure',
-        'type': 'Residential',
-        'coordinates': [23.1667, 77.4333]
-    },
-    'indrapuri': {
-        'name': 'Indrapuri Housing',
-        'description': 'Planned residential colony with green spaces',
-        'type': 'Residential',
-        'coordinates': [23.2800, 77.4200]
-    },
-    'bhopal_lake': {
-        'name': 'Bhopal Lake Area',
-        'description': 'Areas surrounding Upper and Lower Lakes, focus on environmental conservation',
-        'type': 'Environmental & Recreational',
-        'coordinates': [23.2667, 77.4000]
-    },
-    'industrial_area': {
-        'name': 'Industrial Zone',
-        'description': 'Manufacturing and industrial activities area',
-        'type': 'Industrial',
-        'coordinates': [23.2000, 77.4500]
-    }
-}
+AREA_MAPPINGS = get_area_registry(get_city().areas_file).mappings()
 
-def get_enhanced_sample_data():
-    """Generate enhanced sample data with comprehensive satellite information"""
-    nasa_api = NASAAPI()
-    processor = BhopalDataProcessor()
-    base_data = processor.generate_area_analysis(nasa_api)
-    
-    # Enhance the data with detailed satellite information
-    enhanced_data = {}
+def format_change(trend, metric, unit, relative=False):
+    """Signed change of a metric from the first to the latest stored period, or 'n/a'"""
+    values = (trend or {}).get(metric) or {}
+    first, latest = values.get('first'), values.get('latest')
+    if first is None or latest is None or (relative and not first):
+        return 'n/a'
+    change = (latest - first) / abs(first) * 100 if relative else latest - first
+    return f"{change:+.1f}{unit}"
+
+def enhance_area_data(area_key, area_data, trend=None, simulation_date=None):
+    """Add detailed satellite, urban and environmental information to one area's analysis.
     
-    for area_key, area_data in base_data.items():
-        coords = AREA_MAPPINGS.get(area_key, {}).get('coordinates', [23.2599, 77.4126])
-        enhanced_data[area_key] = {
-            **area_data,
-            'latitude': coords[0],
-            'longitude': coords[1],
-            # Enhanced satellite data
-            'satellite_imagery': {
-                'landsat_acquisition_date': '2024-01-15',
-                'modis_acquisition_date': '2024-01-16',
-                'resolution': '30m (Landsat) / 250m (MODIS)',
-                'cloud_cover': f"{np.random.randint(5, 20)}%",
-                'data_quality': 'Excellent'
-            },
-            'detailed_vegetation': {
-                'ndvi_mean': area_data.get('vegetation_index', 0.5),
-                'ndvi_std': 0.15,
-                'vegetation_health': area_data.get('vegetation_health', 'Moderate'),
-                'forest_cover': f"{np.random.randint(15, 60)}%",
-                'agricultural_land': f"{np.random.randint(10, 40)}%",
-                'green_spaces': f"{np.random.randint(5, 25)}%"
-            },
-            'urban_analysis': {
-                'built_up_area': f"{np.random.randint(30, 85)}%",
-                'population_density': area_data.get('population_density', 1000),
-                'road_density': f"{np.random.randint(5, 20)} km/km²",
-                'building_height_avg': f"{np.random.randint(8, 25)}m"
-            },
-            'environmental_metrics': {
-                'air_quality_index': np.random.randint(50, 150),
-                'water_quality_index': np.random.randint(60, 95),
-                'noise_pollution': f"{np.random.randint(45, 80)} dB",
-                'carbon_sequestration': f"{np.random.randint(50, 200)} tons/year"
-            },
-            'infrastructure_metrics': {
-                'public_transport_coverage': f"{np.random.randint(40, 90)}%",
-                'renewable_energy_capacity': f"{np.random.randint(5, 25)} MW",
-                'waste_management_efficiency': f"{np.random.randint(50, 95)}%",
-                'water_supply_coverage': f"{np.random.randint(70, 98)}%"
-            },
-            'historical_trends': {
-                'vegetation_change_5yr': f"+{np.random.randint(1, 10)}%",
-                'urbanization_growth_5yr': f"+{np.random.randint(5, 20)}%",
-                'temperature_change_5yr': f"+{np.random.uniform(0.5, 2.1):.1f}°C",
-                'sustainability_improvement': f"+{np.random.randint(5, 25)}%"
-            }
+    The simulated details are seeded draws at the area's coordinates for the
+    snapshot's simulation date, so every request and worker sees the same values.
+    """
+    coords = AREA_MAPPINGS.get(area_key, {}).get('coordinates', [23.2599, 77.4126])
+    details = {name: int(values[0]) for name, values in SimulationEngine(date=simulation_date).area_details([coords[0]], [coords[1]]).items()}
+    return {
+        **area_data,
+        'latitude': coords[0],
+        'longitude': coords[1],
+        # Enhanced satellite data
+        'satellite_imagery': {
+            'landsat_acquisition_date': '2024-01-15',
+            'modis_acquisition_date': '2024-01-16',
+            'resolution': '30m (Landsat) / 250m (MODIS)',
+            'cloud_cover': f"{details['cloud_cover']}%",
+            'data_quality': 'Excellent'
+        },
+        'detailed_vegetation': {
+            'ndvi_mean': area_data.get('vegetation_index', 0.5),
+            'ndvi_std': 0.15,
+            'vegetation_health': area_data.get('vegetation_health', 'Moderate'),
+            'forest_cover': f"{details['forest_cover']}%",
+            'agricultural_land': f"{details['agricultural_land']}%",
+            'green_spaces': f"{details['green_spaces']}%"
+        },
+        'urban_analysis': {
+            'built_up_area': f"{details['built_up_area']}%",
+            'population_density': area_data.get('population_density', 1000),
+            'road_density': f"{details['road_density']} km/km²",
+            'building_height_avg': f"{details['building_height_avg']}m"
+        },
+        'environmental_metrics': {
+            'air_quality_index': details['air_quality_index'],
+            'water_quality_index': details['water_quality_index'],
+            'noise_pollution': f"{details['noise_pollution']} dB",
+            'carbon_sequestration': f"{details['carbon_sequestration']} tons/year"
+        },
+        'infrastructure_metrics': {
+            'public_transport_coverage': f"{details['public_transport_coverage']}%",
+            'renewable_energy_capacity': f"{details['renewable_energy_capacity']} MW",
+            'waste_management_efficiency': f"{details['waste_management_efficiency']}%",
+            'water_supply_coverage': f"{details['water_supply_coverage']}%"
+        },
+        'historical_trends': {
+            'period_start': (trend or {}).get('start'),
+            'period_end': (trend or {}).get('end'),
+            'vegetation_change': format_change(trend, 'vegetation_index', '%', relative=True),
+            'urbanization_growth': format_change(trend, 'urbanization_index', '%', relative=True),
+            'temperature_change': format_change(trend, 'temperature', '°C'),
+            'sustainability_improvement': format_change(trend, 'sustainability_score', '%', relative=True),
+            'sustainability_slope_per_year': ((trend or {}).get('sustainability_score') or {}).get('slope_per_year')
         }
-    
-    return enhanced_data
+    }
 
 def analysis_data_to_dataframe(analysis_data):
     """Convert analysis data dictionary to pandas DataFrame for correlation matrix"""
@@ -339,35 +463,174 @@ def get_solution_data(solution_type, analysis_data):
     }
     return fallbacks.get(solution_type, lambda x: {})(analysis_data)
 
+# Chart payloads built for every snapshot, by name
+CHART_BUILDERS = {
+    'sustainability': 'generate_sustainability_chart',
+    'comparison': 'generate_comparison_chart',
+    'satellite_analysis': 'generate_satellite_analysis_chart',
+    'vegetation_analysis': 'generate_vegetation_analysis_chart',
+    'satellite_comparison': 'generate_satellite_data_comparison',
+    'radar_comparison': 'generate_radar_chart_comparison',
+    'interactive_map': 'generate_interactive_map',
+    'trend_analysis': 'generate_trend_analysis'
+}
+
+# Graph inputs of each chart beyond the enhanced analysis
+CHART_INPUTS = {
+    'trend_analysis': ['enhanced_analysis', 'history_trends']
+}
+
+def summarize_analysis(analysis_data):
+    total_areas = len(analysis_data)
+    return {
+        'total_areas': total_areas,
+        'avg_sustainability': round(sum(data['sustainability_score'] for data in analysis_data.values()) / total_areas, 1),
+        'best_area': max(analysis_data.values(), key=lambda x: x['sustainability_score']),
+        'worst_area': min(analysis_data.values(), key=lambda x: x['sustainability_score'])
+    }
+
+def build_snapshot_graph(processor):
+    """Dependency graph from fetched sources through area metrics to solutions, charts and summary"""
+    graph = processor.build_analysis_graph()
+    visualizer = DataVisualizerPlotly()
+    
+    for area_key in processor.areas:
+        graph.add_node(
+            f'{area_key}/enhanced',
+            lambda area_data, trends, simulation_date, area_key=area_key: enhance_area_data(area_key, area_data, trends.get(area_key), simulation_date),
+            [f'{area_key}/result', 'history_trends', 'simulation_date']
+        )
+    area_keys = list(processor.areas)
+    graph.add_node('enhanced_analysis', lambda *areas: dict(zip(area_keys, areas)), [f'{area_key}/enhanced' for area_key in area_keys])
+    
+    for solution_type in SOLUTION_MODULES:
+        graph.add_node(f'solutions/{solution_type}', lambda data, solution_type=solution_type: get_solution_data(solution_type, data), ['enhanced_analysis'])
+    for name, method in CHART_BUILDERS.items():
+        graph.add_node(f'charts/{name}', getattr(visualizer, method), CHART_INPUTS.get(name, ['enhanced_analysis']))
+    graph.add_node('summary', summarize_analysis, ['enhanced_analysis'])
+    return graph
+
+snapshot_processor = None
+analysis_graph = None
+# Guards creating and feeding this worker's analysis graph; graph_build_id is
+# the build whose inputs it holds
+graph_lock = threading.Lock()
+graph_build_id = None
+# History periods still to score after the previous build, to tell whether backfill is progressing
+history_pending = None
+
+def _ensure_analysis_graph():
+    global snapshot_processor, analysis_graph
+    if analysis_graph is None:
+        snapshot_processor = BhopalDataProcessor()
+        analysis_graph = build_snapshot_graph(snapshot_processor)
+    return analysis_graph
+
+def build_analysis_snapshot():
+    """Build analysis data, solutions, chart payloads and summary stats for one snapshot.
+    
+    Sources are refetched every time, but only the areas and outputs whose
+    inputs changed since the previous snapshot are recomputed. The sources,
+    history, simulation date and raster directory travel with the snapshot, so
+    workers that adopt it can feed their own graph and serve the same raster.
+    
+    History is backfilled a few periods per build, and not at all while this
+    worker has no snapshot to serve, so the first build (which a request may
+    be waiting on) never fetches months of POWER data. While backfill makes
+    progress the scheduler is asked to build again straight away.
+    """
+    global graph_build_id, history_pending
+    with graph_lock:
+        _ensure_analysis_graph()
+    
+    area_sources = snapshot_processor.fetch_area_sources(NASAAPI())
+    history_dates = snapshot_processor.history_dates()
+    history = snapshot_processor.analyze_history(
+        lambda date: NASAAPI(simulation_date=date, power_window=snapshot_processor.history_window(date)),
+        history_dates,
+        limit=NASAConfig.HISTORY_BACKFILL_PER_BUILD if snapshot_scheduler.snapshot is not None else 0
+    )
+    pending = len(history.missing(history_dates))
+    if pending and (history_pending is None or pending < history_pending):
+        snapshot_scheduler.refresh()
+    history_pending = pending
+    history_trends = history.trend_summary()
+    simulation_date = datetime.now().date().isoformat()
+    solution_nodes = {solution_type: f'solutions/{solution_type}' for solution_type in SOLUTION_MODULES}
+    chart_nodes = {name: f'charts/{name}' for name in CHART_BUILDERS}
+    
+    with graph_lock:
+        changed = snapshot_processor.update_analysis_graph(analysis_graph, area_sources, {'history_trends': history_trends, 'simulation_date': simulation_date})
+        print(f"Analysis graph: {len(changed)} changed inputs")
+        # One locked read, so every part comes from the same inputs
+        values = analysis_graph.get_many(['enhanced_analysis', 'summary', 'raster', *solution_nodes.values(), *chart_nodes.values()])
+        graph_build_id = uuid.uuid4().hex
+    
+    if values['raster'] is not None:
+        # Tile overviews are written next to the raster, so workers adopting this snapshot only load them
+        get_tile_server().publish(values['raster'])
+    
+    return {
+        'build_id': graph_build_id,
+        'data': values['enhanced_analysis'],
+        'solutions': {solution_type: values[node] for solution_type, node in solution_nodes.items()},
+        'charts': {name: values[node] for name, node in chart_nodes.items()},
+        'summary': values['summary'],
+        'sources': area_sources,
+        'history_trends': history_trends,
+        'simulation_date': simulation_date,
+        'history': history.export(),
+        'raster': values['raster'].directory if values['raster'] is not None else None
+    }
+
+def snapshot_graph(snapshot):
+    """This worker's analysis graph holding a snapshot's inputs, built and fed on first use"""
+    global graph_build_id
+    with graph_lock:
+        graph = _ensure_analysis_graph()
+        if graph_build_id != snapshot.build_id:
+            snapshot_processor.update_analysis_graph(graph, snapshot.sources, {'history_trends': snapshot.history_trends, 'simulation_date': snapshot.simulation_date})
+            graph_build_id = snapshot.build_id
+        return graph
+
+_served_raster = None
+
+def snapshot_raster(snapshot):
+    """The ScoreRaster rendered for a snapshot, reopened (and published to the tile server) when the snapshot changes"""
+    global _served_raster
+    if snapshot.raster is None or ScoreRaster is None:
+        raise RuntimeError('No raster was rendered for this snapshot')
+    raster = _served_raster
+    if raster is None or raster.directory != snapshot.raster:
+        raster = ScoreRaster.open(snapshot.raster)
+        get_tile_server().publish(raster)
+        _served_raster = raster
+    return raster
+
+# Routes read the latest snapshot; the pipeline runs on the scheduler thread of
+# whichever worker holds the shared build lock, and every worker maps its output
+snapshot_scheduler = SnapshotScheduler(
+    build_analysis_snapshot,
+    interval=int(os.environ.get('SNAPSHOT_INTERVAL', 300)),
+    store=SharedSnapshotStore() if NASAConfig.SNAPSHOT_SHARED else None
+)
+
 # Route definitions
 @app.route('/')
 def index():
     """Homepage with overview and key metrics"""
     try:
-        nasa_api = NASAAPI()
-        processor = BhopalDataProcessor()
-        visualizer = DataVisualizerPlotly()
-        
-        # Get enhanced sample data for homepage
-        analysis_data = get_enhanced_sample_data()
-        
-        # Generate a simple chart for homepage
-        sustainability_chart = visualizer.generate_sustainability_chart(analysis_data)
-        
-        # Calculate overall statistics
-        total_areas = len(analysis_data)
-        avg_sustainability = sum(data['sustainability_score'] for data in analysis_data.values()) / total_areas
-        best_area = max(analysis_data.values(), key=lambda x: x['sustainability_score'])
-        worst_area = min(analysis_data.values(), key=lambda x: x['sustainability_score'])
+        snapshot = snapshot_scheduler.current()
+        summary = snapshot.summary
         
         return render_template('index.html', 
-                             data=analysis_data, 
+                             data=snapshot.data, 
                              area_mappings=AREA_MAPPINGS,
-                             sustainability_chart=sustainability_chart,
-                             total_areas=total_areas,
-                             avg_sustainability=round(avg_sustainability, 1),
-                             best_area=best_area,
-                             worst_area=worst_area)
+                             sustainability_chart=snapshot.charts['sustainability'],
+                             total_areas=summary['total_areas'],
+                             avg_sustainability=summary['avg_sustainability'],
+                             best_area=summary['best_area'],
+                             worst_area=summary['worst_area'])
     except Exception as e:
         return f"Error loading homepage: {str(e)}", 500
 
@@ -380,6 +643,214 @@ def solutions_page():
 # Keep all your existing routes (dashboard, analysis, satellite, etc.) as they are
 # ... [ALL YOUR EXISTING ROUTES REMAIN THE SAME] ...
 
+@app.route('/api/diagnostics')
+def diagnostics():
+    """Circuit breaker state, latency histograms, cache and coalescing counters"""
+    try:
+        return jsonify({
+            'generated_at': datetime.now().isoformat(),
+            'circuit_breakers': get_breaker_states(),
+            'response_caches': {name: cache.get_stats() for name, cache in get_response_caches().items()},
+            'single_flight': {name: flight.get_stats() for name, flight in get_single_flights().items()},
+            'memo': {name: memo.get_stats() for name, memo in get_memos().items()},
+            'history': {name: store.get_stats() for name, store in get_history_stores().items()},
+            'zonal': {name: engine.get_stats() for name, engine in get_zonal_engines().items()},
+            'tiles': get_tile_server().get_stats(),
+            'firms': {name: store.get_stats() for name, store in get_fire_stores().items()},
+            'land_cover': {name: breakdown.get_stats() for name, breakdown in get_land_cover_breakdowns().items()},
+            'snapshot': snapshot_scheduler.get_stats(),
+            'analysis_graph': analysis_graph.get_stats() if analysis_graph is not None else {}
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/diagnostics/graph-trace')
+def graph_trace():
+    """Hit/recompute trace of the analysis dependency graph (?clear=1 resets it)"""
+    try:
+        graph = snapshot_graph(snapshot_scheduler.current())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 503
+    clear = request.args.get('clear', '0') == '1'
+    return jsonify({'stats': graph.get_stats(), 'trace': graph.get_trace(clear=clear)})
+
+@app.route('/api/history')
+def history_series():
+    """Stored periods of one metric (?metric=sustainability_score) with rolling, YoY and slope aggregates"""
+    try:
+        snapshot = snapshot_scheduler.current()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 503
+    metric = request.args.get('metric', 'sustainability_score')
+    if HistoryStore is None:
+        return jsonify({'error': 'Analysis history unavailable'}), 501
+    store = HistoryStore.from_export('snapshot_history', snapshot.history)
+    if metric not in store.values:
+        return jsonify({'error': f'Unknown history metric: {metric}'}), 400
+    try:
+        window = int(request.args.get('window', NASAConfig.HISTORY_ROLLING_WINDOW))
+    except ValueError:
+        return jsonify({'error': 'window must be an integer number of periods'}), 400
+    if window < 1:
+        return jsonify({'error': 'window must be at least 1 period'}), 400
+    try:
+        dates, values = store.series(metric)
+        as_lists = lambda array: [[None if np.isnan(v) else round(float(v), 3) for v in row] for row in array.T]
+        return jsonify({
+            'metric': metric,
+            'dates': [str(date) for date in dates],
+            'areas': store.area_keys,
+            'values': as_lists(values),
+            'rolling_mean': as_lists(store.rolling_mean(metric, window)),
+            'yoy_change': as_lists(store.year_over_year(metric)),
+            'slope_per_year': [None if np.isnan(v) else round(float(v), 4) for v in store.slope(metric)]
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/raster')
+def raster_summary():
+    """Grid, location and statistics of the gridded score surfaces of the served snapshot"""
+    try:
+        snapshot = snapshot_scheduler.current()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 503
+    try:
+        return jsonify(snapshot_raster(snapshot).summary())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/zonal')
+def zonal_statistics():
+    """Per-area statistics of a raster score surface or Landsat index (?surface=ndvi&bins=10&percentiles=10,50,90)"""
+    try:
+        snapshot = snapshot_scheduler.current()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 503
+    surface = request.args.get('surface', 'sustainability_score')
+    try:
+        options = {'bins': int(request.args['bins']) if 'bins' in request.args else None}
+        if 'percentiles' in request.args:
+            options['percentiles'] = [float(q) for q in request.args['percentiles'].split(',') if q]
+        engine = get_zonal_stats(get_area_registry(get_city().areas_file))
+        if surface in INDEX_NAMES:
+            scene = get_scene_indices()
+            if scene is None:
+                return jsonify({'error': 'No Landsat scene configured (LANDSAT_SCENE_DIR)'}), 404
+            stats = engine.geotiff(scene.path(surface), **options)
+        else:
+            raster = snapshot_raster(snapshot)
+            if surface not in raster.surfaces:
+                return jsonify({'error': f'Unknown zonal surface: {surface}'}), 400
+            stats = engine.raster(raster, [surface], **options)[surface]
+        return jsonify({'surface': surface, 'areas': stats})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 501
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/fires')
+def fire_detections():
+    """FIRMS detections for the country, or within radius_km of an area (?area=kolar&radius_km=10&days=30)"""
+    area_key = request.args.get('area')
+    try:
+        days = int(request.args.get('days', 30))
+        api = NASAAPI()
+        if not area_key:
+            return jsonify(api.get_modis_fire_data(request.args.get('country', 'IND'), days))
+        registry = get_area_registry(get_city().areas_file)
+        if area_key not in registry:
+            return jsonify({'error': f'Unknown area: {area_key}'}), 404
+        radius_km = float(request.args.get('radius_km', NASAConfig.FIRMS_NEARBY_KM))
+        row = registry.position(area_key)
+        fires = api.get_fires_near(registry.columns['lat'][row], registry.columns['lon'][row], radius_km, days)
+        if fires is None:
+            return jsonify({'error': 'FIRMS detections unavailable (is FIRMS_MAP_KEY set?)'}), 501
+        return jsonify({'area': area_key, **fires})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/land-cover')
+def land_cover_breakdown():
+    """MCD12Q1 class fractions per area, or per cell of a grid over the city (?grid=20,20)"""
+    path = find_land_cover_file()
+    if not path:
+        return jsonify({'error': 'No MCD12Q1 raster configured (LAND_COVER_FILE or MODIS_DATA_DIR)'}), 404
+    city = get_city()
+    try:
+        if 'grid' in request.args:
+            rows, cols = (int(n) for n in request.args['grid'].split(','))
+            fractions = grid_class_fractions(path, city.bounds, rows, cols)
+            present = np.flatnonzero(np.nansum(fractions, axis=(0, 1)) > 0)
+            return jsonify({
+                'bounds': city.bounds,
+                'rows': rows,
+                'cols': cols,
+                'classes': {
+                    IGBP_CLASSES.get(int(code), f'Class {code}'): [
+                        [None if np.isnan(value) else round(float(value), 4) for value in row]
+                        for row in fractions[:, :, code]
+                    ]
+                    for code in present
+                }
+            })
+        registry = get_area_registry(city.areas_file)
+        return jsonify({'source': os.path.basename(path), 'areas': get_land_cover_breakdown(registry).areas(path, city.bounds)})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 501
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/tiles/<layer>/<int:z>/<int:x>/<int:y>.png')
+def map_tile(layer, z, x, y):
+    """XYZ PNG tile of a raster layer (sustainability, ndvi, lst) for the dashboard maps"""
+    if layer not in TILE_LAYERS or z > NASAConfig.TILE_MAX_ZOOM or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        return Response(status=404)
+    try:
+        snapshot = snapshot_scheduler.current()
+    except Exception:
+        return Response(status=503)
+    try:
+        payload = get_tile_server().tile(snapshot_raster(snapshot), layer, z, x, y)
+        return Response(payload, mimetype='image/png', headers={'Cache-Control': 'public, max-age=300'})
+    except Exception as e:
+        print(f"Error rendering tile {layer}/{z}/{x}/{y}: {e}")
+        return Response(status=500)
+
+@app.route('/api/export/<export_format>')
+def export_analysis(export_format):
+    """Area analysis as streamed GeoJSON, GeoParquet or FlatGeobuf (?properties=a,b projects columns)"""
+    properties = [name for name in request.args.get('properties', '').split(',') if name] or None
+    try:
+        data = snapshot_scheduler.current().data
+        if export_format == 'geojson':
+            chunks = iter_geojson(data, properties)
+            # Validate the projection before the response starts streaming
+            first = next(chunks)
+            next_chunk = next(chunks)
+            return Response(
+                itertools.chain([first, next_chunk], chunks),
+                mimetype='application/geo+json',
+                headers={'Content-Disposition': 'attachment; filename=bhopal_analysis.geojson'}
+            )
+        if export_format == 'geoparquet':
+            payload, mimetype, extension = write_geoparquet(data, properties=properties), 'application/vnd.apache.parquet', 'parquet'
+        elif export_format == 'flatgeobuf':
+            payload, mimetype, extension = write_flatgeobuf(data, properties=properties), 'application/octet-stream', 'fgb'
+        else:
+            return jsonify({'error': f'Unknown export format: {export_format}'}), 404
+        return send_file(io.BytesIO(payload), mimetype=mimetype, as_attachment=True, download_name=f'bhopal_analysis.{extension}')
+    except KeyError as e:
+        return jsonify({'error': e.args[0]}), 400
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 501
+
 # Error Handlers with better error messages
 @app.errorhandler(404)
 def not_found(error):
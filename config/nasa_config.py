@@ -3,6 +3,10 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+def _standin_apis(base_url, apis):
+    """Route every NASA endpoint to a local stand-in server at base_url/<api name>"""
+    return {name: f"{base_url.rstrip('/')}/{name}" for name in apis}
+
 class NASAConfig:
     NASA_API_KEY = os.getenv('NASA_API_KEY', 'DEMO_KEY')
     
@@ -11,11 +15,22 @@ class NASAConfig:
         'earth_imagery': 'https://api.nasa.gov/planetary/earth/imagery',
         'earth_assets': 'https://api.nasa.gov/planetary/earth/assets',
         'power': 'https://power.larc.nasa.gov/api/temporal/daily/point',
+        'power_regional': 'https://power.larc.nasa.gov/api/temporal/daily/regional',
         'modis': 'https://modis.ornl.gov/rst/api/v1',
         'landsat': 'https://landsatlook.usgs.gov/sat-api/collections/landsat-c2l2-sr/items',
         'firms': 'https://firms.modaps.eosdis.nasa.gov/api/area/country'
     }
     
+    # Local stand-in for offline benchmarking (python -m utils.nasa_standin serve)
+    STANDIN_URL = os.getenv('NASA_STANDIN_URL', '')
+    if STANDIN_URL:
+        APIS = _standin_apis(STANDIN_URL, APIS)
+    
+    # HTTP record/replay: '' (live), 'record' or 'replay'
+    RECORD_MODE = os.getenv('NASA_RECORD_MODE', '')
+    RECORD_DIR = os.getenv('NASA_RECORD_DIR', '')
+    REPLAY_LATENCY = os.getenv('NASA_REPLAY_LATENCY', 'false').lower() == 'true'
+    
     # MODIS Products
     MODIS_PRODUCTS = {
         'vegetation': 'MOD13Q1',  # Vegetation Indices
@@ -38,4 +53,121 @@ class NASAConfig:
         'south': 23.1000,
         'east': 77.6000,
         'west': 77.3000
-    }
\ No newline at end of file
+    }
+    
+    # Cities the processor can run for; CITIES_FILE adds or overrides entries from JSON
+    # ({"<city>": {"name": ..., "bounds": {...}, "areas_file": ...}}, relative paths next to the file)
+    DEFAULT_CITY = os.getenv('DEFAULT_CITY', 'bhopal')
+    CITIES_FILE = os.getenv('CITIES_FILE', '')
+    CITY_BATCH_PROCESSES = int(os.getenv('CITY_BATCH_PROCESSES', str(os.cpu_count() or 1)))
+    
+    # Concurrent per-area fetching: max in-flight calls per endpoint
+    CONCURRENT_FETCH = os.getenv('CONCURRENT_FETCH', 'true').lower() == 'true'
+    FETCH_MAX_WORKERS = int(os.getenv('FETCH_MAX_WORKERS', '16'))
+    FETCH_DEFAULT_CONCURRENCY = int(os.getenv('FETCH_DEFAULT_CONCURRENCY', '4'))
+    FETCH_CONCURRENCY = {
+        'power': int(os.getenv('POWER_CONCURRENCY', '2')),
+        'earth_imagery': int(os.getenv('EARTH_IMAGERY_CONCURRENCY', '4')),
+        'modis': int(os.getenv('MODIS_CONCURRENCY', '4')),
+        'landsat': int(os.getenv('LANDSAT_CONCURRENCY', '4')),
+        'firms': int(os.getenv('FIRMS_CONCURRENCY', '2')),
+        'simulation': int(os.getenv('SIMULATION_CONCURRENCY', '8'))
+    }
+    
+    # Study area registry: JSON keyed by area, GeoJSON FeatureCollection, CSV or Parquet
+    DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+    AREAS_FILE = os.getenv('AREAS_FILE', os.path.join(DATA_DIR, 'bhopal_areas.geojson'))
+    
+    # On-disk response cache (survives restarts, shared by all workers on the host)
+    CACHE_DIR = os.getenv('CACHE_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache'))
+    POWER_CACHE_TTL = int(os.getenv('POWER_CACHE_TTL', str(7 * 24 * 3600)))
+    POWER_CACHE_STALE_TTL = int(os.getenv('POWER_CACHE_STALE_TTL', str(30 * 24 * 3600)))
+    POWER_CACHE_MAX_BYTES = int(os.getenv('POWER_CACHE_MAX_BYTES', str(50 * 1024 * 1024)))
+    POWER_COORD_PRECISION = int(os.getenv('POWER_COORD_PRECISION', '2'))
+    # Parsed regional POWER grids kept in memory, one per request window (current plus history periods)
+    POWER_GRID_CACHE = int(os.getenv('POWER_GRID_CACHE', '8'))
+    
+    # NASA POWER daily request window
+    POWER_PARAMETERS = 'ALLSKY_SFC_SW_DWN,CLRSKY_SFC_SW_DWN,T2M'
+    POWER_START = os.getenv('POWER_START', '20230101')
+    POWER_END = os.getenv('POWER_END', '20231231')
+    
+    # 'point' makes one POWER request per area; 'regional' fetches one grid over
+    # BHOPAL_BOUNDS and interpolates every area from it
+    POWER_FETCH_MODE = os.getenv('POWER_FETCH_MODE', 'point')
+    POWER_REGIONAL_MIN_SPAN = float(os.getenv('POWER_REGIONAL_MIN_SPAN', '2.0'))
+    
+    # Circuit breaker and adaptive timeouts for NASA endpoints
+    BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', '3'))
+    BREAKER_COOLDOWN = float(os.getenv('BREAKER_COOLDOWN', '30'))
+    BREAKER_MAX_COOLDOWN = float(os.getenv('BREAKER_MAX_COOLDOWN', '600'))
+    LATENCY_WINDOW = int(os.getenv('LATENCY_WINDOW', '100'))
+    ADAPTIVE_TIMEOUT_MIN = float(os.getenv('ADAPTIVE_TIMEOUT_MIN', '2'))
+    ADAPTIVE_TIMEOUT_MAX = float(os.getenv('ADAPTIVE_TIMEOUT_MAX', '30'))
+    ADAPTIVE_TIMEOUT_MIN_SAMPLES = int(os.getenv('ADAPTIVE_TIMEOUT_MIN_SAMPLES', '5'))
+    ADAPTIVE_TIMEOUT_PERCENTILE = float(os.getenv('ADAPTIVE_TIMEOUT_PERCENTILE', '95'))
+    ADAPTIVE_TIMEOUT_MULTIPLIER = float(os.getenv('ADAPTIVE_TIMEOUT_MULTIPLIER', '2.0'))
+    
+    # Simulated sources: output is deterministic per (seed, date); batched for all areas
+    SIMULATION_SEED = int(os.getenv('SIMULATION_SEED', '42'))
+    SIMULATION_BATCH = os.getenv('SIMULATION_BATCH', 'true').lower() == 'true'
+    
+    # Per-area analysis results memoized on a hash of their inputs and scoring weights
+    MEMO_MAX_ENTRIES = int(os.getenv('MEMO_MAX_ENTRIES', '4096'))
+    MEMO_PERSIST = os.getenv('MEMO_PERSIST', 'false').lower() == 'true'
+    # Persisted memo entries are dropped after MEMO_DISK_MAX_AGE seconds or least recently used over MEMO_DISK_MAX_BYTES
+    MEMO_DISK_MAX_BYTES = int(os.getenv('MEMO_DISK_MAX_BYTES', str(256 * 1024 * 1024)))
+    MEMO_DISK_MAX_AGE = int(os.getenv('MEMO_DISK_MAX_AGE', str(7 * 24 * 3600)))
+    
+    # Gridded scoring over the city bounds; tiles bound the working memory of a render
+    RASTER_ROWS = int(os.getenv('RASTER_ROWS', '500'))
+    RASTER_COLS = int(os.getenv('RASTER_COLS', '500'))
+    RASTER_TILE_SIZE = int(os.getenv('RASTER_TILE_SIZE', '256'))
+    RASTER_IDW_POWER = float(os.getenv('RASTER_IDW_POWER', '2'))
+    # Largest pixel x area block an IDW pass holds at once (8 bytes each, a few arrays live)
+    RASTER_IDW_MAX_CELLS = int(os.getenv('RASTER_IDW_MAX_CELLS', str(2 * 1024 * 1024)))
+    # Renders kept under CACHE_DIR/raster; the least recently used are removed first
+    RASTER_CACHE_KEEP = int(os.getenv('RASTER_CACHE_KEEP', '4'))
+    
+    # Historical analysis: one period per month, the last HISTORY_PERIODS completed months
+    HISTORY_PERIODS = int(os.getenv('HISTORY_PERIODS', '24'))
+    HISTORY_ROLLING_WINDOW = int(os.getenv('HISTORY_ROLLING_WINDOW', '3'))
+    HISTORY_PERSIST = os.getenv('HISTORY_PERSIST', 'true').lower() == 'true'
+    # Periods scored per snapshot build; the first build of a worker scores none so it is served quickly
+    HISTORY_BACKFILL_PER_BUILD = int(os.getenv('HISTORY_BACKFILL_PER_BUILD', '3'))
+    
+    # Analysis snapshots published to one memory-mapped file shared by all workers on the host
+    SNAPSHOT_SHARED = os.getenv('SNAPSHOT_SHARED', 'true').lower() == 'true'
+    SNAPSHOT_DIR = os.getenv('SNAPSHOT_DIR', '')
+    SNAPSHOT_DECODE_CACHE = int(os.getenv('SNAPSHOT_DECODE_CACHE', '256'))
+    
+    # Local Landsat C2 L2 scene (directory of *_SR_B*.TIF); when set, Landsat indices come from it
+    LANDSAT_SCENE_DIR = os.getenv('LANDSAT_SCENE_DIR', '')
+    LANDSAT_WINDOW_SIZE = int(os.getenv('LANDSAT_WINDOW_SIZE', '1024'))
+    LANDSAT_SAMPLE_RADIUS = int(os.getenv('LANDSAT_SAMPLE_RADIUS', '1'))
+    
+    # Zonal statistics: areas without a polygon own the pixels nearest them within this many degrees
+    ZONAL_POINT_RADIUS = float(os.getenv('ZONAL_POINT_RADIUS', '0.02'))
+    ZONAL_MASK_CACHE = int(os.getenv('ZONAL_MASK_CACHE', '8'))
+    
+    # Local MODIS granules (MOD13Q1/MOD11A2 NetCDF or HDF5 with lat/lon coordinates); when set, MODIS data comes from them
+    MODIS_DATA_DIR = os.getenv('MODIS_DATA_DIR', '')
+    MODIS_TIME_CHUNK = int(os.getenv('MODIS_TIME_CHUNK', '8'))
+    
+    # XYZ map tiles of the raster layers: byte-bounded in-memory LRU plus a PNG cache under CACHE_DIR/tiles
+    TILE_CACHE_MAX_BYTES = int(os.getenv('TILE_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+    TILE_DISK_CACHE = os.getenv('TILE_DISK_CACHE', 'true').lower() == 'true'
+    TILE_MAX_ZOOM = int(os.getenv('TILE_MAX_ZOOM', '18'))
+    TILE_OPACITY = float(os.getenv('TILE_OPACITY', '0.7'))
+    
+    # FIRMS active fires: days are ingested into a columnar store indexed by (day, FIRMS_CELL_DEG cell)
+    FIRMS_MAP_KEY = os.getenv('FIRMS_MAP_KEY', '')
+    FIRMS_SOURCE = os.getenv('FIRMS_SOURCE', 'MODIS_NRT')
+    FIRMS_CELL_DEG = float(os.getenv('FIRMS_CELL_DEG', '0.1'))
+    FIRMS_SETTLE_DAYS = int(os.getenv('FIRMS_SETTLE_DAYS', '1'))
+    FIRMS_MAX_DAYS = int(os.getenv('FIRMS_MAX_DAYS', '365'))
+    FIRMS_NEARBY_KM = float(os.getenv('FIRMS_NEARBY_KM', '10'))
+    FIRMS_REFRESH_SECONDS = float(os.getenv('FIRMS_REFRESH_SECONDS', '900'))
+    
+    # Local MCD12Q1 land-cover raster (GeoTIFF or NetCDF LC_Type1); defaults to the newest MCD12Q1 file in MODIS_DATA_DIR
+    LAND_COVER_FILE = os.getenv('LAND_COVER_FILE', '')
@@ -0,0 +1,16 @@
+import numpy as np
+import pytest
+from config.nasa_config import NASAConfig
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Keep every on-disk cache of a test under its own temporary directory"""
+    directory = tmp_path / 'cache'
+    monkeypatch.setattr(NASAConfig, 'CACHE_DIR', str(directory))
+    return directory
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(1234)
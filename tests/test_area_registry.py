@@ -0,0 +1,118 @@
+import json
+import os
+import numpy as np
+import pytest
+from config.nasa_config import NASAConfig
+from utils.area_registry import AreaRegistry
+
+# AREA_MAPPINGS as app.py hard-coded it before the registry
+BASELINE_MAPPINGS = {
+    'old_bhopal': ('Old Bhopal Heritage', 'Historic city center with traditional architecture and cultural significance', 'Heritage & Commercial', [23.2599, 77.4126]),
+    'new_bhopal': ('New Bhopal Development', 'Modern planned areas with contemporary infrastructure', 'Residential & Commercial', [23.2278, 77.4357]),
+    'shahpura': ('Shahpura Sector', 'Mixed residential and commercial sector with good connectivity', 'Mixed Use', [23.3000, 77.3667]),
+    'kolar': ('Kolar Residential Zone', 'Suburban residential area with growing infrastructure', 'Residential', [23.1667, 77.4333]),
+    'indrapuri': ('Indrapuri Housing', 'Planned residential colony with green spaces', 'Residential', [23.2800, 77.4200]),
+    'bhopal_lake': ('Bhopal Lake Area', 'Areas surrounding Upper and Lower Lakes, focus on environmental conservation', 'Environmental & Recreational', [23.2667, 77.4000]),
+    'industrial_area': ('Industrial Zone', 'Manufacturing and industrial activities area', 'Industrial', [23.2000, 77.4500])
+}
+
+# Two of the per-area dicts BhopalDataProcessor hard-coded before the registry
+BASELINE_AREAS = {
+    'old_bhopal': {
+        'name': 'Old Bhopal',
+        'lat': 23.2599, 'lon': 77.4126,
+        'type': 'Mixed Use', 'temperature': 35.8,
+        'population_density': 12000, 'green_cover': 15.0,
+        'pollution_index': 82,
+        'energy_consumption': {'grid_electricity': 72, 'solar_energy': 15, 'battery_storage': 8, 'generator_backup': 5},
+        'transportation': {'private_vehicles': 45, 'public_transport': 30, 'two_wheelers': 15, 'walking_cycling': 10},
+        'key_concerns': ['High density', 'Low green cover', 'Traffic congestion', 'Air pollution']
+    },
+    'industrial_area': {
+        'name': 'Industrial Area',
+        'lat': 23.2000, 'lon': 77.4500,
+        'type': 'Industrial', 'temperature': 37.5,
+        'population_density': 3800, 'green_cover': 12.5,
+        'pollution_index': 95,
+        'energy_consumption': {'grid_electricity': 80, 'solar_energy': 8, 'battery_storage': 5, 'generator_backup': 7},
+        'transportation': {'private_vehicles': 50, 'public_transport': 25, 'two_wheelers': 15, 'walking_cycling': 10},
+        'key_concerns': ['Severe pollution', 'Industrial waste', 'Worker safety']
+    }
+}
+
+
+@pytest.fixture
+def bundled():
+    return AreaRegistry.load(NASAConfig.AREAS_FILE)
+
+
+def test_bundled_areas_match_the_baseline_mappings(bundled):
+    assert list(bundled) == list(BASELINE_MAPPINGS)
+    expected = {
+        key: {'name': name, 'description': description, 'type': kind, 'coordinates': coordinates}
+        for key, (name, description, kind, coordinates) in BASELINE_MAPPINGS.items()
+    }
+    assert bundled.mappings() == expected
+
+
+@pytest.mark.parametrize('key', list(BASELINE_AREAS))
+def test_record_matches_the_baseline_area(bundled, key):
+    record = bundled.record(key)
+    assert {field: record[field] for field in BASELINE_AREAS[key]} == BASELINE_AREAS[key]
+    # Integer fields stay integers
+    assert isinstance(record['population_density'], int)
+    assert isinstance(record['temperature'], float)
+    assert bundled[key] == record
+
+
+def test_record_is_built_once_per_key(bundled):
+    assert bundled.record('kolar') is bundled.record('kolar')
+    assert bundled['kolar'] is bundled.record('kolar')
+    assert bundled.record('kolar') is not bundled.record('shahpura')
+
+
+def test_unknown_keys_raise_key_error(bundled):
+    with pytest.raises(KeyError):
+        bundled['atlantis']
+    with pytest.raises(KeyError):
+        bundled.position('atlantis')
+    assert 'atlantis' not in bundled
+    assert bundled.get('atlantis') is None
+
+
+def test_load_json_keyed_by_area(tmp_path):
+    path = tmp_path / 'areas.json'
+    path.write_text(json.dumps({
+        'north': {'name': 'North', 'latitude': 23.3, 'longitude': 77.4, 'population_density': 900, 'energy_consumption': {'solar_energy': 12}},
+        'south': {'name': 'South', 'lat': 23.1, 'lng': 77.5, 'population_density': 1200, 'key_concerns': ['Flooding']}
+    }))
+    registry = AreaRegistry.load(str(path))
+
+    assert list(registry) == ['north', 'south']
+    assert registry.source == str(path)
+    assert registry.coordinates() == [(23.3, 77.4), (23.1, 77.5)]
+    assert registry['north'] == {'name': 'North', 'lat': 23.3, 'lon': 77.4, 'population_density': 900, 'energy_consumption': {'solar_energy': 12}}
+    # Fields an area lacks are left out of its record, and NaN in its column
+    assert registry['south'] == {'name': 'South', 'lat': 23.1, 'lon': 77.5, 'population_density': 1200, 'key_concerns': ['Flooding']}
+    np.testing.assert_array_equal(registry.column('energy_consumption.solar_energy', default=0.0), [12.0, 0.0])
+
+
+def test_load_csv_with_and_without_a_key_column(tmp_path):
+    registry = AreaRegistry.load(os.path.join(NASAConfig.DATA_DIR, 'energy_resources.csv'))
+    assert registry['arera_colony'] == {'name': 'Arera Colony', 'lat': 23.2278, 'lon': 77.4357, 'solar_potential': 5.2, 'wind_potential': 2.1, 'biomass_potential': 3.5}
+    assert 'mp_nagar' in registry
+
+    path = tmp_path / 'wards.csv'
+    path.write_text('key,name,lat,lon,population_density,key_concerns\nw1,Ward 1,23.2,77.4,1500,Flooding;Traffic\nw2,Ward 2,23.3,77.5,800,\n')
+    wards = AreaRegistry.load(str(path))
+    assert list(wards) == ['w1', 'w2']
+    assert wards['w1'] == {'name': 'Ward 1', 'lat': 23.2, 'lon': 77.4, 'population_density': 1500, 'key_concerns': ['Flooding', 'Traffic']}
+    assert wards['w2']['key_concerns'] == []
+    assert wards.nearest_keys([23.29], [77.49]) == ['w2']
+
+
+def test_registry_rejects_missing_coordinates_and_duplicate_keys():
+    with pytest.raises(ValueError, match="'lat'"):
+        AreaRegistry.from_records({'a': {'name': 'A', 'lon': 77.4}})
+    with pytest.raises(ValueError, match='unique'):
+        AreaRegistry.from_records([('a', {'lat': 23.2, 'lon': 77.4}), ('a', {'lat': 23.3, 'lon': 77.5})])
@@ -0,0 +1,110 @@
+import threading
+import time
+import pytest
+from config.nasa_config import NASAConfig
+from utils import circuit_breaker
+from utils.circuit_breaker import CircuitBreaker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(circuit_breaker.time, 'time', lambda: now[0])
+    return now
+
+
+@pytest.fixture(autouse=True)
+def settings(monkeypatch):
+    monkeypatch.setattr(NASAConfig, 'BREAKER_FAILURE_THRESHOLD', 3)
+    monkeypatch.setattr(NASAConfig, 'BREAKER_COOLDOWN', 30)
+    monkeypatch.setattr(NASAConfig, 'BREAKER_MAX_COOLDOWN', 60)
+
+
+def test_opens_after_consecutive_failures_and_fails_fast(clock):
+    breaker = CircuitBreaker('test')
+    breaker.record_failure(0.1)
+    breaker.record_failure(0.1)
+    breaker.record_success(0.1)
+    breaker.record_failure(0.1)
+    breaker.record_failure(0.1)
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow_request()
+
+    breaker.record_failure(0.1)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    assert breaker.get_state()['counts']['rejected'] == 1
+    assert breaker.get_state()['counts']['opened'] == 1
+
+
+def test_half_open_trial_after_cooldown_closes_on_success(clock):
+    breaker = CircuitBreaker('test')
+    for _ in range(3):
+        breaker.record_failure()
+    clock[0] += 29
+    assert not breaker.allow_request()
+    clock[0] += 1
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Only the one trial call goes through
+    assert not breaker.allow_request()
+
+    breaker.record_success(0.2)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.consecutive_failures == 0 and breaker.opened_at is None
+
+
+def test_half_open_failure_reopens_immediately(clock):
+    breaker = CircuitBreaker('test')
+    for _ in range(3):
+        breaker.record_failure()
+    clock[0] += 30
+    assert breaker.allow_request()
+
+    clock[0] += 5
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.opened_at == clock[0]
+    assert breaker.get_state()['counts']['opened'] == 2
+
+
+def test_background_probe_closes_the_breaker(monkeypatch):
+    monkeypatch.setattr(NASAConfig, 'BREAKER_COOLDOWN', 0.01)
+    probed = threading.Event()
+
+    def probe(timeout):
+        probed.set()
+        return True
+
+    breaker = CircuitBreaker('test', probe=probe)
+    for _ in range(3):
+        breaker.record_failure()
+    # With a probe, callers never get a trial call of their own
+    assert not breaker.allow_request()
+    assert probed.wait(5)
+    for _ in range(500):
+        if breaker.state == CircuitBreaker.CLOSED:
+            break
+        time.sleep(0.01)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.get_state()['counts']['probes'] >= 1
+
+
+def test_timeout_adapts_to_latency_percentile(monkeypatch):
+    monkeypatch.setattr(NASAConfig, 'ADAPTIVE_TIMEOUT_MIN_SAMPLES', 5)
+    monkeypatch.setattr(NASAConfig, 'ADAPTIVE_TIMEOUT_PERCENTILE', 95)
+    monkeypatch.setattr(NASAConfig, 'ADAPTIVE_TIMEOUT_MULTIPLIER', 2.0)
+    monkeypatch.setattr(NASAConfig, 'ADAPTIVE_TIMEOUT_MIN', 1.0)
+    monkeypatch.setattr(NASAConfig, 'ADAPTIVE_TIMEOUT_MAX', 30.0)
+    monkeypatch.setattr(NASAConfig, 'LATENCY_WINDOW', 20)
+    breaker = CircuitBreaker('test')
+    assert breaker.timeout() == 30.0
+
+    for _ in range(20):
+        breaker.record_success(2.0)
+    assert breaker.timeout() == 4.0
+
+    for _ in range(20):
+        breaker.record_success(0.01)
+    # Only the latest LATENCY_WINDOW samples count
+    assert breaker.timeout() == 1.0
+    assert breaker.get_state()['histogram']['le_0.1'] == 20
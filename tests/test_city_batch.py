@@ -0,0 +1,84 @@
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import pytest
+import utils.city_batch as city_batch
+import utils.cities as cities
+from config.nasa_config import NASAConfig, _standin_apis
+from utils.nasa_standin import start_standin
+
+
+@pytest.fixture
+def standin():
+    server = start_standin()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def cities_file(tmp_path, monkeypatch):
+    """Two cities sharing the first areas of Bhopal, plus one whose areas file is missing"""
+    with open(NASAConfig.AREAS_FILE, 'r', encoding='utf-8') as f:
+        areas = json.load(f)
+    (tmp_path / 'mini_areas.json').write_text(json.dumps({key: areas[key] for key in ('old_bhopal', 'new_bhopal')}))
+
+    bounds = dict(NASAConfig.BHOPAL_BOUNDS)
+    path = tmp_path / 'cities.json'
+    path.write_text(json.dumps({
+        'mini': {'name': 'Mini', 'bounds': bounds, 'areas_file': 'mini_areas.json'},
+        'mini_copy': {'bounds': bounds, 'areas_file': 'mini_areas.json'},
+        'broken': {'bounds': bounds, 'areas_file': 'missing.geojson'}
+    }))
+    monkeypatch.setattr(NASAConfig, 'CITIES_FILE', str(path))
+    monkeypatch.setattr(cities, '_cities', None)
+    return path
+
+
+@pytest.fixture
+def spawned_pool(monkeypatch):
+    # Spawned workers start from a fresh interpreter, so they only see the
+    # caller's NASAConfig overrides if WORKER_CONFIG carries them
+    monkeypatch.setattr(city_batch, 'ProcessPoolExecutor', partial(ProcessPoolExecutor, mp_context=multiprocessing.get_context('spawn')))
+
+
+def test_run_cities_writes_snapshots_and_survives_a_failing_city(standin, cities_file, spawned_pool, tmp_path, monkeypatch):
+    monkeypatch.setattr(NASAConfig, 'APIS', _standin_apis(standin.base_url, NASAConfig.APIS))
+    output_dir = tmp_path / 'out'
+
+    report = city_batch.run_cities(['mini', 'broken', 'mini_copy'], processes=2, output_dir=str(output_dir))
+
+    assert report['processes'] == 2
+    assert report['completed'] == 2 and report['failed'] == 1
+    assert [result['city'] for result in report['cities']] == ['mini', 'broken', 'mini_copy']
+    assert 'missing.geojson' in report['cities'][1]['error']
+    # The workers fetched from the stand-in the caller configured, not the live APIs
+    assert standin.stats['power']['requests'] > 0
+
+    for city_key in ('mini', 'mini_copy'):
+        result = next(result for result in report['cities'] if result['city'] == city_key)
+        assert result['areas'] == 2
+        assert result['snapshot'] == str(output_dir / city_key)
+
+        analysis = json.loads((output_dir / city_key / 'analysis.json').read_text())
+        assert analysis['city']['key'] == city_key
+        assert sorted(analysis['areas']) == ['new_bhopal', 'old_bhopal']
+        assert all('sustainability_score' in area for area in analysis['areas'].values())
+
+        geojson = json.loads((output_dir / city_key / 'areas.geojson').read_text())
+        assert geojson['type'] == 'FeatureCollection'
+        assert len(geojson['features']) == 2
+    assert not (output_dir / 'broken' / 'analysis.json').exists()
+
+
+def test_worker_initializer_applies_the_caller_config(monkeypatch):
+    monkeypatch.setattr(NASAConfig, 'SIMULATION_SEED', NASAConfig.SIMULATION_SEED)
+    city_batch._init_worker({'SIMULATION_SEED': 987})
+    assert NASAConfig.SIMULATION_SEED == 987
+
+
+def test_run_cities_rejects_unknown_cities_before_starting_workers(cities_file, tmp_path):
+    with pytest.raises(KeyError, match='atlantis'):
+        city_batch.run_cities(['mini', 'atlantis'], processes=1, output_dir=str(tmp_path / 'out'))
+    assert not (tmp_path / 'out').exists()
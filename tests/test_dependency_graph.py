@@ -0,0 +1,98 @@
+import threading
+import pytest
+from utils.dependency_graph import DependencyGraph
+
+
+def _graph(calls):
+    graph = DependencyGraph('test')
+
+    def node(name, func):
+        def counted(*args):
+            calls.append(name)
+            return func(*args)
+        return counted
+
+    graph.add_node('sum', node('sum', lambda a, b: a + b), ['a', 'b'])
+    graph.add_node('sign', node('sign', lambda total: total >= 0), ['sum'])
+    graph.add_node('label', node('label', lambda positive: 'positive' if positive else 'negative'), ['sign'])
+    return graph
+
+
+def test_only_stale_nodes_recompute():
+    calls = []
+    graph = _graph(calls)
+    graph.set_inputs({'a': 1, 'b': 2})
+    assert graph.get('label') == 'positive'
+    assert calls == ['sum', 'sign', 'label']
+
+    calls.clear()
+    assert graph.get('label') == 'positive'
+    assert calls == []
+    assert graph.set_input('a', 1) is False
+    assert graph.get('label') == 'positive'
+    assert calls == []
+
+
+def test_unchanged_values_cut_off_the_recompute():
+    calls = []
+    graph = _graph(calls)
+    graph.set_inputs({'a': 1, 'b': 2})
+    graph.get('label')
+
+    calls.clear()
+    graph.set_input('a', 5)
+    assert graph.get('label') == 'positive'
+    # sign is still True, so label keeps its value without running
+    assert calls == ['sum', 'sign']
+    assert graph.get_stats()['cutoffs'] == 1
+
+    calls.clear()
+    graph.set_input('b', -20)
+    assert graph.get('label') == 'negative'
+    assert calls == ['sum', 'sign', 'label']
+
+
+def test_set_inputs_returns_changed_names_and_missing_inputs_raise():
+    graph = _graph([])
+    assert graph.set_inputs({'a': 1, 'b': 2}) == ['a', 'b']
+    assert graph.set_inputs({'a': 1, 'b': 3}) == ['b']
+    with pytest.raises(KeyError):
+        graph.get('unknown')
+    graph.add_node('needs_c', lambda c: c, ['c'])
+    with pytest.raises(KeyError):
+        graph.get('needs_c')
+
+
+def test_readers_never_see_half_applied_input_sets():
+    graph = DependencyGraph('test')
+    graph.add_node('pair', lambda a, b: (a, b), ['a', 'b'])
+    graph.set_inputs({'a': 0, 'b': 0})
+    torn = []
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            a, b = graph.get('pair')
+            if a != b:
+                torn.append((a, b))
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    for i in range(1, 2000):
+        graph.set_inputs({'a': i, 'b': i})
+    done.set()
+    reader.join()
+    assert torn == []
+
+
+def test_invalidate_forces_a_rerun_and_trace_records_it():
+    calls = []
+    graph = _graph(calls)
+    graph.set_inputs({'a': 1, 'b': 2})
+    graph.get('sum')
+    graph.get_trace(clear=True)
+
+    graph.invalidate('sum')
+    graph.get('sum')
+    assert calls == ['sum', 'sum']
+    assert [event['event'] for event in graph.get_trace()] == ['recompute']
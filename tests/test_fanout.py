@@ -0,0 +1,31 @@
+import threading
+import time
+from utils.fanout import AreaFanout, get_fanout
+
+
+def test_results_keep_task_order_and_endpoint_limits_hold():
+    fanout = AreaFanout({'slow': 2}, max_workers=8)
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def call(value):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return value
+
+    tasks = [(f'area{i}', f'source{j}', 'slow', call, (i * 10 + j,)) for i in range(4) for j in range(2)]
+    results, timings = fanout.run(tasks)
+
+    assert peak[0] <= 2
+    assert results == {f'area{i}': {f'source{j}': i * 10 + j for j in range(2)} for i in range(4)}
+    assert set(timings['areas']) == {f'area{i}' for i in range(4)}
+
+
+def test_one_fanout_per_limits():
+    assert get_fanout({'a': 1, 'b': 2}) is get_fanout({'b': 2, 'a': 1})
+    assert get_fanout({'a': 1}) is not get_fanout({'a': 2})
+    assert get_fanout() is get_fanout(None)
@@ -0,0 +1,43 @@
+import numpy as np
+from utils.firms import FIRE_COLUMNS, FireStore, haversine_km, parse_firms_csv, to_day
+
+CSV = """latitude,longitude,bright_ti4,acq_date,acq_time,confidence,frp,daynight
+23.25,77.41,330.1,2024-03-01,812,h,12.5,D
+23.30,77.50,310.0,2024-03-02,2015,l,3.0,N
+"""
+
+
+def test_parse_viirs_csv():
+    columns = parse_firms_csv(CSV)
+    assert set(columns) == set(FIRE_COLUMNS)
+    assert columns['confidence'].tolist() == [90, 30]
+    assert columns['daytime'].tolist() == [True, False]
+    assert columns['day'].tolist() == [to_day('2024-03-01'), to_day('2024-03-02')]
+    assert len(parse_firms_csv('latitude,longitude,acq_date,acq_time,frp\n')['lat']) == 0
+
+
+def test_radius_query_matches_brute_force(rng):
+    store = FireStore('test', cell_deg=0.25, persist=False)
+    n = 20000
+    days = rng.integers(to_day('2024-01-01'), to_day('2024-01-31'), n)
+    columns = {
+        'lat': rng.uniform(20.0, 26.0, n).astype(np.float32),
+        'lon': rng.uniform(74.0, 80.0, n).astype(np.float32),
+        'day': days.astype(np.int32),
+        'time': np.zeros(n, dtype=np.int16),
+        'frp': rng.uniform(0, 50, n).astype(np.float32),
+        'brightness': np.full(n, 300, dtype=np.float32),
+        'confidence': np.full(n, 80, dtype=np.uint8),
+        'daytime': np.ones(n, dtype=bool)
+    }
+    store.append(columns, np.unique(days))
+
+    start, end = to_day('2024-01-10'), to_day('2024-01-20')
+    rows, distances = store.query(23.25, 77.41, 75.0, start, end)
+
+    all_distances = haversine_km(23.25, 77.41, store.columns['lat'], store.columns['lon'])
+    in_days = (store.columns['day'] >= start) & (store.columns['day'] <= end)
+    expected = np.flatnonzero(in_days & (all_distances <= 75.0))
+    assert sorted(rows.tolist()) == expected.tolist()
+    np.testing.assert_allclose(distances, all_distances[rows])
+    assert store.summarize(rows, distances)['active_fires'] == len(expected)
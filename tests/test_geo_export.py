@@ -0,0 +1,79 @@
+import io
+import json
+import struct
+import numpy as np
+import pytest
+from utils import geo_export
+from utils.geo_export import EXPORT_PROPERTIES, iter_features, iter_geojson, point_wkb, write_geojson, write_geoparquet
+
+
+def _results(n):
+    return {
+        f'area_{i}': {
+            'name': f'Area {i}',
+            'type': 'residential',
+            'coordinates': {'lat': 23.0 + i * 1e-3, 'lon': 77.0 + i * 1e-3},
+            'sustainability_score': float('nan') if i % 7 == 0 else float(i),
+            'temperature': np.float32(30.5)
+        }
+        for i in range(n)
+    }
+
+
+@pytest.mark.parametrize('n', [0, 1, 999, 1000, 2501])
+def test_geojson_stream_is_one_valid_feature_collection(n):
+    results = _results(n)
+    collection = json.loads(''.join(iter_geojson(results, chunk_size=300)))
+
+    assert collection['type'] == 'FeatureCollection'
+    assert len(collection['features']) == n
+    for feature, result in zip(collection['features'], results.values()):
+        assert feature['geometry']['coordinates'] == [result['coordinates']['lon'], result['coordinates']['lat']]
+        properties = feature['properties']
+        assert list(properties) == list(EXPORT_PROPERTIES)
+        assert properties['area'] == result['name']
+        assert properties['sustainability_score'] == (None if np.isnan(result['sustainability_score']) else result['sustainability_score'])
+        assert properties['temperature'] == 30.5
+        assert properties['energy_index'] is None
+
+
+def test_columns_are_built_one_chunk_at_a_time():
+    chunks = list(geo_export._column_chunks(_results(250), ['area'], chunk_size=100))
+    assert [len(lons) for lons, _, _ in chunks] == [100, 100, 50]
+    assert chunks[2][2]['area'][0] == 'Area 200'
+
+
+def test_unknown_properties_fail_before_the_first_feature():
+    features = iter_features(_results(3), ['area', 'not_a_property'])
+    with pytest.raises(KeyError):
+        next(features)
+    with pytest.raises(KeyError):
+        next(iter_features({'lat': np.zeros(2), 'lon': np.zeros(2), 'value': np.ones(2)}, ['missing']))
+
+
+def test_tables_export_their_own_columns():
+    table = {'lat': np.array([23.0, 23.1]), 'lon': np.array([77.0, 77.1]), 'score': np.array([1.5, np.nan])}
+    target = io.StringIO()
+    write_geojson(table, target)
+    features = json.loads(target.getvalue())['features']
+    assert [feature['properties'] for feature in features] == [{'score': 1.5}, {'score': None}]
+    assert features[1]['geometry']['coordinates'] == [77.1, 23.1]
+
+
+def test_point_wkb_records():
+    buffer = point_wkb(np.array([77.0, -1.5]), np.array([23.0, 45.25]))
+    assert len(buffer) == 42
+    records = [struct.unpack('<BIdd', buffer[i:i + 21]) for i in (0, 21)]
+    assert records == [(1, 1, 77.0, 23.0), (1, 1, -1.5, 45.25)]
+
+
+def test_geoparquet_round_trip():
+    pq = pytest.importorskip('pyarrow.parquet')
+    data = write_geoparquet(_results(20), properties=['area', 'sustainability_score'])
+    table = pq.read_table(io.BytesIO(data))
+    geo = json.loads(table.schema.metadata[b'geo'])
+
+    assert table.column_names == ['area', 'sustainability_score', 'geometry']
+    assert geo['columns']['geometry']['encoding'] == 'WKB'
+    assert table.column('sustainability_score').null_count == 3
+    assert struct.unpack('<BIdd', table.column('geometry')[1].as_py()) == (1, 1, 77.001, 23.001)
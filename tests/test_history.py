@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+from utils.history import HistoryStore
+
+
+def _store(**kwargs):
+    return HistoryStore('test', persist=False, **kwargs)
+
+
+def _monthly(store, months, area_keys, value):
+    dates = [np.datetime64('2022-01') + np.timedelta64(m, 'M') for m in range(months)]
+    dates = [month.astype('datetime64[D]') for month in dates]
+    store.upsert_many(dates, area_keys, {'score': np.array([[value(m, a) for a in range(len(area_keys))] for m in range(months)])})
+    return dates
+
+
+def test_slope_is_per_year_and_ignores_missing_periods():
+    store = _store()
+    _monthly(store, 24, ['a', 'b'], lambda m, a: float(m) if a == 0 else (np.nan if m % 3 else 5.0))
+    slope = store.slope('score')
+    # 'a' rises one per month; 'b' is flat where present
+    assert slope[0] == pytest.approx(12.0, rel=2e-2)
+    assert slope[1] == pytest.approx(0.0, abs=1e-9)
+
+
+def test_year_over_year_and_rolling_mean():
+    store = _store()
+    _monthly(store, 14, ['a'], lambda m, a: float(m))
+    yoy = store.year_over_year('score')[:, 0]
+    assert np.isnan(yoy[:12]).all()
+    assert yoy[12:].tolist() == [12.0, 12.0]
+    assert store.rolling_mean('score', 3)[:, 0].tolist()[:4] == [0.0, 0.5, 1.0, 2.0]
+    assert store.rolling_mean('score', 1)[:, 0].tolist() == [float(m) for m in range(14)]
+    with pytest.raises(ValueError, match='at least 1'):
+        store.rolling_mean('score', 0)
+
+
+def test_upsert_replaces_a_period_and_adds_new_areas():
+    store = _store()
+    store.upsert('2024-01-01', ['a'], {'score': [1.0]})
+    store.upsert('2024-01-01', ['a', 'b'], {'score': [2.0, 3.0]})
+    store.upsert('2023-12-01', ['b'], {'score': [4.0]})
+    dates, values = store.series('score')
+    assert [str(d) for d in dates] == ['2023-12-01', '2024-01-01']
+    np.testing.assert_array_equal(values, [[np.nan, 4.0], [2.0, 3.0]])
+    assert store.missing(['2024-01-01', '2024-02-01']) == ['2024-02-01']
+
+
+def test_export_round_trip_and_persistence(cache_dir):
+    store = HistoryStore('test', fingerprint='v1', persist=True, cache_dir=str(cache_dir))
+    _monthly(store, 3, ['a', 'b'], lambda m, a: m + a)
+
+    copy = HistoryStore.from_export('copy', store.export())
+    assert copy.trend_summary() == store.trend_summary()
+    assert HistoryStore('test', fingerprint='v1', persist=True, cache_dir=str(cache_dir)).trend_summary() == store.trend_summary()
+    # A different fingerprint starts empty
+    assert len(HistoryStore('test', fingerprint='v2', persist=True, cache_dir=str(cache_dir))) == 0
+
+
+def test_incomplete_periods_are_reported_missing_until_rescored(cache_dir):
+    store = HistoryStore('test', persist=True, cache_dir=str(cache_dir))
+    store.upsert('2024-01-01', ['a'], {'score': [1.0]}, complete=False)
+    store.upsert('2024-02-01', ['a'], {'score': [2.0]})
+    assert store.missing(['2024-01-01', '2024-02-01']) == ['2024-01-01']
+    # Survives a restart and an export
+    assert HistoryStore('test', persist=True, cache_dir=str(cache_dir)).missing(['2024-01-01']) == ['2024-01-01']
+    assert HistoryStore.from_export('copy', store.export()).missing(['2024-01-01']) == ['2024-01-01']
+
+    store.upsert('2024-01-01', ['a'], {'score': [1.5]})
+    assert store.missing(['2024-01-01', '2024-02-01']) == []
+    assert store.get_stats()['incomplete_periods'] == 0
+
+
+def test_analyze_history_retries_periods_without_measured_power(rng, monkeypatch):
+    from tests.test_indices import _power_series, _processor, _random_area, _random_sources
+    areas = {f'area_{i}': _random_area(rng, f'Area {i}') for i in range(5)}
+    processor = _processor(areas)
+    sources = _random_sources(rng, areas)
+    power_up = {'2024-01-01': True, '2024-02-01': False, '2024-03-01': True}
+
+    def fetch(date):
+        kind = 'real' if power_up[date] else 'simulated'
+        return {key: dict(area_sources, solar_data=_power_series(rng, kind)) for key, area_sources in sources.items()}
+
+    monkeypatch.setattr(processor, 'fetch_area_sources', lambda date: fetch(date))
+    store = _store()
+    dates = list(power_up)
+
+    processor.analyze_history(lambda date: date, dates, store, limit=0)
+    assert len(store) == 0
+    processor.analyze_history(lambda date: date, dates, store, limit=2)
+    # Newest periods first
+    assert [str(d) for d in store.dates] == ['2024-02-01', '2024-03-01']
+    processor.analyze_history(lambda date: date, dates, store)
+    assert store.missing(dates) == ['2024-02-01']
+    assert np.isnan(store.series('energy_index', '2024-02-01', '2024-02-01')[1]).all()
+
+    power_up['2024-02-01'] = True
+    processor.analyze_history(lambda date: date, dates, store)
+    assert store.missing(dates) == []
+    assert np.isfinite(store.series('energy_index')[1]).all()
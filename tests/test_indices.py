@@ -0,0 +1,144 @@
+import numpy as np
+import pytest
+from utils.data_processing import CityDataProcessor
+from utils.dependency_graph import DependencyGraph
+from utils.memo import ContentMemo
+from utils.nasa_api import NASAAPI
+from utils.timeseries import PowerSeries
+
+N_AREAS = 300
+
+
+def _power_series(rng, kind):
+    dates = np.arange(np.datetime64('2023-01-01'), np.datetime64('2024-01-01'))
+    if kind == 'empty':
+        return PowerSeries(dates, {'ALLSKY_SFC_SW_DWN': np.full(len(dates), np.nan, dtype=np.float32)})
+    radiation = rng.uniform(2.0, 8.0, len(dates)).astype(np.float32)
+    radiation[rng.random(len(dates)) < 0.1] = np.nan
+    return PowerSeries(dates, {'ALLSKY_SFC_SW_DWN': radiation}, simulated=kind == 'simulated')
+
+
+def _random_area(rng, name):
+    area = {
+        'name': name,
+        'type': 'residential',
+        'lat': float(rng.uniform(23.1, 23.4)),
+        'lon': float(rng.uniform(77.2, 77.6)),
+        'population_density': int(rng.integers(1000, 20000)),
+        'key_concerns': [],
+        'transportation': {
+            'public_transport': float(rng.uniform(0, 100)),
+            'walking_cycling': float(rng.uniform(0, 100)),
+            'private_vehicles': float(rng.uniform(0, 100))
+        },
+        'energy_consumption': {
+            'solar_energy': float(rng.uniform(0, 60)),
+            'battery_storage': float(rng.uniform(0, 30)),
+            'grid_electricity': float(rng.uniform(0, 100)),
+            'generator_backup': float(rng.uniform(0, 30))
+        },
+        'pollution_index': float(rng.uniform(0, 100)),
+        'green_cover': float(rng.uniform(0, 60))
+    }
+    # Exercise the scalar defaults for missing fields
+    if rng.random() < 0.1:
+        del area['pollution_index']
+    if rng.random() < 0.1:
+        del area['transportation']['walking_cycling']
+    return area
+
+
+def _random_sources(rng, areas):
+    nasa_api = NASAAPI(simulation_seed=7)
+    simulated = nasa_api.get_simulated_sources_batch([(area['lat'], area['lon']) for area in areas.values()])
+    sources = {}
+    for row, area_key in enumerate(areas):
+        area_sources = {source: records[row] for source, records in simulated.items()}
+        if rng.random() < 0.5:
+            area_sources['air_quality'] = dict(
+                area_sources['air_quality'], simulated=False,
+                **{name: float(rng.uniform(0, 150)) for name in ('pm25', 'pm10', 'no2', 'so2')}
+            )
+        area_sources['solar_data'] = _power_series(rng, rng.choice(['real', 'real', 'simulated', 'empty']))
+        area_sources['satellite_img'] = f'https://example.invalid/{area_key}.png'
+        sources[area_key] = area_sources
+    return sources
+
+
+@pytest.fixture
+def areas(rng):
+    return {f'area_{i}': _random_area(rng, f'Area {i}') for i in range(N_AREAS)}
+
+
+@pytest.fixture
+def sources(rng, areas):
+    return _random_sources(rng, areas)
+
+
+def _processor(areas):
+    processor = CityDataProcessor(areas=areas)
+    processor.result_memo = ContentMemo('test_analysis', persist=False)
+    return processor
+
+
+def test_batch_indices_match_scalar_methods(areas, sources):
+    processor = _processor(areas)
+    batch = processor.calculate_indices_batch(processor.build_area_table(sources))
+
+    mismatches = []
+    for row, (area_key, area) in enumerate(areas.items()):
+        area_sources = sources[area_key]
+        transport = processor.calculate_transport_index(area)
+        pollution = processor.calculate_pollution_index(area, area_sources['air_quality'])
+        energy = processor.calculate_energy_index(area, area_sources['solar_data'])
+        score = processor.calculate_enhanced_sustainability_score(
+            transport, pollution, energy, area_sources['modis_vegetation'], area_sources['landsat_indices']
+        )
+        expected = {'transport_index': transport, 'pollution_index': pollution, 'energy_index': energy, 'sustainability_score': score}
+        mismatches += [(area_key, name) for name, value in expected.items() if batch[name][row] != value]
+
+    assert mismatches == []
+
+
+def test_analysis_graph_matches_generate_area_analysis(areas, sources, monkeypatch):
+    nasa_api = NASAAPI(simulation_seed=7)
+
+    direct = _processor(areas)
+    monkeypatch.setattr(direct, 'fetch_area_sources', lambda *args, **kwargs: sources)
+    expected = direct.generate_area_analysis(nasa_api)
+
+    processor = _processor(areas)
+    graph = processor.build_analysis_graph(DependencyGraph('test'))
+    processor.update_analysis_graph(graph, sources)
+
+    assert graph.get('analysis') == expected
+
+
+def test_analysis_graph_only_recomputes_changed_areas(areas, sources):
+    processor = _processor(areas)
+    graph = processor.build_analysis_graph(DependencyGraph('test'))
+    processor.update_analysis_graph(graph, sources)
+    before = graph.get('analysis')
+
+    changed = dict(sources)
+    area_key = next(iter(areas))
+    changed[area_key] = dict(sources[area_key], landsat_indices=dict(sources[area_key]['landsat_indices'], ndbi=0.9))
+    assert processor.update_analysis_graph(graph, changed) == [f'{area_key}/landsat_indices']
+
+    recomputes = graph.get_stats()['recomputes']
+    after = graph.get('analysis')
+    # sustainability_score, result and analysis for the one area
+    assert graph.get_stats()['recomputes'] - recomputes == 3
+    assert {key for key in areas if after[key] != before[key]} == {area_key}
+
+
+def test_memoized_results_are_not_shared(areas, sources, monkeypatch):
+    processor = _processor(areas)
+    monkeypatch.setattr(processor, 'fetch_area_sources', lambda *args, **kwargs: sources)
+    nasa_api = NASAAPI(simulation_seed=7)
+
+    first = processor.generate_area_analysis(nasa_api)
+    first['area_0']['sustainability_score'] = -1
+    second = processor.generate_area_analysis(nasa_api)
+
+    assert second['area_0']['sustainability_score'] != -1
@@ -0,0 +1,137 @@
+import numpy as np
+import pytest
+from config.nasa_config import NASAConfig
+from utils.area_registry import AreaRegistry
+from utils.land_cover import LC_FILL, N_CODES, LandCoverBreakdown, LandCoverRaster, class_histograms, find_land_cover_file, grid_class_fractions
+from utils.raster import RasterGrid
+from utils.zonal import rasterize_zones
+
+# 10 x 10 pixels of 0.1 degrees, split into a western and an eastern area
+BOUNDS = {'north': 1.0, 'south': 0.0, 'west': 0.0, 'east': 1.0}
+
+
+def _box(west, east):
+    return {'type': 'Polygon', 'coordinates': [[[west, 0.0], [east, 0.0], [east, 1.0], [west, 1.0], [west, 0.0]]]}
+
+
+@pytest.fixture
+def registry():
+    registry = AreaRegistry.from_records({
+        'west': {'lat': 0.5, 'lon': 0.25},
+        'east': {'lat': 0.5, 'lon': 0.75},
+        'far': {'lat': 5.0, 'lon': 5.0}
+    })
+    registry.geometries = {'west': _box(0.0, 0.5), 'east': _box(0.5, 1.0)}
+    return registry
+
+
+@pytest.fixture
+def codes():
+    """Croplands over built-up land in the west, water and an unknown code in the east"""
+    codes = np.full((10, 10), 17, dtype=np.uint8)
+    codes[:6, :5] = 12
+    codes[6:, :5] = 13
+    codes[0, 0] = LC_FILL
+    codes[:, 9] = 99
+    return codes
+
+
+@pytest.fixture
+def patched_read(monkeypatch, codes):
+    """LandCoverRaster.read returning the synthetic codes on a RasterGrid, counting reads"""
+    reads = []
+
+    def read(self, bounds):
+        reads.append(self.path)
+        return codes, RasterGrid(BOUNDS, 10, 10)
+
+    monkeypatch.setattr(LandCoverRaster, 'read', read)
+    return reads
+
+
+def test_class_histograms_count_classes_per_zone_without_fill(registry, codes):
+    masks = rasterize_zones(registry, RasterGrid(BOUNDS, 10, 10), radius=0.05)
+    histograms = class_histograms(masks, codes)
+
+    assert histograms.shape == (3, N_CODES)
+    assert {int(c): int(n) for c, n in enumerate(histograms[0]) if n} == {12: 29, 13: 20}
+    assert {int(c): int(n) for c, n in enumerate(histograms[1]) if n} == {17: 40, 99: 10}
+    assert histograms[2].sum() == 0
+
+
+def test_class_histograms_of_a_row_window_match_the_full_raster(registry, codes):
+    # The areas only cover the southern half of a taller grid
+    grid = RasterGrid({**BOUNDS, 'north': 2.0}, 20, 10)
+    masks = rasterize_zones(registry, grid, radius=0.05)
+    full = np.vstack([np.ones_like(codes), codes])
+    np.testing.assert_array_equal(class_histograms(masks, full[10:], row_offset=10), class_histograms(masks, full))
+
+
+def test_breakdown_reports_dominant_classes_and_fractions(registry, patched_read, tmp_path):
+    path = tmp_path / 'MCD12Q1.tif'
+    path.write_bytes(b'tif')
+    breakdown = LandCoverBreakdown(registry, cache_dir=str(tmp_path))
+
+    areas = breakdown.areas(str(path), BOUNDS)
+    assert areas['west'] == {
+        'pixels': 49, 'dominant_code': 12, 'dominant_type': 'Croplands', 'dominant_fraction': round(29 / 49, 4),
+        'fractions': {'Croplands': round(29 / 49, 4), 'Urban and Built-up': round(20 / 49, 4)}
+    }
+    assert areas['east']['dominant_type'] == 'Water Bodies'
+    assert list(areas['east']['fractions'].items()) == [('Water Bodies', 0.8), ('Class 99', 0.2)]
+    assert areas['far'] == {'pixels': 0, 'dominant_code': None, 'dominant_type': None, 'dominant_fraction': None, 'fractions': {}}
+
+    assert breakdown.areas(str(path), BOUNDS) is areas
+    other = LandCoverBreakdown(registry, cache_dir=str(tmp_path))
+    assert other.areas(str(path), BOUNDS) == areas
+    assert len(patched_read) == 1
+    assert breakdown.get_stats() == {'hits': 1, 'disk_hits': 0, 'computed': 1}
+    assert other.get_stats() == {'hits': 0, 'disk_hits': 1, 'computed': 0}
+
+    # A rewritten raster is a new version
+    path.write_bytes(b'tif, reprocessed')
+    breakdown.areas(str(path), BOUNDS)
+    assert len(patched_read) == 2
+
+
+def test_grid_class_fractions_per_cell(patched_read, codes):
+    fractions = grid_class_fractions('lc.tif', BOUNDS, 2, 2)
+
+    assert fractions.shape == (2, 2, N_CODES)
+    np.testing.assert_allclose(fractions.sum(axis=2), 1.0)
+    assert fractions[0, 0, 12] == 1.0
+    np.testing.assert_allclose(fractions[1, 0, [12, 13]], [0.2, 0.8])
+    np.testing.assert_allclose(fractions[0, 1, [17, 99]], [0.8, 0.2])
+
+    codes[:] = LC_FILL
+    assert np.isnan(grid_class_fractions('lc.tif', BOUNDS, 2, 2)).all()
+
+
+def test_find_land_cover_file_prefers_the_setting_then_the_newest_granule(tmp_path, monkeypatch):
+    monkeypatch.setattr(NASAConfig, 'LAND_COVER_FILE', '')
+    monkeypatch.setattr(NASAConfig, 'MODIS_DATA_DIR', '')
+    assert find_land_cover_file() is None
+
+    monkeypatch.setattr(NASAConfig, 'MODIS_DATA_DIR', str(tmp_path))
+    assert find_land_cover_file() is None
+    for name in ('MCD12Q1.A2022001.tif', 'MCD12Q1.A2023001.nc', 'MCD12Q1.A2024001.xml', 'MOD13Q1.A2024001.tif'):
+        (tmp_path / name).write_bytes(b'')
+    assert find_land_cover_file() == str(tmp_path / 'MCD12Q1.A2023001.nc')
+
+    monkeypatch.setattr(NASAConfig, 'LAND_COVER_FILE', '/data/lc.tif')
+    assert find_land_cover_file() == '/data/lc.tif'
+
+
+def test_breakdown_reads_a_geotiff(registry, codes, tmp_path):
+    rasterio = pytest.importorskip('rasterio')
+    from rasterio.transform import from_origin
+
+    path = tmp_path / 'MCD12Q1.A2023001.tif'
+    profile = {'driver': 'GTiff', 'width': 10, 'height': 10, 'count': 1, 'dtype': 'uint8', 'crs': 'EPSG:4326', 'transform': from_origin(0.0, 1.0, 0.1, 0.1)}
+    with rasterio.open(path, 'w', **profile) as dst:
+        dst.write(codes, 1)
+
+    areas = LandCoverBreakdown(registry, cache_dir=str(tmp_path)).areas(str(path), BOUNDS)
+    assert areas['west']['pixels'] == 49 and areas['west']['dominant_type'] == 'Croplands'
+    assert areas['east']['fractions'] == {'Water Bodies': 0.8, 'Class 99': 0.2}
+    np.testing.assert_allclose(grid_class_fractions(str(path), BOUNDS, 2, 2)[1, 0, [12, 13]], [0.2, 0.8])
@@ -0,0 +1,92 @@
+import os
+import numpy as np
+import pytest
+from utils.landsat import INDEX_NAMES, QA_CLOUD_MASK, SR_FILL, SR_OFFSET, SR_SCALE, LandsatScene, compute_indices, ingest_scene
+
+
+def _stored(reflectance):
+    """Collection 2 stored integers for a surface reflectance"""
+    return np.round((np.asarray(reflectance, dtype=np.float64) - SR_OFFSET) / SR_SCALE).astype(np.uint16)
+
+
+def test_compute_indices_match_the_formulas():
+    blue, red, nir, swir1 = (np.array(values) for values in ([0.05, 0.08], [0.06, 0.20], [0.40, 0.25], [0.20, 0.30]))
+    indices = compute_indices(_stored(blue), _stored(red), _stored(nir), _stored(swir1))
+
+    assert set(indices) == set(INDEX_NAMES)
+    assert all(values.dtype == np.float32 for values in indices.values())
+    np.testing.assert_allclose(indices['ndvi'], (nir - red) / (nir + red), atol=1e-4)
+    np.testing.assert_allclose(indices['evi'], 2.5 * (nir - red) / (nir + 6 * red - 7.5 * blue + 1), atol=1e-4)
+    np.testing.assert_allclose(indices['ndbi'], (swir1 - nir) / (swir1 + nir), atol=1e-4)
+
+
+def test_compute_indices_mask_fill_clouds_and_out_of_range_evi():
+    shape = (2, 3)
+    blue, red, nir, swir1 = (np.full(shape, value) for value in (_stored(0.05), _stored(0.06), _stored(0.40), _stored(0.20)))
+    red[0, 0] = SR_FILL
+    # Very bright blue pushes EVI outside [-1, 1] while NDVI stays valid
+    blue[1, 2] = _stored(0.19)
+    valid = np.ones(shape, dtype=bool)
+    valid[1, 0] = False
+
+    indices = compute_indices(blue, red, nir, swir1, valid)
+    for name in INDEX_NAMES:
+        assert np.isnan(indices[name][0, 0]) and np.isnan(indices[name][1, 0]), name
+    assert np.isnan(indices['evi'][1, 2]) and np.isfinite(indices['ndvi'][1, 2])
+    assert np.isfinite(indices['ndvi'][1, 1]) and np.isfinite(indices['evi'][1, 1]) and np.isfinite(indices['ndbi'][1, 1])
+
+
+def test_discover_finds_bands_and_qa(tmp_path):
+    for suffix in ('SR_B2', 'SR_B4', 'SR_B5', 'SR_B6', 'QA_PIXEL'):
+        (tmp_path / f'LC08_L2SP_145044_20240115_{suffix}.TIF').write_bytes(b'tif')
+    scene = LandsatScene.discover(str(tmp_path))
+
+    assert scene.scene_id == 'LC08_L2SP_145044_20240115'
+    assert scene.bands['nir'].endswith('_SR_B5.TIF')
+    assert scene.qa.endswith('_QA_PIXEL.TIF')
+    fingerprint = scene.fingerprint()
+    assert len(fingerprint) == 5
+
+    (tmp_path / 'LC08_L2SP_145044_20240115_SR_B5.TIF').write_bytes(b'changed')
+    assert scene.fingerprint() != fingerprint
+
+    os.remove(tmp_path / 'LC08_L2SP_145044_20240115_SR_B6.TIF')
+    with pytest.raises(FileNotFoundError, match='SR_B6'):
+        LandsatScene.discover(str(tmp_path))
+
+
+def test_ingest_and_sample_a_synthetic_scene(tmp_path):
+    rasterio = pytest.importorskip('rasterio')
+    from rasterio.transform import from_origin
+
+    # 40 x 40 pixels of 0.001 degrees; the left half vegetated, the right half built up
+    size = 40
+    transform = from_origin(77.40, 23.28, 0.001, 0.001)
+    reflectance = {'blue': 0.05, 'red': np.where(np.arange(size) < size // 2, 0.05, 0.20), 'nir': np.where(np.arange(size) < size // 2, 0.45, 0.22), 'swir1': 0.30}
+    scene_dir = tmp_path / 'scene'
+    scene_dir.mkdir()
+    profile = {'driver': 'GTiff', 'width': size, 'height': size, 'count': 1, 'dtype': 'uint16', 'crs': 'EPSG:4326', 'transform': transform}
+    for name, suffix in (('blue', 'SR_B2'), ('red', 'SR_B4'), ('nir', 'SR_B5'), ('swir1', 'SR_B6')):
+        values = np.broadcast_to(_stored(reflectance[name]), (size, size))
+        with rasterio.open(scene_dir / f'TEST_{suffix}.TIF', 'w', **profile) as dst:
+            dst.write(values, 1)
+    qa = np.zeros((size, size), dtype=np.uint16)
+    qa[:5, :5] = QA_CLOUD_MASK
+    with rasterio.open(scene_dir / 'TEST_QA_PIXEL.TIF', 'w', **profile) as dst:
+        dst.write(qa, 1)
+
+    indices = ingest_scene(LandsatScene.discover(str(scene_dir)), cache_dir=str(tmp_path / 'cache'), window_size=16)
+    assert indices.meta['width'] == size and indices.meta['height'] == size
+    with rasterio.open(indices.path('ndvi')) as src:
+        ndvi = src.read(1)
+    assert np.isnan(ndvi[:5, :5]).all()
+    np.testing.assert_allclose(ndvi[10, 5], 0.8, atol=1e-3)
+    np.testing.assert_allclose(ndvi[10, 30], 0.05 / 0.42, atol=1e-3)
+
+    samples = indices.sample([23.28 - 0.0105, 23.28 - 0.0105, 10.0], [77.40 + 0.0055, 77.40 + 0.0305, 10.0], radius=1)
+    np.testing.assert_allclose(samples['ndvi'][:2], [0.8, 0.05 / 0.42], atol=1e-3)
+    assert np.isnan(samples['ndbi'][2])
+
+    # Unchanged bands reuse the cached rasters
+    again = ingest_scene(LandsatScene.discover(str(scene_dir)), cache_dir=str(tmp_path / 'cache'))
+    assert again.meta == indices.meta
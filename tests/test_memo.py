@@ -0,0 +1,66 @@
+import os
+import time
+import numpy as np
+import pytest
+from datetime import date
+from utils.memo import ContentMemo, PRUNE_EVERY, stable_hash
+from utils.timeseries import PowerSeries
+
+
+def test_stable_hash_is_canonical_and_type_aware():
+    assert stable_hash({'b': 1, 'a': [1.0, 'x']}) == stable_hash({'a': [1.0, 'x'], 'b': 1})
+    assert stable_hash(1) != stable_hash(1.0) != stable_hash('1')
+    assert stable_hash(np.arange(3)) != stable_hash(np.arange(3, dtype=np.float32))
+    assert stable_hash(date(2024, 1, 1)) == stable_hash('2024-01-01')
+
+    series = PowerSeries(np.array(['2024-01-01'], dtype='datetime64[D]'), {'T2M': np.array([1.0], dtype=np.float32)})
+    assert stable_hash(series) == stable_hash(PowerSeries(series.dates.copy(), {'T2M': series.columns['T2M'].copy()}))
+    with pytest.raises(TypeError):
+        stable_hash(object())
+
+
+def test_memory_lru_evicts_the_oldest_entry():
+    memo = ContentMemo('test', max_entries=2, persist=False)
+    memo.set('a', 1)
+    memo.set('b', 2)
+    memo.get('a')
+    memo.set('c', 3)
+    assert memo.get('b') is None
+    assert (memo.get('a'), memo.get('c')) == (1, 3)
+    assert memo.get_stats()['evictions'] == 1
+
+
+def test_hits_return_copies():
+    memo = ContentMemo('test', persist=False)
+    value = {'scores': [1, 2]}
+    memo.set('key', value)
+    value['scores'].append(3)
+    memo.get('key')['scores'].append(4)
+    assert memo.get('key') == {'scores': [1, 2]}
+    assert memo.get_or_compute('other', lambda: {'fresh': True}) == {'fresh': True}
+
+
+def test_persisted_entries_survive_a_new_instance_until_they_expire(cache_dir):
+    memo = ContentMemo('test', persist=True, cache_dir=str(cache_dir), max_disk_age=3600)
+    memo.set('key', {'value': 1})
+
+    restarted = ContentMemo('test', persist=True, cache_dir=str(cache_dir), max_disk_age=3600)
+    assert restarted.get('key') == {'value': 1}
+    assert restarted.get_stats()['disk_hits'] == 1
+
+    old = time.time() - 7200
+    os.utime(memo._path('key'), (old, old))
+    assert ContentMemo('test', persist=True, cache_dir=str(cache_dir), max_disk_age=3600).get('key') is None
+
+
+def test_disk_store_is_bounded_by_bytes(cache_dir):
+    memo = ContentMemo('test', max_entries=10, persist=True, cache_dir=str(cache_dir), max_disk_bytes=2000)
+    now = time.time()
+    for i in range(PRUNE_EVERY + 1):
+        memo.set(f'key{i}', 'x' * 100)
+        os.utime(memo._path(f'key{i}'), (now - 1000 + i, now - 1000 + i))
+    memo.prune_disk()
+
+    remaining = os.listdir(memo.directory)
+    assert sum(os.path.getsize(os.path.join(memo.directory, name)) for name in remaining) <= 2000
+    assert f'key{PRUNE_EVERY}.pkl' in remaining and 'key0.pkl' not in remaining
@@ -0,0 +1,111 @@
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from utils.area_registry import AreaRegistry
+from utils.history import HistoryStore
+from utils.modis import (
+    MODIS_VARIABLES, CoordinateGrid, _granule_dates, _to_physical, _window, discover_granules, ingest_granule, latest_values
+)
+from utils.zonal import ZonalStats, rasterize_zones
+
+BOUNDS = {'north': 23.4, 'south': 23.1, 'west': 77.3, 'east': 77.6}
+
+
+@pytest.fixture
+def registry():
+    return AreaRegistry.from_records({'north': {'lat': 23.35, 'lon': 77.45}, 'south': {'lat': 23.15, 'lon': 77.45}})
+
+
+def test_window_handles_ascending_and_descending_coordinates():
+    ascending = np.arange(23.0, 23.55, 0.1)
+    assert _window(ascending, 23.15, 23.35) == slice(2, 4)
+    descending = ascending[::-1]
+    assert _window(descending, 23.15, 23.35) == slice(2, 4)
+    assert _window(ascending, 30.0, 31.0) is None
+
+
+def test_to_physical_converts_kelvin_and_masks_out_of_range_values():
+    lst = MODIS_VARIABLES['MOD11A2']['lst_day']
+    np.testing.assert_allclose(_to_physical([300.0, 173.15, np.nan], lst, 'K'), [26.85, np.nan, np.nan])
+    # Already in Celsius when the units say so
+    np.testing.assert_allclose(_to_physical([26.85], lst, 'degC'), [26.85])
+
+    ndvi = MODIS_VARIABLES['MOD13Q1']['ndvi']
+    np.testing.assert_allclose(_to_physical([0.5, -0.3, 1.2, -0.2], ndvi, ''), [0.5, np.nan, np.nan, -0.2])
+
+
+def test_granule_dates_come_from_time_or_the_file_name():
+    dataset = SimpleNamespace(dims={})
+    assert _granule_dates(dataset, '/data/MOD13Q1.A2023145.h24v06.061.hdf').tolist() == [np.datetime64('2023-05-25').item()]
+    assert _granule_dates(dataset, 'MOD11A2.A2024001.h24v06.nc').tolist() == [np.datetime64('2024-01-01').item()]
+    with pytest.raises(ValueError, match='AYYYYDDD'):
+        _granule_dates(dataset, 'subset.nc')
+
+
+def test_discover_granules_filters_by_product_and_extension(tmp_path):
+    for name in ('MOD13Q1.A2023145.nc', 'mod13q1_subset.nc4', 'MOD13Q1.A2023161.hdf', 'MOD13Q1.A2023177.xml', 'MOD11A2.A2023145.nc'):
+        (tmp_path / name).write_bytes(b'')
+    found = [path.rsplit('/', 1)[-1] for path in discover_granules('MOD13Q1', str(tmp_path))]
+    assert found == ['MOD13Q1.A2023145.nc', 'MOD13Q1.A2023161.hdf', 'mod13q1_subset.nc4']
+
+
+def test_coordinate_grid_zones_follow_the_granule_rows(registry):
+    # Latitudes run north to south, as in most granules
+    lats = np.round(np.arange(23.4, 23.09, -0.05), 2)
+    lons = np.round(np.arange(77.3, 77.61, 0.05), 2)
+    grid = CoordinateGrid(lats, lons)
+    assert grid.shape == (len(lats), len(lons))
+
+    labels = rasterize_zones(registry, grid, radius=0.06).labels()
+    north_rows = np.flatnonzero((labels == 0).any(axis=1))
+    south_rows = np.flatnonzero((labels == 1).any(axis=1))
+    assert lats[north_rows].min() > 23.25 and lats[south_rows].max() < 23.25
+
+
+def test_latest_values_picks_the_last_composite_per_area():
+    store = HistoryStore('modis', persist=False)
+    store.upsert_many(['2024-01-01', '2024-01-17', '2024-02-02'], ['a', 'b'], {
+        'ndvi': np.array([[0.3, 0.5], [0.4, np.nan], [np.nan, np.nan]])
+    })
+
+    values, dates = latest_values(store, ['ndvi'])
+    np.testing.assert_allclose(values['ndvi'], [0.4, 0.5])
+    np.testing.assert_allclose(values['ndvi_previous'], [0.3, np.nan])
+    assert dates['ndvi'] == ['2024-01-17', '2024-01-01']
+
+    values, dates = latest_values(store, ['ndvi'], on_or_before='2024-01-10')
+    np.testing.assert_allclose(values['ndvi'], [0.3, 0.5])
+    assert dates['ndvi'] == ['2024-01-01', '2024-01-01']
+    values, dates = latest_values(store, ['ndvi'], on_or_before='2023-12-31')
+    assert np.isnan(values['ndvi']).all() and dates['ndvi'] == [None, None]
+
+
+def test_ingest_granule_folds_composites_into_per_area_means(registry, tmp_path):
+    xarray = pytest.importorskip('xarray')
+    pytest.importorskip('netCDF4')
+
+    lats = np.round(np.arange(23.4, 23.09, -0.05), 2)
+    lons = np.round(np.arange(77.3, 77.61, 0.05), 2)
+    times = np.array(['2024-01-01', '2024-01-09', '2024-01-17'], dtype='datetime64[ns]')
+    # Day LST in Kelvin rising by one degree per composite, hotter in the south
+    south = (lats < 23.25)[None, :, None]
+    day = 300.0 + np.arange(3)[:, None, None] + 2.0 * south + np.zeros((3, len(lats), len(lons)))
+    dataset = xarray.Dataset(
+        {
+            'LST_Day_1km': (('time', 'lat', 'lon'), day, {'units': 'K'}),
+            'LST_Night_1km': (('time', 'lat', 'lon'), day - 10.0, {'units': 'K'})
+        },
+        coords={'time': times, 'lat': lats, 'lon': lons}
+    )
+    path = str(tmp_path / 'MOD11A2_subset.nc')
+    dataset.to_netcdf(path)
+
+    store = HistoryStore('modis', persist=False)
+    engine = ZonalStats(registry, radius=0.06, cache_dir=str(tmp_path))
+    assert ingest_granule(path, 'MOD11A2', store, engine, BOUNDS, time_chunk=2) == 3
+    series_dates, series = store.series('lst_day')
+    assert [str(date) for date in series_dates] == ['2024-01-01', '2024-01-09', '2024-01-17']
+    np.testing.assert_allclose(series[:, store.area_keys.index('north')], [26.85, 27.85, 28.85], atol=1e-6)
+    np.testing.assert_allclose(series[:, store.area_keys.index('south')], [28.85, 29.85, 30.85], atol=1e-6)
+    # Dates already stored are not read again
+    assert ingest_granule(path, 'MOD11A2', store, engine, BOUNDS, time_chunk=2) == 0
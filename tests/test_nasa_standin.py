@@ -0,0 +1,68 @@
+import io
+import numpy as np
+import pandas as pd
+import pytest
+import requests
+from config.nasa_config import NASAConfig
+from utils.nasa_standin import StandinProfile, start_standin
+from utils.timeseries import PowerSeries
+
+
+@pytest.fixture
+def standin():
+    server = start_standin()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_standin_serves_power_point_payloads(standin):
+    params = {'parameters': 'ALLSKY_SFC_SW_DWN,T2M', 'start': '20240101', 'end': '20240110', 'latitude': 23.26, 'longitude': 77.41}
+    response = requests.get(f'{standin.base_url}/power', params=params, timeout=10)
+
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == 'application/json'
+    body = response.json()
+    assert body['geometry']['coordinates'][:2] == [77.41, 23.26]
+    series = PowerSeries.from_response(body)
+    assert len(series) == 10
+    assert set(series.columns) == {'ALLSKY_SFC_SW_DWN', 'T2M'}
+    assert np.isfinite(series.columns['T2M']).all()
+    # Payloads depend only on the query, so repeated requests match
+    assert requests.get(f'{standin.base_url}/power', params=params, timeout=10).json() == body
+    assert standin.stats['power'] == {'requests': 2, 'errors': 0, 'bytes': 2 * len(response.content)}
+
+
+def test_standin_serves_power_regional_payloads(standin):
+    params = {'parameters': 'ALLSKY_SFC_SW_DWN', 'start': '20240101', 'end': '20240102',
+              'latitude-min': 23.0, 'latitude-max': 24.0, 'longitude-min': 77.0, 'longitude-max': 78.25}
+    features = requests.get(f'{standin.base_url}/power_regional', params=params, timeout=10).json()['features']
+
+    # 0.5 x 0.625 degree cells over the requested box
+    assert len(features) == 3 * 3
+    assert all(len(feature['properties']['parameter']['ALLSKY_SFC_SW_DWN']) == 2 for feature in features)
+
+
+def test_standin_serves_firms_csv(standin):
+    response = requests.get(f'{standin.base_url}/firms/csv/KEY/MODIS_NRT/IND/2/2024-01-31', timeout=10)
+
+    assert response.headers['Content-Type'] == 'text/csv'
+    fires = pd.read_csv(io.StringIO(response.text))
+    assert {'latitude', 'longitude', 'acq_date', 'frp', 'confidence'} <= set(fires.columns)
+    assert set(fires['acq_date']) == {'2024-01-30', '2024-01-31'}
+    assert fires['latitude'].between(8.0, 35.0).all() and fires['longitude'].between(68.0, 97.0).all()
+    # A share of the fires falls inside the city so radius queries find some
+    bounds = NASAConfig.BHOPAL_BOUNDS
+    assert (fires['latitude'].between(bounds['south'], bounds['north']) & fires['longitude'].between(bounds['west'], bounds['east'])).any()
+
+
+def test_standin_injects_errors_and_rejects_unknown_endpoints():
+    server = start_standin(profile=StandinProfile(error_rate=1.0))
+    try:
+        response = requests.get(f'{server.base_url}/power', timeout=10)
+        assert response.status_code in (429, 503)
+        assert server.stats['power']['errors'] == 1
+        assert requests.get(f'{server.base_url}/nope', timeout=10).status_code == 404
+    finally:
+        server.shutdown()
+        server.server_close()
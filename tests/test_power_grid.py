@@ -0,0 +1,86 @@
+from collections import OrderedDict
+import numpy as np
+import pytest
+import utils.nasa_api as nasa_api
+from config.nasa_config import NASAConfig
+from utils.power_grid import PowerGrid
+from utils.timeseries import POWER_FILL_VALUE
+
+
+def _response(lats, lons, dates, value):
+    return {'features': [
+        {
+            'geometry': {'coordinates': [lon, lat]},
+            'properties': {'parameter': {'ALLSKY_SFC_SW_DWN': {date: value(lat, lon, day) for day, date in enumerate(dates)}}}
+        }
+        for lat in lats for lon in lons
+    ]}
+
+
+DATES = ['20240101', '20240102', '20240103']
+
+
+def test_bilinear_interpolation_reproduces_a_plane(rng):
+    plane = lambda lat, lon, day: 2.0 * lat - 3.0 * lon + day
+    grid = PowerGrid.from_response(_response([23.0, 23.5, 24.0], [77.0, 77.5, 78.0], DATES, plane))
+
+    lats = rng.uniform(23.0, 24.0, 50)
+    lons = rng.uniform(77.0, 78.0, 50)
+    values = grid.interpolate(lats, lons, 'ALLSKY_SFC_SW_DWN')
+
+    assert values.shape == (50, len(DATES))
+    expected = 2.0 * lats[:, None] - 3.0 * lons[:, None] + np.arange(len(DATES))
+    np.testing.assert_allclose(values, expected, rtol=1e-5)
+
+
+def test_grid_points_are_exact_and_outside_points_clamp():
+    grid = PowerGrid.from_response(_response([23.0, 23.5], [77.0, 77.5], DATES, lambda lat, lon, day: lat * 10 + lon))
+    values = grid.interpolate([23.5, 30.0, 10.0], [77.0, 90.0, 70.0], 'ALLSKY_SFC_SW_DWN')
+    np.testing.assert_allclose(values[:, 0], [23.5 * 10 + 77.0, 23.5 * 10 + 77.5, 23.0 * 10 + 77.0], rtol=1e-6)
+
+
+def test_fill_values_become_nan():
+    value = lambda lat, lon, day: POWER_FILL_VALUE if (lat, day) == (23.0, 1) else 5.0
+    grid = PowerGrid.from_response(_response([23.0, 23.5], [77.0], DATES, value))
+    values = grid.interpolate([23.0, 23.5], [77.0, 77.0], 'ALLSKY_SFC_SW_DWN')
+
+    assert np.isnan(values[0, 1])
+    assert np.isfinite(np.delete(values.ravel(), 1)).all()
+    response = grid.point_responses([23.0], [77.0])[0]
+    assert response['properties']['parameter']['ALLSKY_SFC_SW_DWN']['20240102'] == POWER_FILL_VALUE
+
+
+def test_point_series_share_the_grid_dates():
+    grid = PowerGrid.from_response(_response([23.0, 23.5], [77.0, 77.5], DATES, lambda lat, lon, day: day + 4.0))
+    series = grid.point_series([23.2, 23.4], [77.1, 77.3])
+    assert [str(date) for date in series[0].dates] == ['2024-01-01', '2024-01-02', '2024-01-03']
+    assert series[1].mean('ALLSKY_SFC_SW_DWN') == pytest.approx(5.0)
+
+
+def test_empty_response_is_rejected():
+    with pytest.raises(ValueError):
+        PowerGrid.from_response({'features': []})
+
+
+def test_nasa_api_keeps_recent_power_grids_per_window(monkeypatch):
+    monkeypatch.setattr(nasa_api, '_power_grids', OrderedDict())
+    monkeypatch.setattr(NASAConfig, 'POWER_GRID_CACHE', 2)
+    fetched = []
+
+    def fetch(self, key, params, endpoint='power'):
+        fetched.append(params['start'])
+        return _response([23.0, 23.5], [77.0, 77.5], DATES, lambda lat, lon, day: 5.0)
+
+    monkeypatch.setattr(nasa_api.NASAAPI, '_cached_power_fetch', fetch)
+    grid = lambda start: nasa_api.NASAAPI(power_window=(start, start[:6] + '28')).get_power_grid()
+
+    current, january = grid('20240301'), grid('20240101')
+    # Alternating between the current and a history window parses each once
+    assert grid('20240301') is current and grid('20240101') is january
+    assert fetched == ['20240301', '20240101']
+
+    # A third window evicts the least recently used one
+    grid('20240201')
+    assert grid('20240101') is january
+    assert grid('20240301') is not current
+    assert fetched == ['20240301', '20240101', '20240201', '20240301']
@@ -0,0 +1,72 @@
+import os
+import numpy as np
+import pytest
+from utils.raster import RasterGrid, RasterWriter, ScoreRaster, idw_interpolate, prune_renders
+
+
+def _dense_idw(values, lats, lons, src_lats, src_lons, power):
+    """Reference IDW over the full query x source matrix"""
+    q_lats, q_lons = lats.reshape(-1, 1), lons.reshape(-1, 1)
+    distance = np.sqrt((q_lats - src_lats) ** 2 + (q_lons - src_lons) ** 2)
+    result = {}
+    for name, column in values.items():
+        column = np.asarray(column, dtype=np.float64)
+        valid = np.isfinite(column)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weights = np.where(valid, distance ** -power, 0.0)
+            blended = (weights * np.where(valid, column, 0.0)).sum(axis=1) / weights.sum(axis=1)
+        exact = distance == 0
+        on_source = exact.any(axis=1)
+        hit_value = column[np.argmax(exact, axis=1)]
+        result[name] = np.where(on_source, hit_value, blended).reshape(lats.shape)
+    return result
+
+
+@pytest.mark.parametrize('power', [2.0, 1.5])
+@pytest.mark.parametrize('max_cells', [1, 97, 10 ** 6])
+def test_chunked_idw_matches_dense_reference(rng, power, max_cells):
+    src_lats, src_lons = rng.uniform(0, 1, 60), rng.uniform(0, 1, 60)
+    values = {'score': rng.uniform(0, 100, 60), 'index': rng.uniform(0, 1, 60)}
+    values['score'][[3, 17]] = np.nan
+    lats, lons = np.meshgrid(np.linspace(0, 1, 12), np.linspace(0, 1, 9), indexing='ij')
+    # Put a few pixels exactly on sources, including a NaN one
+    lats.ravel()[[0, 5, 9]] = src_lats[[0, 3, 8]]
+    lons.ravel()[[0, 5, 9]] = src_lons[[0, 3, 8]]
+
+    result = idw_interpolate(values, lats, lons, src_lats, src_lons, power=power, max_cells=max_cells)
+    expected = _dense_idw(values, lats, lons, src_lats, src_lons, power)
+
+    for name in values:
+        assert result[name].shape == lats.shape
+        np.testing.assert_allclose(result[name], expected[name], rtol=1e-9, equal_nan=True)
+    assert result['score'].ravel()[0] == values['score'][0]
+    assert np.isnan(result['score'].ravel()[5])
+
+
+def _render(root, name, mtime):
+    grid = RasterGrid({'north': 1, 'south': 0, 'east': 1, 'west': 0}, 4, 4, tile_size=2)
+    writer = RasterWriter(os.path.join(root, name), grid, surfaces=['score'])
+    for r0, r1, c0, c1 in grid.tiles():
+        writer.write('score', r0, c0, np.full((r1 - r0, c1 - c0), 1.0, dtype=np.float32))
+    raster = writer.close()
+    os.utime(os.path.join(raster.directory, ScoreRaster.META_FILE), (mtime, mtime))
+    return raster
+
+
+def test_writer_round_trip(tmp_path):
+    raster = _render(str(tmp_path), 'render', 1)
+    opened = ScoreRaster.open(raster.directory)
+    assert opened == raster
+    assert opened.meta['surfaces']['score'] == {'min': 1.0, 'max': 1.0, 'mean': 1.0}
+    assert opened.read_window('score', 1, 3, 0, 2).tolist() == [[1.0, 1.0], [1.0, 1.0]]
+
+
+def test_prune_keeps_the_most_recently_used_renders(tmp_path):
+    root = str(tmp_path)
+    for i, name in enumerate(['a', 'b', 'c', 'd']):
+        _render(root, name, 100 + i)
+    os.makedirs(os.path.join(root, 'unfinished'))
+
+    assert prune_renders(root, 2, protect=[os.path.join(root, 'a')]) == 1
+    assert sorted(os.listdir(root)) == ['a', 'c', 'd', 'unfinished']
+    assert prune_renders(os.path.join(root, 'missing'), 1) == 0
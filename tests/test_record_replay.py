@@ -0,0 +1,70 @@
+import json
+import os
+import pytest
+import requests
+from config.nasa_config import NASAConfig
+from utils.nasa_standin import start_standin
+from utils.record_replay import RecordReplayAdapter, mount_record_replay
+
+
+@pytest.fixture
+def standin():
+    server = start_standin()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _session(mode, directory):
+    return mount_record_replay(requests.Session(), mode, str(directory))
+
+
+def test_record_then_replay_round_trip(standin, tmp_path, monkeypatch):
+    monkeypatch.setattr(NASAConfig, 'NASA_API_KEY', 'secret-key')
+    url = f'{standin.base_url}/power'
+    params = {'parameters': 'T2M', 'start': '20240101', 'end': '20240103', 'latitude': 23.26, 'longitude': 77.41}
+
+    recorded = _session('record', tmp_path).get(url, params={**params, 'api_key': 'secret-key'}, timeout=10)
+    assert recorded.status_code == 200
+    assert standin.stats['power']['requests'] == 1
+
+    # Replay needs no server, and matches with another key and parameter order
+    standin.shutdown()
+    replayed = _session('replay', tmp_path).get(url, params={'api_key': 'other-key', **dict(reversed(list(params.items())))}, timeout=10)
+    assert replayed.status_code == 200
+    assert replayed.json() == recorded.json()
+    assert replayed.headers['Content-Type'] == 'application/json'
+    assert replayed.url.startswith(url)
+
+
+def test_recordings_never_contain_api_keys(standin, tmp_path, monkeypatch):
+    monkeypatch.setattr(NASAConfig, 'NASA_API_KEY', 'secret-key')
+    session = _session('record', tmp_path)
+    session.get(f'{standin.base_url}/power', params={'latitude': 23.26, 'api_key': 'secret-key'}, timeout=10)
+    session.get(f'{standin.base_url}/firms/csv/secret-key/MODIS_NRT/IND/1/2024-01-31', params={'MAP_KEY': 'secret-key'}, timeout=10)
+
+    names = os.listdir(tmp_path)
+    assert len(names) == 2
+    for name in names:
+        text = (tmp_path / name).read_text()
+        assert 'secret-key' not in text
+        assert 'secret-key' not in name
+    urls = sorted(json.loads((tmp_path / name).read_text())['url'] for name in names)
+    assert urls[0].endswith('/firms/csv/REDACTED/MODIS_NRT/IND/1/2024-01-31')
+    assert urls[1].endswith('/power?latitude=23.26')
+
+
+def test_replay_without_a_recording_raises_connection_error(tmp_path):
+    session = _session('replay', tmp_path)
+    with pytest.raises(requests.exceptions.ConnectionError, match='No recording') as error:
+        session.get('https://power.larc.nasa.gov/api/temporal/daily/point', params={'latitude': 1, 'api_key': 'secret-key'}, timeout=10)
+    assert 'secret-key' not in str(error.value)
+
+
+def test_mount_is_a_no_op_without_a_mode_and_rejects_unknown_modes(tmp_path, monkeypatch):
+    monkeypatch.setattr(NASAConfig, 'RECORD_MODE', '')
+    session = requests.Session()
+    assert mount_record_replay(session) is session
+    assert not isinstance(session.get_adapter('https://example.com'), RecordReplayAdapter)
+    with pytest.raises(ValueError, match='mode'):
+        RecordReplayAdapter('rewind', str(tmp_path))
@@ -0,0 +1,117 @@
+import os
+import threading
+import time
+import pytest
+from utils import response_cache
+from utils.response_cache import ResponseCache
+from utils.single_flight import SingleFlight
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.time() for the cache module"""
+    now = [1_000_000.0]
+    monkeypatch.setattr(response_cache.time, 'time', lambda: now[0])
+    return now
+
+
+def _cache(cache_dir, **kwargs):
+    options = {'ttl': 60, 'stale_ttl': 30, 'max_bytes': 10 ** 6}
+    options.update(kwargs)
+    return ResponseCache('test', cache_dir=str(cache_dir), **options)
+
+
+def test_entry_ages_from_fresh_to_stale_to_expired(cache_dir, clock):
+    cache = _cache(cache_dir)
+    assert cache.get('key') == (None, 'miss')
+
+    cache.set('key', {'value': 1})
+    assert cache.get('key') == ({'value': 1}, 'fresh')
+    clock[0] += 61
+    assert cache.get('key') == ({'value': 1}, 'stale')
+    assert cache.get_fresh('key') is None
+    clock[0] += 30
+    assert cache.get('key') == ({'value': 1}, 'expired')
+
+
+def test_get_or_fetch_serves_stale_and_refreshes_in_background(cache_dir, clock):
+    cache = _cache(cache_dir)
+    cache.set('key', 'old')
+    clock[0] += 61
+
+    refreshed = threading.Event()
+
+    def fetch():
+        refreshed.set()
+        return 'new'
+
+    assert cache.get_or_fetch('key', fetch) == 'old'
+    assert refreshed.wait(5)
+    for _ in range(100):
+        if cache.get('key') == ('new', 'fresh'):
+            break
+        time.sleep(0.01)
+    assert cache.get('key') == ('new', 'fresh')
+    assert cache.get_stats()['stale'] == 1
+
+
+def test_get_or_fetch_falls_back_to_expired_value_when_fetch_fails(cache_dir, clock):
+    cache = _cache(cache_dir)
+    cache.set('key', 'old')
+    clock[0] += 1000
+
+    assert cache.get_or_fetch('key', lambda: None) == 'old'
+    assert cache.get_or_fetch('missing', lambda: None) is None
+    assert cache.get_or_fetch('missing', lambda: 'fetched') == 'fetched'
+    assert cache.get('missing') == ('fetched', 'fresh')
+
+
+def test_least_recently_used_entries_are_evicted_over_max_bytes(cache_dir):
+    cache = _cache(cache_dir, max_bytes=10 ** 6)
+    for i in range(5):
+        cache.set(f'key{i}', 'x' * 100)
+        os.utime(cache._path(f'key{i}'), (i, i))
+    entry_size = os.path.getsize(cache._path('key0'))
+
+    # Half an entry of slack: the stored timestamp varies entry sizes by a few bytes
+    cache.max_bytes = entry_size * 3 + entry_size // 2
+    cache.get('key0')  # touch: now the most recently used
+    cache.set('key5', 'x' * 100)
+
+    remaining = {key for key in (f'key{i}' for i in range(6)) if os.path.exists(cache._path(key))}
+    assert remaining == {'key0', 'key4', 'key5'}
+    assert cache.size_bytes() <= cache.max_bytes
+    assert cache.get_stats()['evictions'] == 3
+
+
+def test_size_estimate_stays_within_max_bytes(cache_dir):
+    cache = _cache(cache_dir, max_bytes=5000)
+    for i in range(300):
+        cache.set(str(i % 120), 'x' * 100)
+        assert cache._size is None or cache._size <= cache.max_bytes
+    assert cache.size_bytes() == cache._size
+
+
+def test_concurrent_misses_share_one_fetch(cache_dir):
+    cache = _cache(cache_dir)
+    flight = SingleFlight('test', lock_dir=str(cache_dir))
+    calls = []
+    release = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return 'value'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_fetch('key', fetch, flight))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ['value'] * 8
+    assert len(calls) == 1
+    assert os.listdir(flight.lock_dir) == []
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+from utils.nasa_api import NASAAPI
+from utils.simulation import AREA_DETAIL_RANGES, STREAMS, SimulationEngine
+
+VECTOR_METHODS = ['air_quality', 'modis_vegetation', 'land_surface_temperature', 'land_cover', 'landsat_indices', 'area_details']
+
+
+def _coords(rng, n):
+    # Spread over the city, with a few points inside the urban and vegetated boxes
+    lats = np.concatenate([rng.uniform(23.1, 23.4, n), [23.2599, 23.2667, 23.1667]])
+    lons = np.concatenate([rng.uniform(77.3, 77.5, n), [77.4126, 77.4000, 77.4333]])
+    return lats, lons
+
+
+def _as_dict(values):
+    return values if isinstance(values, dict) else {'value': values}
+
+
+@pytest.mark.parametrize('method', VECTOR_METHODS + ['cloud_cover', 'solar_monthly'])
+def test_same_seed_and_date_give_identical_output(rng, method):
+    lats, lons = _coords(rng, 50)
+    first = _as_dict(getattr(SimulationEngine(seed=7, date='2024-03-01'), method)(lats, lons))
+    second = _as_dict(getattr(SimulationEngine(seed=7, date='2024-03-01'), method)(lats, lons))
+
+    assert first.keys() == second.keys()
+    for name in first:
+        np.testing.assert_array_equal(first[name], second[name])
+
+
+def test_seed_and_date_each_change_the_draws(rng):
+    lats, lons = _coords(rng, 50)
+    base = SimulationEngine(seed=7, date='2024-03-01').uniform(lats, lons, 'pm25')
+    assert not np.array_equal(base, SimulationEngine(seed=8, date='2024-03-01').uniform(lats, lons, 'pm25'))
+    assert not np.array_equal(base, SimulationEngine(seed=7, date='2024-03-02').uniform(lats, lons, 'pm25'))
+
+
+def test_streams_and_substreams_are_independent(rng):
+    lats, lons = _coords(rng, 50)
+    engine = SimulationEngine(seed=7, date='2024-03-01')
+    draws = [engine.uniform(lats, lons, stream) for stream in STREAMS]
+    draws += [engine.uniform(lats, lons, 'solar_month', substream=month) for month in range(1, 12)]
+    assert len({values.tobytes() for values in draws}) == len(draws)
+
+
+@pytest.mark.parametrize('method', VECTOR_METHODS)
+def test_batched_output_matches_per_area_output(rng, method):
+    lats, lons = _coords(rng, 30)
+    engine = SimulationEngine(seed=7, date='2024-03-01')
+    batched = _as_dict(getattr(engine, method)(lats, lons))
+
+    for i in range(len(lats)):
+        single = _as_dict(getattr(engine, method)(lats[i:i + 1], lons[i:i + 1]))
+        for name, values in single.items():
+            assert values[0] == batched[name][i], (name, i)
+
+
+def test_batched_output_does_not_depend_on_order(rng):
+    lats, lons = _coords(rng, 40)
+    engine = SimulationEngine(seed=7, date='2024-03-01')
+    order = rng.permutation(len(lats))
+    np.testing.assert_array_equal(engine.uniform(lats, lons, 'aqi')[order], engine.uniform(lats[order], lons[order], 'aqi'))
+
+
+def test_uniform_draws_stay_in_range(rng):
+    lats, lons = _coords(rng, 2000)
+    values = SimulationEngine(seed=7, date='2024-03-01').uniform(lats, lons, 'pm25', 15, 85)
+    assert values.min() >= 15 and values.max() < 85
+
+
+def test_area_details_are_integers_within_their_ranges(rng):
+    lats, lons = _coords(rng, 2000)
+    details = SimulationEngine(seed=7, date='2024-03-01').area_details(lats, lons)
+
+    assert list(details) == list(AREA_DETAIL_RANGES)
+    for name, (low, high) in AREA_DETAIL_RANGES.items():
+        assert details[name].dtype == np.int64
+        assert details[name].min() >= low and details[name].max() < high, name
+
+
+def test_simulated_api_batch_matches_single_point_calls(rng):
+    api = NASAAPI(simulation_seed=7, simulation_date='2024-03-01')
+    lats, lons = _coords(rng, 10)
+    batched = api._simulated_air_quality(lats, lons)
+
+    for i, (lat, lon) in enumerate(zip(lats, lons)):
+        assert api.get_air_quality_data(lat, lon) == batched[i]
+    assert NASAAPI(simulation_seed=7, simulation_date='2024-03-01').get_air_quality_data(lats[0], lons[0]) == batched[0]
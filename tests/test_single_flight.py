@@ -0,0 +1,66 @@
+import multiprocessing
+import os
+import threading
+import time
+import pytest
+from utils.single_flight import SingleFlight, fcntl
+
+
+def test_leader_error_reaches_every_waiter(tmp_path):
+    flight = SingleFlight('test', lock_dir=str(tmp_path))
+    release = threading.Event()
+
+    def fetch():
+        release.wait(5)
+        raise ValueError('upstream failed')
+
+    errors = []
+
+    def call():
+        try:
+            flight.do('key', fetch)
+        except ValueError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert errors == ['upstream failed'] * 4
+    stats = flight.get_stats()
+    assert stats['fetches'] == 1 and stats['coalesced_local'] == 3 and stats['in_flight'] == 0
+
+
+def _worker(lock_dir, marker, queue):
+    flight = SingleFlight('test', lock_dir=lock_dir)
+
+    def fetch():
+        time.sleep(0.2)
+        with open(marker, 'a') as f:
+            f.write('x')
+        return 'fetched'
+
+    lookup = lambda: 'cached' if os.path.exists(marker) else None
+    queue.put(flight.do('key', fetch, lookup=lookup))
+
+
+@pytest.mark.skipif(fcntl is None, reason='cross-worker locking needs fcntl')
+def test_workers_wait_for_the_lock_and_reuse_the_result(tmp_path):
+    marker = str(tmp_path / 'fetched')
+    queue = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_worker, args=(str(tmp_path), marker, queue)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(10)
+
+    results = sorted(queue.get(timeout=1) for _ in workers)
+    with open(marker) as f:
+        fetches = len(f.read())
+    assert results.count('fetched') == fetches
+    assert fetches < len(workers)
+    assert os.listdir(tmp_path / 'locks' / 'test') == []
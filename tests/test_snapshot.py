@@ -0,0 +1,134 @@
+import time
+import pytest
+from utils.snapshot import SnapshotScheduler
+from utils.snapshot_store import SharedSnapshotStore
+
+
+class CountingBuild:
+    """build_fn that numbers its builds and can be told to fail"""
+
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+
+    def __call__(self):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError('source down')
+        return {'data': {'build': self.calls}, 'summary': {'total_areas': 1}}
+
+
+def _scheduler(build, interval=3600, store=None):
+    scheduler = SnapshotScheduler(build, interval=interval, store=store)
+    # Builds run only when a test asks for them
+    scheduler.start = lambda: None
+    return scheduler
+
+
+def _wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+def test_current_builds_once_and_serves_the_same_snapshot():
+    build = CountingBuild()
+    scheduler = _scheduler(build)
+
+    snapshot = scheduler.current()
+    assert snapshot.version == 1
+    assert snapshot.data['build'] == 1
+    assert scheduler.current() is snapshot
+    assert build.calls == 1
+
+
+def test_failed_build_keeps_the_last_good_snapshot():
+    build = CountingBuild()
+    scheduler = _scheduler(build)
+    good = scheduler.current()
+
+    build.fail = True
+    assert scheduler.build(force=True) is good
+    assert scheduler.current() is good
+    stats = scheduler.get_stats()
+    assert stats['failures'] == 1
+    assert stats['last_error'] == 'RuntimeError: source down'
+    assert stats['version'] == 1
+
+    build.fail = False
+    assert scheduler.build(force=True).version == 2
+
+
+def test_current_raises_when_the_first_build_fails():
+    build = CountingBuild()
+    build.fail = True
+    with pytest.raises(RuntimeError, match='source down'):
+        _scheduler(build).current()
+
+
+def test_current_adopts_a_newer_shared_snapshot(tmp_path):
+    builder_build, reader_build = CountingBuild(), CountingBuild()
+    builder = _scheduler(builder_build, store=SharedSnapshotStore(directory=str(tmp_path)))
+    reader = _scheduler(reader_build, store=SharedSnapshotStore(directory=str(tmp_path)))
+    reader.SHARED_CHECK_INTERVAL = 0.0
+
+    assert builder.current().version == 1
+    assert reader.current().version == 1
+    assert reader_build.calls == 0
+
+    builder.build(force=True)
+    adopted = reader.current()
+    assert adopted.version == 2
+    assert adopted.data['build'] == 2
+    assert reader_build.calls == 0
+    assert reader.get_stats()['adopted'] == 2
+
+    # A forced build on the reader publishes past the builder's version
+    assert reader.build(force=True).version == 3
+    assert builder.current().version == 2
+    builder.SHARED_CHECK_INTERVAL = 0.0
+    assert builder.current().version == 3
+
+
+def test_build_adopts_a_fresh_shared_snapshot_and_rebuilds_a_stale_one(tmp_path):
+    _scheduler(CountingBuild(), store=SharedSnapshotStore(directory=str(tmp_path))).current()
+
+    fresh_build = CountingBuild()
+    assert _scheduler(fresh_build, store=SharedSnapshotStore(directory=str(tmp_path))).build().version == 1
+    assert fresh_build.calls == 0
+
+    late_build = CountingBuild()
+    late = _scheduler(late_build, interval=0.05, store=SharedSnapshotStore(directory=str(tmp_path)))
+    time.sleep(0.1)
+    # current() serves whatever was published; build() replaces it once it is older than the interval
+    assert late.current().version == 1
+    assert late.build().version == 2
+    assert late_build.calls == 1
+
+
+def test_background_thread_rebuilds_every_interval():
+    build = CountingBuild()
+    scheduler = SnapshotScheduler(build, interval=1)
+    try:
+        scheduler.start()
+        _wait_for(lambda: build.calls >= 3)
+        assert scheduler.get_stats()['running']
+        assert scheduler.current().version >= 2
+    finally:
+        scheduler.interval = 10 ** 6
+
+
+def test_refresh_wakes_the_background_thread():
+    build = CountingBuild()
+    scheduler = SnapshotScheduler(build, interval=3600)
+    try:
+        scheduler.start()
+        _wait_for(lambda: scheduler.snapshot is not None)
+        started = time.monotonic()
+        scheduler.refresh()
+        _wait_for(lambda: scheduler.snapshot.version == 2)
+        assert time.monotonic() - started < 5
+        assert build.calls == 2
+    finally:
+        scheduler.interval = 10 ** 6
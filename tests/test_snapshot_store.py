@@ -0,0 +1,151 @@
+import io
+import os
+import struct
+from datetime import date, datetime
+import numpy as np
+import pytest
+import utils.snapshot_store as snapshot_store
+from utils.snapshot_store import (
+    FORMAT_VERSION, MAGIC, MappedPart, SharedSnapshotStore, SnapshotFile, decode_value, encode_value, write_snapshot_file
+)
+from utils.timeseries import PowerSeries
+
+
+def _parts():
+    return {
+        'data': {
+            'old_bhopal': {'name': 'Old Bhopal', 'sustainability_score': 45.0, 'coordinates': [23.26, 77.41]},
+            'new_bhopal': {'name': 'New Bhopal', 'sustainability_score': 65.0, 'coordinates': [23.23, 77.43]}
+        },
+        'summary': {'total_areas': 2, 'avg_sustainability': 55.0},
+        'history': {'dates': np.array(['2024-01-01', '2024-02-01'], dtype='datetime64[D]'), 'values': {'score': np.arange(4.0).reshape(2, 2)}},
+        'raster': None,
+        'build_id': 'abc123'
+    }
+
+
+def test_encode_value_round_trips_the_snapshot_types():
+    series = PowerSeries(
+        np.array(['2024-01-01', '2024-01-02'], dtype='datetime64[D]'),
+        {'ALLSKY_SFC_SW_DWN': np.array([5.1, np.nan])}, simulated=False, source='power'
+    )
+    value = {
+        'array': np.arange(6, dtype=np.int32).reshape(2, 3),
+        'objects': np.array(['a', None], dtype=object),
+        'scalar': np.float64(1.5),
+        'pairs': {('old_bhopal', 'pm25'): 3, 7: 'seven'},
+        'tuple': (1, 'two'),
+        'set': {3},
+        'series': series,
+        'when': datetime(2024, 1, 2, 3, 4, 5),
+        'day': date(2024, 1, 2),
+        'png': b'\x89PNG',
+        'nested': [{'a': None, 'b': True}]
+    }
+    decoded = decode_value(encode_value(value))
+
+    np.testing.assert_array_equal(decoded['array'], value['array'])
+    assert decoded['array'].dtype == np.int32
+    assert decoded['objects'].tolist() == ['a', None]
+    assert decoded['scalar'] == 1.5
+    assert decoded['pairs'] == {('old_bhopal', 'pm25'): 3, 7: 'seven'}
+    assert decoded['tuple'] == (1, 'two')
+    assert decoded['set'] == [3]
+    assert decoded['series'] == series
+    assert decoded['when'] == value['when']
+    assert decoded['day'] == value['day']
+    assert decoded['png'] == value['png']
+    assert decoded['nested'] == value['nested']
+
+
+def test_encode_value_refuses_arbitrary_objects():
+    with pytest.raises(TypeError, match='object'):
+        encode_value({'callback': object()})
+
+
+def test_decode_value_refuses_pickled_arrays():
+    # A blob written by someone with access to the cache directory, smuggling a pickle in an array
+    buffer = io.BytesIO()
+    np.save(buffer, np.array([{'payload': 1}], dtype=object), allow_pickle=True)
+    document = b'{"__array__":0}'
+    blob = struct.pack('<Q', len(document)) + document + struct.pack('<Q', buffer.tell()) + buffer.getvalue()
+    with pytest.raises(ValueError, match='allow_pickle'):
+        decode_value(blob)
+
+
+def test_snapshot_file_round_trips_parts(tmp_path):
+    path = str(tmp_path / 'analysis.snap')
+    write_snapshot_file(path, 4, 1700000000.0, 1.25, _parts())
+    snapshot_file = SnapshotFile(path)
+    parts = snapshot_file.parts()
+
+    assert snapshot_file.version == 4
+    assert snapshot_file.header['built_at'] == 1700000000.0
+    assert snapshot_file.header['build_seconds'] == 1.25
+    # String-keyed dicts are mapped per key; everything else is one decoded value
+    assert isinstance(parts['data'], MappedPart)
+    assert sorted(parts['data']) == ['new_bhopal', 'old_bhopal']
+    assert parts['data']['old_bhopal'] == _parts()['data']['old_bhopal']
+    assert dict(parts['summary']) == _parts()['summary']
+    np.testing.assert_array_equal(parts['history']['dates'], _parts()['history']['dates'])
+    np.testing.assert_array_equal(parts['history']['values']['score'], np.arange(4.0).reshape(2, 2))
+    assert parts['raster'] is None
+    assert parts['build_id'] == 'abc123'
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+
+def test_snapshot_file_rejects_other_formats(tmp_path):
+    path = tmp_path / 'analysis.snap'
+    path.write_bytes(struct.pack('<4sIQ', MAGIC, FORMAT_VERSION - 1, 2) + b'{}')
+    with pytest.raises(ValueError, match='analysis snapshot'):
+        SnapshotFile(str(path))
+
+    path.write_bytes(b'not a snapshot file at all')
+    with pytest.raises(ValueError, match='analysis snapshot'):
+        SnapshotFile(str(path))
+
+
+def test_mapped_part_keeps_only_the_most_recently_used_entries(tmp_path, monkeypatch):
+    path = str(tmp_path / 'analysis.snap')
+    write_snapshot_file(path, 1, 0.0, 0.0, {'data': {f'area_{i}': {'index': i} for i in range(5)}})
+    part = SnapshotFile(path, cache_size=2).parts()['data']
+
+    decoded = []
+    real_decode = snapshot_store.decode_value
+    monkeypatch.setattr(snapshot_store, 'decode_value', lambda blob: decoded.append(1) or real_decode(blob))
+
+    assert part['area_0'] == {'index': 0}
+    assert part['area_1'] == {'index': 1}
+    # area_0 is used again, so area_1 is the one evicted by area_2
+    assert part['area_0'] is part['area_0']
+    part['area_2']
+    assert list(part._cache) == ['area_0', 'area_2']
+    assert len(decoded) == 3
+
+    part['area_1']
+    assert len(decoded) == 4
+    assert list(part._cache) == ['area_2', 'area_1']
+    with pytest.raises(KeyError):
+        part['missing']
+
+
+def test_shared_store_remaps_only_when_the_file_changes(tmp_path):
+    store = SharedSnapshotStore(directory=str(tmp_path))
+    assert store.load() is None
+
+    first = store.publish(1, 0.5, _parts())
+    assert store.load() is first
+    assert store.load() is first
+    assert store.get_stats()['maps'] == 1
+
+    # Another worker's store publishing to the same directory replaces the file
+    SharedSnapshotStore(directory=str(tmp_path)).publish(2, 0.5, _parts())
+    second = store.load()
+    assert second is not first
+    assert second.version == 2
+    assert store.load() is second
+    stats = store.get_stats()
+    assert stats['maps'] == 2
+    assert stats['publishes'] == 1
+    assert stats['mapped_version'] == 2
+    assert stats['bytes'] == os.path.getsize(store.path)
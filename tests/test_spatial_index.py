@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from utils.spatial_index import PointIndex, ZoneIndex
+
+
+def _linear_nearest(lats, lons, q_lats, q_lons):
+    distance = np.sqrt((q_lats[:, None] - lats) ** 2 + (q_lons[:, None] - lons) ** 2)
+    # argmin returns the first of equal distances, like the index
+    return np.argmin(distance, axis=1), distance.min(axis=1)
+
+
+@pytest.mark.parametrize('n_points', [1, 7, 500, 5000])
+def test_point_index_matches_linear_scan(rng, n_points):
+    lats = rng.uniform(23.0, 23.5, n_points)
+    lons = rng.uniform(77.0, 77.8, n_points)
+    index = PointIndex(range(n_points), lats, lons)
+
+    # Queries inside, around and far outside the points
+    q_lats = rng.uniform(22.5, 24.0, 2000)
+    q_lons = rng.uniform(76.5, 78.3, 2000)
+    found, distance = index.nearest(q_lats, q_lons)
+    expected, expected_distance = _linear_nearest(lats, lons, q_lats, q_lons)
+
+    assert np.count_nonzero(found != expected) == 0
+    np.testing.assert_allclose(distance, expected_distance)
+
+
+def test_point_index_breaks_ties_towards_the_first_point():
+    # Two points on top of each other and a query equidistant from two others
+    index = PointIndex(['a', 'b', 'c', 'd'], [0.0, 1.0, 1.0, 0.0], [0.0, 0.0, 0.0, 2.0])
+    assert index.nearest_keys([1.0, 0.0], [0.0, 1.0]) == ['b', 'a']
+
+
+def test_point_index_skips_non_finite_queries():
+    index = PointIndex.from_dict({'a': (0.0, 0.0), 'b': (1.0, 1.0)})
+    found, distance = index.nearest([np.nan, 0.9], [0.0, 0.9])
+    assert found.tolist() == [-1, 1]
+    assert np.isinf(distance[0])
+    assert index.nearest_keys([np.nan], [0.0]) == [None]
+
+
+def test_zone_index_boxes_match_linear_scan(rng):
+    centres = np.column_stack([rng.uniform(23.0, 23.5, 400), rng.uniform(77.0, 77.8, 400)])
+    index = ZoneIndex.from_boxes(centres, 0.02)
+
+    q_lats = rng.uniform(22.9, 23.6, 5000)
+    q_lons = rng.uniform(76.9, 77.9, 5000)
+    inside = (np.abs(q_lats[:, None] - centres[:, 0]) < 0.02) & (np.abs(q_lons[:, None] - centres[:, 1]) < 0.02)
+    expected = np.where(inside.any(axis=1), np.argmax(inside, axis=1), -1)
+
+    assert np.count_nonzero(index.locate(q_lats, q_lons) != expected) == 0
+
+
+def test_zone_index_polygons_use_even_odd_rule():
+    square = [[0.0, 0.0], [4.0, 0.0], [4.0, 4.0], [0.0, 4.0], [0.0, 0.0]]
+    hole = [[1.0, 1.0], [3.0, 1.0], [3.0, 3.0], [1.0, 3.0]]
+    triangle = [[[5.0, 0.0], [7.0, 0.0], [6.0, 2.0]]]
+    source = {'features': [
+        {'properties': {'name': 'ring'}, 'geometry': {'type': 'Polygon', 'coordinates': [square, hole]}},
+        {'properties': {'name': 'triangle'}, 'geometry': {'type': 'MultiPolygon', 'coordinates': [triangle]}},
+        {'properties': {'name': 'line'}, 'geometry': {'type': 'LineString', 'coordinates': square}}
+    ]}
+    index = ZoneIndex.from_geojson(source)
+
+    # (lat, lon) points: in the ring, in the hole, in the triangle, beside it, outside everything
+    lats = [0.5, 2.0, 0.5, 1.9, 10.0]
+    lons = [0.5, 2.0, 6.0, 5.1, 10.0]
+    assert index.keys == ['ring', 'triangle']
+    assert index.locate_keys(lats, lons) == ['ring', None, 'triangle', None, None]
+    assert index.contains(lats, lons).tolist() == [True, False, True, False, False]
+
+
+def test_zone_index_overlaps_go_to_the_first_zone():
+    index = ZoneIndex.from_boxes([(0.0, 0.0), (0.5, 0.5)], 1.0, keys=['first', 'second'])
+    assert index.locate_keys([0.25, 1.2], [0.25, 1.2]) == ['first', 'second']
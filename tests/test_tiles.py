@@ -0,0 +1,198 @@
+import math
+import os
+import struct
+import threading
+import zlib
+import numpy as np
+import pytest
+from utils.png import encode_png
+from utils.raster import RasterGrid, RasterWriter
+from utils.tiles import MIN_OVERVIEW_SIZE, TILE_LAYERS, TILE_SIZE, TileServer, build_overviews, colorize, tile_centres
+
+BOUNDS = {'north': 23.30, 'south': 23.20, 'west': 77.35, 'east': 77.45}
+
+
+def _decode_png(payload):
+    """(height, width, 4) pixels of a PNG written by encode_png, checking every chunk CRC"""
+    assert payload[:8] == b'\x89PNG\r\n\x1a\n'
+    position, chunks = 8, {}
+    while position < len(payload):
+        (length,) = struct.unpack('>I', payload[position:position + 4])
+        tag, body = payload[position + 4:position + 8], payload[position + 8:position + 8 + length]
+        (crc,) = struct.unpack('>I', payload[position + 8 + length:position + 12 + length])
+        assert crc == zlib.crc32(tag + body) & 0xFFFFFFFF
+        chunks[tag] = body
+        position += 12 + length
+    width, height, depth, color_type = struct.unpack('>IIBB', chunks[b'IHDR'][:10])
+    assert (depth, color_type) == (8, 6)
+    raw = np.frombuffer(zlib.decompress(chunks[b'IDAT']), dtype=np.uint8).reshape(height, width * 4 + 1)
+    assert (raw[:, 0] == 0).all()
+    assert b'IEND' in chunks
+    return raw[:, 1:].reshape(height, width, 4)
+
+
+def _tile_of(lat, lon, z):
+    n = 2 ** z
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return x, y
+
+
+def _raster(directory, key='r1', rows=80, cols=80, fill=None):
+    """A raster whose sustainability score rises from 0 in the west to 100 in the east"""
+    grid = RasterGrid(BOUNDS, rows, cols)
+    surfaces = [spec['surface'] for spec in TILE_LAYERS.values()]
+    writer = RasterWriter(str(directory), grid, surfaces, extra_meta={'key': key})
+    score = np.tile(np.linspace(0.0, 100.0, cols, dtype=np.float32), (rows, 1))
+    if fill is not None:
+        score[:] = fill
+    writer.write('sustainability_score', 0, 0, score)
+    writer.write('ndvi', 0, 0, np.full((rows, cols), 0.4, dtype=np.float32))
+    writer.write('land_surface_temperature', 0, 0, np.full((rows, cols), np.nan, dtype=np.float32))
+    return writer.close()
+
+
+def test_encode_png_round_trips_rgba_pixels(rng):
+    pixels = rng.integers(0, 256, (5, 7, 4), dtype=np.uint8)
+    np.testing.assert_array_equal(_decode_png(encode_png(pixels)), pixels)
+    with pytest.raises(ValueError, match='RGBA'):
+        encode_png(np.zeros((5, 7, 3), dtype=np.uint8))
+
+
+def test_tile_centres_cover_the_tile_bounds():
+    lats, lons = tile_centres(0, 0, 0)
+    assert lats.shape == lons.shape == (TILE_SIZE,)
+    assert lons[0] == pytest.approx(-180.0 + 180.0 / TILE_SIZE)
+    assert lons[-1] == pytest.approx(180.0 - 180.0 / TILE_SIZE)
+    np.testing.assert_allclose(lats, -lats[::-1])
+    assert lats[0] < 85.06 and np.all(np.diff(lats) < 0)
+
+    # z=1, x=1, y=0 is the north-east quarter of the world
+    lats, lons = tile_centres(1, 1, 0)
+    assert 0.0 < lons.min() and lons.max() < 180.0
+    assert 0.0 < lats.min() and lats.max() < 85.06
+
+
+def test_colorize_maps_the_ramp_and_hides_nan():
+    pixels = colorize(np.array([[0.0, 50.0, 100.0, 150.0, np.nan]]), 'sustainability', opacity=0.5)
+    assert pixels[0, 0, :3].tolist() == [0xd7, 0x30, 0x27]
+    assert pixels[0, 1, :3].tolist() == [0xfe, 0xe0, 0x8b]
+    assert pixels[0, 2, :3].tolist() == [0x1a, 0x98, 0x50]
+    # Values beyond the range clamp to its end
+    assert pixels[0, 3, :3].tolist() == pixels[0, 2, :3].tolist()
+    assert pixels[0, :4, 3].tolist() == [128] * 4
+    assert pixels[0, 4, 3] == 0
+
+
+def test_build_overviews_mean_pool_ignoring_nan(tmp_path):
+    surface = np.arange(130 * 100, dtype=np.float32).reshape(130, 100)
+    surface[0, 0] = np.nan
+    levels = build_overviews(surface, str(tmp_path), 'score')
+
+    assert [factor for factor, _ in levels] == [1, 2, 4]
+    assert [level.shape for _, level in levels] == [(130, 100), (65, 50), (33, 25)]
+    assert max(levels[-1][1].shape) <= MIN_OVERVIEW_SIZE
+    half = levels[1][1]
+    assert half[0, 0] == pytest.approx((surface[0, 1] + surface[1, 0] + surface[1, 1]) / 3)
+    assert half[5, 7] == pytest.approx(surface[10:12, 14:16].mean())
+    # The odd last row of the 65-row level pools with padding only
+    assert levels[2][1][32, 0] == pytest.approx(np.nanmean(half[64, 0:2]))
+
+    assert sorted(os.listdir(tmp_path)) == ['score.2.f32', 'score.4.f32']
+    reloaded = build_overviews(np.zeros_like(surface), str(tmp_path), 'score')
+    np.testing.assert_array_equal(reloaded[2][1], levels[2][1])
+
+
+def test_tile_renders_the_raster_where_it_covers_the_tile(tmp_path):
+    raster = _raster(tmp_path / 'raster')
+    server = TileServer(cache_dir=str(tmp_path), disk_cache=False)
+    x, y = _tile_of(23.25, 77.40, 12)
+
+    pixels = _decode_png(server.tile(raster, 'sustainability', 12, x, y))
+    lats, lons = tile_centres(12, x, y)
+    inside = ((lats > BOUNDS['south']) & (lats < BOUNDS['north']))[:, None] & ((lons > BOUNDS['west']) & (lons < BOUNDS['east']))[None, :]
+    assert inside.any() and not inside.all()
+    np.testing.assert_array_equal(pixels[..., 3] > 0, inside)
+    # Red in the west of the raster, green in the east
+    row = np.flatnonzero(inside.any(axis=1))[0]
+    cols = np.flatnonzero(inside[row])
+    assert pixels[row, cols[0], 0] > pixels[row, cols[0], 1]
+    assert pixels[row, cols[-1], 1] > pixels[row, cols[-1], 0]
+
+    # All-NaN layers and tiles away from the raster are fully transparent
+    assert (_decode_png(server.tile(raster, 'lst', 12, x, y))[..., 3] == 0).all()
+    assert server.tile(raster, 'ndvi', 3, 0, 0) == server._empty
+    with pytest.raises(KeyError, match='layer'):
+        server.tile(raster, 'rainfall', 12, x, y)
+
+
+def test_tile_caches_in_memory_then_on_disk(tmp_path):
+    raster = _raster(tmp_path / 'raster')
+    x, y = _tile_of(23.25, 77.40, 13)
+    server = TileServer(cache_dir=str(tmp_path), disk_cache=True)
+
+    first = server.tile(raster, 'ndvi', 13, x, y)
+    assert server.tile(raster, 'ndvi', 13, x, y) is first
+    assert server.get_stats()['renders'] == 1 and server.get_stats()['hits'] == 1
+    assert os.path.exists(tmp_path / 'tiles' / 'r1' / 'ndvi' / '13' / str(x) / f'{y}.png')
+
+    other = TileServer(cache_dir=str(tmp_path), disk_cache=True)
+    assert other.tile(raster, 'ndvi', 13, x, y) == first
+    assert other.get_stats()['disk_hits'] == 1 and other.get_stats()['renders'] == 0
+
+    # A byte budget just below both tiles keeps only the latest one
+    second = server.tile(raster, 'ndvi', 13, x + 1, y)
+    small = TileServer(cache_dir=str(tmp_path), disk_cache=False, max_bytes=len(first) + len(second) - 1)
+    small.tile(raster, 'ndvi', 13, x, y)
+    assert small.tile(raster, 'ndvi', 13, x + 1, y) == second
+    assert small.get_stats()['entries'] == 1 and small.get_stats()['evictions'] == 1
+
+
+def test_publish_precomputes_overviews_and_prunes_old_tile_trees(tmp_path):
+    server = TileServer(cache_dir=str(tmp_path), disk_cache=True, keep=1)
+    first = _raster(tmp_path / 'raster1', key='r1', rows=200, cols=200)
+    server.publish(first)
+    assert sorted(os.listdir(tmp_path / 'raster1' / 'overviews')) == sorted(
+        f'{spec["surface"]}.{factor}.f32' for spec in TILE_LAYERS.values() for factor in (2, 4)
+    )
+    x, y = _tile_of(23.25, 77.40, 12)
+    server.tile(first, 'sustainability', 12, x, y)
+
+    second = _raster(tmp_path / 'raster2', key='r2', fill=50.0)
+    server.publish(second)
+    assert os.listdir(tmp_path / 'tiles') == ['r2']
+    assert server.get_stats()['pruned_rasters'] == 1
+    # Publishing the current raster again changes nothing
+    server.publish(second)
+    assert server.get_stats()['pruned_rasters'] == 1
+
+
+def test_publish_never_prunes_a_tree_with_a_render_in_flight(tmp_path):
+    server = TileServer(cache_dir=str(tmp_path), disk_cache=True, keep=1)
+    old, new = _raster(tmp_path / 'old', key='old'), _raster(tmp_path / 'new', key='new')
+    server.publish(old)
+    x, y = _tile_of(23.25, 77.40, 12)
+
+    rendering, release = threading.Event(), threading.Event()
+    render = server.render
+
+    def slow_render(*args):
+        rendering.set()
+        release.wait(10)
+        return render(*args)
+
+    server.render = slow_render
+    results = []
+    worker = threading.Thread(target=lambda: results.append(server.tile(old, 'ndvi', 12, x, y)))
+    worker.start()
+    assert rendering.wait(10)
+    server.publish(new)
+    assert sorted(os.listdir(tmp_path / 'tiles')) == ['new', 'old']
+    release.set()
+    worker.join(10)
+
+    assert results and _decode_png(results[0]).shape == (TILE_SIZE, TILE_SIZE, 4)
+    assert os.path.exists(tmp_path / 'tiles' / 'old' / 'ndvi' / '12' / str(x) / f'{y}.png')
+    # Once the render is done the old tree goes at the next publish
+    server.publish(_raster(tmp_path / 'newer', key='newer'))
+    assert os.listdir(tmp_path / 'tiles') == ['newer']
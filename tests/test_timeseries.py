@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+from utils.timeseries import POWER_FILL_VALUE, SEASONS, PowerSeries
+
+
+def _response(parameters, **extra):
+    return {'properties': {'parameter': parameters}, **extra}
+
+
+def _daily(start, end, value_for):
+    """{YYYYMMDD: value_for(day)} for every day in [start, end]"""
+    days = np.arange(np.datetime64(start), np.datetime64(end) + 1)
+    return {str(day).replace('-', ''): value_for(day) for day in days}
+
+
+def test_from_response_builds_sorted_typed_columns():
+    series = PowerSeries.from_response(_response({
+        'T2M': {'20240103': 3.0, '20240101': 1.0, '20240102': 2.0},
+        'ALLSKY_SFC_SW_DWN': {'20240102': 5.5, '20240101': 5.0}
+    }))
+
+    assert series.dates.dtype == np.dtype('datetime64[D]')
+    assert series.dates.tolist() == [np.datetime64('2024-01-01').item(), np.datetime64('2024-01-02').item(), np.datetime64('2024-01-03').item()]
+    assert series.columns['T2M'].dtype == np.float32
+    np.testing.assert_array_equal(series.columns['T2M'], [1.0, 2.0, 3.0])
+    # A parameter missing a day gets NaN there
+    np.testing.assert_array_equal(series.columns['ALLSKY_SFC_SW_DWN'], [5.0, 5.5, np.nan])
+    assert len(series) == 3
+    assert 'T2M' in series and 'WS2M' not in series
+    assert series.source == 'NASA POWER API' and not series.simulated
+
+
+def test_fill_values_and_non_daily_keys_are_dropped():
+    series = PowerSeries.from_response(_response({
+        'T2M': {'20240101': POWER_FILL_VALUE, '20240102': 4.0, '20240103': None, '202401': 9.9, 'ANN': 8.8}
+    }))
+
+    assert len(series) == 3
+    np.testing.assert_array_equal(series.columns['T2M'], [np.nan, 4.0, np.nan])
+    assert series.mean('T2M') == 4.0
+    assert PowerSeries.from_response(_response({'T2M': {'20240101': POWER_FILL_VALUE}})).mean('T2M') is None
+    assert series.mean('WS2M') is None
+
+
+def test_from_response_handles_empty_and_simulated_payloads():
+    empty = PowerSeries.from_response(None)
+    assert len(empty) == 0 and empty.columns == {}
+    months, means = empty.monthly('T2M')
+    assert len(months) == 0 and len(means) == 0
+    assert empty.annual('T2M') == {}
+
+    simulated = PowerSeries.from_response(_response({'T2M': {'20240101': 1.0}}, simulated=True))
+    assert simulated.simulated and simulated.source == 'Simulated'
+    assert PowerSeries.from_response(simulated) is simulated
+
+
+def test_monthly_means_cover_every_month_in_range():
+    # February is missing entirely and one March day holds the fill value
+    days = {**_daily('2024-01-01', '2024-01-31', lambda day: 1.0), **_daily('2024-03-01', '2024-03-31', lambda day: 3.0)}
+    days['20240315'] = POWER_FILL_VALUE
+    days['20240316'] = 34.0
+    series = PowerSeries.from_response(_response({'T2M': days}))
+
+    months, means = series.monthly('T2M')
+    assert months.dtype == np.dtype('datetime64[M]')
+    assert [str(month) for month in months] == ['2024-01', '2024-02', '2024-03']
+    np.testing.assert_allclose(means, [1.0, np.nan, (3.0 * 29 + 34.0) / 30])
+
+
+def test_seasonal_means_group_months_across_years():
+    # Each day's value is its calendar month, over two full years
+    series = PowerSeries.from_response(_response({
+        'T2M': _daily('2022-01-01', '2023-12-31', lambda day: float(day.astype('datetime64[M]').astype(int) % 12 + 1))
+    }))
+    seasonal = series.seasonal('T2M')
+
+    assert list(seasonal) == list(SEASONS)
+    # Winter mixes December (31 days) with January (31) and February (28 per year)
+    assert seasonal['winter'] == round((12 * 31 + 1 * 31 + 2 * 28) / 90, 3)
+    assert seasonal['summer'] == round((3 * 31 + 4 * 30 + 5 * 31) / 92, 3)
+    assert seasonal['monsoon'] == round((6 * 30 + 7 * 31 + 8 * 31 + 9 * 30) / 122, 3)
+    assert seasonal['post_monsoon'] == round((10 * 31 + 11 * 30) / 61, 3)
+    assert series.annual('T2M') == {2022: pytest.approx(6.526, abs=1e-3), 2023: pytest.approx(6.526, abs=1e-3)}
+
+
+def test_seasonal_reports_none_for_seasons_without_data():
+    series = PowerSeries.from_response(_response({'T2M': _daily('2024-06-01', '2024-06-30', lambda day: 30.0)}))
+    assert series.seasonal('T2M') == {'winter': None, 'summer': None, 'monsoon': 30.0, 'post_monsoon': None}
+    assert series.seasonal('WS2M') == dict.fromkeys(SEASONS)
+
+
+def test_equality_compares_dates_columns_and_provenance():
+    def make(**overrides):
+        fields = {
+            'dates': np.array(['2024-01-01', '2024-01-02'], dtype='datetime64[D]'),
+            'columns': {'T2M': np.array([1.0, np.nan], dtype=np.float32)},
+            'simulated': False,
+            'source': 'NASA POWER API'
+        }
+        fields.update(overrides)
+        return PowerSeries(fields['dates'], fields['columns'], simulated=fields['simulated'], source=fields['source'])
+
+    # NaN in the same place counts as equal
+    assert make() == make()
+    assert make() != make(columns={'T2M': np.array([1.0, 2.0], dtype=np.float32)})
+    assert make() != make(columns={'T2M': np.array([1.0, np.nan], dtype=np.float32), 'WS2M': np.zeros(2, dtype=np.float32)})
+    assert make() != make(dates=np.array(['2024-01-01', '2024-01-03'], dtype='datetime64[D]'))
+    assert make() != make(simulated=True)
+    assert make() != make(source='cache')
+    assert make() != {'T2M': [1.0, None]}
+    with pytest.raises(TypeError):
+        hash(make())
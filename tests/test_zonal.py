@@ -0,0 +1,130 @@
+import numpy as np
+import pytest
+from utils.area_registry import AreaRegistry
+from utils.raster import RasterGrid
+from utils.zonal import ZonalStats, ZoneMasks, rasterize_zones, zonal_mean_stack, zonal_reduce
+
+# 10 x 10 pixels of 0.1 degrees; pixel (r, c) is centred at lat 0.95 - 0.1 r, lon 0.05 + 0.1 c
+BOUNDS = {'north': 1.0, 'south': 0.0, 'west': 0.0, 'east': 1.0}
+RADIUS = 0.25
+
+
+@pytest.fixture
+def registry():
+    """A polygon over the western half, a point in the east and a point off the grid"""
+    registry = AreaRegistry.from_records({
+        'west': {'lat': 0.5, 'lon': 0.25},
+        'east': {'lat': 0.55, 'lon': 0.85},
+        'far': {'lat': 5.0, 'lon': 5.0}
+    })
+    registry.geometries = {'west': {'type': 'Polygon', 'coordinates': [[[0.0, 0.0], [0.5, 0.0], [0.5, 1.0], [0.0, 1.0], [0.0, 0.0]]]}}
+    return registry
+
+
+@pytest.fixture
+def grid():
+    return RasterGrid(BOUNDS, 10, 10, tile_size=3)
+
+
+def _expected_labels():
+    lats, lons = RasterGrid(BOUNDS, 10, 10).centres(0, 10, 0, 10)
+    labels = np.full((10, 10), -1)
+    labels[lons < 0.5] = 0
+    near_east = np.hypot(lats - 0.55, lons - 0.85) <= RADIUS
+    labels[(labels < 0) & near_east] = 1
+    return labels
+
+
+def test_rasterize_zones_assigns_polygons_then_nearby_points(registry, grid):
+    masks = rasterize_zones(registry, grid, radius=RADIUS, key='k')
+
+    np.testing.assert_array_equal(masks.labels(), _expected_labels())
+    assert masks.zone_keys == ['west', 'east', 'far']
+    assert masks.counts.tolist() == [50, int((_expected_labels() == 1).sum()), 0]
+    assert masks.row_range == (0, 10)
+
+
+def test_zonal_reduce_matches_numpy_on_a_known_grid(registry, grid):
+    masks = rasterize_zones(registry, grid, radius=RADIUS)
+    values = np.arange(100, dtype=np.float64).reshape(10, 10)
+    values[0, 0] = np.nan
+    values[1, 1] = -9999.0
+    labels = _expected_labels()
+
+    stats = zonal_reduce(masks, values, percentiles=(25, 50, 90), nodata=-9999.0)
+    for z, zone_key in enumerate(['west', 'east']):
+        zone = values[(labels == z) & np.isfinite(values) & (values != -9999.0)]
+        assert stats[zone_key]['pixels'] == int((labels == z).sum())
+        assert stats[zone_key]['count'] == zone.size
+        assert stats[zone_key]['mean'] == round(zone.mean(), 4)
+        assert stats[zone_key]['std'] == round(zone.std(), 4)
+        assert stats[zone_key]['min'] == zone.min() and stats[zone_key]['max'] == zone.max()
+        for q in (25, 50, 90):
+            assert stats[zone_key][f'p{q}'] == round(float(np.percentile(zone, q)), 4)
+    assert stats['far'] == {'pixels': 0, 'count': 0, 'mean': None, 'std': None, 'min': None, 'max': None, 'p25': None, 'p50': None, 'p90': None}
+
+
+def test_zonal_reduce_histograms_and_class_counts(registry, grid):
+    masks = rasterize_zones(registry, grid, radius=RADIUS)
+    values = np.tile(np.arange(10, dtype=np.float64), (10, 1))
+
+    stats = zonal_reduce(masks, values, percentiles=(), bins=[0, 2, 5, 9])
+    assert stats['west']['histogram'] == {'edges': [0.0, 2.0, 5.0, 9.0], 'counts': [20, 30, 0]}
+    east = values[_expected_labels() == 1]
+    assert stats['east']['histogram']['counts'] == np.histogram(east, bins=[0, 2, 5, 9])[0].tolist()
+
+    classes = zonal_reduce(masks, values, percentiles=(), categorical=True)
+    assert classes['west']['classes'] == {str(c): 10 for c in range(5)}
+    assert sum(classes['east']['classes'].values()) == east.size
+    assert classes['far']['classes'] == {}
+
+
+def test_zonal_mean_stack_matches_per_step_means(registry, grid, rng):
+    masks = rasterize_zones(registry, grid, radius=RADIUS)
+    stack = rng.normal(size=(4, 10, 10))
+    stack[1, _expected_labels() == 1] = np.nan
+    labels = _expected_labels()
+
+    means = zonal_mean_stack(masks, stack)
+    assert means.shape == (4, 3)
+    for step in range(4):
+        np.testing.assert_allclose(means[step, 0], np.nanmean(stack[step][labels == 0]))
+    assert np.isnan(means[1, 1]) and np.isfinite(means[0, 1])
+    assert np.isnan(means[:, 2]).all()
+
+
+def test_zonal_stats_caches_masks_in_memory_and_on_disk(registry, grid, tmp_path):
+    engine = ZonalStats(registry, radius=RADIUS, cache_dir=str(tmp_path))
+    values = np.ones((10, 10))
+
+    first = engine.compute(values, grid)
+    assert engine.masks(grid) is engine.masks(grid)
+    assert engine.get_stats() == {'hits': 2, 'disk_hits': 0, 'rasterized': 1, 'grids': 1, 'zones': 3}
+
+    other = ZonalStats(registry, radius=RADIUS, cache_dir=str(tmp_path))
+    assert other.compute(values, grid) == first
+    assert other.stats['disk_hits'] == 1 and other.stats['rasterized'] == 0
+
+    # Different zone definitions never reuse the saved masks
+    narrow = ZonalStats(registry, radius=0.05, cache_dir=str(tmp_path))
+    narrow.masks(grid)
+    assert narrow.stats['rasterized'] == 1
+
+
+def test_zone_masks_round_trip_and_row_range(registry, tmp_path):
+    # Only the lower half of a taller grid is covered, so compute reads just those rows
+    registry.geometries = {}
+    grid = RasterGrid({'north': 2.0, 'south': 0.0, 'west': 0.0, 'east': 1.0}, 20, 10)
+    masks = rasterize_zones(registry, grid, radius=RADIUS, key='abc')
+    assert masks.row_range[0] >= 10
+
+    path = str(tmp_path / 'zones' / 'abc.npz')
+    masks.save(path)
+    loaded = ZoneMasks.load(path)
+    assert loaded.key == 'abc' and loaded.zone_keys == masks.zone_keys and loaded.shape == masks.shape
+    np.testing.assert_array_equal(loaded.labels(), masks.labels())
+
+    values = np.arange(200, dtype=np.float64).reshape(20, 10)
+    full = zonal_reduce(masks, values)
+    r0, r1 = masks.row_range
+    assert zonal_reduce(masks, values[r0:r1], r0) == full
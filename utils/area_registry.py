@@ -0,0 +1,256 @@
+import json
+import os
+import re
+import threading
+from collections.abc import Mapping
+import numpy as np
+import pandas as pd
+from config.nasa_config import NASAConfig
+from utils.spatial_index import PointIndex
+
+# Flat column names accepted from CSV/Parquet headers and GeoJSON properties
+COLUMN_ALIASES = {
+    'latitude': 'lat',
+    'longitude': 'lon',
+    'lng': 'lon',
+    'area': 'name'
+}
+
+# Text fields kept as object columns; every other scalar field is numeric
+TEXT_FIELDS = {'name', 'type', 'display_name', 'display_type', 'description'}
+LIST_FIELDS = {'key_concerns'}
+
+
+def _slug(name):
+    return re.sub(r'[^a-z0-9]+', '_', str(name).lower()).strip('_')
+
+
+def _flatten(record, prefix=''):
+    """{'energy_consumption': {'solar_energy': 15}} -> {'energy_consumption.solar_energy': 15}"""
+    flat = {}
+    for field, value in record.items():
+        name = f'{prefix}{field}'
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f'{name}.'))
+        else:
+            flat[COLUMN_ALIASES.get(name, name)] = value
+    return flat
+
+
+def _point_of(geometry):
+    """(lat, lon) for a Point, or the vertex mean of a polygon's outer ring"""
+    kind = geometry.get('type')
+    coords = geometry.get('coordinates')
+    if kind == 'Point':
+        return coords[1], coords[0]
+    if kind == 'Polygon':
+        ring = np.asarray(coords[0], dtype=np.float64)
+    elif kind == 'MultiPolygon':
+        ring = np.asarray(coords[0][0], dtype=np.float64)
+    else:
+        return None
+    return float(ring[:, 1].mean()), float(ring[:, 0].mean())
+
+
+class AreaRegistry(Mapping):
+    """Study areas held as columns rather than one dict per area.
+
+    Numeric fields are float64 arrays (NaN where an area has no value), text
+    and list fields are object arrays. Nested fields such as
+    energy_consumption.solar_energy are stored flat under dotted names.
+    registry[key] builds the familiar nested per-area dict on first access and
+    then returns that same dict, so existing per-area code keeps working
+    without rebuilding it per call, while batch code reads columns. Records
+    are shared and must be treated as read-only.
+    """
+
+    __slots__ = ('_keys', '_positions', 'columns', '_integer', '_point_index', '_records', 'source', 'geometries')
+
+    def __init__(self, keys, columns, integer_columns=(), source=None, geometries=None):
+        self._keys = list(keys)
+        self._positions = {key: row for row, key in enumerate(self._keys)}
+        if len(self._positions) != len(self._keys):
+            raise ValueError('Area keys must be unique')
+        self.columns = columns
+        self._integer = set(integer_columns)
+        self._point_index = None
+        self._records = {}
+        self.source = source
+        # Polygon/MultiPolygon geometry by key, for areas loaded from GeoJSON features with one
+        self.geometries = dict(geometries or {})
+        for required in ('lat', 'lon'):
+            if required not in columns:
+                raise ValueError(f"Area registry needs a '{required}' column")
+
+    @classmethod
+    def from_records(cls, records, source=None):
+        """Build from {key: record} or [(key, record)] with nested or dotted fields"""
+        items = list(records.items()) if isinstance(records, dict) else list(records)
+        flat = [(key, _flatten(record)) for key, record in items]
+        n = len(flat)
+
+        names = []
+        for _, record in flat:
+            names.extend(name for name in record if name not in names)
+
+        columns, integer_columns = {}, []
+        for name in names:
+            values = [record.get(name) for _, record in flat]
+            if name in TEXT_FIELDS or name in LIST_FIELDS or any(isinstance(v, (str, list)) for v in values):
+                column = np.empty(n, dtype=object)
+                column[:] = [list(v) if isinstance(v, (list, tuple)) else v for v in values]
+            else:
+                present = [v for v in values if v is not None]
+                column = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+                if present and all(isinstance(v, (int, np.integer)) and not isinstance(v, bool) for v in present):
+                    integer_columns.append(name)
+            columns[name] = column
+
+        return cls([key for key, _ in flat], columns, integer_columns, source)
+
+    @classmethod
+    def from_frame(cls, frame, source=None):
+        """Build from a DataFrame with one row per area (CSV/Parquet)"""
+        frame = frame.rename(columns=lambda c: COLUMN_ALIASES.get(str(c).strip(), str(c).strip()))
+        if 'key' in frame.columns:
+            keys = frame['key'].astype(str).tolist()
+        else:
+            keys = [_slug(name) for name in frame['name']]
+
+        columns, integer_columns = {}, []
+        for name in frame.columns:
+            if name == 'key':
+                continue
+            series = frame[name]
+            if name in LIST_FIELDS:
+                column = np.empty(len(frame), dtype=object)
+                column[:] = [v.split(';') if isinstance(v, str) else [] for v in series]
+            elif name in TEXT_FIELDS or not pd.api.types.is_numeric_dtype(series):
+                column = series.to_numpy(dtype=object)
+            else:
+                column = series.to_numpy(dtype=np.float64)
+                if pd.api.types.is_integer_dtype(series):
+                    integer_columns.append(name)
+            columns[name] = column
+
+        return cls(keys, columns, integer_columns, source)
+
+    @classmethod
+    def load(cls, path):
+        """Load a registry from .json/.geojson, .csv or .parquet"""
+        extension = os.path.splitext(path)[1].lower()
+        if extension == '.csv':
+            return cls.from_frame(pd.read_csv(path), source=path)
+        if extension == '.parquet':
+            return cls.from_frame(pd.read_parquet(path), source=path)
+
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('type') != 'FeatureCollection':
+            return cls.from_records(data, source=path)
+
+        records, geometries = [], {}
+        for position, feature in enumerate(data.get('features', [])):
+            properties = dict(feature.get('properties') or {})
+            geometry = feature.get('geometry') or {}
+            point = _point_of(geometry)
+            if point is not None:
+                properties.setdefault('lat', point[0])
+                properties.setdefault('lon', point[1])
+            key = str(properties.pop('key', None) or feature.get('id') or _slug(properties.get('name', position)))
+            if geometry.get('type') in ('Polygon', 'MultiPolygon'):
+                geometries[key] = geometry
+            records.append((key, properties))
+        registry = cls.from_records(records, source=path)
+        registry.geometries = geometries
+        return registry
+
+    def __getitem__(self, key):
+        return self.record(key)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._positions
+
+    def position(self, key):
+        return self._positions[key]
+
+    def column(self, name, default=np.nan):
+        """Numeric column with missing values replaced by default"""
+        values = self.columns.get(name)
+        if values is None:
+            return np.full(len(self), default, dtype=np.float64)
+        return np.where(np.isnan(values), default, values) if values.dtype == np.float64 else values
+
+    def coordinates(self):
+        return list(zip(self.columns['lat'].tolist(), self.columns['lon'].tolist()))
+
+    def record(self, key):
+        """Nested per-area dict in the shape the processor has always used, built once per key"""
+        record = self._records.get(key)
+        if record is None:
+            record = self._records.setdefault(key, self._build_record(key))
+        return record
+
+    def _build_record(self, key):
+        row = self._positions[key]
+        record = {}
+        for name, values in self.columns.items():
+            value = values[row]
+            if value is None or (isinstance(value, float) and np.isnan(value)):
+                continue
+            if values.dtype == np.float64:
+                value = int(value) if name in self._integer else float(value)
+            elif isinstance(value, list):
+                value = list(value)
+            target = record
+            *parents, leaf = name.split('.')
+            for parent in parents:
+                target = target.setdefault(parent, {})
+            target[leaf] = value
+        return record
+
+    def mappings(self):
+        """Display metadata keyed by area, as templates expect for area_mappings"""
+        mappings = {}
+        for key, row in self._positions.items():
+            mappings[key] = {
+                'name': self._text('display_name', row) or self._text('name', row),
+                'description': self._text('description', row) or '',
+                'type': self._text('display_type', row) or self._text('type', row),
+                'coordinates': [float(self.columns['lat'][row]), float(self.columns['lon'][row])]
+            }
+        return mappings
+
+    def _text(self, name, row):
+        values = self.columns.get(name)
+        return None if values is None else values[row]
+
+    def nearest(self, lats, lons):
+        """(row, distance in degrees) of the nearest area for every coordinate, via a lazily built PointIndex"""
+        if self._point_index is None:
+            self._point_index = PointIndex(self._keys, self.columns['lat'], self.columns['lon'])
+        return self._point_index.nearest(lats, lons)
+
+    def nearest_keys(self, lats, lons):
+        """Nearest area key for every coordinate"""
+        rows, _ = self.nearest(lats, lons)
+        return [self._keys[row] if row >= 0 else None for row in rows]
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_area_registry(path=None):
+    """Return the process-wide registry for path (NASAConfig.AREAS_FILE by default), loading it once"""
+    path = os.path.abspath(path or NASAConfig.AREAS_FILE)
+    with _registries_lock:
+        if path not in _registries:
+            _registries[path] = AreaRegistry.load(path)
+        return _registries[path]
@@ -0,0 +1,161 @@
+import threading
+import time
+from collections import deque
+import numpy as np
+from config.nasa_config import NASAConfig
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = [0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, float('inf')]
+
+
+class CircuitBreaker:
+    """Per-endpoint circuit breaker with latency-percentile adaptive timeouts.
+
+    After failure_threshold consecutive failures the breaker opens and callers
+    fail fast to cached or simulated data. A background probe (or, without one,
+    the first call after the cooldown) tests the endpoint and closes it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, endpoint, probe=None):
+        self.endpoint = endpoint
+        self.probe = probe
+        self.failure_threshold = NASAConfig.BREAKER_FAILURE_THRESHOLD
+        self.cooldown = NASAConfig.BREAKER_COOLDOWN
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.latencies = deque(maxlen=NASAConfig.LATENCY_WINDOW)
+        self.histogram = [0] * len(LATENCY_BUCKETS)
+        self.counts = {'success': 0, 'failure': 0, 'rejected': 0, 'opened': 0, 'probes': 0}
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """Return False when the call should fail fast"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.probe is None and time.time() - self.opened_at >= self.cooldown:
+                # No background probe: let one trial call through
+                self.state = self.HALF_OPEN
+                return True
+            self.counts['rejected'] += 1
+            return False
+
+    def timeout(self):
+        """Adaptive timeout from the recent latency percentile, clamped to the configured range"""
+        with self._lock:
+            samples = list(self.latencies)
+        if len(samples) < NASAConfig.ADAPTIVE_TIMEOUT_MIN_SAMPLES:
+            return NASAConfig.ADAPTIVE_TIMEOUT_MAX
+        observed = float(np.percentile(samples, NASAConfig.ADAPTIVE_TIMEOUT_PERCENTILE))
+        adaptive = observed * NASAConfig.ADAPTIVE_TIMEOUT_MULTIPLIER
+        return round(min(NASAConfig.ADAPTIVE_TIMEOUT_MAX, max(NASAConfig.ADAPTIVE_TIMEOUT_MIN, adaptive)), 3)
+
+    def record_success(self, latency):
+        with self._lock:
+            self._observe(latency)
+            self.counts['success'] += 1
+            self.consecutive_failures = 0
+            self.state = self.CLOSED
+            self.opened_at = None
+
+    def record_failure(self, latency=None):
+        with self._lock:
+            if latency is not None:
+                self._observe(latency)
+            self.counts['failure'] += 1
+            self.consecutive_failures += 1
+            should_open = self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold
+            if should_open and self.state != self.OPEN:
+                self.state = self.OPEN
+                self.opened_at = time.time()
+                self.counts['opened'] += 1
+                print(f"Circuit breaker for {self.endpoint} opened after {self.consecutive_failures} failures")
+        if should_open:
+            self._start_probe()
+
+    def get_state(self):
+        with self._lock:
+            samples = list(self.latencies)
+            state = {
+                'endpoint': self.endpoint,
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'opened_at': self.opened_at,
+                'counts': dict(self.counts),
+                'histogram': {
+                    (f'le_{bound}' if bound != float('inf') else 'le_inf'): count
+                    for bound, count in zip(LATENCY_BUCKETS, self.histogram)
+                }
+            }
+        state['timeout'] = self.timeout()
+        if samples:
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+            state['latency'] = {'p50': round(float(p50), 4), 'p95': round(float(p95), 4), 'p99': round(float(p99), 4), 'samples': len(samples)}
+        return state
+
+    def _observe(self, latency):
+        self.latencies.append(latency)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if latency <= bound:
+                self.histogram[i] += 1
+                break
+
+    def _start_probe(self):
+        with self._lock:
+            if self.probe is None or self._probing:
+                return
+            self._probing = True
+        threading.Thread(target=self._probe_loop, daemon=True).start()
+
+    def _probe_loop(self):
+        delay = self.cooldown
+        try:
+            while True:
+                time.sleep(delay)
+                with self._lock:
+                    self.state = self.HALF_OPEN
+                    self.counts['probes'] += 1
+                started = time.perf_counter()
+                try:
+                    healthy = self.probe(self.timeout())
+                except Exception as e:
+                    print(f"Probe for {self.endpoint} failed: {e}")
+                    healthy = False
+                if healthy:
+                    self.record_success(time.perf_counter() - started)
+                    print(f"Circuit breaker for {self.endpoint} closed after successful probe")
+                    return
+                with self._lock:
+                    self.state = self.OPEN
+                    self.opened_at = time.time()
+                delay = min(delay * 2, NASAConfig.BREAKER_MAX_COOLDOWN)
+        finally:
+            with self._lock:
+                self._probing = False
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(endpoint, probe=None):
+    """Return the process-wide breaker for an endpoint, registering its probe on first use"""
+    with _breakers_lock:
+        breaker = _breakers.get(endpoint)
+        if breaker is None:
+            breaker = _breakers[endpoint] = CircuitBreaker(endpoint, probe)
+        elif breaker.probe is None and probe is not None:
+            breaker.probe = probe
+        return breaker
+
+
+def get_breaker_states():
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.endpoint: breaker.get_state() for breaker in breakers}
@@ -0,0 +1,65 @@
+import json
+import os
+import threading
+from config.nasa_config import NASAConfig
+
+
+class City:
+    """A study city: display name, bounding box and area registry file"""
+
+    __slots__ = ('key', 'name', 'bounds', 'areas_file')
+
+    def __init__(self, key, name, bounds, areas_file):
+        self.key = key
+        self.name = name
+        self.bounds = {side: float(bounds[side]) for side in ('north', 'south', 'east', 'west')}
+        self.areas_file = areas_file
+
+    def to_dict(self):
+        return {'key': self.key, 'name': self.name, 'bounds': self.bounds, 'areas_file': self.areas_file}
+
+    def __repr__(self):
+        return f'City({self.key!r})'
+
+
+def load_cities(path=None):
+    """Bhopal from the base config plus every city in the CITIES_FILE JSON"""
+    cities = {'bhopal': City('bhopal', 'Bhopal', NASAConfig.BHOPAL_BOUNDS, NASAConfig.AREAS_FILE)}
+    path = path if path is not None else NASAConfig.CITIES_FILE
+    if not path:
+        return cities
+
+    with open(path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(path))
+    for key, entry in entries.items():
+        missing = [field for field in ('bounds', 'areas_file') if field not in entry]
+        if missing:
+            raise ValueError(f"City {key} in {path} is missing {', '.join(missing)}")
+        areas_file = entry['areas_file']
+        if not os.path.isabs(areas_file):
+            areas_file = os.path.join(base_dir, areas_file)
+        cities[key] = City(key, entry.get('name', key.replace('_', ' ').title()), entry['bounds'], areas_file)
+    return cities
+
+
+_cities = None
+_cities_lock = threading.Lock()
+
+
+def get_cities():
+    """Return the process-wide city table, loading it once"""
+    global _cities
+    with _cities_lock:
+        if _cities is None:
+            _cities = load_cities()
+        return _cities
+
+
+def get_city(key=None):
+    """City by key (NASAConfig.DEFAULT_CITY by default)"""
+    key = key or NASAConfig.DEFAULT_CITY
+    cities = get_cities()
+    if key not in cities:
+        raise KeyError(f"Unknown city: {key} (known: {', '.join(cities)})")
+    return cities[key]
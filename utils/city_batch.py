@@ -0,0 +1,119 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from config.nasa_config import NASAConfig
+from utils.cities import get_cities, get_city
+from utils.geo_export import write_geojson
+
+# NASAConfig attributes copied into every pool worker, so overrides made by the
+# caller (stand-in URLs, cache location, city file) also apply there
+WORKER_CONFIG = ('APIS', 'CACHE_DIR', 'CITIES_FILE', 'SIMULATION_SEED', 'POWER_FETCH_MODE')
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+
+def _write_atomic(path, write):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def write_city_snapshot(city_dir, city, analysis, seconds):
+    """Write analysis.json (full results plus run metadata) and areas.geojson for one city"""
+    os.makedirs(city_dir, exist_ok=True)
+    snapshot = {
+        'city': city.to_dict(),
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'seconds': seconds,
+        'areas': analysis
+    }
+    _write_atomic(os.path.join(city_dir, 'analysis.json'), lambda f: json.dump(snapshot, f, default=_json_default))
+    _write_atomic(os.path.join(city_dir, 'areas.geojson'), lambda f: write_geojson(analysis, f))
+
+
+def _init_worker(config):
+    for name, value in config.items():
+        setattr(NASAConfig, name, value)
+
+
+def process_city(city_key, output_dir):
+    """Fetch and score every area of one city and write its snapshot; runs in a pool worker"""
+    from utils.data_processing import CityDataProcessor
+    from utils.nasa_api import NASAAPI
+
+    city = get_city(city_key)
+    started = time.perf_counter()
+    processor = CityDataProcessor(city=city)
+    analysis = processor.generate_area_analysis(NASAAPI(city=city))
+    seconds = round(time.perf_counter() - started, 3)
+
+    city_dir = os.path.join(output_dir, city.key)
+    write_city_snapshot(city_dir, city, analysis, seconds)
+    return {'city': city.key, 'areas': len(analysis), 'seconds': seconds, 'pid': os.getpid(), 'snapshot': city_dir}
+
+
+def run_cities(city_keys=None, processes=None, output_dir=None):
+    """Shard cities across a process pool and write one snapshot directory per city.
+
+    Returns per-city results plus throughput in cities per minute and areas
+    per second of wall-clock time. A failing city is reported with its
+    error and does not stop the others.
+    """
+    city_keys = list(city_keys or get_cities())
+    for city_key in city_keys:
+        get_city(city_key)
+    processes = max(1, min(processes or NASAConfig.CITY_BATCH_PROCESSES, len(city_keys)))
+    output_dir = output_dir or os.path.join(NASAConfig.CACHE_DIR, 'cities')
+    config = {name: getattr(NASAConfig, name) for name in WORKER_CONFIG}
+
+    results = {}
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(config,)) as executor:
+        futures = {executor.submit(process_city, city_key, output_dir): city_key for city_key in city_keys}
+        for future in as_completed(futures):
+            city_key = futures[future]
+            try:
+                results[city_key] = future.result()
+                print(f"✅ {city_key}: {results[city_key]['areas']} areas in {results[city_key]['seconds']}s")
+            except Exception as e:
+                results[city_key] = {'city': city_key, 'error': str(e)}
+                print(f"⚠️ {city_key} failed: {e}")
+    elapsed = time.perf_counter() - started
+
+    completed = [result for result in results.values() if 'error' not in result]
+    areas = sum(result['areas'] for result in completed)
+    return {
+        'processes': processes,
+        'output_dir': output_dir,
+        'cities': [results[city_key] for city_key in city_keys],
+        'completed': len(completed),
+        'failed': len(results) - len(completed),
+        'seconds': round(elapsed, 3),
+        'cities_per_minute': round(len(completed) / elapsed * 60, 2) if elapsed else 0.0,
+        'areas_per_second': round(areas / elapsed, 2) if elapsed else 0.0
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Score several cities in parallel and write per-city snapshots')
+    parser.add_argument('--cities', help='comma-separated city keys (default: every configured city)')
+    parser.add_argument('--processes', type=int, help='pool size (default: CITY_BATCH_PROCESSES)')
+    parser.add_argument('--output', help='snapshot directory (default: CACHE_DIR/cities)')
+    args = parser.parse_args(argv)
+
+    city_keys = [key for key in (args.cities or '').split(',') if key] or None
+    print(json.dumps(run_cities(city_keys, args.processes, args.output), indent=2))
+
+
+if __name__ == '__main__':
+    main()
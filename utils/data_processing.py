@@ -1,140 +1,68 @@
 import pandas as pd
 import numpy as np
 import json
+import os
+import time
 from datetime import datetime
+from config.nasa_config import NASAConfig
+from utils.fanout import get_fanout
+from utils.timeseries import PowerSeries
+from utils.area_registry import AreaRegistry, get_area_registry
+from utils.cities import City, get_city
+from utils.dependency_graph import DependencyGraph
+from utils.memo import get_memo, stable_hash
+from utils.history import get_history_store
+from utils.raster import INPUT_SURFACES, RASTER_SURFACES, RasterGrid, RasterWriter, ScoreRaster, idw_interpolate, prune_renders
+from utils.geo_export import DEFAULT_CHUNK_SIZE, iter_features, iter_geojson, write_geoparquet, write_flatgeobuf
 
-class BhopalDataProcessor:
-    def __init__(self):
-        self.areas = {
-            "old_bhopal": {
-                "name": "Old Bhopal",
-                "lat": 23.2599, "lon": 77.4126,
-                "type": "Mixed Use", "temperature": 35.8,
-                "population_density": 12000, "green_cover": 15.0,
-                "pollution_index": 82,
-                "energy_consumption": {
-                    "grid_electricity": 72, "solar_energy": 15,
-                    "battery_storage": 8, "generator_backup": 5
-                },
-                "transportation": {
-                    "private_vehicles": 45, "public_transport": 30,
-                    "two_wheelers": 15, "walking_cycling": 10
-                },
-                "key_concerns": [
-                    "High density", "Low green cover",
-                    "Traffic congestion", "Air pollution"
-                ]
-            },
-            "new_bhopal": {
-                "name": "New Bhopal",
-                "lat": 23.2278, "lon": 77.4357,
-                "type": "Residential/Commercial", "temperature": 32.5,
-                "population_density": 8500, "green_cover": 28.0,
-                "pollution_index": 56,
-                "energy_consumption": {
-                    "grid_electricity": 65, "solar_energy": 22,
-                    "battery_storage": 10, "generator_backup": 3
-                },
-                "transportation": {
-                    "private_vehicles": 40, "public_transport": 35,
-                    "two_wheelers": 15, "walking_cycling": 10
-                },
-                "key_concerns": [
-                    "Moderate pollution", "Infrastructure development",
-                    "Waste management"
-                ]
-            },
-            "shahpura": {
-                "name": "Shahpura",
-                "lat": 23.3000, "lon": 77.3667,
-                "type": "Residential", "temperature": 33.2,
-                "population_density": 9200, "green_cover": 22.5,
-                "pollution_index": 68,
-                "energy_consumption": {
-                    "grid_electricity": 70, "solar_energy": 18,
-                    "battery_storage": 8, "generator_backup": 4
-                },
-                "transportation": {
-                    "private_vehicles": 42, "public_transport": 32,
-                    "two_wheelers": 16, "walking_cycling": 10
-                },
-                "key_concerns": [
-                    "Water scarcity", "Traffic congestion", "Air pollution"
-                ]
-            },
-            "kolar": {
-                "name": "Kolar",
-                "lat": 23.1667, "lon": 77.4333,
-                "type": "Suburban/Residential", "temperature": 31.8,
-                "population_density": 6500, "green_cover": 35.0,
-                "pollution_index": 48,
-                "energy_consumption": {
-                    "grid_electricity": 60, "solar_energy": 28,
-                    "battery_storage": 9, "generator_backup": 3
-                },
-                "transportation": {
-                    "private_vehicles": 38, "public_transport": 38,
-                    "two_wheelers": 14, "walking_cycling": 10
-                },
-                "key_concerns": [
-                    "Urban sprawl", "Public transport connectivity"
-                ]
-            },
-            "indrapuri": {
-                "name": "Indrapuri",
-                "lat": 23.2800, "lon": 77.4200,
-                "type": "Residential", "temperature": 32.0,
-                "population_density": 7800, "green_cover": 30.5,
-                "pollution_index": 52,
-                "energy_consumption": {
-                    "grid_electricity": 62, "solar_energy": 25,
-                    "battery_storage": 10, "generator_backup": 3
-                },
-                "transportation": {
-                    "private_vehicles": 35, "public_transport": 40,
-                    "two_wheelers": 15, "walking_cycling": 10
-                },
-                "key_concerns": [
-                    "Parking issues", "Waste management"
-                ]
-            },
-            "bhopal_lake": {
-                "name": "Bhopal Lake Area",
-                "lat": 23.2667, "lon": 77.4000,
-                "type": "Recreational/Residential", "temperature": 30.2,
-                "population_density": 5200, "green_cover": 40.5,
-                "pollution_index": 32,
-                "energy_consumption": {
-                    "grid_electricity": 55, "solar_energy": 35,
-                    "battery_storage": 8, "generator_backup": 2
-                },
-                "transportation": {
-                    "private_vehicles": 30, "public_transport": 45,
-                    "two_wheelers": 10, "walking_cycling": 15
-                },
-                "key_concerns": [
-                    "Lake conservation", "Tourist management"
-                ]
-            },
-            "industrial_area": {
-                "name": "Industrial Area",
-                "lat": 23.2000, "lon": 77.4500,
-                "type": "Industrial", "temperature": 37.5,
-                "population_density": 3800, "green_cover": 12.5,
-                "pollution_index": 95,
-                "energy_consumption": {
-                    "grid_electricity": 80, "solar_energy": 8,
-                    "battery_storage": 5, "generator_backup": 7
-                },
-                "transportation": {
-                    "private_vehicles": 50, "public_transport": 25,
-                    "two_wheelers": 15, "walking_cycling": 10
-                },
-                "key_concerns": [
-                    "Severe pollution", "Industrial waste", "Worker safety"
-                ]
-            }
-        }
+class CityDataProcessor:
+    """Scores the study areas of one city (NASAConfig.DEFAULT_CITY unless given)"""
+    
+    # (result key, NASAAPI method, endpoint whose concurrency limit applies)
+    DATA_SOURCES = [
+        ('air_quality', 'get_air_quality_data', 'simulation'),
+        ('solar_data', 'get_solar_energy_data', 'power'),
+        ('modis_vegetation', 'get_modis_vegetation_data', 'modis'),
+        ('modis_temperature', 'get_modis_land_surface_temperature', 'modis'),
+        ('modis_land_cover', 'get_modis_land_cover', 'modis'),
+        ('landsat_metadata', 'get_landsat_imagery_metadata', 'landsat'),
+        ('landsat_indices', 'get_landsat_vegetation_indices', 'landsat'),
+        ('satellite_img', 'get_satellite_imagery', 'earth_imagery')
+    ]
+    
+    # Weights behind calculate_*_index and the enhanced sustainability score
+    SCORING_WEIGHTS = {
+        'transport': {'public_transport': 0.4, 'walking_cycling': 0.3, 'low_private_vehicles': 0.3},
+        'pollution': {'base': 0.7, 'satellite': 0.3, 'pm25': 0.3, 'pm10': 0.3, 'no2': 0.2, 'so2': 0.2},
+        'energy': {'renewable': 0.7, 'low_non_renewable': 0.3, 'solar_boost_per_kwh': 5, 'solar_boost_max': 20},
+        'sustainability': {'transport': 0.25, 'pollution': 0.35, 'energy': 0.30, 'vegetation': 10, 'urbanization': 5}
+    }
+    
+    # Bump when _area_result or the index formulas change, so persisted memo entries are not reused
+    ANALYSIS_VERSION = 1
+    
+    # Bump when how historical periods are fetched or scored changes, so persisted history is rebuilt
+    HISTORY_VERSION = 3
+    
+    # Per-area metrics kept for every historical period
+    HISTORY_METRICS = [
+        'transport_index', 'pollution_index', 'energy_index', 'sustainability_score',
+        'vegetation_index', 'urbanization_index', 'temperature'
+    ]
+    
+    # Numeric columns of the area table consumed by calculate_indices_batch
+    TABLE_COLUMNS = [
+        'public_transport', 'walking_cycling', 'private_vehicles',
+        'solar_energy', 'battery_storage', 'grid_electricity', 'generator_backup',
+        'base_pollution', 'green_cover', 'pm25', 'pm10', 'no2', 'so2',
+        'avg_radiation', 'ndvi', 'ndbi'
+    ]
+    
+    def __init__(self, areas=None, city=None):
+        self.last_fetch_timings = {}
+        self.city = city if isinstance(city, City) else get_city(city)
+        self.areas = areas if areas is not None else get_area_registry(self.city.areas_file)
+        self.result_memo = get_memo('area_analysis')
     
     def calculate_transport_index(self, area_data):
         transport = area_data.get('transportation', {})
@@ -142,26 +70,28 @@ class BhopalDataProcessor:
         walking_cycling = transport.get('walking_cycling', 0)
         private_vehicles = transport.get('private_vehicles', 0)
         
+        weights = self.SCORING_WEIGHTS['transport']
         transport_index = (
-            public_transport * 0.4 +
-            walking_cycling * 0.3 +
-            (100 - private_vehicles) * 0.3
+            public_transport * weights['public_transport'] +
+            walking_cycling * weights['walking_cycling'] +
+            (100 - private_vehicles) * weights['low_private_vehicles']
         )
         
         return min(100, max(0, transport_index))
     
     def calculate_pollution_index(self, area_data, nasa_air_data=None):
         base_pollution = area_data.get('pollution_index', 50)
+        weights = self.SCORING_WEIGHTS['pollution']
         
         if nasa_air_data and not nasa_air_data.get('simulated', True):
             try:
                 nasa_pollution = (
-                    nasa_air_data.get('pm25', 0) * 0.3 +
-                    nasa_air_data.get('pm10', 0) * 0.3 +
-                    nasa_air_data.get('no2', 0) * 0.2 +
-                    nasa_air_data.get('so2', 0) * 0.2
+                    nasa_air_data.get('pm25', 0) * weights['pm25'] +
+                    nasa_air_data.get('pm10', 0) * weights['pm10'] +
+                    nasa_air_data.get('no2', 0) * weights['no2'] +
+                    nasa_air_data.get('so2', 0) * weights['so2']
                 )
-                pollution_index = (base_pollution * 0.7 + nasa_pollution * 0.3)
+                pollution_index = (base_pollution * weights['base'] + nasa_pollution * weights['satellite'])
             except:
                 pollution_index = base_pollution
         else:
@@ -183,22 +113,16 @@ class BhopalDataProcessor:
         renewable_score = solar_energy + battery_storage
         non_renewable_score = grid_electricity + generator_backup
         
+        weights = self.SCORING_WEIGHTS['energy']
         energy_index = (
-            renewable_score * 0.7 +
-            (100 - non_renewable_score) * 0.3
+            renewable_score * weights['renewable'] +
+            (100 - non_renewable_score) * weights['low_non_renewable']
         )
         
-        if nasa_solar_data and not nasa_solar_data.get('simulated', True):
-            try:
-                solar_radiation = nasa_solar_data.get('properties', {}).get('parameter', {})
-                if 'ALLSKY_SFC_SW_DWN' in solar_radiation:
-                    radiation_values = list(solar_radiation['ALLSKY_SFC_SW_DWN'].values())
-                    if radiation_values:
-                        avg_radiation = np.mean(list(radiation_values)[:30])
-                        solar_boost = min(20, (avg_radiation - 4) * 5)
-                        energy_index += solar_boost
-            except:
-                pass
+        avg_radiation = self._average_radiation(nasa_solar_data)
+        if avg_radiation is not None:
+            solar_boost = min(weights['solar_boost_max'], (avg_radiation - 4) * weights['solar_boost_per_kwh'])
+            energy_index += solar_boost
         
         return min(100, max(0, energy_index))
     
@@ -212,39 +136,285 @@ class BhopalDataProcessor:
         return min(100, max(0, sustainability_score))
     
     def calculate_enhanced_sustainability_score(self, transport_idx, pollution_idx, energy_idx, modis_vegetation, landsat_indices):
+        weights = self.SCORING_WEIGHTS['sustainability']
         base_score = (
-            transport_idx * 0.25 +
-            (100 - pollution_idx) * 0.35 +
-            energy_idx * 0.30
+            transport_idx * weights['transport'] +
+            (100 - pollution_idx) * weights['pollution'] +
+            energy_idx * weights['energy']
         )
         
-        vegetation_boost = modis_vegetation.get('ndvi', 0.5) * 10
-        urbanization_penalty = landsat_indices.get('ndbi', 0) * 5
+        vegetation_boost = modis_vegetation.get('ndvi', 0.5) * weights['vegetation']
+        urbanization_penalty = landsat_indices.get('ndbi', 0) * weights['urbanization']
         
         enhanced_score = base_score + vegetation_boost - urbanization_penalty
         
         return min(100, max(0, enhanced_score))
     
+    def build_area_table(self, area_sources, areas=None):
+        """Columnar table of every input the indices use, one row per area.
+        
+        Missing values take the same defaults as the scalar calculate_* methods.
+        Grid or ward tables with the same columns can be passed straight to
+        calculate_indices_batch.
+        """
+        areas = self.areas if areas is None else areas
+        keys = list(areas)
+        n = len(keys)
+        table = {'area_key': keys}
+        for column in self.TABLE_COLUMNS:
+            table[column] = np.zeros(n, dtype=np.float64)
+        table['air_quality_real'] = np.zeros(n, dtype=bool)
+        
+        # (table column, area field, default used by the scalar methods)
+        area_fields = [
+            ('public_transport', 'transportation.public_transport', 0),
+            ('walking_cycling', 'transportation.walking_cycling', 0),
+            ('private_vehicles', 'transportation.private_vehicles', 0),
+            ('solar_energy', 'energy_consumption.solar_energy', 0),
+            ('battery_storage', 'energy_consumption.battery_storage', 0),
+            ('grid_electricity', 'energy_consumption.grid_electricity', 0),
+            ('generator_backup', 'energy_consumption.generator_backup', 0),
+            ('base_pollution', 'pollution_index', 50),
+            ('green_cover', 'green_cover', 0)
+        ]
+        if isinstance(areas, AreaRegistry):
+            for column, field, default in area_fields:
+                table[column] = areas.column(field, default).astype(np.float64)
+        else:
+            for row, area_key in enumerate(keys):
+                area_data = areas[area_key]
+                for column, field, default in area_fields:
+                    *parents, leaf = field.split('.')
+                    value = area_data
+                    for parent in parents:
+                        value = value.get(parent, {})
+                    table[column][row] = value.get(leaf, default)
+        
+        for row, area_key in enumerate(keys):
+            sources = area_sources.get(area_key, {})
+            table['ndvi'][row] = (sources.get('modis_vegetation') or {}).get('ndvi', 0.5)
+            table['ndbi'][row] = (sources.get('landsat_indices') or {}).get('ndbi', 0)
+            
+            avg_radiation = self._average_radiation(sources.get('solar_data'))
+            table['avg_radiation'][row] = np.nan if avg_radiation is None else avg_radiation
+            
+            air = sources.get('air_quality')
+            if air and not air.get('simulated', True):
+                try:
+                    values = [float(air.get(name, 0)) for name in ('pm25', 'pm10', 'no2', 'so2')]
+                except (TypeError, ValueError):
+                    continue
+                table['pm25'][row], table['pm10'][row], table['no2'][row], table['so2'][row] = values
+                table['air_quality_real'][row] = True
+        
+        return table
+    
+    def calculate_indices_batch(self, table):
+        """Every index for every row of an area table as NumPy column operations.
+        
+        Mirrors calculate_transport_index, calculate_pollution_index,
+        calculate_energy_index and calculate_enhanced_sustainability_score
+        operation for operation, so results match the scalar path exactly.
+        """
+        weights = self.SCORING_WEIGHTS
+        transport_idx = np.clip(
+            table['public_transport'] * weights['transport']['public_transport'] +
+            table['walking_cycling'] * weights['transport']['walking_cycling'] +
+            (100 - table['private_vehicles']) * weights['transport']['low_private_vehicles'],
+            0, 100
+        )
+        
+        nasa_pollution = (
+            table['pm25'] * weights['pollution']['pm25'] +
+            table['pm10'] * weights['pollution']['pm10'] +
+            table['no2'] * weights['pollution']['no2'] +
+            table['so2'] * weights['pollution']['so2']
+        )
+        pollution_idx = np.where(
+            table['air_quality_real'],
+            table['base_pollution'] * weights['pollution']['base'] + nasa_pollution * weights['pollution']['satellite'],
+            table['base_pollution']
+        )
+        pollution_adjustment = (100 - table['green_cover']) / 2
+        pollution_idx = np.clip(np.minimum(100, pollution_idx + pollution_adjustment / 10), 0, 100)
+        
+        energy_idx = (
+            (table['solar_energy'] + table['battery_storage']) * weights['energy']['renewable'] +
+            (100 - (table['grid_electricity'] + table['generator_backup'])) * weights['energy']['low_non_renewable']
+        )
+        avg_radiation = table['avg_radiation']
+        solar_boost = np.minimum(weights['energy']['solar_boost_max'], (avg_radiation - 4) * weights['energy']['solar_boost_per_kwh'])
+        energy_idx = np.clip(np.where(np.isnan(avg_radiation), energy_idx, energy_idx + solar_boost), 0, 100)
+        
+        base_score = (
+            transport_idx * weights['sustainability']['transport'] +
+            (100 - pollution_idx) * weights['sustainability']['pollution'] +
+            energy_idx * weights['sustainability']['energy']
+        )
+        sustainability_score = np.clip(
+            base_score + table['ndvi'] * weights['sustainability']['vegetation'] - table['ndbi'] * weights['sustainability']['urbanization'],
+            0, 100
+        )
+        
+        return {
+            'transport_index': transport_idx,
+            'pollution_index': pollution_idx,
+            'energy_index': energy_idx,
+            'sustainability_score': sustainability_score
+        }
+    
+    def history_dates(self, periods=None, today=None):
+        """Month starts of the last `periods` completed months, oldest first"""
+        periods = periods or NASAConfig.HISTORY_PERIODS
+        current = np.datetime64(today or datetime.now().date(), 'M')
+        return [month.astype('datetime64[D]').astype(object) for month in current - np.arange(periods, 0, -1)]
+    
+    def history_window(self, date):
+        """(start, end) YYYYMMDD POWER request window of the monthly period that starts at date"""
+        month = np.datetime64(date, 'M')
+        start = month.astype('datetime64[D]').astype(object)
+        end = ((month + 1).astype('datetime64[D]') - 1).astype(object)
+        return start.strftime('%Y%m%d'), end.strftime('%Y%m%d')
+    
+    def history_store(self):
+        """Process-wide history of this processor's areas, discarded when weights or areas change"""
+        fingerprint = stable_hash(self.ANALYSIS_VERSION, self.HISTORY_VERSION, self.SCORING_WEIGHTS, list(self.areas))
+        return get_history_store(f'{self.city.key}_area_analysis', fingerprint)
+    
+    def analyze_history(self, api_for_date, dates=None, store=None, limit=None):
+        """Score the periods in dates that are missing or incomplete and return the store.
+        
+        api_for_date(date) returns the NASAAPI to fetch that period's sources
+        with (its POWER window should be history_window(date)); each period is
+        scored with calculate_indices_batch. Periods without real POWER data
+        store no energy index, so energy trends only cover measured periods,
+        and are stored as incomplete so a later call scores them again. At most
+        limit periods are scored per call: never-scored periods first, newest
+        first, then incomplete ones.
+        """
+        store = store if store is not None else self.history_store()
+        dates = dates if dates is not None else self.history_dates()
+        missing = sorted(store.missing(dates), key=lambda date: (date in store, -np.datetime64(date, 'D').astype(np.int64)))
+        if limit is not None:
+            missing = missing[:max(0, limit)]
+        if not missing:
+            return store
+        
+        started = time.perf_counter()
+        incomplete = 0
+        for date in missing:
+            area_sources = self.fetch_area_sources(api_for_date(date))
+            metrics = self._period_metrics(area_sources)
+            measured = bool(np.isfinite(metrics['energy_index']).all())
+            incomplete += not measured
+            store.upsert(date, list(self.areas), metrics, complete=measured)
+        print(f"Scored {len(missing)} historical periods in {round(time.perf_counter() - started, 2)}s ({incomplete} incomplete)")
+        return store
+    
+    def _period_metrics(self, area_sources):
+        table = self.build_area_table(area_sources)
+        metrics = {name: np.round(values, 2) for name, values in self.calculate_indices_batch(table).items()}
+        # Without measured radiation the energy index is the static area mix, identical every period
+        metrics['energy_index'] = np.where(np.isnan(table['avg_radiation']), np.nan, metrics['energy_index'])
+        keys = list(self.areas)
+        metrics['vegetation_index'] = np.array([area_sources[key]['landsat_indices'].get('ndvi', np.nan) for key in keys], dtype=np.float64)
+        metrics['urbanization_index'] = np.array([area_sources[key]['landsat_indices'].get('ndbi', np.nan) for key in keys], dtype=np.float64)
+        metrics['temperature'] = np.array([area_sources[key]['modis_temperature'].get('daytime_temperature', np.nan) for key in keys], dtype=np.float64)
+        return {name: metrics[name] for name in self.HISTORY_METRICS}
+    
+    def score_raster(self, area_sources, rows=None, cols=None, tile_size=None, directory=None, bounds=None):
+        """Transport, pollution, energy and sustainability surfaces on a lat/lon grid.
+        
+        NDVI and daytime land surface temperature are kept as surfaces too, for
+        map layers. Every pixel takes the inverse-distance weighted inputs of the study
+        areas and is scored with calculate_indices_batch, one tile at a time,
+        into float32 memory maps. Peak memory depends on tile_size, not on the
+        grid size, and the IDW pass walks the areas in chunks of at most
+        RASTER_IDW_MAX_CELLS pixel x area pairs. Renders are keyed on their
+        inputs, so an unchanged grid is reopened from disk instead of being
+        scored again; only the RASTER_CACHE_KEEP most recently used are kept.
+        """
+        grid = RasterGrid(
+            bounds or self.city.bounds,
+            rows or NASAConfig.RASTER_ROWS,
+            cols or NASAConfig.RASTER_COLS,
+            tile_size or NASAConfig.RASTER_TILE_SIZE
+        )
+        power = NASAConfig.RASTER_IDW_POWER
+        table = self.build_area_table(area_sources)
+        
+        # Satellite air quality blends linearly into the base pollution, so fold it
+        # in per area and interpolate the result instead of a per-area flag
+        weights = self.SCORING_WEIGHTS['pollution']
+        nasa_pollution = (
+            table['pm25'] * weights['pm25'] + table['pm10'] * weights['pm10'] +
+            table['no2'] * weights['no2'] + table['so2'] * weights['so2']
+        )
+        columns = {column: table[column] for column in self.TABLE_COLUMNS if column not in ('pm25', 'pm10', 'no2', 'so2')}
+        columns['base_pollution'] = np.where(
+            table['air_quality_real'],
+            table['base_pollution'] * weights['base'] + nasa_pollution * weights['satellite'],
+            table['base_pollution']
+        )
+        columns['land_surface_temperature'] = np.array([
+            (area_sources.get(area_key, {}).get('modis_temperature') or {}).get('daytime_temperature', np.nan)
+            for area_key in table['area_key']
+        ], dtype=np.float64)
+        
+        if isinstance(self.areas, AreaRegistry):
+            src_lats, src_lons = self.areas.column('lat').astype(np.float64), self.areas.column('lon').astype(np.float64)
+        else:
+            src_lats = np.array([self.areas[area_key]['coordinates']['lat'] for area_key in table['area_key']], dtype=np.float64)
+            src_lons = np.array([self.areas[area_key]['coordinates']['lon'] for area_key in table['area_key']], dtype=np.float64)
+        
+        key = stable_hash('raster', self.ANALYSIS_VERSION, self.SCORING_WEIGHTS, grid.to_dict(), power, src_lats, src_lons, columns)
+        cache_root = os.path.join(NASAConfig.CACHE_DIR, 'raster')
+        managed = directory is None
+        directory = directory or os.path.join(cache_root, key)
+        if ScoreRaster.exists(directory):
+            raster = ScoreRaster.open(directory)
+            if raster.meta.get('key') == key:
+                if managed:
+                    # Mark the render as recently used for prune_renders
+                    os.utime(os.path.join(directory, ScoreRaster.META_FILE))
+                return raster
+        
+        started = time.perf_counter()
+        writer = RasterWriter(directory, grid, RASTER_SURFACES, extra_meta={'key': key, 'idw_power': power, 'areas': len(src_lats)})
+        zeros = None
+        for r0, r1, c0, c1 in grid.tiles():
+            lats, lons = grid.centres(r0, r1, c0, c1)
+            tile = idw_interpolate(columns, lats, lons, src_lats, src_lons, power)
+            if zeros is None or zeros.shape != lats.shape:
+                zeros = np.zeros(lats.shape)
+            tile.update({'pm25': zeros, 'pm10': zeros, 'no2': zeros, 'so2': zeros, 'air_quality_real': False})
+            for name, values in self.calculate_indices_batch(tile).items():
+                writer.write(name, r0, c0, values.astype(np.float32))
+            for name in INPUT_SURFACES:
+                writer.write(name, r0, c0, tile[name].astype(np.float32))
+        raster = writer.close()
+        print(f"Scored {grid.rows}x{grid.cols} raster in {round(time.perf_counter() - started, 2)}s -> {directory}")
+        if managed:
+            prune_renders(cache_root, NASAConfig.RASTER_CACHE_KEEP, protect=[directory])
+        return raster
+    
     def analyze_energy_resources(self, area_data, nasa_solar_data):
         energy_consumption = area_data.get('energy_consumption', {})
         solar_percentage = energy_consumption.get('solar_energy', 0)
         
-        if nasa_solar_data and not nasa_solar_data.get('simulated', False):
-            try:
-                solar_radiation = nasa_solar_data.get('properties', {}).get('parameter', {})
-                if 'ALLSKY_SFC_SW_DWN' in solar_radiation:
-                    radiation_values = list(solar_radiation['ALLSKY_SFC_SW_DWN'].values())
-                    if radiation_values:
-                        avg_radiation = np.mean(list(radiation_values)[:30])
-                    else:
-                        avg_radiation = 5.2
-                else:
-                    avg_radiation = 5.2
-            except:
-                avg_radiation = 5.2
-        else:
+        avg_radiation = self._average_radiation(nasa_solar_data)
+        if avg_radiation is None:
             avg_radiation = 5.2
         
+        monthly_radiation = []
+        seasonal_radiation = {}
+        if nasa_solar_data:
+            series = PowerSeries.from_response(nasa_solar_data)
+            if 'ALLSKY_SFC_SW_DWN' in series:
+                _, monthly = series.monthly('ALLSKY_SFC_SW_DWN')
+                monthly_radiation = [None if np.isnan(value) else round(float(value), 2) for value in monthly]
+                seasonal_radiation = series.seasonal('ALLSKY_SFC_SW_DWN')
+        
         solar_potential_score = (avg_radiation / 8) * 100
         
         if solar_potential_score >= 75 and solar_percentage >= 25:
@@ -263,118 +433,252 @@ class BhopalDataProcessor:
         return {
             'solar_potential': round(avg_radiation, 2),
             'solar_percentage': solar_percentage,
+            'monthly_radiation': monthly_radiation,
+            'seasonal_radiation': seasonal_radiation,
             'renewable_capacity': capacity,
             'grid_dependency': energy_consumption.get('grid_electricity', 0)
         }
     
 
-    def generate_area_analysis(self, nasa_api):
-        analysis_results = {}
+    def _average_radiation(self, nasa_solar_data):
+        """Full-period mean all-sky radiation from real POWER data, or None"""
+        if not nasa_solar_data:
+            return None
+        try:
+            series = PowerSeries.from_response(nasa_solar_data)
+            if series.simulated:
+                return None
+            return series.mean('ALLSKY_SFC_SW_DWN')
+        except Exception:
+            return None
+    
+    def fetch_area_sources(self, nasa_api, concurrent=None, limits=None):
+        """Fetch every NASA data source for every area, optionally in parallel"""
+        if concurrent is None:
+            concurrent = NASAConfig.CONCURRENT_FETCH
+        
+        # Batched sources cover every area in one call instead of one call per area
+        batched = {}
+        batch_seconds = {}
+        coords = self.areas.coordinates()
+        if NASAConfig.POWER_FETCH_MODE == 'regional':
+            started = time.perf_counter()
+            batched['solar_data'] = dict(zip(self.areas, nasa_api.get_solar_energy_data_batch(coords)))
+            batch_seconds['solar_data'] = round(time.perf_counter() - started, 4)
+        if NASAConfig.SIMULATION_BATCH:
+            started = time.perf_counter()
+            for source, records in nasa_api.get_simulated_sources_batch(coords).items():
+                batched[source] = dict(zip(self.areas, records))
+            batch_seconds['simulated'] = round(time.perf_counter() - started, 4)
+        
+        tasks = [
+            (area_key, source, endpoint, getattr(nasa_api, method), area_coords)
+            for area_key, area_coords in zip(self.areas, coords)
+            for source, method, endpoint in self.DATA_SOURCES
+            if source not in batched
+        ]
+        
+        fetched, timings = get_fanout(limits).run(tasks, concurrent=concurrent)
+        timings['batches'] = batch_seconds
+        self.last_fetch_timings = timings
+        
+        sources = {}
+        for area_key in self.areas:
+            area_fetched = fetched.get(area_key, {})
+            sources[area_key] = {
+                source: batched[source][area_key] if source in batched else area_fetched[source]
+                for source, _, _ in self.DATA_SOURCES
+            }
+            # Keep POWER data as typed columns rather than nested date-keyed dicts
+            sources[area_key]['solar_data'] = PowerSeries.from_response(sources[area_key]['solar_data'])
+        
+        mode = 'concurrent' if concurrent else 'sequential'
+        print(f"Fetched {len(tasks)} data sources for {len(sources)} areas ({mode}) in {timings['total']}s")
+        for source, seconds in batch_seconds.items():
+            print(f"  {source} (batched for all areas): {seconds}s")
+        for area_key, seconds in timings['areas'].items():
+            slowest = max(timings['sources'][area_key].items(), key=lambda item: item[1])
+            print(f"  {area_key}: {seconds}s (slowest: {slowest[0]} {slowest[1]}s)")
         
-        for area_key, area_data in self.areas.items():
+        return sources
+    
+    def generate_area_analysis(self, nasa_api, concurrent=None, limits=None):
+        area_sources = self.fetch_area_sources(nasa_api, concurrent=concurrent, limits=limits)
+        
+        # Areas whose inputs and weights are unchanged reuse their memoized result
+        keys = {area_key: self._result_key(self.areas[area_key], area_sources[area_key]) for area_key in self.areas}
+        analysis_results = {area_key: self.result_memo.get(key) for area_key, key in keys.items()}
+        pending = {area_key: self.areas[area_key] for area_key, result in analysis_results.items() if result is None}
+        if len(pending) < len(analysis_results):
+            print(f"Reused {len(analysis_results) - len(pending)} memoized area results")
+        if not pending:
+            return analysis_results
+        
+        indices = self.calculate_indices_batch(self.build_area_table(area_sources, pending))
+        
+        for row, (area_key, area_data) in enumerate(pending.items()):
             print(f"Processing {area_data['name']} with MODIS and Landsat data...")
             
-            coords = {'lat': area_data['lat'], 'lon': area_data['lon']}
-            
-            # Get all NASA data sources
-            air_quality = nasa_api.get_air_quality_data(area_data['lat'], area_data['lon'])
-            solar_data = nasa_api.get_solar_energy_data(area_data['lat'], area_data['lon'])
-            modis_vegetation = nasa_api.get_modis_vegetation_data(area_data['lat'], area_data['lon'])
-            modis_temperature = nasa_api.get_modis_land_surface_temperature(area_data['lat'], area_data['lon'])
-            modis_land_cover = nasa_api.get_modis_land_cover(area_data['lat'], area_data['lon'])
-            landsat_metadata = nasa_api.get_landsat_imagery_metadata(area_data['lat'], area_data['lon'])
-            landsat_indices = nasa_api.get_landsat_vegetation_indices(area_data['lat'], area_data['lon'])
-            satellite_img = nasa_api.get_satellite_imagery(area_data['lat'], area_data['lon'])
-            
-            # Calculate indices
-            transport_idx = self.calculate_transport_index(area_data)
-            pollution_idx = self.calculate_pollution_index(area_data, air_quality)
-            energy_idx = self.calculate_energy_index(area_data, solar_data)
-            energy_analysis = self.analyze_energy_resources(area_data, solar_data)
-            
-            # Enhanced sustainability score
-            sustainability_score = self.calculate_enhanced_sustainability_score(
-                transport_idx, pollution_idx, energy_idx, modis_vegetation, landsat_indices
+            # Indices for every pending area were computed in one batch above
+            sustainability_score = float(indices['sustainability_score'][row])
+            analysis_results[area_key] = self._area_result(
+                area_data,
+                area_sources[area_key],
+                float(indices['transport_index'][row]),
+                float(indices['pollution_index'][row]),
+                float(indices['energy_index'][row]),
+                sustainability_score,
+                self.analyze_energy_resources(area_data, area_sources[area_key]['solar_data'])
             )
-            
-            analysis_results[area_key] = {
-                'name': area_data['name'],
-                'type': area_data['type'],
-                'coordinates': coords,
-                'transport_index': round(transport_idx, 2),
-                'pollution_index': round(pollution_idx, 2),
-                'energy_index': round(energy_idx, 2),
-                'sustainability_score': round(sustainability_score, 2),
-                'solar_potential': energy_analysis['solar_potential'],
-                'solar_percentage': energy_analysis['solar_percentage'],
-                'renewable_capacity': energy_analysis['renewable_capacity'],
-                'grid_dependency': energy_analysis['grid_dependency'],
-                'temperature': modis_temperature['daytime_temperature'],
-                'urban_heat_intensity': modis_temperature['urban_heat_intensity'],
-                'population_density': area_data['population_density'],
-                'green_cover': area_data['green_cover'],
-                
-                # MODIS Data
-                'modis_vegetation': modis_vegetation,
-                'modis_land_cover': modis_land_cover,
-                'modis_temperature': modis_temperature,
-                
-                # Landsat Data
-                'landsat_indices': landsat_indices,
-                'landsat_metadata': landsat_metadata,
-                
-                'vegetation_index': landsat_indices['ndvi'],
-                'urbanization_index': landsat_indices['ndbi'],
-                'vegetation_health': landsat_indices['vegetation_health'],
-                'urbanization_level': landsat_indices['urbanization_level'],
-                
-                'air_quality_data': air_quality,
-                'key_concerns': area_data['key_concerns'],
-                'transportation_breakdown': area_data['transportation'],
-                'energy_breakdown': area_data['energy_consumption'],
-                'satellite_image': satellite_img,
-                'data_sources': {
-                    'air_quality': air_quality.get('source', 'Simulated'),
-                    'solar_data': 'NASA POWER API' if not solar_data.get('simulated', True) else 'Simulated',
-                    'modis_vegetation': modis_vegetation.get('source', 'MODIS'),
-                    'modis_land_cover': modis_land_cover.get('source', 'MODIS'),
-                    'modis_temperature': modis_temperature.get('source', 'MODIS'),
-                    'landsat_indices': landsat_indices.get('source', 'Landsat'),
-                }
-            }
+            self.result_memo.set(keys[area_key], analysis_results[area_key])
             
             print(f"Completed {area_data['name']} - Score: {sustainability_score}")
         
         return analysis_results
     
-    def export_to_geojson(self, analysis_data):
-        features = []
-        
-        for area_key, data in analysis_data.items():
-            feature = {
-                'type': 'Feature',
-                'geometry': {
-                    'type': 'Point',
-                    'coordinates': [data['coordinates']['lon'], data['coordinates']['lat']]
-                },
-                'properties': {
-                    'area': data['name'],
-                    'type': data['type'],
-                    'transport_index': data['transport_index'],
-                    'pollution_index': data['pollution_index'],
-                    'energy_index': data['energy_index'],
-                    'sustainability_score': data['sustainability_score'],
-                    'solar_potential': data['solar_potential'],
-                    'temperature': data['temperature'],
-                    'population_density': data['population_density'],
-                    'green_cover': data['green_cover'],
-                    'vegetation_index': data['vegetation_index'],
-                    'urbanization_index': data['urbanization_index']
-                }
-            }
-            features.append(feature)
+    def _result_key(self, area_data, sources):
+        return self.result_memo.key(self.ANALYSIS_VERSION, self.SCORING_WEIGHTS, area_data, sources)
+    
+    def build_analysis_graph(self, graph=None):
+        """Register per-area metric nodes and the combined 'analysis' node on a DependencyGraph.
+        
+        Inputs are '<area>/area_data' plus '<area>/<source>' for every DATA_SOURCES
+        entry; feed them with update_analysis_graph. Reading 'analysis' then only
+        recomputes the areas and metrics whose inputs changed.
+        """
+        graph = graph if graph is not None else DependencyGraph('analysis')
+        source_names = [source for source, _, _ in self.DATA_SOURCES]
+        
+        for area_key in self.areas:
+            node = lambda name: f'{area_key}/{name}'
+            graph.add_node(node('transport_index'), self.calculate_transport_index, [node('area_data')])
+            graph.add_node(node('pollution_index'), self.calculate_pollution_index, [node('area_data'), node('air_quality')])
+            graph.add_node(node('energy_index'), self.calculate_energy_index, [node('area_data'), node('solar_data')])
+            graph.add_node(node('energy_analysis'), self.analyze_energy_resources, [node('area_data'), node('solar_data')])
+            graph.add_node(
+                node('sustainability_score'),
+                self.calculate_enhanced_sustainability_score,
+                [node('transport_index'), node('pollution_index'), node('energy_index'), node('modis_vegetation'), node('landsat_indices')]
+            )
+            graph.add_node(
+                node('result'),
+                lambda area_data, transport_idx, pollution_idx, energy_idx, score, energy_analysis, *sources: self.result_memo.get_or_compute(
+                    self._result_key(area_data, dict(zip(source_names, sources))),
+                    lambda: self._area_result(
+                        area_data, dict(zip(source_names, sources)), transport_idx, pollution_idx, energy_idx, score, energy_analysis
+                    )
+                ),
+                [node('area_data'), node('transport_index'), node('pollution_index'), node('energy_index'),
+                 node('sustainability_score'), node('energy_analysis')] + [node(source) for source in source_names]
+            )
+        
+        area_keys = list(self.areas)
+        graph.add_node('analysis', lambda *results: dict(zip(area_keys, results)), [f'{area_key}/result' for area_key in area_keys])
+        
+        # Rendered lazily, on the first lookup after its inputs change
+        raster_inputs = [(area_key, source) for area_key in area_keys for source in source_names]
+        graph.add_node(
+            'raster',
+            lambda *values: self.score_raster(self._sources_from_inputs(raster_inputs, values)),
+            [f'{area_key}/{source}' for area_key, source in raster_inputs]
+        )
+        return graph
+    
+    def _sources_from_inputs(self, inputs, values):
+        area_sources = {}
+        for (area_key, source), value in zip(inputs, values):
+            area_sources.setdefault(area_key, {})[source] = value
+        return area_sources
+    
+    def update_analysis_graph(self, graph, area_sources, extra_inputs=None):
+        """Set graph inputs from fetched sources (plus any extra named inputs) in one transaction.
+        
+        Returns the inputs that actually changed.
+        """
+        inputs = {}
+        for area_key in self.areas:
+            inputs[f'{area_key}/area_data'] = self.areas[area_key]
+            for source, value in area_sources.get(area_key, {}).items():
+                inputs[f'{area_key}/{source}'] = value
+        inputs.update(extra_inputs or {})
+        return graph.set_inputs(inputs)
+    
+    def _area_result(self, area_data, sources, transport_idx, pollution_idx, energy_idx, sustainability_score, energy_analysis):
+        coords = {'lat': area_data['lat'], 'lon': area_data['lon']}
+        
+        air_quality = sources['air_quality']
+        solar_data = sources['solar_data']
+        modis_vegetation = sources['modis_vegetation']
+        modis_temperature = sources['modis_temperature']
+        modis_land_cover = sources['modis_land_cover']
+        landsat_metadata = sources['landsat_metadata']
+        landsat_indices = sources['landsat_indices']
+        satellite_img = sources['satellite_img']
         
+        return {
+            'name': area_data['name'],
+            'type': area_data['type'],
+            'coordinates': coords,
+            'transport_index': round(transport_idx, 2),
+            'pollution_index': round(pollution_idx, 2),
+            'energy_index': round(energy_idx, 2),
+            'sustainability_score': round(sustainability_score, 2),
+            'solar_potential': energy_analysis['solar_potential'],
+            'solar_percentage': energy_analysis['solar_percentage'],
+            'solar_monthly': energy_analysis['monthly_radiation'],
+            'solar_seasonal': energy_analysis['seasonal_radiation'],
+            'renewable_capacity': energy_analysis['renewable_capacity'],
+            'grid_dependency': energy_analysis['grid_dependency'],
+            'temperature': modis_temperature['daytime_temperature'],
+            'urban_heat_intensity': modis_temperature['urban_heat_intensity'],
+            'population_density': area_data['population_density'],
+            'green_cover': area_data['green_cover'],
+            
+            # MODIS Data
+            'modis_vegetation': modis_vegetation,
+            'modis_land_cover': modis_land_cover,
+            'modis_temperature': modis_temperature,
+            
+            # Landsat Data
+            'landsat_indices': landsat_indices,
+            'landsat_metadata': landsat_metadata,
+            
+            'vegetation_index': landsat_indices['ndvi'],
+            'urbanization_index': landsat_indices['ndbi'],
+            'vegetation_health': landsat_indices['vegetation_health'],
+            'urbanization_level': landsat_indices['urbanization_level'],
+            
+            'air_quality_data': air_quality,
+            'key_concerns': area_data['key_concerns'],
+            'transportation_breakdown': area_data['transportation'],
+            'energy_breakdown': area_data['energy_consumption'],
+            'satellite_image': satellite_img,
+            'data_sources': {
+                'air_quality': air_quality.get('source', 'Simulated'),
+                'solar_data': solar_data.source,
+                'modis_vegetation': modis_vegetation.get('source', 'MODIS'),
+                'modis_land_cover': modis_land_cover.get('source', 'MODIS'),
+                'modis_temperature': modis_temperature.get('source', 'MODIS'),
+                'landsat_indices': landsat_indices.get('source', 'Landsat'),
+            }
+        }
+    
+    def export_to_geojson(self, analysis_data, properties=None):
         return {
             'type': 'FeatureCollection',
-            'features': features
-        }
\ No newline at end of file
+            'features': list(iter_features(analysis_data, properties))
+        }
+    
+    def stream_geojson(self, analysis_data, properties=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """FeatureCollection text in chunks, for chunked HTTP responses or large files"""
+        return iter_geojson(analysis_data, properties, chunk_size)
+    
+    def export_geoparquet(self, analysis_data, target=None, properties=None):
+        return write_geoparquet(analysis_data, target, properties)
+    
+    def export_flatgeobuf(self, analysis_data, target=None, properties=None):
+        return write_flatgeobuf(analysis_data, target, properties)
+
+
+# Bhopal was the only city before multi-city support; the default city keeps it working
+BhopalDataProcessor = CityDataProcessor
\ No newline at end of file
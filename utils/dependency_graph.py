@@ -0,0 +1,153 @@
+import threading
+import time
+from collections import deque
+
+
+def _same(old, new):
+    """Whether a recomputed value equals the previous one (unknown comparisons count as changed)"""
+    if old is new:
+        return True
+    try:
+        result = old == new
+    except Exception:
+        return False
+    return result if isinstance(result, bool) else False
+
+
+class _Node:
+    __slots__ = ('func', 'deps', 'value', 'version', 'seen', 'computed', 'verified')
+
+    def __init__(self, func=None, deps=()):
+        self.func = func
+        self.deps = tuple(deps)
+        self.value = None
+        self.version = 0
+        self.seen = None
+        self.computed = False
+        self.verified = None
+
+
+class DependencyGraph:
+    """Memoized graph of raw inputs and derived values.
+
+    Each node remembers the versions of its dependencies when it last ran and
+    only reruns when one of them moved. A node whose recomputed value equals
+    its previous one keeps its version, so unchanged results stop the
+    recompute from spreading further (early cutoff). Every lookup is logged to
+    a bounded trace of hits and recomputes for profiling.
+    """
+
+    def __init__(self, name='graph', trace_limit=2000):
+        self.name = name
+        self._nodes = {}
+        self._revision = 0
+        self._epoch = 0
+        self._lock = threading.RLock()
+        self.trace = deque(maxlen=trace_limit)
+        self.stats = {'hits': 0, 'recomputes': 0, 'cutoffs': 0, 'input_changes': 0}
+
+    def add_node(self, name, func, deps=()):
+        """Register a derived node computed as func(*dependency values)"""
+        with self._lock:
+            self._nodes[name] = _Node(func, deps)
+            self._epoch += 1
+
+    def has_node(self, name):
+        return name in self._nodes
+
+    def set_input(self, name, value):
+        """Set a raw input; returns whether it changed"""
+        with self._lock:
+            node = self._nodes.get(name)
+            if node is None:
+                node = self._nodes[name] = _Node()
+            elif node.computed and _same(node.value, value):
+                return False
+            self._revision += 1
+            self._epoch += 1
+            node.value = value
+            node.version = self._revision
+            node.computed = True
+            self.stats['input_changes'] += 1
+            self.trace.append({'node': name, 'event': 'input', 'revision': self._revision})
+            return True
+
+    def set_inputs(self, values):
+        """Set several raw inputs as one transaction; returns the names that changed.
+
+        The lock is held across every update, so a concurrent get() computes
+        from either all of the old inputs or all of the new ones.
+        """
+        with self._lock:
+            return [name for name, value in values.items() if self.set_input(name, value)]
+
+    def get(self, name):
+        with self._lock:
+            self._refresh(name)
+            return self._nodes[name].value
+
+    def get_many(self, names):
+        with self._lock:
+            return {name: self.get(name) for name in names}
+
+    def invalidate(self, name):
+        """Force a derived node to rerun on its next lookup"""
+        with self._lock:
+            node = self._nodes[name]
+            node.seen = None
+            self._epoch += 1
+
+    def _refresh(self, name):
+        """Bring a node up to date and return its version"""
+        node = self._nodes.get(name)
+        if node is None:
+            raise KeyError(f"Unknown graph node: {name}")
+        if node.func is None:
+            if not node.computed:
+                raise KeyError(f"Input {name} has not been set")
+            return node.version
+        if node.verified == self._epoch:
+            # Already checked since the last input change
+            return node.version
+
+        seen = tuple(self._refresh(dep) for dep in node.deps)
+        if node.computed and seen == node.seen:
+            node.verified = self._epoch
+            self.stats['hits'] += 1
+            self.trace.append({'node': name, 'event': 'hit'})
+            return node.version
+
+        started = time.perf_counter()
+        value = node.func(*(self._nodes[dep].value for dep in node.deps))
+        seconds = round(time.perf_counter() - started, 6)
+        node.seen = seen
+        self.stats['recomputes'] += 1
+
+        if node.computed and _same(node.value, value):
+            node.verified = self._epoch
+            self.stats['cutoffs'] += 1
+            self.trace.append({'node': name, 'event': 'recompute', 'seconds': seconds, 'changed': False})
+            return node.version
+
+        self._revision += 1
+        node.value = value
+        node.version = self._revision
+        node.computed = True
+        node.verified = self._epoch
+        self.trace.append({'node': name, 'event': 'recompute', 'seconds': seconds, 'changed': True})
+        return node.version
+
+    def get_trace(self, clear=False):
+        with self._lock:
+            trace = list(self.trace)
+            if clear:
+                self.trace.clear()
+            return trace
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['nodes'] = len(self._nodes)
+            stats['inputs'] = sum(1 for node in self._nodes.values() if node.func is None)
+            stats['revision'] = self._revision
+            return stats
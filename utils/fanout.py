@@ -0,0 +1,83 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config.nasa_config import NASAConfig
+
+
+class AreaFanout:
+    """Run per-area data-source calls with a concurrency limit per endpoint"""
+
+    def __init__(self, limits=None, max_workers=None):
+        self.limits = dict(NASAConfig.FETCH_CONCURRENCY if limits is None else limits)
+        self.max_workers = max_workers or NASAConfig.FETCH_MAX_WORKERS
+        self._semaphores = {
+            endpoint: threading.BoundedSemaphore(max(1, limit))
+            for endpoint, limit in self.limits.items()
+        }
+        self._default_semaphore = threading.BoundedSemaphore(max(1, NASAConfig.FETCH_DEFAULT_CONCURRENCY))
+
+    def run(self, tasks, concurrent=True):
+        """Run (area_key, source, endpoint, func, args) tasks.
+
+        Returns (results, timings). Results are {area_key: {source: value}} in task order,
+        whether or not the calls ran in parallel.
+        """
+        started = time.perf_counter()
+        spans = [None] * len(tasks)
+
+        if concurrent and len(tasks) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(tasks))) as executor:
+                futures = [executor.submit(self._call, task, spans, i) for i, task in enumerate(tasks)]
+                values = [future.result() for future in futures]
+        else:
+            values = [self._call(task, spans, i, limited=False) for i, task in enumerate(tasks)]
+
+        results = {}
+        timings = {'areas': {}, 'sources': {}, 'total': round(time.perf_counter() - started, 4)}
+        area_spans = {}
+
+        for (area_key, source, endpoint, func, args), value, (start, end) in zip(tasks, values, spans):
+            results.setdefault(area_key, {})[source] = value
+            timings['sources'].setdefault(area_key, {})[source] = round(end - start, 4)
+            first, last = area_spans.get(area_key, (start, end))
+            area_spans[area_key] = (min(first, start), max(last, end))
+
+        for area_key, (first, last) in area_spans.items():
+            timings['areas'][area_key] = round(last - first, 4)
+
+        return results, timings
+
+    def _call(self, task, spans, index, limited=True):
+        area_key, source, endpoint, func, args = task
+        semaphore = self._semaphores.get(endpoint, self._default_semaphore)
+
+        if limited:
+            semaphore.acquire()
+        try:
+            start = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                spans[index] = (start, time.perf_counter())
+        finally:
+            if limited:
+                semaphore.release()
+
+
+_fanouts = {}
+_fanouts_lock = threading.Lock()
+
+
+def get_fanout(limits=None):
+    """Return the process-wide fanout for a set of endpoint limits.
+
+    Callers with the same limits share one instance, so its per-endpoint
+    semaphores bound concurrent fetches across every call, not just one.
+    """
+    limits = dict(NASAConfig.FETCH_CONCURRENCY if limits is None else limits)
+    key = tuple(sorted(limits.items()))
+    with _fanouts_lock:
+        fanout = _fanouts.get(key)
+        if fanout is None:
+            fanout = _fanouts[key] = AreaFanout(limits=limits)
+        return fanout
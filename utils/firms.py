@@ -0,0 +1,311 @@
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date as date_type, timedelta
+import numpy as np
+import pandas as pd
+from config.nasa_config import NASAConfig
+from utils.spatial_index import _expand
+
+# Stored columns and their dtypes; day counts days since 1970-01-01
+FIRE_COLUMNS = {
+    'lat': np.float32,
+    'lon': np.float32,
+    'day': np.int32,
+    'time': np.int16,
+    'frp': np.float32,
+    'brightness': np.float32,
+    'confidence': np.uint8,
+    'daytime': np.bool_
+}
+# VIIRS reports confidence as a class rather than a percentage
+CONFIDENCE_CLASSES = {'l': 30, 'low': 30, 'n': 60, 'nominal': 60, 'h': 90, 'high': 90}
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = np.pi * EARTH_RADIUS_KM / 180.0
+_EPOCH = date_type(1970, 1, 1)
+
+
+def to_day(value):
+    """Days since 1970-01-01 for a date, datetime or ISO string"""
+    return int(np.datetime64(value, 'D').astype(np.int64))
+
+
+def from_day(day):
+    return _EPOCH + timedelta(days=int(day))
+
+
+def parse_firms_csv(text):
+    """FIRMS area/country CSV (MODIS or VIIRS) as FIRE_COLUMNS arrays"""
+    frame = pd.read_csv(io.StringIO(text) if isinstance(text, str) else io.BytesIO(text))
+    n = len(frame)
+    if not n:
+        return {name: np.zeros(0, dtype=dtype) for name, dtype in FIRE_COLUMNS.items()}
+    brightness = frame['brightness'] if 'brightness' in frame else frame.get('bright_ti4', pd.Series(np.nan, index=frame.index))
+    confidence = frame['confidence'] if 'confidence' in frame else pd.Series(0, index=frame.index)
+    if not pd.api.types.is_numeric_dtype(confidence):
+        confidence = confidence.astype(str).str.lower().map(CONFIDENCE_CLASSES).fillna(0)
+    return {
+        'lat': frame['latitude'].to_numpy(np.float32),
+        'lon': frame['longitude'].to_numpy(np.float32),
+        'day': pd.to_datetime(frame['acq_date']).to_numpy('datetime64[D]').astype(np.int64).astype(np.int32),
+        'time': frame['acq_time'].to_numpy(np.int16),
+        'frp': frame['frp'].to_numpy(np.float32),
+        'brightness': brightness.to_numpy(np.float32),
+        'confidence': np.clip(confidence.to_numpy(np.float64), 0, 100).astype(np.uint8),
+        'daytime': (frame['daynight'].astype(str).str.upper() == 'D').to_numpy() if 'daynight' in frame else np.ones(n, dtype=bool)
+    }
+
+
+def haversine_km(lat, lon, lats, lons):
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(np.asarray(lats, dtype=np.float64)), np.radians(np.asarray(lons, dtype=np.float64))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class FireStore:
+    """Active-fire detections as columns sorted by (day, spatial cell).
+
+    Every row's key is day * n_cells + cell on a global grid of cell_deg
+    cells, so the detections of one day and one run of cells along a grid
+    row are a contiguous slice found by binary search. A radius query over
+    N days touches N * (rows the circle spans) slices plus an exact
+    distance test on their rows, however many detections are stored.
+    Columns persist as .npy files under CACHE_DIR/firms/<name>.
+    """
+
+    def __init__(self, name, cell_deg=None, persist=True, cache_dir=None):
+        self.name = name
+        self.cell_deg = cell_deg or NASAConfig.FIRMS_CELL_DEG
+        self.n_rows = int(np.ceil(180.0 / self.cell_deg))
+        self.n_cols = int(np.ceil(360.0 / self.cell_deg))
+        self.n_cells = self.n_rows * self.n_cols
+        self.persist = persist
+        self.directory = os.path.join(cache_dir or NASAConfig.CACHE_DIR, 'firms', name)
+        self.columns = {name: np.zeros(0, dtype=dtype) for name, dtype in FIRE_COLUMNS.items()}
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.days = set()
+        # Unsettled days appended recently, by monotonic time of their fetch
+        self.refreshed = {}
+        self.version = 0
+        self._loaded_mtime = None
+        self._lock = threading.RLock()
+        if persist:
+            self._load()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _cell_rows(self, lats):
+        return np.clip(np.floor((np.asarray(lats, dtype=np.float64) + 90.0) / self.cell_deg), 0, self.n_rows - 1).astype(np.int64)
+
+    def _cell_cols(self, lons):
+        return np.clip(np.floor((np.asarray(lons, dtype=np.float64) + 180.0) / self.cell_deg), 0, self.n_cols - 1).astype(np.int64)
+
+    def _keys(self, days, lats, lons):
+        return np.asarray(days, dtype=np.int64) * self.n_cells + self._cell_rows(lats) * self.n_cols + self._cell_cols(lons)
+
+    def append(self, columns, days, complete=None):
+        """Store detections for days, replacing whatever was stored for them.
+
+        Only the days in complete (all of them by default) are recorded as
+        ingested; the rest are fetched again by the next ingest.
+        """
+        days = sorted({int(day) for day in days})
+        keys = self._keys(columns['day'], columns['lat'], columns['lon'])
+        with self._lock:
+            self._reload_if_changed()
+            # Rows are grouped by day, so a day's stored detections are one slice
+            stored = [self.day_range(day, day) for day in days]
+            keep = slice(None)
+            if any(rows.stop > rows.start for rows in stored):
+                keep = np.ones(len(self.keys), dtype=bool)
+                for rows in stored:
+                    keep[rows] = False
+            merged_keys = np.concatenate([self.keys[keep], keys])
+            merged = {
+                name: np.concatenate([self.columns[name][keep], np.asarray(columns[name], dtype=dtype)])
+                for name, dtype in FIRE_COLUMNS.items()
+            }
+            # New days usually follow the stored ones, which keeps the merge a plain concatenation
+            if len(self.keys) and len(keys) and isinstance(keep, slice) and keys.min() >= self.keys[-1]:
+                order = np.argsort(keys, kind='stable')
+                merged_keys[len(self.keys):] = keys[order]
+                for name in merged:
+                    merged[name][len(self.keys):] = np.asarray(columns[name])[order]
+            else:
+                order = np.argsort(merged_keys, kind='stable')
+                merged_keys = merged_keys[order]
+                merged = {name: values[order] for name, values in merged.items()}
+            self.keys, self.columns = merged_keys, merged
+            complete = set(days if complete is None else (int(day) for day in complete))
+            self.days.update(complete)
+            now = time.monotonic()
+            self.refreshed.update({day: now for day in days if day not in complete})
+            self.version += 1
+            if self.persist:
+                self._save()
+
+    def missing(self, days, refresh_seconds=None):
+        """Days not yet ingested, leaving out unsettled days fetched within refresh_seconds"""
+        refresh_seconds = NASAConfig.FIRMS_REFRESH_SECONDS if refresh_seconds is None else refresh_seconds
+        now = time.monotonic()
+        with self._lock:
+            self._reload_if_changed()
+            return [
+                day for day in days
+                if day not in self.days and now - self.refreshed.get(day, -np.inf) >= refresh_seconds
+            ]
+
+    def day_range(self, start_day, end_day):
+        """Row slice of every detection from start_day to end_day inclusive"""
+        lo = np.searchsorted(self.keys, np.int64(start_day) * self.n_cells, side='left')
+        hi = np.searchsorted(self.keys, (np.int64(end_day) + 1) * self.n_cells, side='left')
+        return slice(int(lo), int(hi))
+
+    def query(self, lat, lon, radius_km, start_day, end_day):
+        """(rows, distances in km) of detections within radius_km of a point between two days"""
+        with self._lock:
+            keys, columns = self.keys, self.columns
+        half_lat = radius_km / KM_PER_DEGREE
+        half_lon = radius_km / (KM_PER_DEGREE * max(np.cos(np.radians(min(abs(lat) + half_lat, 89.9))), 1e-6))
+        rows = np.arange(self._cell_rows(lat - half_lat), self._cell_rows(lat + half_lat) + 1)
+        c0, c1 = self._cell_cols(lon - half_lon), self._cell_cols(lon + half_lon)
+        days = np.arange(int(start_day), int(end_day) + 1, dtype=np.int64)
+
+        # One (day, cell row) slice per pair: cells c0..c1 of a row are consecutive keys
+        base = (days[:, None] * self.n_cells + rows[None, :] * self.n_cols).ravel()
+        lo = np.searchsorted(keys, base + c0, side='left')
+        hi = np.searchsorted(keys, base + c1 + 1, side='left')
+        _, candidates = _expand(lo, hi)
+        if not len(candidates):
+            return candidates, np.zeros(0)
+        distances = haversine_km(lat, lon, columns['lat'][candidates], columns['lon'][candidates])
+        within = distances <= radius_km
+        return candidates[within], distances[within]
+
+    def summarize(self, rows, distances=None):
+        """Count, FRP and confidence summary of a set of detection rows"""
+        rows = np.arange(len(self.keys))[rows] if isinstance(rows, slice) else rows
+        frp = self.columns['frp'][rows].astype(np.float64)
+        confidence = self.columns['confidence'][rows]
+        median_confidence = float(np.median(confidence)) if len(rows) else 0.0
+        summary = {
+            'active_fires': int(len(rows)),
+            'fire_radiative_power': round(float(frp.mean()), 2) if len(rows) else 0.0,
+            'total_fire_radiative_power': round(float(frp.sum()), 2),
+            'confidence': 'high' if median_confidence >= 80 else 'nominal' if median_confidence >= 30 else 'low',
+            'daytime_fraction': round(float(self.columns['daytime'][rows].mean()), 3) if len(rows) else 0.0
+        }
+        if distances is not None:
+            summary['nearest_km'] = round(float(distances.min()), 2) if len(distances) else None
+        return summary
+
+    def _save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        pid = os.getpid()
+        try:
+            for name, values in {**self.columns, 'keys': self.keys}.items():
+                tmp_path = os.path.join(self.directory, f'{name}.{pid}.tmp.npy')
+                np.save(tmp_path, values)
+                os.replace(tmp_path, os.path.join(self.directory, f'{name}.npy'))
+            meta_path = os.path.join(self.directory, 'meta.json')
+            tmp_path = f'{meta_path}.{pid}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'cell_deg': self.cell_deg, 'rows': len(self.keys), 'days': sorted(self.days)}, f)
+            os.replace(tmp_path, meta_path)
+            self._loaded_mtime = os.path.getmtime(meta_path)
+        except OSError as e:
+            print(f"⚠️ Could not persist fire store {self.name}: {e}")
+
+    def _load(self):
+        meta_path = os.path.join(self.directory, 'meta.json')
+        try:
+            mtime = os.path.getmtime(meta_path)
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta['cell_deg'] != self.cell_deg:
+                return
+            keys = np.load(os.path.join(self.directory, 'keys.npy'))
+            columns = {name: np.load(os.path.join(self.directory, f'{name}.npy')) for name in FIRE_COLUMNS}
+        except (OSError, KeyError, ValueError):
+            return
+        if len(keys) != meta['rows'] or any(len(values) != len(keys) for values in columns.values()):
+            return
+        self.keys, self.columns, self.days = keys, columns, set(meta['days'])
+        self._loaded_mtime = mtime
+
+    def _reload_if_changed(self):
+        """Pick up days another worker ingested since this store was loaded"""
+        if not self.persist:
+            return
+        try:
+            mtime = os.path.getmtime(os.path.join(self.directory, 'meta.json'))
+        except OSError:
+            return
+        if mtime != self._loaded_mtime:
+            self._load()
+
+    def get_stats(self):
+        with self._lock:
+            days = sorted(self.days)
+            return {
+                'detections': len(self.keys),
+                'days': len(days),
+                'first_day': str(from_day(days[0])) if days else None,
+                'last_day': str(from_day(days[-1])) if days else None,
+                'cell_deg': self.cell_deg,
+                'bytes': int(self.keys.nbytes + sum(values.nbytes for values in self.columns.values())),
+                'version': self.version
+            }
+
+
+def ingest_days(store, fetch_day, days, settle_days=None, workers=None):
+    """Fetch and append the days the store lacks, fetching concurrently.
+
+    fetch_day(day) returns CSV text or None on failure; failed days stay
+    missing and are retried by the next call. Days within settle_days of
+    today are appended but not marked complete, because near-real-time
+    files keep growing for a while; they are refetched once
+    FIRMS_REFRESH_SECONDS have passed.
+    """
+    settle_days = NASAConfig.FIRMS_SETTLE_DAYS if settle_days is None else settle_days
+    newest = to_day(date_type.today())
+    wanted = store.missing(days)
+    if not wanted:
+        return 0
+    with ThreadPoolExecutor(max_workers=max(1, min(workers or NASAConfig.FETCH_CONCURRENCY['firms'], len(wanted)))) as executor:
+        texts = list(executor.map(fetch_day, wanted))
+
+    fetched = [(day, text) for day, text in zip(wanted, texts) if text is not None]
+    if not fetched:
+        return 0
+    parsed = [parse_firms_csv(text) for _, text in fetched]
+    columns = {name: np.concatenate([part[name] for part in parsed]) for name in FIRE_COLUMNS}
+    complete = [day for day, _ in fetched if day <= newest - settle_days]
+    fetched_days = [day for day, _ in fetched]
+    # Rows are bucketed by their own acquisition date; keep only the days fetched
+    keep = np.isin(columns['day'], fetched_days)
+    store.append({name: values[keep] for name, values in columns.items()}, fetched_days, complete)
+    return len(fetched)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_fire_store(source=None, country='IND'):
+    """Return the process-wide fire store for a FIRMS source and country"""
+    name = f'{source or NASAConfig.FIRMS_SOURCE}_{country}'
+    with _stores_lock:
+        if name not in _stores:
+            _stores[name] = FireStore(name)
+        return _stores[name]
+
+
+def get_fire_stores():
+    with _stores_lock:
+        return dict(_stores)
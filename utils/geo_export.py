@@ -0,0 +1,186 @@
+import io
+import itertools
+import json
+import math
+from collections.abc import Mapping
+import numpy as np
+
+# Exported property name -> key in a per-area analysis result
+EXPORT_PROPERTIES = {
+    'area': 'name',
+    'type': 'type',
+    'transport_index': 'transport_index',
+    'pollution_index': 'pollution_index',
+    'energy_index': 'energy_index',
+    'sustainability_score': 'sustainability_score',
+    'solar_potential': 'solar_potential',
+    'temperature': 'temperature',
+    'population_density': 'population_density',
+    'green_cover': 'green_cover',
+    'vegetation_index': 'vegetation_index',
+    'urbanization_index': 'urbanization_index'
+}
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def _is_table(data):
+    """Columnar tables hold 'lat'/'lon' arrays; analysis results map area keys to dicts"""
+    return isinstance(data, Mapping) and 'lat' in data and 'lon' in data and not isinstance(data['lat'], Mapping)
+
+
+def _clean(value):
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _property_names(data, properties=None):
+    """Exported property names, checked against the table columns or EXPORT_PROPERTIES"""
+    if _is_table(data):
+        names = properties or [name for name in data if name not in ('lat', 'lon')]
+        missing = [name for name in names if name not in data]
+        if missing:
+            raise KeyError(f"Unknown export columns: {', '.join(missing)}")
+        return names
+    names = properties or list(EXPORT_PROPERTIES)
+    unknown = [name for name in names if name not in EXPORT_PROPERTIES]
+    if unknown:
+        raise KeyError(f"Unknown export properties: {', '.join(unknown)}")
+    return names
+
+
+def _column_chunks(data, properties=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield (lons, lats, {property: values}) for successive slices of chunk_size areas or rows.
+
+    Analysis results are walked lazily, so only one chunk of property
+    columns exists at a time however many areas are exported.
+    """
+    names = _property_names(data, properties)
+    if _is_table(data):
+        lons, lats = np.asarray(data['lon'], dtype=np.float64), np.asarray(data['lat'], dtype=np.float64)
+        for start in range(0, len(lons), chunk_size):
+            stop = start + chunk_size
+            yield lons[start:stop], lats[start:stop], {name: data[name][start:stop] for name in names}
+        return
+
+    results = iter(data.values())
+    while True:
+        chunk = list(itertools.islice(results, chunk_size))
+        if not chunk:
+            return
+        lons = np.array([result['coordinates']['lon'] for result in chunk], dtype=np.float64)
+        lats = np.array([result['coordinates']['lat'] for result in chunk], dtype=np.float64)
+        yield lons, lats, {name: [result.get(EXPORT_PROPERTIES[name]) for result in chunk] for name in names}
+
+
+def _columns(data, properties=None):
+    """Normalise analysis results or a table into whole (lons, lats, {property: values}) columns"""
+    names = _property_names(data, properties)
+    if _is_table(data):
+        return np.asarray(data['lon'], dtype=np.float64), np.asarray(data['lat'], dtype=np.float64), {name: data[name] for name in names}
+    lons, lats, columns = [], [], {name: [] for name in names}
+    for chunk_lons, chunk_lats, chunk in _column_chunks(data, names):
+        lons.append(chunk_lons)
+        lats.append(chunk_lats)
+        for name in names:
+            columns[name].extend(chunk[name])
+    return np.concatenate(lons or [np.zeros(0)]), np.concatenate(lats or [np.zeros(0)]), columns
+
+
+def iter_features(data, properties=None):
+    """Yield one GeoJSON Point feature per area or table row"""
+    for lons, lats, chunk in _column_chunks(data, properties):
+        chunk = {name: list(values) for name, values in chunk.items()}
+        for offset, (lon, lat) in enumerate(zip(lons.tolist(), lats.tolist())):
+            yield {
+                'type': 'Feature',
+                'geometry': {'type': 'Point', 'coordinates': [lon, lat]},
+                'properties': {name: _clean(values[offset]) for name, values in chunk.items()}
+            }
+
+
+def iter_geojson(data, properties=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield a FeatureCollection as text chunks of up to chunk_size features each"""
+    yield '{"type": "FeatureCollection", "features": ['
+    batch = []
+    first = True
+    for feature in iter_features(data, properties):
+        batch.append(json.dumps(feature))
+        if len(batch) >= chunk_size:
+            yield ('' if first else ',') + ','.join(batch)
+            first = False
+            batch = []
+    if batch:
+        yield ('' if first else ',') + ','.join(batch)
+    yield ']}'
+
+
+def write_geojson(data, target, properties=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Stream a FeatureCollection to a path or text file object"""
+    if isinstance(target, str):
+        with open(target, 'w', encoding='utf-8') as f:
+            return write_geojson(data, f, properties, chunk_size)
+    for chunk in iter_geojson(data, properties, chunk_size):
+        target.write(chunk)
+
+
+def point_wkb(lons, lats):
+    """Little-endian WKB Points for coordinate arrays as one contiguous buffer of 21-byte records"""
+    records = np.empty(len(lons), dtype=[('order', 'u1'), ('kind', '<u4'), ('x', '<f8'), ('y', '<f8')])
+    records['order'] = 1
+    records['kind'] = 1
+    records['x'] = lons
+    records['y'] = lats
+    return records.tobytes()
+
+
+def write_geoparquet(data, target=None, properties=None, compression='zstd'):
+    """Write GeoParquet (WKB point geometry plus 'geo' metadata); returns bytes when target is None"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError('GeoParquet export needs pyarrow (pip install pyarrow)')
+
+    lons, lats, columns = _columns(data, properties)
+    arrays = {name: pa.array([_clean(v) for v in values]) if not isinstance(values, np.ndarray) else pa.array(values)
+              for name, values in columns.items()}
+    offsets = (np.arange(len(lons) + 1, dtype=np.int32) * 21).tobytes()
+    arrays['geometry'] = pa.Array.from_buffers(pa.binary(), len(lons), [None, pa.py_buffer(offsets), pa.py_buffer(point_wkb(lons, lats))])
+    table = pa.table(arrays)
+
+    bbox = [float(lons.min()), float(lats.min()), float(lons.max()), float(lats.max())] if len(lons) else []
+    geo = {
+        'version': '1.0.0',
+        'primary_column': 'geometry',
+        'columns': {'geometry': {'encoding': 'WKB', 'geometry_types': ['Point'], 'bbox': bbox}}
+    }
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), b'geo': json.dumps(geo).encode('utf-8')})
+
+    sink = io.BytesIO() if target is None else target
+    pq.write_table(table, sink, compression=compression)
+    return sink.getvalue() if target is None else None
+
+
+def write_flatgeobuf(data, target=None, properties=None):
+    """Write FlatGeobuf through geopandas; returns bytes when target is None"""
+    try:
+        import geopandas as gpd
+    except ImportError:
+        raise RuntimeError('FlatGeobuf export needs geopandas with pyogrio or fiona')
+
+    lons, lats, columns = _columns(data, properties)
+    frame = gpd.GeoDataFrame(
+        {name: [_clean(v) for v in values] for name, values in columns.items()},
+        geometry=gpd.points_from_xy(lons, lats),
+        crs='EPSG:4326'
+    )
+    if target is not None:
+        frame.to_file(target, driver='FlatGeobuf')
+        return None
+    sink = io.BytesIO()
+    frame.to_file(sink, driver='FlatGeobuf')
+    return sink.getvalue()
@@ -0,0 +1,251 @@
+import os
+import threading
+import numpy as np
+from config.nasa_config import NASAConfig
+
+DAYS_PER_YEAR = 365.25
+
+
+def _to_day(date):
+    return np.datetime64(date, 'D')
+
+
+class HistoryStore:
+    """Per-area metrics for a sorted run of analysis periods.
+
+    Each metric is a (n_periods, n_areas) float64 array with NaN where a
+    period has no value, indexed by a datetime64[D] row per period. Rolling,
+    year-over-year and slope aggregates work on whole arrays at once. With
+    persist enabled the store is saved to CACHE_DIR/history/<namespace>.npz
+    after every new period, so past periods are never recomputed. Periods
+    upserted as incomplete (scored without measured inputs) are kept for
+    display but still reported by missing(), so they are scored again.
+    """
+
+    def __init__(self, namespace, fingerprint='', persist=None, cache_dir=None):
+        self.namespace = namespace
+        self.fingerprint = fingerprint
+        self.persist = NASAConfig.HISTORY_PERSIST if persist is None else persist
+        self.path = os.path.join(cache_dir or NASAConfig.CACHE_DIR, 'history', f'{namespace}.npz')
+        self.dates = np.array([], dtype='datetime64[D]')
+        self.area_keys = []
+        self.values = {}
+        self.incomplete = np.array([], dtype='datetime64[D]')
+        self.version = 0
+        self._lock = threading.RLock()
+        if self.persist:
+            self._load()
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __contains__(self, date):
+        position = np.searchsorted(self.dates, _to_day(date))
+        return position < len(self.dates) and self.dates[position] == _to_day(date)
+
+    def missing(self, dates):
+        """Dates from the list that have no stored period yet or only an incomplete one"""
+        with self._lock:
+            return [date for date in dates if date not in self or self.is_incomplete(date)]
+
+    def is_incomplete(self, date):
+        return bool(np.isin(_to_day(date), self.incomplete))
+
+    def upsert(self, date, area_keys, metrics, complete=True):
+        """Store one period's {metric: per-area values}, replacing any earlier values for that date"""
+        with self._lock:
+            self._upsert_row(date, area_keys, metrics)
+            self._mark(date, complete)
+            self.version += 1
+            if self.persist:
+                self._save()
+
+    def upsert_many(self, dates, area_keys, metrics, complete=True):
+        """Store several periods at once from {metric: (n_dates, n_areas) values}, saving once"""
+        with self._lock:
+            for row, date in enumerate(dates):
+                self._upsert_row(date, area_keys, {name: values[row] for name, values in metrics.items()})
+                self._mark(date, complete)
+            self.version += 1
+            if self.persist:
+                self._save()
+
+    def _upsert_row(self, date, area_keys, metrics):
+        day = _to_day(date)
+        for area_key in area_keys:
+            if area_key not in self.area_keys:
+                self.area_keys.append(area_key)
+                for name in self.values:
+                    self.values[name] = np.pad(self.values[name], ((0, 0), (0, 1)), constant_values=np.nan)
+        for name in metrics:
+            if name not in self.values:
+                self.values[name] = np.full((len(self.dates), len(self.area_keys)), np.nan)
+
+        row = np.searchsorted(self.dates, day)
+        if row == len(self.dates) or self.dates[row] != day:
+            self.dates = np.insert(self.dates, row, day)
+            for name in self.values:
+                self.values[name] = np.insert(self.values[name], row, np.nan, axis=0)
+
+        columns = [self.area_keys.index(area_key) for area_key in area_keys]
+        for name, values in metrics.items():
+            self.values[name][row, columns] = np.asarray(values, dtype=np.float64)
+
+    def _mark(self, date, complete):
+        day = _to_day(date)
+        self.incomplete = self.incomplete[self.incomplete != day]
+        if not complete:
+            self.incomplete = np.sort(np.append(self.incomplete, day))
+
+    def export(self):
+        """Plain {dates, area_keys, values} copy of the stored periods, e.g. to ship inside a snapshot"""
+        with self._lock:
+            return {
+                'dates': self.dates.copy(),
+                'area_keys': list(self.area_keys),
+                'values': {name: values.copy() for name, values in self.values.items()},
+                'incomplete': self.incomplete.copy()
+            }
+
+    @classmethod
+    def from_export(cls, namespace, exported):
+        """In-memory store holding the periods of an export()"""
+        store = cls(namespace, persist=False)
+        store.dates = np.asarray(exported['dates']).astype('datetime64[D]')
+        store.area_keys = list(exported['area_keys'])
+        store.values = {name: np.asarray(values, dtype=np.float64) for name, values in exported['values'].items()}
+        store.incomplete = np.asarray(exported.get('incomplete', []), dtype='datetime64[D]')
+        return store
+
+    def series(self, metric, start=None, end=None):
+        """Return (dates, values) for periods in [start, end]"""
+        with self._lock:
+            lo = 0 if start is None else np.searchsorted(self.dates, _to_day(start), side='left')
+            hi = len(self.dates) if end is None else np.searchsorted(self.dates, _to_day(end), side='right')
+            values = self.values.get(metric, np.full((len(self.dates), len(self.area_keys)), np.nan))
+            return self.dates[lo:hi], values[lo:hi]
+
+    def rolling_mean(self, metric, window):
+        """Mean over each period and the window - 1 before it, ignoring missing values"""
+        if window < 1:
+            raise ValueError(f"Rolling window must be at least 1 period, got {window}")
+        _, values = self.series(metric)
+        valid = np.isfinite(values)
+        sums = np.cumsum(np.where(valid, values, 0.0), axis=0)
+        counts = np.cumsum(valid, axis=0)
+        sums[window:] = sums[window:] - sums[:-window]
+        counts[window:] = counts[window:] - counts[:-window]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, sums / counts, np.nan)
+
+    def year_over_year(self, metric):
+        """Change from the period exactly one calendar year earlier (NaN where there is none)"""
+        dates, values = self.series(metric)
+        months = dates.astype('datetime64[M]')
+        year_ago = (months - np.timedelta64(12, 'M')).astype('datetime64[D]') + (dates - months.astype('datetime64[D]'))
+        position = np.clip(np.searchsorted(dates, year_ago), 0, max(len(dates) - 1, 0))
+        found = (dates[position] == year_ago) if len(dates) else np.zeros(0, dtype=bool)
+        previous = np.where(found[:, None], values[position], np.nan)
+        return values - previous
+
+    def slope(self, metric, start=None, end=None):
+        """Least-squares trend per area in units per year, over the periods in [start, end]"""
+        dates, values = self.series(metric, start, end)
+        years = (dates - dates[0]).astype(np.float64)[:, None] / DAYS_PER_YEAR if len(dates) else np.zeros((0, 1))
+        valid = np.isfinite(values)
+        n = valid.sum(axis=0)
+        x = np.where(valid, years, 0.0)
+        y = np.where(valid, values, 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            x_mean = x.sum(axis=0) / n
+            y_mean = y.sum(axis=0) / n
+            covariance = (np.where(valid, (years - x_mean) * (values - y_mean), 0.0)).sum(axis=0)
+            variance = (np.where(valid, (years - x_mean) ** 2, 0.0)).sum(axis=0)
+            return np.where((n >= 2) & (variance > 0), covariance / variance, np.nan)
+
+    def trend_summary(self, window=None, metrics=None):
+        """{area_key: {metric: aggregates}} over the stored history, as plain floats"""
+        window = window or NASAConfig.HISTORY_ROLLING_WINDOW
+        with self._lock:
+            metrics = metrics or list(self.values)
+            summary = {area_key: {'periods': len(self.dates)} for area_key in self.area_keys}
+            if not len(self.dates):
+                return summary
+            for metric in metrics:
+                _, values = self.series(metric)
+                aggregates = {
+                    'first': values[0],
+                    'previous': values[-2] if len(values) > 1 else np.full(len(self.area_keys), np.nan),
+                    'latest': values[-1],
+                    'rolling_mean': self.rolling_mean(metric, window)[-1],
+                    'yoy_change': self.year_over_year(metric)[-1],
+                    'slope_per_year': self.slope(metric)
+                }
+                for column, area_key in enumerate(self.area_keys):
+                    summary[area_key][metric] = {
+                        name: (None if np.isnan(array[column]) else round(float(array[column]), 4))
+                        for name, array in aggregates.items()
+                    }
+            summary_range = {'start': str(self.dates[0]), 'end': str(self.dates[-1])}
+            for area_summary in summary.values():
+                area_summary.update(summary_range)
+            return summary
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f'{self.path}.{os.getpid()}.tmp.npz'
+        try:
+            np.savez(
+                tmp_path,
+                fingerprint=np.array(self.fingerprint),
+                dates=self.dates,
+                area_keys=np.array(self.area_keys, dtype=str),
+                incomplete=self.incomplete,
+                **{f'metric_{name}': values for name, values in self.values.items()}
+            )
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️ Could not persist history {self.namespace}: {e}")
+
+    def _load(self):
+        try:
+            with np.load(self.path) as saved:
+                if str(saved['fingerprint']) != self.fingerprint:
+                    return
+                self.dates = saved['dates'].astype('datetime64[D]')
+                self.area_keys = saved['area_keys'].tolist()
+                self.incomplete = saved['incomplete'].astype('datetime64[D]')
+                self.values = {name[len('metric_'):]: saved[name] for name in saved.files if name.startswith('metric_')}
+        except (OSError, KeyError, ValueError):
+            pass
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'periods': len(self.dates),
+                'incomplete_periods': len(self.incomplete),
+                'areas': len(self.area_keys),
+                'metrics': list(self.values),
+                'start': str(self.dates[0]) if len(self.dates) else None,
+                'end': str(self.dates[-1]) if len(self.dates) else None,
+                'version': self.version,
+                'persist': self.persist
+            }
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_history_store(namespace, fingerprint=''):
+    """Return the process-wide history store for a namespace and fingerprint"""
+    with _stores_lock:
+        store = _stores.get(namespace)
+        if store is None or store.fingerprint != fingerprint:
+            store = _stores[namespace] = HistoryStore(namespace, fingerprint)
+        return store
+
+
+def get_history_stores():
+    with _stores_lock:
+        return dict(_stores)
@@ -0,0 +1,206 @@
+import glob
+import json
+import os
+import threading
+import numpy as np
+from config.nasa_config import NASAConfig
+from utils.memo import stable_hash
+from utils.raster import RasterGrid
+from utils.simulation import LAND_COVER_TYPES
+from utils.modis import CoordinateGrid, lat_lon_window
+from utils.zonal import GeoTiffGrid, get_zonal_stats
+
+# MCD12Q1 LC_Type1 (IGBP) classes; 255 marks unclassified/fill pixels
+IGBP_CLASSES = {**LAND_COVER_TYPES, 17: 'Water Bodies'}
+LC_FILL = 255
+N_CODES = 256
+LC_VARIABLE_NAMES = ('LC_Type1', 'Land_Cover_Type_1')
+LAND_COVER_EXTENSIONS = ('.tif', '.tiff', '.nc', '.nc4', '.h5')
+
+
+def find_land_cover_file():
+    """LAND_COVER_FILE, or the newest MCD12Q1 raster in MODIS_DATA_DIR, or None"""
+    if NASAConfig.LAND_COVER_FILE:
+        return NASAConfig.LAND_COVER_FILE
+    if not NASAConfig.MODIS_DATA_DIR:
+        return None
+    product = NASAConfig.MODIS_PRODUCTS['land_cover']
+    paths = sorted(
+        path for path in glob.glob(os.path.join(NASAConfig.MODIS_DATA_DIR, f'{product}*'))
+        if os.path.splitext(path)[1].lower() in LAND_COVER_EXTENSIONS
+    )
+    return paths[-1] if paths else None
+
+
+def class_histograms(masks, codes, row_offset=0):
+    """(n_zones, N_CODES) pixel counts of every class code per zone, from one bincount.
+
+    codes covers raster rows [row_offset, row_offset + len(codes)) at full
+    width; fill and out-of-range codes are left out.
+    """
+    n = len(masks.zone_keys)
+    flat = np.asarray(codes).reshape(-1)[masks.members - row_offset * masks.shape[1]].astype(np.int64)
+    zone = np.repeat(np.arange(n), masks.counts)
+    valid = (flat >= 0) & (flat < N_CODES) & (flat != LC_FILL)
+    return np.bincount(zone[valid] * N_CODES + flat[valid], minlength=n * N_CODES).reshape(n, N_CODES)
+
+
+def _class_fractions(counts):
+    """{class name: fraction} of one histogram row, largest first"""
+    total = counts.sum()
+    present = np.flatnonzero(counts)
+    present = present[np.argsort(-counts[present], kind='stable')]
+    return {IGBP_CLASSES.get(int(code), f'Class {code}'): round(float(counts[code] / total), 4) for code in present}
+
+
+def _require_xarray():
+    try:
+        import xarray
+    except ImportError:
+        raise RuntimeError('NetCDF land cover needs xarray and netCDF4 (pip install xarray netCDF4)')
+    return xarray
+
+
+class LandCoverRaster:
+    """One MCD12Q1 LC_Type1 raster: GeoTIFF (rasterio) or NetCDF/HDF5 with lat/lon coordinates (xarray)"""
+
+    def __init__(self, path):
+        self.path = path
+
+    @property
+    def is_geotiff(self):
+        return os.path.splitext(self.path)[1].lower() in ('.tif', '.tiff')
+
+    def fingerprint(self):
+        return [self.path, os.path.getsize(self.path), os.path.getmtime(self.path)]
+
+    def read(self, bounds):
+        """(codes, grid): class codes of the pixel window covering bounds and its zone-mask grid"""
+        if self.is_geotiff:
+            grid = GeoTiffGrid.for_bounds(self.path, bounds)
+            return grid.read(1), grid
+
+        xarray = _require_xarray()
+        with xarray.open_dataset(self.path, mask_and_scale=False) as dataset:
+            window = lat_lon_window(dataset, self.path, bounds)
+            if window is None:
+                raise ValueError(f"{os.path.basename(self.path)} does not cover the requested bounds")
+            lat_name, lon_name, rows, cols = window
+            name = next((name for name in LC_VARIABLE_NAMES if name in dataset.variables), None)
+            if name is None:
+                raise ValueError(f"{os.path.basename(self.path)} has none of {', '.join(LC_VARIABLE_NAMES)}")
+            variable = dataset[name]
+            selection = {lat_name: rows, lon_name: cols}
+            if 'time' in variable.dims:
+                # Latest yearly classification in the file
+                selection['time'] = -1
+            codes = variable.isel(selection).transpose(lat_name, lon_name).values
+            grid = CoordinateGrid(dataset[lat_name].values[rows], dataset[lon_name].values[cols])
+        return codes, grid
+
+
+class LandCoverBreakdown:
+    """Per-area IGBP class fractions of a land-cover raster, cached by raster version.
+
+    The city window of the raster is read once per version and reduced
+    with a single bincount over zone and class. Results are kept in memory
+    and as JSON under CACHE_DIR/land_cover/<key>.json, keyed on the file's
+    path, size and mtime, the window and the zone definitions.
+    """
+
+    def __init__(self, registry, cache_dir=None):
+        self.registry = registry
+        self.directory = os.path.join(cache_dir or NASAConfig.CACHE_DIR, 'land_cover')
+        self.stats = {'hits': 0, 'disk_hits': 0, 'computed': 0}
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def areas(self, path, bounds):
+        """{area_key: {pixels, dominant_code, dominant_type, dominant_fraction, fractions}}"""
+        raster = LandCoverRaster(path)
+        engine = get_zonal_stats(self.registry)
+        key = stable_hash('land_cover', raster.fingerprint(), bounds, engine.zones_hash)
+        with self._lock:
+            if key in self._results:
+                self.stats['hits'] += 1
+                return self._results[key]
+
+        cache_path = os.path.join(self.directory, f'{key}.json')
+        result = None
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+            kind = 'disk_hits'
+        except (OSError, ValueError):
+            pass
+        if result is None:
+            codes, grid = raster.read(bounds)
+            masks = engine.masks(grid)
+            histograms = class_histograms(masks, codes)
+            result = {}
+            for zone, area_key in enumerate(masks.zone_keys):
+                counts = histograms[zone]
+                total = int(counts.sum())
+                dominant = int(np.argmax(counts)) if total else None
+                result[area_key] = {
+                    'pixels': total,
+                    'dominant_code': dominant,
+                    'dominant_type': IGBP_CLASSES.get(dominant, f'Class {dominant}') if dominant is not None else None,
+                    'dominant_fraction': round(float(counts[dominant] / total), 4) if total else None,
+                    'fractions': _class_fractions(counts) if total else {}
+                }
+            kind = 'computed'
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(result, f)
+                os.replace(tmp_path, cache_path)
+            except OSError as e:
+                print(f"⚠️ Could not persist land cover breakdown: {e}")
+
+        with self._lock:
+            self.stats[kind] += 1
+            self._results = {key: result}
+        return result
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats)
+
+
+def grid_class_fractions(path, bounds, rows, cols):
+    """(rows, cols, N_CODES) class fractions of every cell of a RasterGrid over bounds, in one bincount"""
+    grid = RasterGrid(bounds, rows, cols)
+    codes, pixels = LandCoverRaster(path).read(grid.bounds)
+    lats, lons = pixels.centres(0, pixels.shape[0], 0, pixels.shape[1])
+    cell_rows = np.floor((grid.bounds['north'] - lats) / grid.lat_step).astype(np.int64)
+    cell_cols = np.floor((lons - grid.bounds['west']) / grid.lon_step).astype(np.int64)
+    codes = np.asarray(codes).astype(np.int64)
+    valid = (
+        (cell_rows >= 0) & (cell_rows < rows) & (cell_cols >= 0) & (cell_cols < cols) &
+        (codes >= 0) & (codes < N_CODES) & (codes != LC_FILL)
+    )
+    cells = (cell_rows[valid] * cols + cell_cols[valid]) * N_CODES + codes[valid]
+    counts = np.bincount(cells, minlength=rows * cols * N_CODES).reshape(rows, cols, N_CODES).astype(np.float64)
+    totals = counts.sum(axis=2, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(totals > 0, counts / totals, np.nan)
+
+
+_breakdowns = {}
+_breakdowns_lock = threading.Lock()
+
+
+def get_land_cover_breakdown(registry):
+    """Return the process-wide land-cover breakdown for an area registry"""
+    with _breakdowns_lock:
+        breakdown = _breakdowns.get(id(registry))
+        if breakdown is None or breakdown.registry is not registry:
+            breakdown = _breakdowns[id(registry)] = LandCoverBreakdown(registry)
+        return breakdown
+
+
+def get_land_cover_breakdowns():
+    with _breakdowns_lock:
+        return {breakdown.registry.source or str(key): breakdown for key, breakdown in _breakdowns.items()}
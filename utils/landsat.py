@@ -0,0 +1,225 @@
+import glob
+import json
+import os
+import re
+import threading
+import numpy as np
+from config.nasa_config import NASAConfig
+
+# Collection 2 Level-2 surface reflectance bands used by the indices (Landsat 8/9 OLI)
+SCENE_BANDS = {'blue': 'SR_B2', 'red': 'SR_B4', 'nir': 'SR_B5', 'swir1': 'SR_B6'}
+INDEX_NAMES = ('ndvi', 'evi', 'ndbi')
+
+# Collection 2 Level-2 scaling from stored integers to surface reflectance
+SR_SCALE = 0.0000275
+SR_OFFSET = -0.2
+SR_FILL = 0
+# QA_PIXEL bits: dilated cloud, cirrus, cloud, cloud shadow
+QA_CLOUD_MASK = (1 << 1) | (1 << 2) | (1 << 3) | (1 << 4)
+
+
+def _require_rasterio():
+    try:
+        import rasterio
+        import rasterio.warp
+        from rasterio.windows import Window
+    except ImportError:
+        raise RuntimeError('Landsat ingestion needs rasterio (pip install rasterio)')
+    return rasterio, Window
+
+
+def compute_indices(blue, red, nir, swir1, valid=None):
+    """NDVI, EVI and NDBI from stored SR band integers in one pass over shared arrays.
+
+    Bands are scaled to reflectance once and reused by all three indices.
+    Pixels that are fill, masked by valid, or have a zero denominator come
+    out as NaN. Returns float32 arrays of the band shape.
+    """
+    stored = (blue, red, nir, swir1)
+    ok = np.ones(np.shape(red), dtype=bool) if valid is None else np.array(valid, dtype=bool)
+    for band in stored:
+        ok &= band != SR_FILL
+    blue, red, nir, swir1 = (np.asarray(band, dtype=np.float32) * np.float32(SR_SCALE) + np.float32(SR_OFFSET) for band in stored)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        nir_plus_red = nir + red
+        ndvi = (nir - red) / nir_plus_red
+        evi = np.float32(2.5) * (nir - red) / (nir + np.float32(6.0) * red - np.float32(7.5) * blue + np.float32(1.0))
+        ndbi = (swir1 - nir) / (swir1 + nir)
+
+    indices = {'ndvi': ndvi, 'evi': evi, 'ndbi': ndbi}
+    for name, values in indices.items():
+        values[~ok | ~np.isfinite(values)] = np.nan
+    # EVI is only meaningful within [-1, 1]; bright targets blow up its denominator
+    indices['evi'][np.abs(indices['evi']) > 1] = np.nan
+    return indices
+
+
+class LandsatScene:
+    """Band files of one Landsat Collection 2 Level-2 scene"""
+
+    def __init__(self, scene_id, bands, qa=None):
+        self.scene_id = scene_id
+        self.bands = bands
+        self.qa = qa
+
+    @classmethod
+    def discover(cls, directory):
+        """Find <scene>_SR_B2/B4/B5/B6.TIF (and QA_PIXEL if present) in a directory"""
+        bands = {}
+        scene_id = None
+        for name, suffix in SCENE_BANDS.items():
+            matches = sorted(glob.glob(os.path.join(directory, f'*_{suffix}.TIF')) + glob.glob(os.path.join(directory, f'*_{suffix}.tif')))
+            if not matches:
+                raise FileNotFoundError(f"No *_{suffix}.TIF band in {directory}")
+            bands[name] = matches[0]
+            scene_id = scene_id or re.sub(rf'_{suffix}\.tif$', '', os.path.basename(matches[0]), flags=re.IGNORECASE)
+        qa = sorted(glob.glob(os.path.join(directory, '*_QA_PIXEL.TIF')) + glob.glob(os.path.join(directory, '*_QA_PIXEL.tif')))
+        return cls(scene_id, bands, qa[0] if qa else None)
+
+    def fingerprint(self):
+        """Paths, sizes and modification times of the inputs; changes invalidate cached indices"""
+        files = [self.bands[name] for name in SCENE_BANDS] + ([self.qa] if self.qa else [])
+        return [[path, os.path.getsize(path), os.path.getmtime(path)] for path in files]
+
+
+class LandsatIndices:
+    """Cached NDVI/EVI/NDBI GeoTIFFs of one scene, sampled at lat/lon points"""
+
+    def __init__(self, directory, meta):
+        self.directory = directory
+        self.meta = meta
+
+    @property
+    def scene_id(self):
+        return self.meta['scene_id']
+
+    def path(self, name):
+        return os.path.join(self.directory, f'{name}.tif')
+
+    def sample(self, lats, lons, radius=None):
+        """Mean of each index over a (2 * radius + 1)^2 pixel window at every point (NaN outside the scene)"""
+        rasterio, Window = _require_rasterio()
+        radius = NASAConfig.LANDSAT_SAMPLE_RADIUS if radius is None else radius
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+        samples = {name: np.full(len(lats), np.nan) for name in INDEX_NAMES}
+
+        with rasterio.open(self.path(INDEX_NAMES[0])) as reference:
+            xs, ys = rasterio.warp.transform('EPSG:4326', reference.crs, lons.tolist(), lats.tolist())
+            rows, cols = rasterio.transform.rowcol(reference.transform, xs, ys)
+            height, width = reference.height, reference.width
+        rows, cols = np.asarray(rows), np.asarray(cols)
+        inside = (rows >= 0) & (rows < height) & (cols >= 0) & (cols < width)
+        if not inside.any():
+            return samples
+
+        # A small window per point keeps reads bounded however far apart the points are
+        size = 2 * radius + 1
+        for name in INDEX_NAMES:
+            with rasterio.open(self.path(name)) as src:
+                windows = np.stack([
+                    src.read(1, window=Window(col - radius, row - radius, size, size), boundless=True, fill_value=np.nan)
+                    for row, col in zip(rows[inside].tolist(), cols[inside].tolist())
+                ]).reshape(-1, size * size)
+            counts = np.isfinite(windows).sum(axis=1)
+            sums = np.nansum(windows, axis=1)
+            samples[name][inside] = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+        return samples
+
+
+def ingest_scene(scene, cache_dir=None, window_size=None):
+    """Compute NDVI, EVI and NDBI GeoTIFFs for a scene, reusing them when the bands are unchanged.
+
+    Bands are read window by window (aligned to the red band's internal
+    blocks) and each window is written straight out, so memory stays at a
+    few windows of four bands whatever the scene size.
+    """
+    rasterio, Window = _require_rasterio()
+    window_size = window_size or NASAConfig.LANDSAT_WINDOW_SIZE
+    directory = os.path.join(cache_dir or NASAConfig.CACHE_DIR, 'landsat', scene.scene_id)
+    meta_path = os.path.join(directory, 'meta.json')
+    fingerprint = scene.fingerprint()
+    if os.path.exists(meta_path):
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('fingerprint') == fingerprint:
+            return LandsatIndices(directory, meta)
+
+    os.makedirs(directory, exist_ok=True)
+    sources = {name: rasterio.open(path) for name, path in scene.bands.items()}
+    qa = rasterio.open(scene.qa) if scene.qa else None
+    outputs = {}
+    try:
+        reference = sources['red']
+        for name, src in sources.items():
+            if (src.width, src.height, src.transform) != (reference.width, reference.height, reference.transform):
+                raise ValueError(f"{scene.scene_id}: band {name} is not on the red band's grid")
+
+        # Whole internal blocks per window, so every read decodes each block once
+        block_rows, block_cols = reference.block_shapes[0]
+        step_rows = max(block_rows, window_size // block_rows * block_rows)
+        step_cols = max(block_cols, window_size // block_cols * block_cols)
+
+        grid = {'width': reference.width, 'height': reference.height, 'crs': str(reference.crs)}
+        profile = reference.profile.copy()
+        profile.update(driver='GTiff', dtype='float32', nodata=np.nan, count=1, compress='deflate', tiled=True, blockxsize=256, blockysize=256)
+        if reference.width < 256 or reference.height < 256:
+            profile.update(tiled=False)
+            profile.pop('blockxsize', None)
+            profile.pop('blockysize', None)
+        for name in INDEX_NAMES:
+            outputs[name] = rasterio.open(os.path.join(directory, f'{name}.tif.tmp'), 'w', **profile)
+
+        stats = {name: {'sum': 0.0, 'count': 0} for name in INDEX_NAMES}
+        for row in range(0, reference.height, step_rows):
+            for col in range(0, reference.width, step_cols):
+                window = Window(col, row, min(step_cols, reference.width - col), min(step_rows, reference.height - row))
+                bands = {name: src.read(1, window=window) for name, src in sources.items()}
+                valid = None
+                if qa is not None:
+                    valid = (qa.read(1, window=window) & QA_CLOUD_MASK) == 0
+                for name, values in compute_indices(bands['blue'], bands['red'], bands['nir'], bands['swir1'], valid).items():
+                    outputs[name].write(values, 1, window=window)
+                    finite = values[np.isfinite(values)]
+                    stats[name]['sum'] += float(finite.sum(dtype=np.float64))
+                    stats[name]['count'] += int(finite.size)
+    finally:
+        for src in sources.values():
+            src.close()
+        if qa is not None:
+            qa.close()
+        for output in outputs.values():
+            output.close()
+
+    for name in INDEX_NAMES:
+        os.replace(os.path.join(directory, f'{name}.tif.tmp'), os.path.join(directory, f'{name}.tif'))
+    meta = {
+        'scene_id': scene.scene_id,
+        'fingerprint': fingerprint,
+        **grid,
+        'means': {name: (round(values['sum'] / values['count'], 4) if values['count'] else None) for name, values in stats.items()}
+    }
+    tmp_path = f'{meta_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+    print(f"Ingested Landsat scene {scene.scene_id} ({grid['width']}x{grid['height']})")
+    return LandsatIndices(directory, meta)
+
+
+_scene_indices = {}
+_scene_lock = threading.Lock()
+
+
+def get_scene_indices(directory=None):
+    """Cached indices of the scene in directory (NASAConfig.LANDSAT_SCENE_DIR by default), or None"""
+    directory = directory or NASAConfig.LANDSAT_SCENE_DIR
+    if not directory:
+        return None
+    with _scene_lock:
+        scene = LandsatScene.discover(directory)
+        cached = _scene_indices.get(directory)
+        if cached is None or cached.meta['fingerprint'] != scene.fingerprint():
+            cached = _scene_indices[directory] = ingest_scene(scene)
+        return cached
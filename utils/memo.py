@@ -0,0 +1,223 @@
+import copy
+import hashlib
+import os
+import pickle
+import struct
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+import numpy as np
+from config.nasa_config import NASAConfig
+from utils.timeseries import PowerSeries
+
+_MISSING = object()
+
+# Persisted entries are pruned once every PRUNE_EVERY stores
+PRUNE_EVERY = 100
+
+
+def _feed(hasher, value):
+    """Write a type-tagged canonical encoding of value into hasher"""
+    if value is None or isinstance(value, bool):
+        hasher.update(b'N' if value is None else (b'T' if value else b'F'))
+    elif isinstance(value, (int, np.integer)):
+        hasher.update(b'i' + str(int(value)).encode('ascii') + b';')
+    elif isinstance(value, (float, np.floating)):
+        hasher.update(b'f' + struct.pack('<d', float(value)))
+    elif isinstance(value, str):
+        encoded = value.encode('utf-8')
+        hasher.update(b's' + struct.pack('<Q', len(encoded)) + encoded)
+    elif isinstance(value, bytes):
+        hasher.update(b'b' + struct.pack('<Q', len(value)) + value)
+    elif isinstance(value, dict) or hasattr(value, 'items'):
+        items = sorted(value.items(), key=lambda item: str(item[0]))
+        hasher.update(b'd' + struct.pack('<Q', len(items)))
+        for key, item in items:
+            _feed(hasher, str(key))
+            _feed(hasher, item)
+    elif isinstance(value, (list, tuple)):
+        hasher.update(b'l' + struct.pack('<Q', len(value)))
+        for item in value:
+            _feed(hasher, item)
+    elif isinstance(value, np.ndarray):
+        array = np.ascontiguousarray(value)
+        hasher.update(b'a' + array.dtype.str.encode('ascii') + repr(array.shape).encode('ascii'))
+        hasher.update(array.tobytes() if array.dtype != object else pickle.dumps(array.tolist()))
+    elif isinstance(value, PowerSeries):
+        hasher.update(b'P')
+        _feed(hasher, {'dates': value.dates, 'columns': value.columns, 'simulated': value.simulated, 'source': value.source})
+    elif isinstance(value, (datetime, date)):
+        _feed(hasher, value.isoformat())
+    else:
+        raise TypeError(f"Cannot hash {type(value).__name__} for memoization")
+
+
+def stable_hash(*parts):
+    """Hex digest that is identical across processes and runs for equal inputs"""
+    hasher = hashlib.blake2b(digest_size=20)
+    for part in parts:
+        _feed(hasher, part)
+    return hasher.hexdigest()
+
+
+class ContentMemo:
+    """Bounded LRU of computed values keyed on a content hash of their inputs.
+
+    With persist enabled every value is also pickled under
+    CACHE_DIR/memo/<namespace>, so a restarted worker (or another worker on
+    the host) picks up results computed earlier instead of recomputing them.
+    The directory is bounded by max_disk_bytes and max_disk_age, with file
+    mtime as the last-access time. Values go in and come out as deep copies,
+    so callers can mutate what they get without corrupting the memo.
+    """
+
+    def __init__(self, namespace, max_entries=None, persist=None, cache_dir=None, max_disk_bytes=None, max_disk_age=None):
+        self.namespace = namespace
+        self.max_entries = max_entries or NASAConfig.MEMO_MAX_ENTRIES
+        self.persist = NASAConfig.MEMO_PERSIST if persist is None else persist
+        self.max_disk_bytes = NASAConfig.MEMO_DISK_MAX_BYTES if max_disk_bytes is None else max_disk_bytes
+        self.max_disk_age = NASAConfig.MEMO_DISK_MAX_AGE if max_disk_age is None else max_disk_age
+        self.directory = os.path.join(cache_dir or NASAConfig.CACHE_DIR, 'memo', namespace)
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'disk_evictions': 0}
+        self._entries = OrderedDict()
+        self._stores = 0
+        self._lock = threading.Lock()
+        if self.persist:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, *parts):
+        return stable_hash(self.namespace, *parts)
+
+    def get(self, key, default=None):
+        """Cached value for key (memory first, then disk), or default"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return copy.deepcopy(self._entries[key])
+
+        value = self._load(key)
+        with self._lock:
+            self.stats['disk_hits' if value is not _MISSING else 'misses'] += 1
+        if value is _MISSING:
+            return default
+        self._remember(key, copy.deepcopy(value))
+        return value
+
+    def set(self, key, value):
+        self._remember(key, copy.deepcopy(value))
+        self._store(key, value)
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.pkl')
+
+    def _load(self, key):
+        if not self.persist:
+            return _MISSING
+        path = self._path(key)
+        try:
+            if self.max_disk_age and time.time() - os.path.getmtime(path) > self.max_disk_age:
+                return _MISSING
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            os.utime(path)
+            return value
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return _MISSING
+
+    def _store(self, key, value):
+        if not self.persist:
+            return
+        tmp_path = f'{self._path(key)}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except (OSError, pickle.PicklingError) as e:
+            print(f"⚠️ Could not persist memo entry {self.namespace}/{key}: {e}")
+            return
+        with self._lock:
+            self._stores += 1
+            prune = self._stores % PRUNE_EVERY == 1
+        if prune:
+            self.prune_disk()
+
+    def prune_disk(self):
+        """Remove persisted entries older than max_disk_age, then least recently used ones over max_disk_bytes"""
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        now = time.time()
+        for name in names:
+            if not name.endswith('.pkl'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for path, size, mtime in sorted(entries, key=lambda entry: entry[2]):
+            expired = self.max_disk_age and now - mtime > self.max_disk_age
+            if not expired and total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except OSError:
+                pass
+        with self._lock:
+            self.stats['disk_evictions'] += removed
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self._entries)
+            stats['max_entries'] = self.max_entries
+            stats['persist'] = self.persist
+        lookups = stats['hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['disk_hits']) / lookups, 4) if lookups else 0.0
+        return stats
+
+
+_memos = {}
+_memos_lock = threading.Lock()
+
+
+def get_memo(namespace):
+    """Return the process-wide memo for a namespace"""
+    with _memos_lock:
+        if namespace not in _memos:
+            _memos[namespace] = ContentMemo(namespace)
+        return _memos[namespace]
+
+
+def get_memos():
+    with _memos_lock:
+        return dict(_memos)
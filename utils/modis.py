@@ -0,0 +1,201 @@
+import glob
+import os
+import re
+import threading
+import numpy as np
+from config.nasa_config import NASAConfig
+from utils.history import get_history_store
+from utils.memo import stable_hash
+from utils.zonal import get_zonal_stats, zonal_mean_stack
+
+# Variables ingested per product: accepted names (HDF-EOS SDS names and their
+# NetCDF spellings from AppEEARS subsets), Kelvin conversion and physical valid range
+MODIS_VARIABLES = {
+    'MOD13Q1': {
+        'ndvi': {'names': ('250m 16 days NDVI', '_250m_16_days_NDVI'), 'valid': (-0.2, 1.0)},
+        'evi': {'names': ('250m 16 days EVI', '_250m_16_days_EVI'), 'valid': (-0.2, 1.0)}
+    },
+    'MOD11A2': {
+        'lst_day': {'names': ('LST_Day_1km',), 'kelvin': True, 'valid': (-40.0, 80.0)},
+        'lst_night': {'names': ('LST_Night_1km',), 'kelvin': True, 'valid': (-40.0, 80.0)}
+    }
+}
+GRANULE_EXTENSIONS = ('.nc', '.nc4', '.h5', '.hdf')
+LAT_NAMES = ('lat', 'latitude')
+LON_NAMES = ('lon', 'longitude')
+# Granule acquisition date in MODIS file names: MOD13Q1.A2023145.h24v06...
+_ACQUISITION = re.compile(r'\.A(\d{4})(\d{3})\.')
+
+
+def _require_xarray():
+    try:
+        import xarray
+    except ImportError:
+        raise RuntimeError('MODIS ingestion needs xarray and netCDF4 (pip install xarray netCDF4)')
+    return xarray
+
+
+class CoordinateGrid:
+    """Pixel grid of a granule's lat/lon window, for zone masks; row 0 is the first latitude"""
+
+    def __init__(self, lats, lons, tile_size=256):
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.tile_size = tile_size
+
+    @property
+    def shape(self):
+        return len(self.lats), len(self.lons)
+
+    def centres(self, r0, r1, c0, c1):
+        return np.meshgrid(self.lats[r0:r1], self.lons[c0:c1], indexing='ij')
+
+    def to_dict(self):
+        return {'lats': self.lats, 'lons': self.lons}
+
+
+def discover_granules(product, directory=None):
+    """Granule files of a product (<product>*.nc/.nc4/.h5/.hdf) in the MODIS data directory"""
+    directory = directory or NASAConfig.MODIS_DATA_DIR
+    paths = glob.glob(os.path.join(directory, f'{product}*')) + glob.glob(os.path.join(directory, f'{product.lower()}*'))
+    return sorted({path for path in paths if os.path.splitext(path)[1].lower() in GRANULE_EXTENSIONS})
+
+
+def _granule_fingerprint(paths):
+    return [[path, os.path.getsize(path), os.path.getmtime(path)] for path in paths]
+
+
+def _name_in(dataset, names, path):
+    for name in names:
+        if name in dataset.variables:
+            return name
+    raise ValueError(f"{os.path.basename(path)} has none of {', '.join(names)}")
+
+
+def _window(coordinate, low, high):
+    """Index slice of a sorted (either direction) 1-D coordinate covering [low, high]"""
+    inside = np.flatnonzero((coordinate >= low) & (coordinate <= high))
+    return slice(int(inside[0]), int(inside[-1]) + 1) if len(inside) else None
+
+
+def lat_lon_window(dataset, path, bounds):
+    """(lat name, lon name, row slice, col slice) of a dataset's lat/lon coordinates inside bounds, or None"""
+    lat_name = _name_in(dataset, LAT_NAMES, path)
+    lon_name = _name_in(dataset, LON_NAMES, path)
+    rows = _window(dataset[lat_name].values, bounds['south'], bounds['north'])
+    cols = _window(dataset[lon_name].values, bounds['west'], bounds['east'])
+    if rows is None or cols is None:
+        return None
+    return lat_name, lon_name, rows, cols
+
+
+def _granule_dates(dataset, path):
+    if 'time' in dataset.dims:
+        return dataset['time'].values.astype('datetime64[D]')
+    match = _ACQUISITION.search(os.path.basename(path))
+    if match is None:
+        raise ValueError(f"{os.path.basename(path)} has no time dimension or .AYYYYDDD. date in its name")
+    year, day = int(match.group(1)), int(match.group(2))
+    return np.array([np.datetime64(f'{year}-01-01') + np.timedelta64(day - 1, 'D')])
+
+
+def _to_physical(values, spec, units):
+    """Decoded values in physical units, NaN outside the variable's valid range"""
+    values = np.asarray(values, dtype=np.float64)
+    if spec.get('kelvin') and str(units).lower() in ('k', 'kelvin'):
+        values = values - 273.15
+    low, high = spec['valid']
+    return np.where((values >= low) & (values <= high), values, np.nan)
+
+
+def ingest_granule(path, product, store, engine, bounds, time_chunk):
+    """Fold one granule into the store as per-area means, a time chunk at a time.
+
+    The dataset is opened lazily and only the rows of the city window that
+    the area zones cover are read, time_chunk composites per read, so memory
+    stays at one small block whatever the granule or stack size. Composite
+    dates already in the store are skipped. Returns the number of new dates.
+    """
+    xarray = _require_xarray()
+    added = 0
+    with xarray.open_dataset(path, mask_and_scale=True) as dataset:
+        window = lat_lon_window(dataset, path, bounds)
+        if window is None:
+            return 0
+        lat_name, lon_name, rows, cols = window
+        lats, lons = dataset[lat_name].values, dataset[lon_name].values
+
+        masks = engine.masks(CoordinateGrid(lats[rows], lons[cols]))
+        r0, r1 = masks.row_range
+        if r1 <= r0:
+            return 0
+        variables = {
+            metric: (dataset[_name_in(dataset, spec['names'], path)], spec)
+            for metric, spec in MODIS_VARIABLES[product].items()
+        }
+        dates = _granule_dates(dataset, path)
+        selection_window = {lat_name: slice(rows.start + r0, rows.start + r1), lon_name: cols}
+
+        for t0 in range(0, len(dates), time_chunk):
+            block_dates = dates[t0:t0 + time_chunk]
+            if not store.missing(block_dates.tolist()):
+                continue
+            means = {}
+            for metric, (variable, spec) in variables.items():
+                selection = dict(selection_window)
+                if 'time' in variable.dims:
+                    selection['time'] = slice(t0, t0 + time_chunk)
+                block = variable.isel(selection).transpose(*(['time'] if 'time' in variable.dims else []), lat_name, lon_name)
+                values = _to_physical(block.values, spec, variable.attrs.get('units', ''))
+                means[metric] = zonal_mean_stack(masks, values.reshape(-1, r1 - r0, values.shape[-1]), r0)
+            store.upsert_many(block_dates.tolist(), masks.zone_keys, means)
+            added += len(block_dates)
+    return added
+
+
+_ingested = {}
+_ingest_lock = threading.Lock()
+
+
+def get_modis_store(product, registry, city_key, bounds, directory=None):
+    """Per-area time series of one MODIS product for a city, ingesting new granules first.
+
+    The store is a HistoryStore in namespace <city>_modis_<product> with one
+    period per composite date; granules are re-scanned only when the set of
+    files (or their size/mtime) changes.
+    """
+    if product not in MODIS_VARIABLES:
+        raise KeyError(f"No MODIS variables configured for {product}")
+    engine = get_zonal_stats(registry)
+    store = get_history_store(f'{city_key}_modis_{product}', stable_hash(product, MODIS_VARIABLES[product], engine.zones_hash))
+    granules = discover_granules(product, directory)
+    fingerprint = stable_hash(_granule_fingerprint(granules))
+    with _ingest_lock:
+        if _ingested.get(store.namespace) != fingerprint:
+            added = sum(ingest_granule(path, product, store, engine, bounds, NASAConfig.MODIS_TIME_CHUNK) for path in granules)
+            _ingested[store.namespace] = fingerprint
+            if added:
+                print(f"Ingested {added} {product} composites from {len(granules)} granules")
+    return store
+
+
+def latest_values(store, metrics, on_or_before=None):
+    """{metric: per-area value of the latest composite on or before a date}, plus the composite dates"""
+    values, dates = {}, {}
+    for metric in metrics:
+        series_dates, series = store.series(metric, end=on_or_before)
+        finite = np.isfinite(series)
+        # Last row with a value, per area column (none when no composite is on or before the date)
+        last = np.full(series.shape[1], -1)
+        if len(series):
+            last = np.where(finite.any(axis=0), len(series) - 1 - np.argmax(finite[::-1], axis=0), -1)
+        columns = np.arange(series.shape[1])
+        values[metric] = np.where(last >= 0, series[np.maximum(last, 0), columns] if len(series) else np.nan, np.nan)
+        previous = np.full(series.shape[1], np.nan)
+        for column, row in enumerate(last):
+            earlier = np.flatnonzero(finite[:max(row, 0), column])
+            if row >= 0 and len(earlier):
+                previous[column] = series[earlier[-1], column]
+        values[f'{metric}_previous'] = previous
+        dates[metric] = [str(series_dates[row]) if row >= 0 else None for row in last]
+    return values, dates
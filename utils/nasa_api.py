@@ -1,45 +1,69 @@
 import requests
 from requests import exceptions
 import pandas as pd
+import numpy as np
 import time
-import random
 from datetime import datetime, timedelta
 import json
+import threading
+from collections import OrderedDict
 from config.nasa_config import NASAConfig
+from utils.response_cache import get_response_cache
+from utils.power_grid import PowerGrid
+from utils.timeseries import PowerSeries
+from utils.single_flight import get_single_flight
+from utils.circuit_breaker import get_breaker
+from utils.record_replay import mount_record_replay
+from utils.area_registry import get_area_registry
+from utils.cities import City, get_city
+from utils.landsat import get_scene_indices
+from utils.modis import get_modis_store, latest_values
+from utils.firms import from_day, get_fire_store, ingest_days, to_day
+from utils.land_cover import find_land_cover_file, get_land_cover_breakdown
+from utils.simulation import SimulationEngine, LAND_COVER_TYPES, is_urban, is_vegetated, is_water
+
+# Parsed regional grids and when they were parsed, keyed by their response cache key
+# (which includes the request window), least recently used first
+_power_grids = OrderedDict()
+_power_grids_lock = threading.Lock()
 
 class NASAAPI:
-    def __init__(self):
+    def __init__(self, simulation_seed=None, simulation_date=None, city=None, power_window=None):
         self.config = NASAConfig()
-        self.session = requests.Session()
+        # (start, end) of POWER requests as YYYYMMDD; historical periods pass their own window
+        self.power_window = tuple(power_window) if power_window else (self.config.POWER_START, self.config.POWER_END)
+        self.city = city if isinstance(city, City) else get_city(city)
+        self.session = mount_record_replay(requests.Session())
+        self.simulation = SimulationEngine(seed=simulation_seed, date=simulation_date)
+        self.power_cache = get_response_cache(
+            'power',
+            ttl=self.config.POWER_CACHE_TTL,
+            stale_ttl=self.config.POWER_CACHE_STALE_TTL,
+            max_bytes=self.config.POWER_CACHE_MAX_BYTES
+        )
+        self.power_flight = get_single_flight('power')
     
     def get_air_quality_data(self, lat, lon):
         """Get simulated air quality data"""
         try:
-            time.sleep(0.1)
-            
-            base_pollution = 50
-            if lat > 23.25:
-                pollution_factor = random.uniform(1.2, 1.8)
-            else:
-                pollution_factor = random.uniform(0.8, 1.2)
-            
-            air_quality = {
-                'pm25': round(random.uniform(15, 85) * pollution_factor, 2),
-                'pm10': round(random.uniform(25, 120) * pollution_factor, 2),
-                'no2': round(random.uniform(5, 45) * pollution_factor, 2),
-                'so2': round(random.uniform(2, 25) * pollution_factor, 2),
-                'o3': round(random.uniform(10, 60) * pollution_factor, 2),
-                'aqi': round(random.uniform(30, 180) * pollution_factor, 2),
-                'simulated': True,
-                'source': 'NASA Simulation Model'
-            }
-            
-            return air_quality
-            
+            return self._simulated_air_quality([lat], [lon])[0]
         except Exception as e:
             print(f"Error in air quality simulation: {e}")
             return self._get_fallback_air_quality()
     
+    def get_simulated_sources_batch(self, coords):
+        """Simulate air quality, MODIS and Landsat data for many (lat, lon) points in one pass"""
+        lats = np.array([lat for lat, _ in coords], dtype=np.float64)
+        lons = np.array([lon for _, lon in coords], dtype=np.float64)
+        return {
+            'air_quality': self._simulated_air_quality(lats, lons),
+            'modis_vegetation': self._modis_vegetation(lats, lons),
+            'modis_temperature': self._land_surface_temperature(lats, lons),
+            'modis_land_cover': self._land_cover(lats, lons),
+            'landsat_metadata': self._simulated_landsat_metadata(lats, lons),
+            'landsat_indices': self._landsat_indices(lats, lons)
+        }
+    
     def get_satellite_imagery(self, lat, lon, dim=0.15):
         """Get satellite imagery"""
         try:
@@ -61,67 +85,163 @@ class NASAAPI:
             return 'https://via.placeholder.com/400x300?text=NASA+Satellite+Data'
     
     def get_solar_energy_data(self, lat, lon):
-        """Get solar energy data from NASA POWER API"""
+        """Get solar energy data from NASA POWER API (cached on disk)"""
         try:
+            precision = self.config.POWER_COORD_PRECISION
             params = {
-                'parameters': 'ALLSKY_SFC_SW_DWN,CLRSKY_SFC_SW_DWN,T2M',
-                'start': '20230101',
-                'end': '20231231',
-                'latitude': lat,
-                'longitude': lon,
+                'parameters': self.config.POWER_PARAMETERS,
+                'start': self.power_window[0],
+                'end': self.power_window[1],
+                'latitude': round(lat, precision),
+                'longitude': round(lon, precision),
                 'community': 'RE',
                 'format': 'JSON'
             }
             
+            key = self.power_cache.make_key(endpoint='power', **params)
+            data = self._cached_power_fetch(key, params)
+            if data is not None:
+                return data
+            return self._get_simulated_solar_data(lat, lon)
+        except Exception as e:
+            print(f"Error fetching solar data: {e}")
+            return self._get_simulated_solar_data(lat, lon)
+    
+    def get_solar_energy_data_batch(self, coords):
+        """Get POWER series for many (lat, lon) points from one regional grid request"""
+        grid = self.get_power_grid()
+        if grid is None:
+            return [PowerSeries.from_response(self.get_solar_energy_data(lat, lon)) for lat, lon in coords]
+        
+        lats = [lat for lat, _ in coords]
+        lons = [lon for _, lon in coords]
+        return grid.point_series(lats, lons)
+    
+    def get_power_grid(self, bounds=None):
+        """Get the regional POWER grid covering the bounds, or None if unavailable"""
+        try:
+            bounds = bounds or self.city.bounds
+            params = {
+                'parameters': self.config.POWER_PARAMETERS,
+                'start': self.power_window[0],
+                'end': self.power_window[1],
+                'community': 'RE',
+                'format': 'JSON',
+                **self._regional_extent(bounds)
+            }
+            
+            key = self.power_cache.make_key(endpoint='power_regional', **params)
+            with _power_grids_lock:
+                cached = _power_grids.get(key)
+                if cached and time.time() - cached[1] < self.config.POWER_CACHE_TTL:
+                    _power_grids.move_to_end(key)
+                    return cached[0]
+            
+            data = self._cached_power_fetch(key, params, endpoint='power_regional')
+            if data is None:
+                return None
+            
+            grid = PowerGrid.from_response(data)
+            with _power_grids_lock:
+                _power_grids[key] = (grid, time.time())
+                _power_grids.move_to_end(key)
+                while len(_power_grids) > self.config.POWER_GRID_CACHE:
+                    _power_grids.popitem(last=False)
+            return grid
+        except Exception as e:
+            print(f"Error building NASA POWER regional grid: {e}")
+            return None
+    
+    def _regional_extent(self, bounds):
+        # POWER rejects regional boxes narrower than its minimum span, so pad around the centre
+        half_span = self.config.POWER_REGIONAL_MIN_SPAN / 2
+        center_lat = (bounds['north'] + bounds['south']) / 2
+        center_lon = (bounds['east'] + bounds['west']) / 2
+        return {
+            'latitude-min': round(min(bounds['south'], center_lat - half_span), 4),
+            'latitude-max': round(max(bounds['north'], center_lat + half_span), 4),
+            'longitude-min': round(min(bounds['west'], center_lon - half_span), 4),
+            'longitude-max': round(max(bounds['east'], center_lon + half_span), 4)
+        }
+    
+    def _cached_power_fetch(self, key, params, endpoint='power'):
+        """Serve a POWER request from cache, coalescing concurrent fetches of the same key"""
+        return self.power_cache.get_or_fetch(
+            key,
+            lambda: self._fetch_power(params, endpoint=endpoint),
+            flight=self.power_flight
+        )
+    
+    def _fetch_power(self, params, endpoint='power'):
+        """Fetch a POWER response, returning None on failure or when the endpoint's breaker is open"""
+        lat, lon = params.get('latitude', 'region'), params.get('longitude', 'region')
+        breaker = get_breaker(endpoint, probe=lambda timeout: self._probe_power(endpoint, timeout))
+        if not breaker.allow_request():
+            print(f"NASA POWER circuit open for {endpoint}, skipping request for {lat}, {lon}")
+            return None
+        
+        started = time.perf_counter()
+        try:
             response = self.session.get(
-                self.config.APIS['power'], 
+                self.config.APIS[endpoint], 
                 params=params, 
-                timeout=30
+                timeout=breaker.timeout()
             )
+            elapsed = time.perf_counter() - started
             
             if response.status_code == 200:
                 data = response.json()
+                breaker.record_success(elapsed)
                 print(f"Successfully fetched NASA POWER data for {lat}, {lon}")
                 return data
             else:
+                # Rate limiting and server errors count against the endpoint; bad requests do not
+                if response.status_code == 429 or response.status_code >= 500:
+                    breaker.record_failure(elapsed)
+                else:
+                    breaker.record_success(elapsed)
                 print(f"NASA POWER API error: {response.status_code}")
-                return self._get_simulated_solar_data(lat, lon)
+                return None
         except exceptions.Timeout:
+            breaker.record_failure(time.perf_counter() - started)
             print(f"NASA POWER API timeout for {lat}, {lon}")
-            return self._get_simulated_solar_data(lat, lon)
-            return self._get_simulated_solar_data(lat, lon)
+            return None
         except Exception as e:
+            breaker.record_failure()
             print(f"Error fetching solar data: {e}")
-            return self._get_simulated_solar_data(lat, lon)
+            return None
+    
+    def _probe_power(self, endpoint, timeout):
+        """Small one-day request used to test whether an open POWER endpoint has recovered"""
+        bounds = self.city.bounds
+        params = {
+            'parameters': 'T2M',
+            'start': self.power_window[0],
+            'end': self.power_window[0],
+            'community': 'RE',
+            'format': 'JSON'
+        }
+        if endpoint == 'power_regional':
+            params.update(self._regional_extent(bounds))
+        else:
+            params['latitude'] = round((bounds['north'] + bounds['south']) / 2, 4)
+            params['longitude'] = round((bounds['east'] + bounds['west']) / 2, 4)
+        
+        response = self.session.get(self.config.APIS[endpoint], params=params, timeout=timeout)
+        return response.status_code == 200
     
     def get_modis_vegetation_data(self, lat, lon):
         """Get MODIS vegetation index data"""
         try:
-            vegetation_data = self._simulate_modis_vegetation(lat, lon)
-            return vegetation_data
-            
+            return self._modis_vegetation([lat], [lon])[0]
         except Exception as e:
             print(f"Error fetching MODIS vegetation data: {e}")
-            return self._simulate_modis_vegetation(lat, lon)
+            return {'ndvi': 0.5, 'evi': 0.6, 'vegetation_density': 50.0, 'simulated': True}
     
     def get_modis_land_surface_temperature(self, lat, lon):
         """Get MODIS land surface temperature data"""
         try:
-            base_temp = 25.0
-            
-            if self._is_urban_area(lat, lon):
-                lst = base_temp + random.uniform(3.0, 8.0)
-            else:
-                lst = base_temp + random.uniform(1.0, 4.0)
-            
-            return {
-                'daytime_temperature': round(lst, 2),
-                'nighttime_temperature': round(lst - random.uniform(5.0, 10.0), 2),
-                'urban_heat_intensity': round(lst - base_temp, 2),
-                'source': 'MODIS MOD11A2',
-                'simulated': True
-            }
-            
+            return self._land_surface_temperature([lat], [lon])[0]
         except Exception as e:
             print(f"Error fetching MODIS temperature data: {e}")
             return {'daytime_temperature': 30.5, 'urban_heat_intensity': 5.5, 'simulated': True}
@@ -129,46 +249,7 @@ class NASAAPI:
     def get_modis_land_cover(self, lat, lon):
         """Get MODIS land cover classification"""
         try:
-            land_cover_types = {
-                1: 'Evergreen Needleleaf Forest',
-                2: 'Evergreen Broadleaf Forest', 
-                3: 'Deciduous Needleleaf Forest',
-                4: 'Deciduous Broadleaf Forest',
-                5: 'Mixed Forests',
-                6: 'Closed Shrublands',
-                7: 'Open Shrublands',
-                8: 'Woody Savannas',
-                9: 'Savannas',
-                10: 'Grasslands',
-                11: 'Permanent Wetlands',
-                12: 'Croplands',
-                13: 'Urban and Built-up',
-                14: 'Cropland/Natural Vegetation Mosaic',
-                15: 'Snow and Ice',
-                16: 'Barren or Sparsely Vegetated'
-            }
-            
-            if self._is_urban_area(lat, lon):
-                cover_type = 13
-                confidence = random.uniform(0.8, 0.95)
-            elif self._is_water_body(lat, lon):
-                cover_type = 11
-                confidence = random.uniform(0.7, 0.9)
-            elif self._is_vegetated_area(lat, lon):
-                cover_type = random.choice([5, 9, 10])
-                confidence = random.uniform(0.6, 0.85)
-            else:
-                cover_type = 16
-                confidence = random.uniform(0.5, 0.8)
-            
-            return {
-                'land_cover_type': land_cover_types[cover_type],
-                'land_cover_code': cover_type,
-                'confidence': round(confidence, 3),
-                'source': 'MODIS MCD12Q1',
-                'simulated': True
-            }
-            
+            return self._land_cover([lat], [lon])[0]
         except Exception as e:
             print(f"Error fetching MODIS land cover: {e}")
             return {'land_cover_type': 'Urban and Built-up', 'confidence': 0.8, 'simulated': True}
@@ -176,97 +257,269 @@ class NASAAPI:
     def get_landsat_imagery_metadata(self, lat, lon):
         """Get Landsat imagery metadata"""
         try:
-            landsat_data = self._simulate_landsat_metadata(lat, lon)
-            return landsat_data
-            
+            return self._simulated_landsat_metadata([lat], [lon])[0]
         except Exception as e:
             print(f"Error fetching Landsat metadata: {e}")
-            return self._simulate_landsat_metadata(lat, lon)
+            return {'cloud_cover': 10.0, 'satellite': 'Landsat-8', 'simulated': True}
     
     def get_landsat_vegetation_indices(self, lat, lon):
         """Calculate vegetation indices from Landsat data"""
         try:
-            ndvi = self._calculate_ndvi_from_landsat(lat, lon)
-            evi = self._calculate_evi_from_landsat(lat, lon)
-            ndbi = self._calculate_ndbi_from_landsat(lat, lon)
-            
-            return {
-                'ndvi': round(ndvi, 3),
-                'evi': round(evi, 3),
-                'ndbi': round(ndbi, 3),
-                'vegetation_health': self._classify_vegetation_health(ndvi),
-                'urbanization_level': self._classify_urbanization(ndbi),
-                'source': 'Landsat 8/9',
-                'simulated': True
-            }
-            
+            return self._landsat_indices([lat], [lon])[0]
         except Exception as e:
             print(f"Error calculating Landsat indices: {e}")
             return {'ndvi': 0.5, 'ndbi': 0.3, 'vegetation_health': 'Moderate', 'simulated': True}
     
     def get_modis_fire_data(self, country='IND', days_back=30):
-        """Get MODIS active fire data"""
+        """Get MODIS active fire data for a country over the days_back days up to the simulation date"""
         try:
-            fire_data = self._simulate_fire_data()
-            return fire_data
-            
+            store, start_day, end_day = self._fire_store(country, days_back)
+            if store is None:
+                return self._simulate_fire_data(country)
+            return self._fire_summary(store, store.summarize(store.day_range(start_day, end_day)), start_day, end_day)
         except Exception as e:
             print(f"Error fetching MODIS fire data: {e}")
-            return self._simulate_fire_data()
+            return {'active_fires': 0, 'fire_radiative_power': 0.0, 'confidence': 'low', 'simulated': True}
     
-    # Helper methods
-    def _simulate_modis_vegetation(self, lat, lon):
-        base_ndvi = 0.3
-        
-        if self._is_vegetated_area(lat, lon):
-            ndvi = base_ndvi + random.uniform(0.2, 0.5)
-        elif self._is_urban_area(lat, lon):
-            ndvi = base_ndvi + random.uniform(0.0, 0.2)
-        else:
-            ndvi = base_ndvi + random.uniform(0.1, 0.3)
-        
-        seasonal_factor = random.uniform(0.8, 1.2)
-        ndvi = max(0.0, min(1.0, ndvi * seasonal_factor))
+    def get_fires_near(self, lat, lon, radius_km=None, days_back=30, country='IND'):
+        """FIRMS detections within radius_km of a point over the days_back days up to the simulation date"""
+        radius_km = radius_km or self.config.FIRMS_NEARBY_KM
+        try:
+            store, start_day, end_day = self._fire_store(country, days_back)
+            if store is None:
+                return None
+            rows, distances = store.query(lat, lon, radius_km, start_day, end_day)
+            return {**self._fire_summary(store, store.summarize(rows, distances), start_day, end_day), 'radius_km': radius_km}
+        except Exception as e:
+            print(f"Error querying FIRMS detections: {e}")
+            return None
+    
+    # Helper methods: simulated sources, each producing one record per coordinate
+    def _simulated_air_quality(self, lats, lons):
+        values = self.simulation.air_quality(lats, lons)
+        return [
+            {
+                **{name: round(float(column[i]), 2) for name, column in values.items()},
+                'simulated': True,
+                'source': 'NASA Simulation Model'
+            }
+            for i in range(len(values['aqi']))
+        ]
+    
+    def _simulated_modis_vegetation(self, lats, lons):
+        values = self.simulation.modis_vegetation(lats, lons)
+        return [
+            {
+                'ndvi': round(float(ndvi), 3),
+                'evi': round(float(evi), 3),
+                'vegetation_density': round(float(ndvi) * 100, 1),
+                'seasonal_trend': 'Increasing' if seasonal > 1 else 'Decreasing',
+                'source': 'MODIS MOD13Q1',
+                'simulated': True
+            }
+            for ndvi, evi, seasonal in zip(values['ndvi'], values['evi'], values['seasonal_factor'])
+        ]
+    
+    def _simulated_land_surface_temperature(self, lats, lons):
+        values = self.simulation.land_surface_temperature(lats, lons)
+        return [
+            {
+                'daytime_temperature': round(float(day), 2),
+                'nighttime_temperature': round(float(night), 2),
+                'urban_heat_intensity': round(float(intensity), 2),
+                'source': 'MODIS MOD11A2',
+                'simulated': True
+            }
+            for day, night, intensity in zip(values['daytime'], values['nighttime'], values['urban_heat_intensity'])
+        ]
+    
+    def _simulated_land_cover(self, lats, lons):
+        values = self.simulation.land_cover(lats, lons)
+        return [
+            {
+                'land_cover_type': LAND_COVER_TYPES[int(code)],
+                'land_cover_code': int(code),
+                'confidence': round(float(confidence), 3),
+                'source': 'MODIS MCD12Q1',
+                'simulated': True
+            }
+            for code, confidence in zip(values['code'], values['confidence'])
+        ]
+    
+    def _simulated_landsat_metadata(self, lats, lons):
+        acquired = self.simulation.date
+        return [
+            {
+                'scene_id': f'LC08_L1TP_143045_{acquired.strftime("%Y%m%d")}',
+                'acquisition_date': acquired.strftime('%Y-%m-%d'),
+                'cloud_cover': float(cloud_cover),
+                'processing_level': 'L1TP',
+                'sensor': 'OLI/TIRS',
+                'satellite': 'Landsat-8',
+                'download_url': '#',
+                'simulated': True
+            }
+            for cloud_cover in self.simulation.cloud_cover(lats, lons)
+        ]
+    
+    def _simulated_landsat_indices(self, lats, lons):
+        values = self.simulation.landsat_indices(lats, lons)
+        return [
+            {
+                'ndvi': round(float(ndvi), 3),
+                'evi': round(float(evi), 3),
+                'ndbi': round(float(ndbi), 3),
+                'vegetation_health': self._classify_vegetation_health(ndvi),
+                'urbanization_level': self._classify_urbanization(ndbi),
+                'source': 'Landsat 8/9',
+                'simulated': True
+            }
+            for ndvi, evi, ndbi in zip(values['ndvi'], values['evi'], values['ndbi'])
+        ]
+    
+    def _landsat_indices(self, lats, lons):
+        """Indices sampled from the local Landsat scene when one is configured, simulated elsewhere"""
+        simulated = self._simulated_landsat_indices(lats, lons)
+        if not self.config.LANDSAT_SCENE_DIR:
+            return simulated
+        try:
+            scene = get_scene_indices()
+            samples = scene.sample(lats, lons)
+        except (RuntimeError, OSError, ValueError) as e:
+            print(f"Error reading Landsat scene: {e}")
+            return simulated
         
-        return {
-            'ndvi': round(ndvi, 3),
-            'evi': round(ndvi * 1.2, 3),
-            'vegetation_density': round(ndvi * 100, 1),
-            'seasonal_trend': 'Increasing' if seasonal_factor > 1 else 'Decreasing',
-            'source': 'MODIS MOD13Q1',
-            'simulated': True
-        }
+        records = []
+        for i, fallback in enumerate(simulated):
+            ndvi, evi, ndbi = (float(samples[name][i]) for name in ('ndvi', 'evi', 'ndbi'))
+            if np.isnan(ndvi) or np.isnan(ndbi):
+                # Outside the scene or fully masked by clouds
+                records.append(fallback)
+                continue
+            records.append({
+                'ndvi': round(ndvi, 3),
+                'evi': round(evi, 3) if not np.isnan(evi) else fallback['evi'],
+                'ndbi': round(ndbi, 3),
+                'vegetation_health': self._classify_vegetation_health(ndvi),
+                'urbanization_level': self._classify_urbanization(ndbi),
+                'source': f'Landsat C2 L2 {scene.scene_id}',
+                'simulated': False
+            })
+        return records
     
-    def _simulate_landsat_metadata(self, lat, lon):
-        return {
-            'scene_id': f'LC08_L1TP_143045_{datetime.now().strftime("%Y%m%d")}',
-            'acquisition_date': datetime.now().strftime('%Y-%m-%d'),
-            'cloud_cover': random.uniform(0, 20),
-            'processing_level': 'L1TP',
-            'sensor': 'OLI/TIRS',
-            'satellite': 'Landsat-8',
-            'download_url': '#',
-            'simulated': True
-        }
+    def _modis_composites(self, product, metrics, lats, lons):
+        """Latest local composite values on or before the simulation date for the areas at lats/lons.
+
+        Returns (values, dates, rows) with rows -1 for points that are not an
+        area centroid, or None when no MODIS data directory is configured.
+        """
+        if not self.config.MODIS_DATA_DIR:
+            return None
+        registry = get_area_registry(self.city.areas_file)
+        try:
+            store = get_modis_store(product, registry, self.city.key, self.city.bounds)
+        except (RuntimeError, OSError, ValueError, KeyError) as e:
+            print(f"Error reading MODIS {product} granules: {e}")
+            return None
+        values, dates = latest_values(store, metrics, self.simulation.date)
+        positions = {area_key: column for column, area_key in enumerate(store.area_keys)}
+        rows, distances = registry.nearest(np.asarray(lats, dtype=np.float64), np.asarray(lons, dtype=np.float64))
+        keys = list(registry)
+        columns = np.array([
+            positions.get(keys[row], -1) if row >= 0 and distance < 1e-6 else -1
+            for row, distance in zip(rows, distances)
+        ], dtype=np.int64)
+        return values, dates, columns
     
-    def _calculate_ndvi_from_landsat(self, lat, lon):
-        base = 0.4
-        if self._is_vegetated_area(lat, lon):
-            return base + random.uniform(0.2, 0.4)
-        elif self._is_urban_area(lat, lon):
-            return base + random.uniform(-0.1, 0.1)
-        else:
-            return base + random.uniform(0.0, 0.2)
+    def _modis_vegetation(self, lats, lons):
+        """MOD13Q1 area means from local granules when configured, simulated elsewhere"""
+        simulated = self._simulated_modis_vegetation(lats, lons)
+        composites = self._modis_composites(self.config.MODIS_PRODUCTS['vegetation'], ('ndvi', 'evi'), lats, lons)
+        if composites is None:
+            return simulated
+        values, dates, columns = composites
+        
+        records = []
+        for fallback, column in zip(simulated, columns):
+            ndvi = values['ndvi'][column] if column >= 0 else np.nan
+            if np.isnan(ndvi):
+                records.append(fallback)
+                continue
+            evi = values['evi'][column]
+            previous = values['ndvi_previous'][column]
+            records.append({
+                'ndvi': round(float(ndvi), 3),
+                'evi': round(float(evi), 3) if not np.isnan(evi) else fallback['evi'],
+                'vegetation_density': round(float(ndvi) * 100, 1),
+                'seasonal_trend': fallback['seasonal_trend'] if np.isnan(previous) else ('Increasing' if ndvi > previous else 'Decreasing'),
+                'composite_date': dates['ndvi'][column],
+                'source': 'MODIS MOD13Q1',
+                'simulated': False
+            })
+        return records
     
-    def _calculate_evi_from_landsat(self, lat, lon):
-        ndvi = self._calculate_ndvi_from_landsat(lat, lon)
-        return min(1.0, ndvi * 1.3)
+    def _land_surface_temperature(self, lats, lons):
+        """MOD11A2 area means from local granules when configured, simulated elsewhere.
+        
+        Urban heat intensity is taken against the coolest area of the same
+        composite, which stands in for a rural reference.
+        """
+        simulated = self._simulated_land_surface_temperature(lats, lons)
+        composites = self._modis_composites(self.config.MODIS_PRODUCTS['land_temp'], ('lst_day', 'lst_night'), lats, lons)
+        if composites is None:
+            return simulated
+        values, dates, columns = composites
+        day_values = values['lst_day']
+        reference = np.nanmin(day_values) if np.isfinite(day_values).any() else np.nan
+        
+        records = []
+        for fallback, column in zip(simulated, columns):
+            day = day_values[column] if column >= 0 else np.nan
+            if np.isnan(day):
+                records.append(fallback)
+                continue
+            night = values['lst_night'][column]
+            records.append({
+                'daytime_temperature': round(float(day), 2),
+                'nighttime_temperature': round(float(night), 2) if not np.isnan(night) else fallback['nighttime_temperature'],
+                'urban_heat_intensity': round(float(day - reference), 2),
+                'composite_date': dates['lst_day'][column],
+                'source': 'MODIS MOD11A2',
+                'simulated': False
+            })
+        return records
     
-    def _calculate_ndbi_from_landsat(self, lat, lon):
-        if self._is_urban_area(lat, lon):
-            return random.uniform(0.1, 0.4)
-        else:
-            return random.uniform(-0.2, 0.1)
+    def _land_cover(self, lats, lons):
+        """MCD12Q1 class breakdown of the areas at lats/lons from the local raster when configured, simulated elsewhere"""
+        simulated = self._simulated_land_cover(lats, lons)
+        path = find_land_cover_file()
+        if not path:
+            return simulated
+        registry = get_area_registry(self.city.areas_file)
+        try:
+            breakdown = get_land_cover_breakdown(registry).areas(path, self.city.bounds)
+        except (RuntimeError, OSError, ValueError, KeyError) as e:
+            print(f"Error reading MCD12Q1 land cover: {e}")
+            return simulated
+        rows, distances = registry.nearest(np.asarray(lats, dtype=np.float64), np.asarray(lons, dtype=np.float64))
+        keys = list(registry)
+        
+        records = []
+        for fallback, row, distance in zip(simulated, rows, distances):
+            area = breakdown.get(keys[row]) if row >= 0 and distance < 1e-6 else None
+            if not area or not area['pixels']:
+                records.append(fallback)
+                continue
+            records.append({
+                'land_cover_type': area['dominant_type'],
+                'land_cover_code': area['dominant_code'],
+                'confidence': area['dominant_fraction'],
+                'class_fractions': area['fractions'],
+                'pixels': area['pixels'],
+                'source': 'MODIS MCD12Q1',
+                'simulated': False
+            })
+        return records
     
     def _classify_vegetation_health(self, ndvi):
         if ndvi > 0.6: return 'Excellent'
@@ -279,29 +532,73 @@ class NASAAPI:
         elif ndbi > 0.1: return 'Moderate Urbanization'
         else: return 'Low Urbanization'
     
-    def _simulate_fire_data(self):
+    def _fire_store(self, country, days_back):
+        """(store, start_day, end_day) with the requested days ingested, or (None, ...) without a FIRMS key"""
+        end_day = to_day(self.simulation.date)
+        start_day = end_day - max(1, min(int(days_back), self.config.FIRMS_MAX_DAYS)) + 1
+        if not self.config.FIRMS_MAP_KEY:
+            return None, start_day, end_day
+        store = get_fire_store(self.config.FIRMS_SOURCE, country)
+        added = ingest_days(store, lambda day: self._fetch_firms_day(country, day), list(range(start_day, end_day + 1)))
+        if added:
+            print(f"Ingested {added} FIRMS days for {country} ({len(store)} detections stored)")
+        return store, start_day, end_day
+    
+    def _fire_summary(self, store, summary, start_day, end_day):
         return {
-            'active_fires': random.randint(0, 5),
-            'fire_radiative_power': random.uniform(0, 100),
-            'confidence': random.choice(['low', 'nominal', 'high']),
-            'acquisition_date': datetime.now().strftime('%Y-%m-%d'),
+            **summary,
+            'start_date': str(from_day(start_day)),
+            'acquisition_date': str(from_day(end_day)),
+            'source': f'FIRMS {store.name}',
+            'simulated': False
+        }
+    
+    def _fetch_firms_day(self, country, day):
+        """CSV text of one day of FIRMS detections for a country, or None on failure"""
+        breaker = get_breaker('firms')
+        if not breaker.allow_request():
+            print(f"FIRMS circuit open, skipping {from_day(day)}")
+            return None
+        url = f"{self.config.APIS['firms']}/csv/{self.config.FIRMS_MAP_KEY}/{self.config.FIRMS_SOURCE}/{country}/1/{from_day(day)}"
+        started = time.perf_counter()
+        try:
+            response = self.session.get(url, timeout=breaker.timeout())
+            elapsed = time.perf_counter() - started
+            if response.status_code == 200:
+                breaker.record_success(elapsed)
+                return response.text
+            if response.status_code == 429 or response.status_code >= 500:
+                breaker.record_failure(elapsed)
+            else:
+                breaker.record_success(elapsed)
+            print(f"FIRMS API error: {response.status_code}")
+            return None
+        except exceptions.Timeout:
+            breaker.record_failure(time.perf_counter() - started)
+            print(f"FIRMS API timeout for {from_day(day)}")
+            return None
+        except Exception as e:
+            breaker.record_failure()
+            print(f"Error fetching FIRMS data: {e}")
+            return None
+    
+    def _simulate_fire_data(self, country='IND'):
+        return {
+            **self.simulation.fire_summary(country),
+            'acquisition_date': self.simulation.date.strftime('%Y-%m-%d'),
             'source': 'MODIS Active Fires',
             'simulated': True
         }
     
     def _get_simulated_solar_data(self, lat, lon):
         base_radiation = 5.5
-        seasonal_variation = {
-            '01': 0.9, '02': 0.95, '03': 1.0, '04': 1.05,
-            '05': 1.1, '06': 1.0, '07': 0.9, '08': 0.95,
-            '09': 1.0, '10': 1.05, '11': 1.0, '12': 0.95
-        }
+        monthly = self.simulation.solar_monthly([lat], [lon], base_radiation)[0]
+        year = self.power_window[0][:4]
         
-        daily_data = {}
-        for month in range(1, 13):
-            month_key = f'2023{month:02d}01'
-            variation = seasonal_variation.get(f'{month:02d}', 1.0)
-            daily_data[month_key] = round(base_radiation * variation * random.uniform(0.95, 1.05), 2)
+        daily_data = {
+            f'{year}{month:02d}01': round(float(value), 2)
+            for month, value in enumerate(monthly, start=1)
+        }
         
         return {
             'properties': {
@@ -320,40 +617,19 @@ class NASAAPI:
         }
     
     def _get_area_key(self, lat, lon):
-        areas = {
-            'old_bhopal': (23.2599, 77.4126),
-            'new_bhopal': (23.2278, 77.4357),
-            'shahpura': (23.3000, 77.3667),
-            'kolar': (23.1667, 77.4333),
-            'indrapuri': (23.2800, 77.4200),
-            'bhopal_lake': (23.2667, 77.4000),
-            'industrial_area': (23.2000, 77.4500)
-        }
-        
-        closest_area = None
-        min_distance = float('inf')
-        
-        for area, (area_lat, area_lon) in areas.items():
-            distance = ((lat - area_lat) ** 2 + (lon - area_lon) ** 2) ** 0.5
-            if distance < min_distance:
-                min_distance = distance
-                closest_area = area
-        
-        return closest_area
+        return self.get_area_keys([(lat, lon)])[0]
+    
+    def get_area_keys(self, coords):
+        """Nearest study area for each (lat, lon) in one vectorized lookup"""
+        lats = [lat for lat, _ in coords]
+        lons = [lon for _, lon in coords]
+        return get_area_registry(self.city.areas_file).nearest_keys(lats, lons)
     
     def _is_urban_area(self, lat, lon):
-        urban_areas = [
-            (23.2599, 77.4126), (23.2278, 77.4357),
-            (23.3000, 77.3667), (23.2800, 77.4200),
-        ]
-        return any(abs(lat - u_lat) < 0.02 and abs(lon - u_lon) < 0.02 for u_lat, u_lon in urban_areas)
+        return bool(is_urban([lat], [lon])[0])
     
     def _is_vegetated_area(self, lat, lon):
-        vegetated_areas = [
-            (23.2667, 77.4000), (23.1667, 77.4333),
-        ]
-        return any(abs(lat - v_lat) < 0.03 and abs(lon - v_lon) < 0.03 for v_lat, v_lon in vegetated_areas)
+        return bool(is_vegetated([lat], [lon])[0])
     
     def _is_water_body(self, lat, lon):
-        water_bodies = [(23.2667, 77.4000)]
-        return any(abs(lat - w_lat) < 0.01 and abs(lon - w_lon) < 0.01 for w_lat, w_lon in water_bodies)
\ No newline at end of file
+        return bool(is_water([lat], [lon])[0])
@@ -0,0 +1,443 @@
+"""
+Local stand-in for the NASA services in NASAConfig.APIS, for offline benchmarking.
+
+    python -m utils.nasa_standin serve --port 8765 --latency 0.2 --error-rate 0.05
+    NASA_STANDIN_URL=http://127.0.0.1:8765 gunicorn app:app
+
+    python -m utils.nasa_standin bench --requests 200 --concurrency 8 --latency 0.05
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+import numpy as np
+from config.nasa_config import NASAConfig, _standin_apis
+from utils.png import encode_png
+
+# Rough bounding boxes for FIRMS country queries: (south, north, west, east)
+COUNTRY_BOUNDS = {
+    'IND': (8.0, 35.0, 68.0, 97.0)
+}
+
+
+class StandinProfile:
+    """Latency, error and payload settings for one endpoint"""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, payload_scale=1.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.payload_scale = payload_scale
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+def _rng_for(*parts):
+    return np.random.default_rng(zlib.crc32('|'.join(str(p) for p in parts).encode('utf-8')))
+
+
+def _param(params, name, default=None):
+    values = params.get(name)
+    return values[0] if values else default
+
+
+def _date_range(start, end):
+    first = datetime.strptime(start, '%Y%m%d')
+    last = datetime.strptime(end, '%Y%m%d')
+    return [(first + timedelta(days=i)).strftime('%Y%m%d') for i in range((last - first).days + 1)]
+
+
+def _power_series(parameters, dates, lat, lon):
+    rng = _rng_for('power', round(lat, 3), round(lon, 3))
+    day_of_year = np.array([datetime.strptime(d, '%Y%m%d').timetuple().tm_yday for d in dates])
+    season = np.sin((day_of_year - 80) / 365.0 * 2 * np.pi)
+    series = {}
+    for name in parameters:
+        if name == 'T2M':
+            values = 25 + 8 * season + rng.normal(0, 1.5, len(dates))
+        elif name == 'CLRSKY_SFC_SW_DWN':
+            values = 6.6 + 1.0 * season + rng.normal(0, 0.2, len(dates))
+        else:
+            values = 5.2 + 1.2 * season + rng.normal(0, 0.6, len(dates))
+        series[name] = dict(zip(dates, np.round(values, 2).tolist()))
+    return series
+
+
+def respond_power(params, segments, profile):
+    parameters = _param(params, 'parameters', 'ALLSKY_SFC_SW_DWN').split(',')
+    dates = _date_range(_param(params, 'start', '20230101'), _param(params, 'end', '20231231'))
+    lat = float(_param(params, 'latitude', 23.25))
+    lon = float(_param(params, 'longitude', 77.45))
+    body = {
+        'type': 'Feature',
+        'geometry': {'type': 'Point', 'coordinates': [lon, lat, 500.0]},
+        'properties': {'parameter': _power_series(parameters, dates, lat, lon)},
+        'header': {'title': 'NASA/POWER stand-in', 'start': dates[0], 'end': dates[-1]}
+    }
+    return json.dumps(body).encode('utf-8'), 'application/json'
+
+
+def respond_power_regional(params, segments, profile):
+    parameters = _param(params, 'parameters', 'ALLSKY_SFC_SW_DWN').split(',')
+    dates = _date_range(_param(params, 'start', '20230101'), _param(params, 'end', '20231231'))
+    lats = np.arange(float(_param(params, 'latitude-min', 22.25)), float(_param(params, 'latitude-max', 24.25)) + 1e-9, 0.5)
+    lons = np.arange(float(_param(params, 'longitude-min', 76.45)), float(_param(params, 'longitude-max', 78.45)) + 1e-9, 0.625)
+    features = [
+        {
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [round(lon, 4), round(lat, 4), 500.0]},
+            'properties': {'parameter': _power_series(parameters, dates, lat, lon)}
+        }
+        for lat in lats for lon in lons
+    ]
+    return json.dumps({'type': 'FeatureCollection', 'features': features}).encode('utf-8'), 'application/json'
+
+
+def respond_earth_imagery(params, segments, profile):
+    size = max(8, int(64 * profile.payload_scale))
+    rng = _rng_for('imagery', _param(params, 'lat'), _param(params, 'lon'))
+    pixels = rng.integers(0, 256, (size, size, 4), dtype=np.uint8)
+    pixels[..., 3] = 255
+    return encode_png(pixels), 'image/png'
+
+
+def respond_earth_assets(params, segments, profile):
+    count = max(1, int(5 * profile.payload_scale))
+    body = {
+        'count': count,
+        'results': [
+            {'date': (datetime(2024, 1, 1) + timedelta(days=16 * i)).strftime('%Y-%m-%dT%H:%M:%S'), 'id': f'LC8_standin_{i}'}
+            for i in range(count)
+        ]
+    }
+    return json.dumps(body).encode('utf-8'), 'application/json'
+
+
+def respond_modis(params, segments, profile):
+    pixels = max(1, int(289 * profile.payload_scale))
+    rng = _rng_for('modis', *segments)
+    product = segments[0] if segments else NASAConfig.MODIS_PRODUCTS['vegetation']
+    body = {
+        'product': product,
+        'latitude': float(_param(params, 'latitude', 23.25)),
+        'longitude': float(_param(params, 'longitude', 77.45)),
+        'subset': [
+            {
+                'band': _param(params, 'band', '250m_16_days_NDVI'),
+                'calendar_date': (datetime(2023, 1, 1) + timedelta(days=16 * i)).strftime('%Y-%m-%d'),
+                'data': rng.integers(1000, 8000, pixels).tolist()
+            }
+            for i in range(max(1, int(4 * profile.payload_scale)))
+        ]
+    }
+    return json.dumps(body).encode('utf-8'), 'application/json'
+
+
+def respond_landsat(params, segments, profile):
+    count = max(1, int(10 * profile.payload_scale))
+    rng = _rng_for('landsat', _param(params, 'bbox'))
+    features = [
+        {
+            'type': 'Feature',
+            'id': f'LC08_L2SP_145044_2023{(i % 12) + 1:02d}15_standin',
+            'properties': {
+                'datetime': f'2023-{(i % 12) + 1:02d}-15T05:10:00Z',
+                'eo:cloud_cover': round(float(rng.uniform(0, 40)), 2),
+                'platform': 'LANDSAT_8'
+            },
+            'assets': {band: {'href': f'standin://{band}.TIF'} for band in ('blue', 'red', 'nir08', 'swir16')}
+        }
+        for i in range(count)
+    ]
+    return json.dumps({'type': 'FeatureCollection', 'features': features}).encode('utf-8'), 'application/json'
+
+
+def respond_firms(params, segments, profile):
+    """FIRMS area/country CSV: .../firms/csv/<key>/<source>/<country>/<days>[/<date>]"""
+    country = segments[3] if len(segments) > 3 else 'IND'
+    days = int(segments[4]) if len(segments) > 4 else 1
+    end = datetime.strptime(segments[5], '%Y-%m-%d') if len(segments) > 5 else datetime(2024, 1, 31)
+    south, north, west, east = COUNTRY_BOUNDS.get(country, COUNTRY_BOUNDS['IND'])
+    bounds = NASAConfig.BHOPAL_BOUNDS
+
+    lines = ['latitude,longitude,brightness,scan,track,acq_date,acq_time,satellite,instrument,confidence,version,bright_t31,frp,daynight']
+    for day in range(days):
+        date = end - timedelta(days=day)
+        rng = _rng_for('firms', country, date.strftime('%Y-%m-%d'))
+        count = int(rng.integers(200, 600) * profile.payload_scale)
+        near_city = rng.random(count) < 0.05
+        lats = np.where(near_city, rng.uniform(bounds['south'], bounds['north'], count), rng.uniform(south, north, count))
+        lons = np.where(near_city, rng.uniform(bounds['west'], bounds['east'], count), rng.uniform(west, east, count))
+        brightness = rng.uniform(300, 380, count)
+        frp = rng.gamma(1.5, 8.0, count)
+        confidence = rng.integers(0, 101, count)
+        times = rng.integers(0, 2400, count)
+        for i in range(count):
+            lines.append(
+                f'{lats[i]:.4f},{lons[i]:.4f},{brightness[i]:.1f},1.0,1.0,{date.strftime("%Y-%m-%d")},'
+                f'{times[i]:04d},{"T" if times[i] % 2 else "A"},MODIS,{confidence[i]},6.1NRT,'
+                f'{brightness[i] - 30:.1f},{frp[i]:.1f},{"D" if 600 <= times[i] < 1800 else "N"}'
+            )
+    return ('\n'.join(lines) + '\n').encode('utf-8'), 'text/csv'
+
+
+RESPONDERS = {
+    'power': respond_power,
+    'power_regional': respond_power_regional,
+    'earth_imagery': respond_earth_imagery,
+    'earth_assets': respond_earth_assets,
+    'modis': respond_modis,
+    'landsat': respond_landsat,
+    'firms': respond_firms
+}
+
+
+class NASAStandinHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        segments = [segment for segment in parts.path.split('/') if segment]
+        api = segments[0] if segments else ''
+        responder = RESPONDERS.get(api)
+        if responder is None:
+            self._send(404, b'{"error": "unknown endpoint"}', 'application/json')
+            return
+
+        profile = self.server.profile_for(api)
+        rng = self.server.next_rng()
+        delay = profile.latency + (rng.exponential(profile.jitter) if profile.jitter > 0 else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+        if profile.error_rate > 0 and rng.random() < profile.error_rate:
+            status = 429 if rng.random() < 0.5 else 503
+            self.server.count(api, status)
+            self._send(status, b'{"error": "stand-in injected failure"}', 'application/json')
+            return
+
+        body, content_type = responder(parse_qs(parts.query), segments[1:], profile)
+        self.server.count(api, 200, len(body))
+        self._send(200, body, content_type)
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class NASAStandinServer(ThreadingHTTPServer):
+    """Threaded HTTP stand-in serving every NASAConfig.APIS endpoint under /<api name>"""
+
+    daemon_threads = True
+
+    def __init__(self, address, profile=None, endpoint_profiles=None, seed=0):
+        super().__init__(address, NASAStandinHandler)
+        self.profile = profile or StandinProfile()
+        self.endpoint_profiles = endpoint_profiles or {}
+        self.stats = {}
+        self._seed = seed
+        self._requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def profile_for(self, api):
+        return self.endpoint_profiles.get(api, self.profile)
+
+    def next_rng(self):
+        with self._lock:
+            self._requests += 1
+            return np.random.default_rng([self._seed, self._requests])
+
+    def count(self, api, status, size=0):
+        with self._lock:
+            stats = self.stats.setdefault(api, {'requests': 0, 'errors': 0, 'bytes': 0})
+            stats['requests'] += 1
+            stats['bytes'] += size
+            if status != 200:
+                stats['errors'] += 1
+
+
+def start_standin(host='127.0.0.1', port=0, profile=None, endpoint_profiles=None, seed=0):
+    """Start a stand-in on a daemon thread and return the server"""
+    server = NASAStandinServer((host, port), profile, endpoint_profiles, seed)
+    threading.Thread(target=server.serve_forever, name='nasa-standin', daemon=True).start()
+    return server
+
+
+def _summarize(latencies, statuses, sizes, wall_seconds):
+    latencies = np.array(latencies) if latencies else np.zeros(1)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        'requests': len(statuses),
+        'errors': int(sum(1 for status in statuses if status != 200)),
+        'throughput_rps': round(len(statuses) / wall_seconds, 1) if wall_seconds else 0.0,
+        'p50_ms': round(float(p50) * 1000, 2),
+        'p95_ms': round(float(p95) * 1000, 2),
+        'p99_ms': round(float(p99) * 1000, 2),
+        'max_ms': round(float(latencies.max()) * 1000, 2),
+        'mean_bytes': int(np.mean(sizes)) if sizes else 0
+    }
+
+
+def _endpoint_urls(api, base_url, count):
+    bounds = NASAConfig.BHOPAL_BOUNDS
+    rng = np.random.default_rng(count)
+    urls = []
+    for i in range(count):
+        lat = round(float(rng.uniform(bounds['south'], bounds['north'])), 4)
+        lon = round(float(rng.uniform(bounds['west'], bounds['east'])), 4)
+        if api == 'power':
+            query = f'parameters={NASAConfig.POWER_PARAMETERS}&start={NASAConfig.POWER_START}&end={NASAConfig.POWER_END}&latitude={lat}&longitude={lon}'
+        elif api == 'power_regional':
+            query = f'parameters={NASAConfig.POWER_PARAMETERS}&start={NASAConfig.POWER_START}&end={NASAConfig.POWER_END}&latitude-min=22.25&latitude-max=24.25&longitude-min=76.45&longitude-max=78.45'
+        else:
+            query = f'lat={lat}&lon={lon}&latitude={lat}&longitude={lon}'
+        path = f'{api}/csv/KEY/MODIS_NRT/IND/1' if api == 'firms' else f'{api}/{NASAConfig.MODIS_PRODUCTS["vegetation"]}' if api == 'modis' else api
+        urls.append(f'{base_url}/{path}?{query}')
+    return urls
+
+
+def run_benchmark(requests_per_endpoint=50, concurrency=8, pipeline_runs=5, profile=None, endpoint_profiles=None):
+    """Measure per-endpoint HTTP throughput/latency and end-to-end ingestion against a stand-in"""
+    import requests
+
+    server = start_standin(profile=profile, endpoint_profiles=endpoint_profiles)
+    results = {'profile': (profile or StandinProfile()).to_dict(), 'endpoints': {}}
+
+    try:
+        session = requests.Session()
+        for api in RESPONDERS:
+            latencies, statuses, sizes = [], [], []
+
+            def fetch(url):
+                started = time.perf_counter()
+                response = session.get(url, timeout=60)
+                return time.perf_counter() - started, response.status_code, len(response.content)
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                for latency, status, size in executor.map(fetch, _endpoint_urls(api, server.base_url, requests_per_endpoint)):
+                    latencies.append(latency)
+                    statuses.append(status)
+                    sizes.append(size)
+            results['endpoints'][api] = _summarize(latencies, statuses, sizes, time.perf_counter() - started)
+
+        results['pipeline'] = _benchmark_pipeline(server.base_url, pipeline_runs)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    return results
+
+
+def _benchmark_pipeline(base_url, runs):
+    from utils import nasa_api
+    from utils.data_processing import BhopalDataProcessor
+    from utils.response_cache import ResponseCache
+    from utils.single_flight import SingleFlight
+
+    original_apis = NASAConfig.APIS
+    cache_dir = tempfile.mkdtemp(prefix='nasa-standin-bench-')
+    NASAConfig.APIS = _standin_apis(base_url, original_apis)
+
+    durations = []
+    areas = 0
+    try:
+        for run in range(runs):
+            # Each run gets its own empty POWER cache so every request reaches the stand-in
+            run_dir = os.path.join(cache_dir, str(run))
+            api = nasa_api.NASAAPI()
+            api.power_cache = ResponseCache(
+                'power', NASAConfig.POWER_CACHE_TTL, NASAConfig.POWER_CACHE_STALE_TTL,
+                NASAConfig.POWER_CACHE_MAX_BYTES, cache_dir=run_dir
+            )
+            api.power_flight = SingleFlight('power', lock_dir=run_dir)
+            nasa_api._power_grids.clear()
+
+            processor = BhopalDataProcessor()
+            started = time.perf_counter()
+            processor.fetch_area_sources(api)
+            durations.append(time.perf_counter() - started)
+            areas += len(processor.areas)
+    finally:
+        NASAConfig.APIS = original_apis
+        nasa_api._power_grids.clear()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    durations = np.array(durations)
+    return {
+        'runs': runs,
+        'mean_s': round(float(durations.mean()), 4),
+        'p95_s': round(float(np.percentile(durations, 95)), 4),
+        'areas_per_second': round(areas / float(durations.sum()), 1) if durations.sum() else 0.0
+    }
+
+
+def _parse_endpoint_profiles(values, base):
+    profiles = {}
+    for value in values or []:
+        # api:latency[:error_rate[:payload_scale]]
+        api, *numbers = value.split(':')
+        numbers = [float(n) for n in numbers]
+        defaults = [base.latency, base.error_rate, base.payload_scale]
+        latency, error_rate, payload_scale = (numbers + defaults[len(numbers):])[:3]
+        profiles[api] = StandinProfile(latency, base.jitter, error_rate, payload_scale)
+    return profiles
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Local stand-in for NASA APIs')
+    parser.add_argument('command', choices=['serve', 'bench'])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='fixed latency per request (s)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='mean of extra exponential latency (s)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered 429/503')
+    parser.add_argument('--payload-scale', type=float, default=1.0, help='multiplier for response sizes')
+    parser.add_argument('--endpoint', action='append', help='per-endpoint override api:latency[:error_rate[:payload_scale]]')
+    parser.add_argument('--requests', type=int, default=50, help='bench: requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=8, help='bench: concurrent requests')
+    parser.add_argument('--pipeline-runs', type=int, default=5, help='bench: cold ingestion runs')
+    args = parser.parse_args(argv)
+
+    profile = StandinProfile(args.latency, args.jitter, args.error_rate, args.payload_scale)
+    endpoint_profiles = _parse_endpoint_profiles(args.endpoint, profile)
+
+    if args.command == 'serve':
+        server = NASAStandinServer((args.host, args.port), profile, endpoint_profiles)
+        print(f"🚀 NASA stand-in listening on {server.base_url} (set NASA_STANDIN_URL={server.base_url})")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return
+
+    results = run_benchmark(args.requests, args.concurrency, args.pipeline_runs, profile, endpoint_profiles)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
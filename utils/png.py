@@ -0,0 +1,30 @@
+import struct
+import zlib
+import numpy as np
+
+
+def _chunk(tag, payload):
+    return (
+        struct.pack('>I', len(payload)) + tag + payload +
+        struct.pack('>I', zlib.crc32(tag + payload) & 0xFFFFFFFF)
+    )
+
+
+def encode_png(pixels, compression=6):
+    """Encode an (height, width, 4) uint8 RGBA array as PNG bytes"""
+    pixels = np.ascontiguousarray(pixels, dtype=np.uint8)
+    height, width, channels = pixels.shape
+    if channels != 4:
+        raise ValueError('encode_png expects RGBA pixels')
+
+    # Filter type 0 (None) byte at the start of every scanline
+    raw = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    raw[:, 1:] = pixels.reshape(height, width * 4)
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+    return (
+        b'\x89PNG\r\n\x1a\n' +
+        _chunk(b'IHDR', header) +
+        _chunk(b'IDAT', zlib.compress(raw.tobytes(), compression)) +
+        _chunk(b'IEND', b'')
+    )
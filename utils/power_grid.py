@@ -0,0 +1,104 @@
+import numpy as np
+from utils.timeseries import PowerSeries, POWER_FILL_VALUE
+
+
+class PowerGrid:
+    """Regional NASA POWER daily grid held as NumPy arrays.
+
+    values[parameter] has shape (n_lat, n_lon, n_days) with NaN where POWER
+    reported its -999 fill value. Points are bilinearly interpolated in one
+    vectorized step, however many areas are requested.
+    """
+
+    def __init__(self, lats, lons, dates, values):
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.dates = list(dates)
+        self.values = values
+
+    @classmethod
+    def from_response(cls, data):
+        """Build a grid from a POWER regional JSON (GeoJSON FeatureCollection) response"""
+        features = data.get('features', [])
+        if not features:
+            raise ValueError('POWER regional response has no grid points')
+
+        points = []
+        for feature in features:
+            lon, lat = feature['geometry']['coordinates'][:2]
+            points.append((lat, lon, feature.get('properties', {}).get('parameter', {})))
+
+        lats = np.unique([p[0] for p in points])
+        lons = np.unique([p[1] for p in points])
+        parameters = sorted({name for _, _, params in points for name in params})
+        dates = sorted({date for _, _, params in points for series in params.values() for date in series})
+        date_index = {date: i for i, date in enumerate(dates)}
+
+        values = {
+            name: np.full((len(lats), len(lons), len(dates)), np.nan, dtype=np.float32)
+            for name in parameters
+        }
+        for lat, lon, params in points:
+            i = np.searchsorted(lats, lat)
+            j = np.searchsorted(lons, lon)
+            for name, series in params.items():
+                column = values[name][i, j]
+                for date, value in series.items():
+                    if value is not None and value != POWER_FILL_VALUE:
+                        column[date_index[date]] = value
+
+        return cls(lats, lons, dates, values)
+
+    def interpolate(self, lats, lons, parameter):
+        """Bilinearly interpolate a parameter at N points; returns (N, n_days)"""
+        grid = self.values[parameter]
+        i0, i1, t = self._axis_weights(self.lats, np.asarray(lats, dtype=np.float64))
+        j0, j1, u = self._axis_weights(self.lons, np.asarray(lons, dtype=np.float64))
+        t = t[:, None]
+        u = u[:, None]
+        corners = [
+            (grid[i0, j0], (1 - t) * (1 - u)),
+            (grid[i1, j0], t * (1 - u)),
+            (grid[i0, j1], (1 - t) * u),
+            (grid[i1, j1], t * u)
+        ]
+        # Corners with zero weight are skipped, so a missing day at a neighbouring
+        # grid point does not turn an exact or edge-aligned point into NaN
+        return sum(np.where(weight > 0, values * weight, 0.0) for values, weight in corners)
+
+    def point_responses(self, lats, lons, source='NASA POWER regional grid'):
+        """Interpolate every parameter at N points and shape each like a POWER point response"""
+        interpolated = {name: self.interpolate(lats, lons, name) for name in self.values}
+        responses = []
+        for n, (lat, lon) in enumerate(zip(lats, lons)):
+            parameter = {}
+            for name, series in interpolated.items():
+                row = np.where(np.isnan(series[n]), POWER_FILL_VALUE, np.round(series[n], 2))
+                parameter[name] = dict(zip(self.dates, row.tolist()))
+            responses.append({
+                'type': 'Feature',
+                'geometry': {'type': 'Point', 'coordinates': [lon, lat]},
+                'properties': {'parameter': parameter},
+                'source': source,
+                'interpolated': True
+            })
+        return responses
+
+    def point_series(self, lats, lons, source='NASA POWER regional grid'):
+        """Interpolate every parameter at N points as PowerSeries sharing one date index"""
+        dates = np.array([f'{d[:4]}-{d[4:6]}-{d[6:]}' for d in self.dates], dtype='datetime64[D]')
+        interpolated = {name: self.interpolate(lats, lons, name).astype(np.float32) for name in self.values}
+        return [
+            PowerSeries(dates, {name: series[n] for name, series in interpolated.items()}, source=source)
+            for n in range(len(lats))
+        ]
+
+    @staticmethod
+    def _axis_weights(axis, points):
+        if len(axis) == 1:
+            zeros = np.zeros(len(points), dtype=np.intp)
+            return zeros, zeros, np.zeros(len(points))
+        lower = np.clip(np.searchsorted(axis, points, side='right') - 1, 0, len(axis) - 2)
+        upper = lower + 1
+        weight = np.clip((points - axis[lower]) / (axis[upper] - axis[lower]), 0.0, 1.0)
+        return lower, upper, weight
@@ -0,0 +1,218 @@
+import json
+import os
+import shutil
+import numpy as np
+from config.nasa_config import NASAConfig
+
+# Surfaces scored from the interpolated inputs, and input layers kept as surfaces for map tiles
+SCORE_SURFACES = ('transport_index', 'pollution_index', 'energy_index', 'sustainability_score')
+INPUT_SURFACES = ('ndvi', 'land_surface_temperature')
+RASTER_SURFACES = SCORE_SURFACES + INPUT_SURFACES
+
+
+class RasterGrid:
+    """Regular lat/lon grid of pixel centres over a bounding box.
+
+    Row 0 is the northern edge and column 0 the western edge, as in an image.
+    The grid is walked in square tiles so per-tile working arrays stay the
+    same size however fine the grid is.
+    """
+
+    def __init__(self, bounds, rows, cols, tile_size=256):
+        self.bounds = {side: float(bounds[side]) for side in ('north', 'south', 'east', 'west')}
+        self.rows = int(rows)
+        self.cols = int(cols)
+        self.tile_size = int(tile_size)
+        if self.rows < 1 or self.cols < 1 or self.tile_size < 1:
+            raise ValueError('Raster grid needs at least one row, column and tile pixel')
+        self.lat_step = (self.bounds['north'] - self.bounds['south']) / self.rows
+        self.lon_step = (self.bounds['east'] - self.bounds['west']) / self.cols
+
+    @property
+    def shape(self):
+        return self.rows, self.cols
+
+    def tiles(self):
+        """Yield (row_start, row_stop, col_start, col_stop) for every tile"""
+        for r0 in range(0, self.rows, self.tile_size):
+            for c0 in range(0, self.cols, self.tile_size):
+                yield r0, min(r0 + self.tile_size, self.rows), c0, min(c0 + self.tile_size, self.cols)
+
+    def centres(self, r0, r1, c0, c1):
+        """Pixel-centre latitudes and longitudes of a window, each shaped (r1 - r0, c1 - c0)"""
+        lats = self.bounds['north'] - (np.arange(r0, r1) + 0.5) * self.lat_step
+        lons = self.bounds['west'] + (np.arange(c0, c1) + 0.5) * self.lon_step
+        return np.meshgrid(lats, lons, indexing='ij')
+
+    def to_dict(self):
+        return {'bounds': self.bounds, 'rows': self.rows, 'cols': self.cols, 'tile_size': self.tile_size}
+
+
+def idw_interpolate(values, lats, lons, src_lats, src_lons, power=2.0, max_cells=None):
+    """Inverse-distance weighted blend of per-source columns at every query point.
+
+    Sources are visited in chunks so that no working array holds more than
+    max_cells query x source entries, whatever the number of sources. A query
+    that falls exactly on a source takes that source's values unchanged, and
+    NaN sources are left out of the blend. Returns {name: array shaped like lats}.
+    """
+    max_cells = max_cells or NASAConfig.RASTER_IDW_MAX_CELLS
+    q_lats, q_lons = lats.reshape(-1, 1), lons.reshape(-1, 1)
+    n = q_lats.shape[0]
+    names = list(values)
+    # One (n_sources, n_columns) matrix, so each chunk is two matrix products
+    matrix = np.column_stack([np.asarray(values[name], dtype=np.float64) for name in names]) if names else np.zeros((len(src_lats), 0))
+    valid = np.isfinite(matrix).astype(np.float64)
+    filled = np.where(valid > 0, matrix, 0.0)
+    # Weighted sums and weight totals, over all sources and over exactly-hit sources
+    sums, totals = np.zeros((n, len(names))), np.zeros((n, len(names)))
+    exact_sums, exact_totals = np.zeros((n, len(names))), np.zeros((n, len(names)))
+    hit = np.zeros(n, dtype=bool)
+
+    chunk = max(1, max_cells // max(n, 1))
+    for s0 in range(0, len(src_lats), chunk):
+        s1 = s0 + chunk
+        d2 = (q_lats - src_lats[s0:s1]) ** 2 + (q_lons - src_lons[s0:s1]) ** 2
+        exact = d2 == 0
+        with np.errstate(divide='ignore'):
+            # The default power of 2 is a plain reciprocal, much cheaper than a general power
+            weights = np.reciprocal(d2, out=d2) if power == 2 else np.power(d2, -power / 2.0, out=d2)
+        weights[exact] = 0.0
+        sums += weights @ filled[s0:s1]
+        totals += weights @ valid[s0:s1]
+        if exact.any():
+            hit |= exact.any(axis=1)
+            exact = exact.astype(np.float64)
+            exact_sums += exact @ filled[s0:s1]
+            exact_totals += exact @ valid[s0:s1]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        blended = np.where(totals > 0, sums / totals, np.nan)
+        on_source = np.where(exact_totals > 0, exact_sums / exact_totals, np.nan)
+        result = np.where(hit[:, None], on_source, blended)
+    return {name: result[:, i].reshape(lats.shape) for i, name in enumerate(names)}
+
+
+def prune_renders(root, keep, protect=()):
+    """Remove all but the `keep` most recently used render directories under root.
+
+    Use is tracked by the mtime of each render's meta.json, which is touched
+    whenever a render is reused. Unfinished renders (no meta.json) are left alone.
+    """
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return 0
+    renders = []
+    for name in names:
+        directory = os.path.join(root, name)
+        try:
+            renders.append((os.path.getmtime(os.path.join(directory, ScoreRaster.META_FILE)), directory))
+        except OSError:
+            continue
+    removed = 0
+    protected = {os.path.abspath(directory) for directory in protect}
+    for _, directory in sorted(renders, reverse=True)[keep:]:
+        if os.path.abspath(directory) in protected:
+            continue
+        shutil.rmtree(directory, ignore_errors=True)
+        removed += 1
+    return removed
+
+
+class ScoreRaster:
+    """Score surfaces stored as float32 memory-mapped files in one directory.
+
+    Each surface is <name>.f32 (row-major, rows x cols) next to a meta.json
+    holding the grid and per-surface statistics. meta.json is written last,
+    so a directory without it is an unfinished render.
+    """
+
+    META_FILE = 'meta.json'
+
+    def __init__(self, directory, meta):
+        self.directory = directory
+        self.meta = meta
+        self.grid = RasterGrid(meta['bounds'], meta['rows'], meta['cols'], meta['tile_size'])
+
+    def __eq__(self, other):
+        if not isinstance(other, ScoreRaster):
+            return NotImplemented
+        return self.directory == other.directory and self.meta == other.meta
+
+    __hash__ = None
+
+    @classmethod
+    def exists(cls, directory):
+        return os.path.exists(os.path.join(directory, cls.META_FILE))
+
+    @classmethod
+    def open(cls, directory):
+        with open(os.path.join(directory, cls.META_FILE), 'r', encoding='utf-8') as f:
+            return cls(directory, json.load(f))
+
+    @property
+    def surfaces(self):
+        return list(self.meta['surfaces'])
+
+    def _path(self, name):
+        return os.path.join(self.directory, f'{name}.f32')
+
+    def surface(self, name):
+        """Read-only memory map of one surface"""
+        if name not in self.meta['surfaces']:
+            raise KeyError(f"Unknown raster surface: {name}")
+        return np.memmap(self._path(name), dtype=np.float32, mode='r', shape=self.grid.shape)
+
+    def read_window(self, name, r0, r1, c0, c1):
+        return np.array(self.surface(name)[r0:r1, c0:c1])
+
+    def summary(self):
+        return {**self.grid.to_dict(), 'surfaces': self.meta['surfaces']}
+
+
+class RasterWriter:
+    """Allocate surface memmaps tile by tile and finish with meta.json"""
+
+    def __init__(self, directory, grid, surfaces=RASTER_SURFACES, extra_meta=None):
+        self.directory = directory
+        self.grid = grid
+        self.extra_meta = extra_meta or {}
+        os.makedirs(directory, exist_ok=True)
+        self._maps = {
+            name: np.memmap(os.path.join(directory, f'{name}.f32'), dtype=np.float32, mode='w+', shape=grid.shape)
+            for name in surfaces
+        }
+        self._stats = {name: {'min': np.inf, 'max': -np.inf, 'sum': 0.0, 'count': 0} for name in surfaces}
+
+    def write(self, name, r0, c0, values):
+        r1, c1 = r0 + values.shape[0], c0 + values.shape[1]
+        self._maps[name][r0:r1, c0:c1] = values
+        finite = values[np.isfinite(values)]
+        if finite.size:
+            stats = self._stats[name]
+            stats['min'] = min(stats['min'], float(finite.min()))
+            stats['max'] = max(stats['max'], float(finite.max()))
+            stats['sum'] += float(finite.sum(dtype=np.float64))
+            stats['count'] += int(finite.size)
+
+    def close(self):
+        """Flush every surface, write meta.json and return the finished ScoreRaster"""
+        surfaces = {}
+        for name, memmap in self._maps.items():
+            memmap.flush()
+            stats = self._stats[name]
+            surfaces[name] = {
+                'min': round(stats['min'], 4) if stats['count'] else None,
+                'max': round(stats['max'], 4) if stats['count'] else None,
+                'mean': round(stats['sum'] / stats['count'], 4) if stats['count'] else None
+            }
+        self._maps.clear()
+
+        meta = {**self.grid.to_dict(), **self.extra_meta, 'dtype': 'float32', 'surfaces': surfaces}
+        meta_path = os.path.join(self.directory, ScoreRaster.META_FILE)
+        tmp_path = f'{meta_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+        return ScoreRaster(self.directory, meta)
@@ -0,0 +1,99 @@
+import base64
+import hashlib
+import json
+import os
+import time
+from datetime import timedelta
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from config.nasa_config import NASAConfig
+
+# Query parameters that must never reach a recording on disk
+SECRET_PARAMS = {'api_key', 'MAP_KEY', 'map_key'}
+
+
+class RecordReplayAdapter(HTTPAdapter):
+    """requests adapter that records live responses to disk or replays them offline.
+
+    Recordings are keyed on method and URL with sorted query parameters, and API
+    keys are stripped first, so the same request replays regardless of key.
+    """
+
+    def __init__(self, mode, directory=None, replay_latency=False, **kwargs):
+        super().__init__(**kwargs)
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown record/replay mode: {mode}")
+        self.mode = mode
+        self.directory = directory or NASAConfig.RECORD_DIR or os.path.join(NASAConfig.CACHE_DIR, 'recordings')
+        self.replay_latency = replay_latency
+        os.makedirs(self.directory, exist_ok=True)
+
+    def send(self, request, **kwargs):
+        path = os.path.join(self.directory, f'{self._key(request)}.json')
+
+        if self.mode == 'replay':
+            if not os.path.exists(path):
+                raise requests.exceptions.ConnectionError(f"No recording for {self._redacted_url(request.url)}")
+            return self._load(request, path)
+
+        response = super().send(request, **kwargs)
+        self._save(path, request, response)
+        return response
+
+    def _key(self, request):
+        raw = f"{request.method} {self._redacted_url(request.url)}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def _redacted_url(self, url):
+        parts = urlsplit(url)
+        query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in SECRET_PARAMS)
+        path = '/'.join('REDACTED' if segment == NASAConfig.NASA_API_KEY else segment for segment in parts.path.split('/'))
+        return urlunsplit((parts.scheme, parts.netloc, path, urlencode(query), ''))
+
+    def _save(self, path, request, response):
+        entry = {
+            'method': request.method,
+            'url': self._redacted_url(request.url),
+            'status_code': response.status_code,
+            'reason': response.reason,
+            'headers': dict(response.headers),
+            'elapsed': response.elapsed.total_seconds(),
+            'body': base64.b64encode(response.content).decode('ascii')
+        }
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    def _load(self, request, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+        if self.replay_latency:
+            time.sleep(entry.get('elapsed', 0))
+
+        response = requests.Response()
+        response.status_code = entry['status_code']
+        response.reason = entry.get('reason')
+        response.headers = CaseInsensitiveDict(entry.get('headers', {}))
+        # The body is stored decoded, so drop encodings that would make requests decode it again
+        response.headers.pop('Content-Encoding', None)
+        response._content = base64.b64decode(entry['body'])
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(seconds=entry.get('elapsed', 0))
+        response.connection = self
+        return response
+
+
+def mount_record_replay(session, mode=None, directory=None):
+    """Route every request made through session via a RecordReplayAdapter"""
+    mode = mode or NASAConfig.RECORD_MODE
+    if not mode:
+        return session
+    adapter = RecordReplayAdapter(mode, directory, replay_latency=NASAConfig.REPLAY_LATENCY)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
@@ -0,0 +1,209 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from config.nasa_config import NASAConfig
+
+
+RESCAN_EVERY = 100
+
+
+class ResponseCache:
+    """On-disk JSON response cache with TTL, LRU size eviction and stale-while-revalidate.
+
+    Each entry is one file, so the cache survives restarts and is shared by every
+    gunicorn worker on the host. File mtime doubles as the last-access time for LRU.
+    """
+
+    def __init__(self, namespace, ttl, stale_ttl, max_bytes, cache_dir=None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_bytes = max_bytes
+        self.directory = os.path.join(cache_dir or NASAConfig.CACHE_DIR, namespace)
+        self.stats = {'fresh': 0, 'stale': 0, 'expired': 0, 'miss': 0, 'refreshes': 0, 'evictions': 0}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        # Running size estimate: this process's writes are added as they happen
+        # and a directory scan resyncs it when it crosses max_bytes or every
+        # RESCAN_EVERY writes, so other workers' entries are picked up too
+        self._size = None
+        self._writes = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def make_key(self, **parts):
+        """Build a stable key from request parts"""
+        raw = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Return (value, status) where status is fresh, stale, expired or miss"""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None, 'miss'
+
+        age = time.time() - entry.get('stored_at', 0)
+        if age <= self.ttl:
+            status = 'fresh'
+        elif age <= self.ttl + self.stale_ttl:
+            status = 'stale'
+        else:
+            status = 'expired'
+        return entry.get('value'), status
+
+    def get_fresh(self, key):
+        """Return the cached value only if it is within its TTL"""
+        value, status = self.get(key)
+        return value if status == 'fresh' else None
+
+    def set(self, key, value):
+        entry = {'stored_at': time.time(), 'value': value}
+        path = self._path(key)
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, separators=(',', ':'))
+            written = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing {self.namespace} cache entry: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        with self._lock:
+            self._writes += 1
+            rescan = self._size is None or self._writes % RESCAN_EVERY == 0
+            if not rescan:
+                self._size += written - replaced
+                rescan = self._size > self.max_bytes
+        if rescan:
+            self._evict()
+
+    def get_or_fetch(self, key, fetch, flight=None):
+        """Serve from cache, refreshing stale entries in the background.
+
+        fetch() must return the value to cache, or None when the upstream call failed.
+        Returns None only when there is no usable cached value and fetch() failed.
+        With a SingleFlight group, concurrent misses for the same key share one fetch.
+        """
+        value, status = self.get(key)
+        with self._lock:
+            self.stats[status] += 1
+
+        if status == 'fresh':
+            return value
+        if status == 'stale':
+            self.refresh_async(key, fetch, flight)
+            return value
+
+        fetched = self._fetch_and_store(key, fetch, flight)
+        return fetched if fetched is not None else value
+
+    def refresh_async(self, key, fetch, flight=None):
+        """Refetch an entry on a background thread, at most once at a time per key"""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            self.stats['refreshes'] += 1
+
+        def refresh():
+            try:
+                self._fetch_and_store(key, fetch, flight)
+            except Exception as e:
+                print(f"Error refreshing {self.namespace} cache entry: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def size_bytes(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats['fresh'] + stats['stale'] + stats['expired'] + stats['miss']
+        stats['hit_rate'] = round((stats['fresh'] + stats['stale']) / lookups, 3) if lookups else 0.0
+        stats['size_bytes'] = self.size_bytes()
+        stats['max_bytes'] = self.max_bytes
+        return stats
+
+    def _fetch_and_store(self, key, fetch, flight):
+        # Store inside the flight so workers waiting on it find the entry on disk
+        def fetch_and_store():
+            fetched = fetch()
+            if fetched is not None:
+                self.set(key, fetched)
+            return fetched
+
+        if flight is None:
+            return fetch_and_store()
+        return flight.do(key, fetch_and_store, lookup=lambda: self.get_fresh(key))
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.json')
+
+    def _entries(self):
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for name in names:
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict(self):
+        """Rescan the directory, drop least recently used entries over max_bytes and resync the size estimate"""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                    with self._lock:
+                        self.stats['evictions'] += 1
+                except OSError:
+                    pass
+        with self._lock:
+            self._size = total
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_response_cache(namespace, ttl, stale_ttl, max_bytes):
+    """Return the process-wide cache for a namespace"""
+    with _caches_lock:
+        if namespace not in _caches:
+            _caches[namespace] = ResponseCache(namespace, ttl, stale_ttl, max_bytes)
+        return _caches[namespace]
+
+
+def get_response_caches():
+    with _caches_lock:
+        return dict(_caches)
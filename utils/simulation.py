@@ -0,0 +1,196 @@
+from datetime import date as date_type, datetime
+import numpy as np
+from config.nasa_config import NASAConfig
+from utils.spatial_index import ZoneIndex
+
+# Box centres used to classify simulated land surfaces: (lat, lon) and half-width in degrees
+URBAN_AREAS = [(23.2599, 77.4126), (23.2278, 77.4357), (23.3000, 77.3667), (23.2800, 77.4200)]
+VEGETATED_AREAS = [(23.2667, 77.4000), (23.1667, 77.4333)]
+WATER_BODIES = [(23.2667, 77.4000)]
+URBAN_HALF_WIDTH = 0.02
+VEGETATED_HALF_WIDTH = 0.03
+WATER_HALF_WIDTH = 0.01
+
+LAND_COVER_TYPES = {
+    1: 'Evergreen Needleleaf Forest',
+    2: 'Evergreen Broadleaf Forest',
+    3: 'Deciduous Needleleaf Forest',
+    4: 'Deciduous Broadleaf Forest',
+    5: 'Mixed Forests',
+    6: 'Closed Shrublands',
+    7: 'Open Shrublands',
+    8: 'Woody Savannas',
+    9: 'Savannas',
+    10: 'Grasslands',
+    11: 'Permanent Wetlands',
+    12: 'Croplands',
+    13: 'Urban and Built-up',
+    14: 'Cropland/Natural Vegetation Mosaic',
+    15: 'Snow and Ice',
+    16: 'Barren or Sparsely Vegetated'
+}
+
+SOLAR_SEASONAL_VARIATION = [0.9, 0.95, 1.0, 1.05, 1.1, 1.0, 0.9, 0.95, 1.0, 1.05, 1.0, 0.95]
+
+# Independent random streams, one per simulated quantity
+STREAMS = {
+    'pollution_factor': 1, 'pm25': 2, 'pm10': 3, 'no2': 4, 'so2': 5, 'o3': 6, 'aqi': 7,
+    'modis_ndvi': 10, 'modis_seasonal': 11,
+    'lst_day': 20, 'lst_night': 21,
+    'land_cover_class': 30, 'land_cover_confidence': 31,
+    'landsat_ndvi': 40, 'landsat_ndbi': 41, 'cloud_cover': 42,
+    'solar_month': 50,
+    'fire_count': 60, 'fire_power': 61, 'fire_confidence': 62,
+    'area_details': 70
+}
+
+# Integer range [low, high) of each simulated area detail; the position is its substream
+AREA_DETAIL_RANGES = {
+    'cloud_cover': (5, 20),
+    'forest_cover': (15, 60), 'agricultural_land': (10, 40), 'green_spaces': (5, 25),
+    'built_up_area': (30, 85), 'road_density': (5, 20), 'building_height_avg': (8, 25),
+    'air_quality_index': (50, 150), 'water_quality_index': (60, 95),
+    'noise_pollution': (45, 80), 'carbon_sequestration': (50, 200),
+    'public_transport_coverage': (40, 90), 'renewable_energy_capacity': (5, 25),
+    'waste_management_efficiency': (50, 95), 'water_supply_coverage': (70, 98)
+}
+
+_MASK64 = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+def _splitmix64(x):
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+_URBAN_INDEX = ZoneIndex.from_boxes(URBAN_AREAS, URBAN_HALF_WIDTH)
+_VEGETATED_INDEX = ZoneIndex.from_boxes(VEGETATED_AREAS, VEGETATED_HALF_WIDTH)
+_WATER_INDEX = ZoneIndex.from_boxes(WATER_BODIES, WATER_HALF_WIDTH)
+
+
+def is_urban(lats, lons):
+    return _URBAN_INDEX.contains(lats, lons)
+
+
+def is_vegetated(lats, lons):
+    return _VEGETATED_INDEX.contains(lats, lons)
+
+
+def is_water(lats, lons):
+    return _WATER_INDEX.contains(lats, lons)
+
+
+class SimulationEngine:
+    """Seeded, vectorized generator for the simulated NASA data sources.
+
+    Every value is a counter-based hash of (seed, date, stream, coordinate), so
+    output is deterministic per (seed, date), independent of how coordinates are
+    batched, and needs no per-call random state or artificial latency.
+    """
+
+    def __init__(self, seed=None, date=None):
+        self.seed = NASAConfig.SIMULATION_SEED if seed is None else int(seed)
+        if date is None:
+            date = date_type.today()
+        elif isinstance(date, str):
+            date = datetime.strptime(date, '%Y-%m-%d').date()
+        elif isinstance(date, datetime):
+            date = date.date()
+        self.date = date
+
+    def uniform(self, lats, lons, stream, low=0.0, high=1.0, substream=0):
+        """Deterministic uniform draws in [low, high), one per coordinate"""
+        lat_q = np.round(np.asarray(lats, dtype=np.float64) * 1e5).astype(np.int64).astype(np.uint64)
+        lon_q = np.round(np.asarray(lons, dtype=np.float64) * 1e5).astype(np.int64).astype(np.uint64)
+        with np.errstate(over='ignore'):
+            key = _splitmix64(np.uint64(self.seed) & _MASK64)
+            key = _splitmix64(key ^ np.uint64(self.date.toordinal()))
+            key = _splitmix64(key ^ np.uint64(STREAMS[stream] * 1000 + substream))
+            bits = _splitmix64(_splitmix64(key ^ lat_q) ^ lon_q)
+        unit = (bits >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+        return low + unit * (high - low)
+
+    def air_quality(self, lats, lons):
+        lats = np.asarray(lats, dtype=np.float64)
+        factor_low = self.uniform(lats, lons, 'pollution_factor', 0.8, 1.2)
+        factor_high = self.uniform(lats, lons, 'pollution_factor', 1.2, 1.8)
+        factor = np.where(lats > 23.25, factor_high, factor_low)
+        return {
+            'pm25': self.uniform(lats, lons, 'pm25', 15, 85) * factor,
+            'pm10': self.uniform(lats, lons, 'pm10', 25, 120) * factor,
+            'no2': self.uniform(lats, lons, 'no2', 5, 45) * factor,
+            'so2': self.uniform(lats, lons, 'so2', 2, 25) * factor,
+            'o3': self.uniform(lats, lons, 'o3', 10, 60) * factor,
+            'aqi': self.uniform(lats, lons, 'aqi', 30, 180) * factor
+        }
+
+    def modis_vegetation(self, lats, lons):
+        draw = self.uniform(lats, lons, 'modis_ndvi')
+        vegetated = is_vegetated(lats, lons)
+        urban = is_urban(lats, lons)
+        low = np.where(vegetated, 0.2, np.where(urban, 0.0, 0.1))
+        high = np.where(vegetated, 0.5, np.where(urban, 0.2, 0.3))
+        seasonal = self.uniform(lats, lons, 'modis_seasonal', 0.8, 1.2)
+        ndvi = np.clip((0.3 + low + draw * (high - low)) * seasonal, 0.0, 1.0)
+        return {'ndvi': ndvi, 'evi': ndvi * 1.2, 'seasonal_factor': seasonal}
+
+    def land_surface_temperature(self, lats, lons):
+        base_temp = 25.0
+        urban = is_urban(lats, lons)
+        draw = self.uniform(lats, lons, 'lst_day')
+        day = base_temp + np.where(urban, 3.0 + draw * 5.0, 1.0 + draw * 3.0)
+        night = day - self.uniform(lats, lons, 'lst_night', 5.0, 10.0)
+        return {'daytime': day, 'nighttime': night, 'urban_heat_intensity': day - base_temp}
+
+    def land_cover(self, lats, lons):
+        urban = is_urban(lats, lons)
+        water = is_water(lats, lons)
+        vegetated = is_vegetated(lats, lons)
+        vegetation_classes = np.array([5, 9, 10])
+        pick = np.minimum((self.uniform(lats, lons, 'land_cover_class') * 3).astype(np.int64), 2)
+        code = np.where(urban, 13, np.where(water, 11, np.where(vegetated, vegetation_classes[pick], 16)))
+        low = np.where(urban, 0.8, np.where(water, 0.7, np.where(vegetated, 0.6, 0.5)))
+        high = np.where(urban, 0.95, np.where(water, 0.9, np.where(vegetated, 0.85, 0.8)))
+        confidence = low + self.uniform(lats, lons, 'land_cover_confidence') * (high - low)
+        return {'code': code, 'confidence': confidence}
+
+    def landsat_indices(self, lats, lons):
+        vegetated = is_vegetated(lats, lons)
+        urban = is_urban(lats, lons)
+        draw = self.uniform(lats, lons, 'landsat_ndvi')
+        low = np.where(vegetated, 0.2, np.where(urban, -0.1, 0.0))
+        high = np.where(vegetated, 0.4, np.where(urban, 0.1, 0.2))
+        ndvi = 0.4 + low + draw * (high - low)
+        # EVI derives from the same NDVI draw rather than an independent one
+        evi = np.minimum(1.0, ndvi * 1.3)
+        ndbi_draw = self.uniform(lats, lons, 'landsat_ndbi')
+        ndbi = np.where(urban, 0.1 + ndbi_draw * 0.3, -0.2 + ndbi_draw * 0.3)
+        return {'ndvi': ndvi, 'evi': evi, 'ndbi': ndbi}
+
+    def cloud_cover(self, lats, lons):
+        return self.uniform(lats, lons, 'cloud_cover', 0, 20)
+
+    def solar_monthly(self, lats, lons, base_radiation=5.5):
+        """(N, 12) simulated monthly all-sky radiation"""
+        variation = np.stack([
+            self.uniform(lats, lons, 'solar_month', 0.95, 1.05, substream=month)
+            for month in range(12)
+        ], axis=1)
+        return base_radiation * np.array(SOLAR_SEASONAL_VARIATION) * variation
+
+    def area_details(self, lats, lons):
+        """Integer detail metrics per coordinate, one substream per AREA_DETAIL_RANGES entry"""
+        return {
+            name: np.floor(self.uniform(lats, lons, 'area_details', low, high, substream=substream)).astype(np.int64)
+            for substream, (name, (low, high)) in enumerate(AREA_DETAIL_RANGES.items())
+        }
+
+    def fire_summary(self, country='IND'):
+        anchor = [float(sum(ord(c) for c in country))]
+        return {
+            'active_fires': int(self.uniform(anchor, [0.0], 'fire_count', 0, 6)[0]),
+            'fire_radiative_power': float(self.uniform(anchor, [0.0], 'fire_power', 0, 100)[0]),
+            'confidence': ['low', 'nominal', 'high'][min(2, int(self.uniform(anchor, [0.0], 'fire_confidence', 0, 3)[0]))]
+        }
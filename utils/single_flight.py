@@ -0,0 +1,138 @@
+import os
+import threading
+from config.nasa_config import NASAConfig
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent fetches for the same key.
+
+    Threads in one process wait on the leader's in-flight call. Across gunicorn
+    workers a per-key file lock serialises the fetch; a worker that had to wait
+    for the lock first re-checks the shared cache through lookup() and only
+    fetches if nothing usable was written meanwhile.
+    """
+
+    def __init__(self, namespace, lock_dir=None):
+        self.namespace = namespace
+        self.lock_dir = os.path.join(lock_dir or NASAConfig.CACHE_DIR, 'locks', namespace)
+        self.stats = {'fetches': 0, 'coalesced_local': 0, 'coalesced_workers': 0, 'lock_waits': 0}
+        self._calls = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.lock_dir, exist_ok=True)
+
+    def do(self, key, fetch, lookup=None):
+        """Return fetch() for key, sharing one in-flight call between concurrent callers"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                self.stats['coalesced_local'] += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = self._do_across_workers(key, fetch, lookup)
+            return call.value
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats['coalesced'] = stats['coalesced_local'] + stats['coalesced_workers']
+        stats['in_flight'] = len(self._calls)
+        return stats
+
+    def _do_across_workers(self, key, fetch, lookup):
+        if fcntl is None:
+            return self._fetch(fetch)
+
+        path = os.path.join(self.lock_dir, f'{key}.lock')
+        lock_file, waited = self._acquire(path)
+        try:
+            if waited and lookup is not None:
+                value = lookup()
+                if value is not None:
+                    with self._lock:
+                        self.stats['coalesced_workers'] += 1
+                    return value
+            return self._fetch(fetch)
+        finally:
+            # Unlink while still holding the lock so lock files do not pile up
+            # for every key ever fetched; _acquire retries on a removed file
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+
+    def _acquire(self, path):
+        """Lock the file at path, returning (file, waited).
+
+        A worker that was blocked may wake up holding the lock of a file the
+        previous holder already removed, so the lock only counts once the
+        locked file is still the one at path.
+        """
+        waited = False
+        while True:
+            lock_file = open(path, 'a')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                with self._lock:
+                    self.stats['lock_waits'] += 1
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                waited = True
+            try:
+                if os.fstat(lock_file.fileno()).st_ino == os.stat(path).st_ino:
+                    return lock_file, waited
+            except OSError:
+                pass
+            lock_file.close()
+
+    def _fetch(self, fetch):
+        with self._lock:
+            self.stats['fetches'] += 1
+        return fetch()
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def get_single_flight(namespace):
+    """Return the process-wide single-flight group for a namespace"""
+    with _flights_lock:
+        if namespace not in _flights:
+            _flights[namespace] = SingleFlight(namespace)
+        return _flights[namespace]
+
+
+def get_single_flights():
+    with _flights_lock:
+        return dict(_flights)
@@ -0,0 +1,199 @@
+import threading
+import time
+import traceback
+from types import MappingProxyType
+
+
+class AnalysisSnapshot:
+    """Read-only result of one full analysis build.
+
+    Top-level mappings are exposed as MappingProxyType (or MappedPart when the
+    snapshot comes from a shared file); routes must treat the nested values as
+    read-only too, since every request shares them.
+    """
+
+    __slots__ = ('_version', '_built_at', '_build_seconds', '_parts')
+
+    def __init__(self, version, built_at, build_seconds, parts):
+        self._version = version
+        self._built_at = built_at
+        self._build_seconds = build_seconds
+        self._parts = MappingProxyType({
+            name: MappingProxyType(value) if isinstance(value, dict) else value
+            for name, value in parts.items()
+        })
+
+    @property
+    def version(self):
+        return self._version
+
+    @property
+    def built_at(self):
+        return self._built_at
+
+    @property
+    def build_seconds(self):
+        return self._build_seconds
+
+    @property
+    def age(self):
+        return time.time() - self._built_at
+
+    def __getattr__(self, name):
+        try:
+            return self._parts[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def get(self, name, default=None):
+        return self._parts.get(name, default)
+
+
+class SnapshotScheduler:
+    """Rebuild an AnalysisSnapshot periodically on a background thread.
+
+    build_fn() returns a dict of named parts (data, solutions, charts, ...).
+    New snapshots are swapped in with a single reference assignment, so readers
+    always see one complete version and never wait for a rebuild.
+
+    With a SharedSnapshotStore, builds are published to a memory-mapped file:
+    a worker that finds a snapshot younger than the interval there adopts it
+    instead of building, and readers switch to newer published versions.
+    """
+
+    # Seconds between checks of the shared file from current()
+    SHARED_CHECK_INTERVAL = 1.0
+
+    def __init__(self, build_fn, interval, store=None):
+        self.build_fn = build_fn
+        self.interval = interval
+        self.store = store
+        self._checked_at = 0.0
+        self._snapshot = None
+        self._version = 0
+        self._thread = None
+        self._build_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wake = threading.Event()
+        self.stats = {'builds': 0, 'adopted': 0, 'failures': 0, 'last_error': None, 'last_failure_at': None}
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='snapshot-scheduler', daemon=True)
+                self._thread.start()
+
+    def current(self):
+        """Return the current snapshot, building one inline only if none exists yet"""
+        self.start()
+        if self.store is not None and time.time() - self._checked_at >= self.SHARED_CHECK_INTERVAL:
+            self._checked_at = time.time()
+            self._adopt_shared()
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self.build(only_if_missing=True)
+        if snapshot is None:
+            raise RuntimeError(f"No analysis snapshot available: {self.stats['last_error']}")
+        return snapshot
+
+    @property
+    def snapshot(self):
+        """The snapshot being served, or None before the first build or adoption"""
+        return self._snapshot
+
+    def refresh(self):
+        """Ask the background thread to rebuild now"""
+        self._wake.set()
+
+    def build(self, only_if_missing=False, force=False):
+        """Build and publish a snapshot; on failure keep serving the previous one"""
+        with self._build_lock:
+            if only_if_missing and self._snapshot is not None:
+                return self._snapshot
+            if self.store is None:
+                return self._build()
+            if not force and self._adopt_shared(max_age=self.interval) is not None:
+                return self._snapshot
+            with self.store.build_lock() as waited:
+                # Another worker may have published while this one waited for the lock
+                if waited and not force and self._adopt_shared(max_age=self.interval) is not None:
+                    return self._snapshot
+                return self._build()
+
+    def _build(self):
+        started = time.perf_counter()
+        try:
+            parts = self.build_fn()
+            build_seconds = round(time.perf_counter() - started, 3)
+            if self.store is not None:
+                published = self.store.load()
+                version = max(self._version, published.version if published is not None else 0) + 1
+                snapshot_file = self.store.publish(version, build_seconds, parts)
+        except Exception as e:
+            self.stats['failures'] += 1
+            self.stats['last_error'] = f"{type(e).__name__}: {e}"
+            self.stats['last_failure_at'] = time.time()
+            print(f"⚠️ Snapshot build failed: {e}")
+            traceback.print_exc()
+            return self._snapshot
+
+        if self.store is not None:
+            # Serve the published file like every other worker does
+            snapshot = self._from_file(snapshot_file)
+        else:
+            self._version += 1
+            snapshot = AnalysisSnapshot(self._version, time.time(), build_seconds, parts)
+        self._snapshot = snapshot
+        self.stats['builds'] += 1
+        print(f"✅ Snapshot v{snapshot.version} built in {snapshot.build_seconds}s")
+        return snapshot
+
+    def _adopt_shared(self, max_age=None):
+        """Switch to a newer published snapshot; returns the adopted snapshot or None"""
+        try:
+            snapshot_file = self.store.load()
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not map shared snapshot: {e}")
+            return None
+        if snapshot_file is None:
+            return None
+        if max_age is not None and time.time() - snapshot_file.header['built_at'] >= max_age:
+            return None
+        current = self._snapshot
+        if current is not None and current.version >= snapshot_file.version:
+            return current if max_age is None or current.age < max_age else None
+        self._snapshot = self._from_file(snapshot_file)
+        self.stats['adopted'] += 1
+        return self._snapshot
+
+    def _from_file(self, snapshot_file):
+        header = snapshot_file.header
+        self._version = max(self._version, header['version'])
+        return AnalysisSnapshot(header['version'], header['built_at'], header['build_seconds'], snapshot_file.parts())
+
+    def get_stats(self):
+        snapshot = self._snapshot
+        stats = dict(self.stats)
+        stats['interval'] = self.interval
+        stats['running'] = self._thread is not None and self._thread.is_alive()
+        if snapshot is not None:
+            stats['version'] = snapshot.version
+            stats['built_at'] = snapshot.built_at
+            stats['age_seconds'] = round(snapshot.age, 1)
+            stats['build_seconds'] = snapshot.build_seconds
+        if self.store is not None:
+            stats['shared'] = self.store.get_stats()
+        return stats
+
+    def _run(self):
+        while True:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.age >= self.interval or self._wake.is_set():
+                force = self._wake.is_set()
+                self._wake.clear()
+                if self.build(only_if_missing=snapshot is None, force=force) is snapshot:
+                    # Build failed: retry sooner than a full interval
+                    self._wake.wait(timeout=min(self.interval, 60))
+                    continue
+            snapshot = self._snapshot
+            self._wake.wait(timeout=max(1.0, self.interval - snapshot.age))
@@ -0,0 +1,290 @@
+import base64
+import io
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from contextlib import contextmanager
+from datetime import date, datetime
+import numpy as np
+from config.nasa_config import NASAConfig
+from utils.timeseries import PowerSeries
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+MAGIC = b'ASNP'
+FORMAT_VERSION = 2
+# magic, format version, header length
+_PREAMBLE = struct.Struct('<4sIQ')
+# Length prefix of the JSON document and of every array in an encoded value
+_LENGTH = struct.Struct('<Q')
+
+
+def encode_value(value):
+    """Encode a snapshot value as data only: a JSON document followed by .npy arrays.
+
+    Nothing in the encoding can name code to run, so a snapshot file in a
+    shared cache directory is as safe to read as any JSON file. Arrays are
+    stored with np.save(allow_pickle=False) and referenced from the document
+    by position; PowerSeries, tuples, dates, bytes and dicts with non-string
+    keys are written as tagged objects.
+    """
+    arrays = []
+
+    def tag(item):
+        if isinstance(item, np.ndarray):
+            if item.dtype == object:
+                return {'__list_array__': [tag(element) for element in item.tolist()]}
+            arrays.append(item)
+            return {'__array__': len(arrays) - 1}
+        if isinstance(item, np.generic):
+            return tag(item.item())
+        if item is None or isinstance(item, (bool, int, float, str)):
+            return item
+        if isinstance(item, Mapping):
+            if all(isinstance(key, str) for key in item):
+                return {key: tag(element) for key, element in item.items()}
+            return {'__items__': [[tag(key), tag(element)] for key, element in item.items()]}
+        if isinstance(item, tuple):
+            return {'__tuple__': [tag(element) for element in item]}
+        if isinstance(item, (list, set, frozenset)):
+            return [tag(element) for element in item]
+        if isinstance(item, PowerSeries):
+            return {'__power_series__': tag({'dates': item.dates, 'columns': item.columns, 'simulated': item.simulated, 'source': item.source})}
+        if isinstance(item, datetime):
+            return {'__datetime__': item.isoformat()}
+        if isinstance(item, date):
+            return {'__date__': item.isoformat()}
+        if isinstance(item, bytes):
+            return {'__bytes__': base64.b64encode(item).decode('ascii')}
+        raise TypeError(f"Cannot store {type(item).__name__} in an analysis snapshot")
+
+    document = json.dumps(tag(value), separators=(',', ':')).encode('utf-8')
+    chunks = [_LENGTH.pack(len(document)), document]
+    for array in arrays:
+        buffer = io.BytesIO()
+        np.save(buffer, array, allow_pickle=False)
+        chunks += [_LENGTH.pack(buffer.tell()), buffer.getvalue()]
+    return b''.join(chunks)
+
+
+def decode_value(blob):
+    """Inverse of encode_value"""
+    (length,), position = _LENGTH.unpack_from(blob, 0), _LENGTH.size
+    document = bytes(blob[position:position + length])
+    position += length
+    arrays = []
+    while position < len(blob):
+        (size,) = _LENGTH.unpack_from(blob, position)
+        position += _LENGTH.size
+        arrays.append(np.load(io.BytesIO(blob[position:position + size]), allow_pickle=False))
+        position += size
+
+    def untag(item):
+        if len(item) != 1:
+            return item
+        (name, value), = item.items()
+        if name == '__array__':
+            return arrays[value]
+        if name == '__list_array__':
+            return np.array(value, dtype=object)
+        if name == '__items__':
+            return {(tuple(key) if isinstance(key, list) else key): element for key, element in value}
+        if name == '__tuple__':
+            return tuple(value)
+        if name == '__power_series__':
+            return PowerSeries(value['dates'], value['columns'], simulated=value['simulated'], source=value['source'])
+        if name == '__datetime__':
+            return datetime.fromisoformat(value)
+        if name == '__date__':
+            return date.fromisoformat(value)
+        if name == '__bytes__':
+            return base64.b64decode(value)
+        return item
+
+    return json.loads(document, object_hook=untag)
+
+
+class MappedPart(Mapping):
+    """Read-only mapping over one snapshot part whose values stay encoded in the mmap.
+
+    Entries are decoded on access; a small per-part LRU keeps the hot ones,
+    so a worker only holds the values its requests actually touch.
+    """
+
+    __slots__ = ('_buffer', '_entries', '_cache', '_cache_size', '_lock')
+
+    def __init__(self, buffer, entries, cache_size):
+        self._buffer = buffer
+        self._entries = entries
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key):
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        offset, length = self._entries[key]
+        value = decode_value(self._buffer[offset:offset + length])
+        with self._lock:
+            self._cache[key] = value
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return value
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+
+class SnapshotFile:
+    """One published snapshot, memory-mapped read-only.
+
+    Layout: preamble, JSON header, then one encode_value blob per entry. The header
+    maps every part to either a single blob or, for dicts with string keys, a
+    blob per key (as offsets into the blob area), so readers decode only what
+    they use.
+    """
+
+    def __init__(self, path, cache_size=None):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.size = os.fstat(f.fileno()).st_size
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, format_version, header_length = _PREAMBLE.unpack_from(self._mmap, 0)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} analysis snapshot")
+        self.header = json.loads(bytes(self._mmap[_PREAMBLE.size:_PREAMBLE.size + header_length]))
+        # Entry offsets are relative to the blobs that follow the header
+        self._buffer = memoryview(self._mmap)[_PREAMBLE.size + header_length:]
+        self._cache_size = cache_size or NASAConfig.SNAPSHOT_DECODE_CACHE
+
+    @property
+    def version(self):
+        return self.header['version']
+
+    def parts(self):
+        """Parts as MappedPart mappings (dict parts) or decoded values"""
+        parts = {}
+        for name, part in self.header['parts'].items():
+            if 'entries' in part:
+                parts[name] = MappedPart(self._buffer, {key: tuple(entry) for key, entry in part['entries'].items()}, self._cache_size)
+            else:
+                offset, length = part['entry']
+                parts[name] = decode_value(self._buffer[offset:offset + length])
+        return parts
+
+
+def write_snapshot_file(path, version, built_at, build_seconds, parts):
+    """Encode parts into a snapshot file, replacing path atomically"""
+    blobs = []
+    header_parts = {}
+    position = 0
+
+    def add(value):
+        nonlocal position
+        blob = encode_value(value)
+        blobs.append(blob)
+        entry = [position, len(blob)]
+        position += len(blob)
+        return entry
+
+    for name, value in parts.items():
+        if isinstance(value, Mapping) and all(isinstance(key, str) for key in value):
+            header_parts[name] = {'entries': {key: add(item) for key, item in value.items()}}
+        else:
+            header_parts[name] = {'entry': add(value)}
+
+    header = {'version': version, 'built_at': built_at, 'build_seconds': build_seconds, 'parts': header_parts}
+    header_bytes = json.dumps(header).encode('utf-8')
+
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, path)
+
+
+class SharedSnapshotStore:
+    """Snapshot file shared by every worker on the host.
+
+    One worker builds and publishes under an exclusive file lock; the others
+    map the published file read-only instead of building their own copy, so
+    all workers serve the same version and each holds only what it decodes.
+    """
+
+    def __init__(self, name='analysis', directory=None):
+        self.directory = directory or NASAConfig.SNAPSHOT_DIR or os.path.join(NASAConfig.CACHE_DIR, 'snapshots')
+        self.path = os.path.join(self.directory, f'{name}.snap')
+        self.lock_path = os.path.join(self.directory, f'{name}.lock')
+        self.stats = {'maps': 0, 'publishes': 0, 'lock_waits': 0}
+        self._mapped = None
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def load(self):
+        """Latest published SnapshotFile (remapped only when the file changed), or None"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if self._mapped is not None and self._mapped[0] == identity:
+                return self._mapped[1]
+        snapshot_file = SnapshotFile(self.path)
+        with self._lock:
+            self._mapped = (identity, snapshot_file)
+            self.stats['maps'] += 1
+        return snapshot_file
+
+    @contextmanager
+    def build_lock(self):
+        """Hold the host-wide build lock; yields whether another worker held it first"""
+        if fcntl is None:
+            yield False
+            return
+        with open(self.lock_path, 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                waited = False
+            except BlockingIOError:
+                with self._lock:
+                    self.stats['lock_waits'] += 1
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                waited = True
+            try:
+                yield waited
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def publish(self, version, build_seconds, parts):
+        write_snapshot_file(self.path, version, time.time(), build_seconds, parts)
+        with self._lock:
+            self.stats['publishes'] += 1
+        return self.load()
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            mapped = self._mapped[1] if self._mapped is not None else None
+        stats['path'] = self.path
+        stats['bytes'] = mapped.size if mapped is not None else 0
+        stats['mapped_version'] = mapped.version if mapped is not None else None
+        return stats
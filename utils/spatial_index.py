@@ -0,0 +1,260 @@
+import json
+import numpy as np
+
+
+def _csr(cell_ids, n_cells):
+    """Order items by cell and return (order, starts) so cell c holds order[starts[c]:starts[c + 1]]"""
+    order = np.argsort(cell_ids, kind='stable')
+    starts = np.searchsorted(cell_ids[order], np.arange(n_cells + 1))
+    return order, starts
+
+
+def _expand(lo, hi):
+    """Flatten the ranges [lo[i], hi[i]) into (owner, position) arrays"""
+    counts = hi - lo
+    owner = np.repeat(np.arange(len(lo)), counts)
+    offsets = np.repeat(np.cumsum(counts) - counts, counts)
+    return owner, np.repeat(lo, counts) + (np.arange(counts.sum()) - offsets)
+
+
+class PointIndex:
+    """Nearest-neighbour lookup over named points on a uniform grid.
+
+    Points are bucketed into cells of roughly two points each; queries search
+    growing rings of cells until no unsearched cell can hold a closer point.
+    Distances are plain Euclidean degrees and exact ties go to the point
+    listed first, matching a linear scan over the same points.
+    """
+
+    def __init__(self, keys, lats, lons, cell_size=None):
+        self.keys = list(keys)
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        if not len(self.keys):
+            raise ValueError('PointIndex needs at least one point')
+
+        self.south = self.lats.min()
+        self.west = self.lons.min()
+        span = max(np.ptp(self.lats), np.ptp(self.lons), 1e-9)
+        self.cell_size = cell_size or span / max(1.0, np.sqrt(len(self.keys) / 2.0))
+        self.n_rows = int((self.lats.max() - self.south) / self.cell_size) + 1
+        self.n_cols = int((self.lons.max() - self.west) / self.cell_size) + 1
+
+        rows, cols = self._cells(self.lats, self.lons)
+        self._order, self._starts = _csr(rows * self.n_cols + cols, self.n_rows * self.n_cols)
+
+    @classmethod
+    def from_dict(cls, points, **kwargs):
+        """Build from {key: (lat, lon)}"""
+        keys = list(points)
+        return cls(keys, [points[k][0] for k in keys], [points[k][1] for k in keys], **kwargs)
+
+    def _cells(self, lats, lons):
+        rows = np.clip(np.floor((lats - self.south) / self.cell_size), 0, self.n_rows - 1).astype(np.int64)
+        cols = np.clip(np.floor((lons - self.west) / self.cell_size), 0, self.n_cols - 1).astype(np.int64)
+        return rows, cols
+
+    def nearest(self, lats, lons):
+        """Return (indices, distances) of the nearest point to every query coordinate"""
+        q_lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        q_lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+        best = np.full(len(q_lats), -1, dtype=np.int64)
+        best_d = np.full(len(q_lats), np.inf)
+
+        valid = np.isfinite(q_lats) & np.isfinite(q_lons)
+        rows, cols = self._cells(np.where(valid, q_lats, self.south), np.where(valid, q_lons, self.west))
+        pending = np.flatnonzero(valid)
+        slack = self.cell_size * 1e-9
+        ring = 0
+
+        while pending.size:
+            r0 = np.maximum(rows[pending] - ring, 0)
+            r1 = np.minimum(rows[pending] + ring, self.n_rows - 1)
+            c0 = np.maximum(cols[pending] - ring, 0)
+            c1 = np.minimum(cols[pending] + ring, self.n_cols - 1)
+
+            # Each window row is one contiguous run of points in cell order
+            row_owner, window_row = _expand(r0, r1 + 1)
+            base = window_row * self.n_cols
+            lo = self._starts[base + c0[row_owner]]
+            hi = self._starts[base + c1[row_owner] + 1]
+            pair_owner, position = _expand(lo, hi)
+            owner = row_owner[pair_owner]
+            point = self._order[position]
+
+            if point.size:
+                query = pending[owner]
+                distance = ((q_lats[query] - self.lats[point]) ** 2 + (q_lons[query] - self.lons[point]) ** 2) ** 0.5
+                # Candidates arrive grouped by query, so reduce each group in place
+                group_starts = np.flatnonzero(np.r_[True, owner[1:] != owner[:-1]])
+                owners = owner[group_starts]
+                group_min = np.minimum.reduceat(distance, group_starts)
+                is_min = distance == np.repeat(group_min, np.diff(np.r_[group_starts, len(owner)]))
+                best[pending[owners]] = np.minimum.reduceat(np.where(is_min, point, len(self.keys)), group_starts)
+                best_d[pending[owners]] = group_min
+
+            # Closest any point outside the searched window could be
+            p_lats, p_lons = q_lats[pending], q_lons[pending]
+            reach = np.full(pending.size, np.inf)
+            reach = np.where(r0 > 0, np.minimum(reach, p_lats - (self.south + r0 * self.cell_size)), reach)
+            reach = np.where(r1 < self.n_rows - 1, np.minimum(reach, self.south + (r1 + 1) * self.cell_size - p_lats), reach)
+            reach = np.where(c0 > 0, np.minimum(reach, p_lons - (self.west + c0 * self.cell_size)), reach)
+            reach = np.where(c1 < self.n_cols - 1, np.minimum(reach, self.west + (c1 + 1) * self.cell_size - p_lons), reach)
+
+            pending = pending[best_d[pending] >= np.maximum(reach, 0.0) - slack]
+            ring += 1
+
+        return best, best_d
+
+    def nearest_keys(self, lats, lons):
+        indices, _ = self.nearest(lats, lons)
+        return [self.keys[i] if i >= 0 else None for i in indices]
+
+
+class ZoneIndex:
+    """Point-in-zone lookup over axis-aligned boxes and polygons.
+
+    Zone bounding boxes are registered in every grid cell they overlap, so a
+    query point is only tested against the zones sharing its cell. Boxes keep
+    the strict |lat - centre| < half_width test used by the simulated land
+    classification; polygons use the even-odd rule, so holes and MultiPolygon
+    parts work without special cases. When zones overlap the one listed first wins.
+    """
+
+    def __init__(self, keys, bounds, box_centres=None, box_half_widths=None, polygons=None, cell_size=None):
+        self.keys = list(keys)
+        bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 4)
+        self.south, self.north, self.west, self.east = bounds.T
+        n = len(self.keys)
+
+        # Boxes: centre (lat, lon) and half-widths (lat, lon); NaN centre marks a polygon zone
+        self.box_centres = np.full((n, 2), np.nan) if box_centres is None else np.asarray(box_centres, dtype=np.float64)
+        self.box_half_widths = np.zeros((n, 2)) if box_half_widths is None else np.asarray(box_half_widths, dtype=np.float64)
+        self.is_box = np.isfinite(self.box_centres[:, 0])
+
+        # Polygons: every ring edge as (lon1, lat1, lon2, lat2), grouped by zone
+        polygons = polygons or {}
+        edges, edge_counts = [], np.zeros(n, dtype=np.int64)
+        for zone in range(n):
+            for ring in polygons.get(zone, []):
+                ring = np.asarray(ring, dtype=np.float64)
+                if len(ring) < 3:
+                    continue
+                closed = np.vstack([ring, ring[:1]]) if not np.array_equal(ring[0], ring[-1]) else ring
+                edges.append(np.hstack([closed[:-1, :2], closed[1:, :2]]))
+                edge_counts[zone] += len(closed) - 1
+        self._edges = np.vstack(edges) if edges else np.zeros((0, 4))
+        self._edge_starts = np.concatenate([[0], np.cumsum(edge_counts)])
+
+        self._build_grid(cell_size)
+
+    @classmethod
+    def from_boxes(cls, centres, half_width, keys=None):
+        """Square zones from (lat, lon) centres, all sharing one half-width in degrees"""
+        centres = np.asarray(centres, dtype=np.float64).reshape(-1, 2)
+        half_widths = np.full(centres.shape, float(half_width))
+        bounds = np.column_stack([
+            centres[:, 0] - half_widths[:, 0], centres[:, 0] + half_widths[:, 0],
+            centres[:, 1] - half_widths[:, 1], centres[:, 1] + half_widths[:, 1]
+        ])
+        keys = keys if keys is not None else range(len(centres))
+        return cls(keys, bounds, box_centres=centres, box_half_widths=half_widths)
+
+    @classmethod
+    def from_geojson(cls, source, key_property='name'):
+        """Zones from Polygon/MultiPolygon features of a GeoJSON file path or dict"""
+        if isinstance(source, str):
+            with open(source, 'r', encoding='utf-8') as f:
+                source = json.load(f)
+
+        keys, bounds, polygons = [], [], {}
+        for position, feature in enumerate(source.get('features', [])):
+            geometry = feature.get('geometry') or {}
+            if geometry.get('type') == 'Polygon':
+                rings = geometry['coordinates']
+            elif geometry.get('type') == 'MultiPolygon':
+                rings = [ring for polygon in geometry['coordinates'] for ring in polygon]
+            else:
+                continue
+            coords = np.vstack([np.asarray(ring, dtype=np.float64)[:, :2] for ring in rings])
+            polygons[len(keys)] = rings
+            keys.append((feature.get('properties') or {}).get(key_property, feature.get('id', position)))
+            bounds.append((coords[:, 1].min(), coords[:, 1].max(), coords[:, 0].min(), coords[:, 0].max()))
+
+        if not keys:
+            raise ValueError('GeoJSON source has no polygon features')
+        return cls(keys, bounds, polygons=polygons)
+
+    def _build_grid(self, cell_size):
+        n = len(self.keys)
+        self.grid_south = self.south.min() if n else 0.0
+        self.grid_west = self.west.min() if n else 0.0
+        lat_span = self.north.max() - self.grid_south if n else 0.0
+        lon_span = self.east.max() - self.grid_west if n else 0.0
+        if cell_size is None:
+            extent = np.maximum(self.north - self.south, self.east - self.west)
+            span = max(lat_span, lon_span, 1e-9)
+            cell_size = max(float(np.median(extent)) if n else span, span / 1024.0, 1e-9)
+        self.cell_size = cell_size
+        self.n_rows = int(lat_span / cell_size) + 1
+        self.n_cols = int(lon_span / cell_size) + 1
+
+        r0, c0 = self._cells(self.south, self.west)
+        r1, c1 = self._cells(self.north, self.east)
+        widths = c1 - c0 + 1
+        zone, local = _expand(np.zeros(n, dtype=np.int64), (r1 - r0 + 1) * widths)
+        cell_ids = (r0[zone] + local // widths[zone]) * self.n_cols + c0[zone] + local % widths[zone]
+        order, self._starts = _csr(cell_ids, self.n_rows * self.n_cols)
+        self._zones = zone[order]
+
+    def _cells(self, lats, lons):
+        rows = np.clip(np.floor((lats - self.grid_south) / self.cell_size), 0, self.n_rows - 1).astype(np.int64)
+        cols = np.clip(np.floor((lons - self.grid_west) / self.cell_size), 0, self.n_cols - 1).astype(np.int64)
+        return rows, cols
+
+    def locate(self, lats, lons):
+        """Index of the first zone containing each coordinate, or -1"""
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+        result = np.full(len(lats), len(self.keys), dtype=np.int64)
+        if not len(self.keys):
+            return result - 1
+
+        valid = np.isfinite(lats) & np.isfinite(lons)
+        rows, cols = self._cells(np.where(valid, lats, self.grid_south), np.where(valid, lons, self.grid_west))
+        cells = np.where(valid, rows * self.n_cols + cols, 0)
+        point, position = _expand(np.where(valid, self._starts[cells], 0), np.where(valid, self._starts[cells + 1], 0))
+        zone = self._zones[position]
+        p_lats, p_lons = lats[point], lons[point]
+
+        inside = np.zeros(len(zone), dtype=bool)
+        box = self.is_box[zone]
+        if box.any():
+            z = zone[box]
+            inside[box] = (
+                (np.abs(p_lats[box] - self.box_centres[z, 0]) < self.box_half_widths[z, 0]) &
+                (np.abs(p_lons[box] - self.box_centres[z, 1]) < self.box_half_widths[z, 1])
+            )
+
+        polygon = ~box & (p_lats >= self.south[zone]) & (p_lats <= self.north[zone]) & (p_lons >= self.west[zone]) & (p_lons <= self.east[zone])
+        if polygon.any():
+            candidates = np.flatnonzero(polygon)
+            z = zone[candidates]
+            owner, edge = _expand(self._edge_starts[z], self._edge_starts[z + 1])
+            x1, y1, x2, y2 = self._edges[edge].T
+            px, py = p_lons[candidates][owner], p_lats[candidates][owner]
+            straddles = (y1 > py) != (y2 > py)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                crossing = straddles & (px < (x2 - x1) * (py - y1) / (y2 - y1) + x1)
+            crossings = np.bincount(owner, weights=crossing, minlength=len(candidates))
+            inside[candidates] = crossings.astype(np.int64) % 2 == 1
+
+        np.minimum.at(result, point[inside], zone[inside])
+        return np.where(result == len(self.keys), -1, result)
+
+    def contains(self, lats, lons):
+        """Whether each coordinate falls in any zone"""
+        return self.locate(lats, lons) >= 0
+
+    def locate_keys(self, lats, lons):
+        return [self.keys[i] if i >= 0 else None for i in self.locate(lats, lons)]
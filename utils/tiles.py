@@ -0,0 +1,251 @@
+import os
+import shutil
+import threading
+from collections import Counter, OrderedDict
+import numpy as np
+from config.nasa_config import NASAConfig
+from utils.memo import stable_hash
+from utils.png import encode_png
+
+TILE_SIZE = 256
+# Map layer -> raster surface, value range mapped onto the colour ramp, and ramp stops
+TILE_LAYERS = {
+    'sustainability': {'surface': 'sustainability_score', 'range': (0.0, 100.0), 'colors': ('#d73027', '#fee08b', '#1a9850')},
+    'ndvi': {'surface': 'ndvi', 'range': (0.0, 0.8), 'colors': ('#a6611a', '#f5f5c0', '#1a9641')},
+    'lst': {'surface': 'land_surface_temperature', 'range': (20.0, 45.0), 'colors': ('#313695', '#ffffbf', '#a50026')}
+}
+# Smallest overview kept, in pixels along its longer side
+MIN_OVERVIEW_SIZE = 64
+
+
+def _rgb(color):
+    return [int(color[i:i + 2], 16) for i in (1, 3, 5)]
+
+
+def tile_centres(z, x, y):
+    """Latitudes (per row) and longitudes (per column) of a Web Mercator XYZ tile's pixel centres"""
+    scale = TILE_SIZE * 2 ** z
+    offsets = np.arange(TILE_SIZE) + 0.5
+    lons = (x * TILE_SIZE + offsets) / scale * 360.0 - 180.0
+    lats = np.degrees(np.arctan(np.sinh(np.pi * (1.0 - 2.0 * (y * TILE_SIZE + offsets) / scale))))
+    return lats, lons
+
+
+def colorize(values, layer, opacity=None):
+    """RGBA pixels for values on a layer's ramp; NaN pixels are fully transparent"""
+    spec = TILE_LAYERS[layer]
+    opacity = NASAConfig.TILE_OPACITY if opacity is None else opacity
+    low, high = spec['range']
+    stops = np.array([_rgb(color) for color in spec['colors']], dtype=np.float64)
+    positions = np.linspace(0.0, 1.0, len(stops))
+    finite = np.isfinite(values)
+    t = np.clip((np.where(finite, values, low) - low) / (high - low), 0.0, 1.0)
+    pixels = np.empty(values.shape + (4,), dtype=np.uint8)
+    for channel in range(3):
+        pixels[..., channel] = np.interp(t, positions, stops[:, channel]).astype(np.uint8)
+    pixels[..., 3] = np.where(finite, int(round(opacity * 255)), 0)
+    return pixels
+
+
+def build_overviews(surface, directory=None, name=None):
+    """NaN-aware 2x mean-pooled levels of a surface, coarsest last, as [(factor, array)].
+
+    Level 1 is the surface itself. With directory set, each coarser level is
+    saved there as <name>.<factor>.f32 and reused while the file exists.
+    """
+    levels = [(1, surface)]
+    current = np.asarray(surface, dtype=np.float32)
+    factor = 1
+    while max(current.shape) > MIN_OVERVIEW_SIZE:
+        factor *= 2
+        rows, cols = (current.shape[0] + 1) // 2, (current.shape[1] + 1) // 2
+        path = os.path.join(directory, f'{name}.{factor}.f32') if directory else None
+        if path and os.path.exists(path) and os.path.getsize(path) == rows * cols * 4:
+            current = np.fromfile(path, dtype=np.float32).reshape(rows, cols)
+        else:
+            padded = np.full((rows * 2, cols * 2), np.nan, dtype=np.float32)
+            padded[:current.shape[0], :current.shape[1]] = current
+            blocks = padded.reshape(rows, 2, cols, 2)
+            finite = np.isfinite(blocks)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                current = (np.where(finite, blocks, 0.0).sum(axis=(1, 3)) / finite.sum(axis=(1, 3))).astype(np.float32)
+            if path:
+                os.makedirs(directory, exist_ok=True)
+                tmp_path = f'{path}.{os.getpid()}.tmp'
+                current.tofile(tmp_path)
+                os.replace(tmp_path, path)
+        levels.append((factor, current))
+    return levels
+
+
+class TileServer:
+    """PNG map tiles of raster surfaces with memory, disk and overview caches.
+
+    Rendered tiles are kept in a byte-bounded LRU and written under
+    CACHE_DIR/tiles/<raster>/<layer>/<z>/<x>/<y>.png, so panning over tiles
+    any worker has drawn costs a dict lookup or one file read. Low zooms
+    sample mean-pooled overviews instead of the full surface; publish()
+    precomputes them when a raster goes live, so no tile request pays for
+    them. Only the tile trees of the keep most recently published rasters
+    stay on disk.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None, disk_cache=None, keep=None):
+        self.directory = os.path.join(cache_dir or NASAConfig.CACHE_DIR, 'tiles')
+        self.max_bytes = NASAConfig.TILE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.disk_cache = NASAConfig.TILE_DISK_CACHE if disk_cache is None else disk_cache
+        self.keep = NASAConfig.RASTER_CACHE_KEEP if keep is None else keep
+        self.stats = {'hits': 0, 'disk_hits': 0, 'renders': 0, 'evictions': 0, 'pruned_rasters': 0}
+        self._raster_key = None
+        # Renders in flight per raster key; their tile trees are never pruned
+        self._rendering = Counter()
+        self._tiles = OrderedDict()
+        self._bytes = 0
+        self._overviews = OrderedDict()
+        self._lock = threading.Lock()
+        self._empty = encode_png(np.zeros((TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8))
+
+    @staticmethod
+    def raster_key(raster):
+        return raster.meta.get('key') or stable_hash(raster.directory, raster.meta)
+
+    def tile(self, raster, layer, z, x, y):
+        """PNG bytes of one XYZ tile of a layer"""
+        if layer not in TILE_LAYERS:
+            raise KeyError(f"Unknown tile layer: {layer}")
+        raster_key = self.raster_key(raster)
+        key = (raster_key, layer, z, x, y)
+        with self._lock:
+            if key in self._tiles:
+                self._tiles.move_to_end(key)
+                self.stats['hits'] += 1
+                return self._tiles[key]
+            self._rendering[raster_key] += 1
+
+        try:
+            payload, kind = self._load_or_render(raster, raster_key, layer, z, x, y)
+        finally:
+            with self._lock:
+                self._rendering[raster_key] -= 1
+                if not self._rendering[raster_key]:
+                    del self._rendering[raster_key]
+
+        with self._lock:
+            self.stats[kind] += 1
+            if key not in self._tiles:
+                self._tiles[key] = payload
+                self._bytes += len(payload)
+            while self._bytes > self.max_bytes and self._tiles:
+                _, evicted = self._tiles.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.stats['evictions'] += 1
+        return payload
+
+    def _load_or_render(self, raster, raster_key, layer, z, x, y):
+        path = os.path.join(self.directory, raster_key, layer, str(z), str(x), f'{y}.png')
+        if self.disk_cache and os.path.exists(path):
+            try:
+                with open(path, 'rb') as f:
+                    return f.read(), 'disk_hits'
+            except OSError:
+                pass
+        payload = self.render(raster, layer, z, x, y)
+        if self.disk_cache:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f'{path}.{os.getpid()}.tmp'
+                with open(tmp_path, 'wb') as f:
+                    f.write(payload)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"⚠️ Could not persist tile {layer}/{z}/{x}/{y}: {e}")
+        return payload, 'renders'
+
+    def publish(self, raster):
+        """Precompute a raster's overviews and make its tile tree the most recent one.
+
+        Older tile trees beyond keep are pruned under the server lock, skipping
+        any raster with a render in flight, so a request still drawing tiles of
+        the previous raster never has its tree removed underneath it.
+        """
+        for spec in TILE_LAYERS.values():
+            if spec['surface'] in raster.surfaces:
+                self.overviews(raster, spec['surface'])
+        if not self.disk_cache:
+            return
+        raster_key = self.raster_key(raster)
+        with self._lock:
+            if raster_key == self._raster_key:
+                return
+            self._raster_key = raster_key
+            directory = os.path.join(self.directory, raster_key)
+            try:
+                os.makedirs(directory, exist_ok=True)
+                os.utime(directory)
+                names = os.listdir(self.directory)
+            except OSError:
+                return
+            trees = []
+            for name in names:
+                try:
+                    trees.append((os.path.getmtime(os.path.join(self.directory, name)), name))
+                except OSError:
+                    continue
+            for _, name in sorted(trees, reverse=True)[self.keep:]:
+                if name != raster_key and name not in self._rendering:
+                    shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+                    self.stats['pruned_rasters'] += 1
+
+    def overviews(self, raster, surface):
+        key = (self.raster_key(raster), surface)
+        with self._lock:
+            if key in self._overviews:
+                self._overviews.move_to_end(key)
+                return self._overviews[key]
+        levels = build_overviews(raster.surface(surface), os.path.join(raster.directory, 'overviews'), surface)
+        with self._lock:
+            self._overviews[key] = levels
+            while len(self._overviews) > 2 * len(TILE_LAYERS):
+                self._overviews.popitem(last=False)
+        return levels
+
+    def render(self, raster, layer, z, x, y):
+        grid = raster.grid
+        lats, lons = tile_centres(z, x, y)
+        rows_inside = (lats > grid.bounds['south']) & (lats < grid.bounds['north'])
+        cols_inside = (lons > grid.bounds['west']) & (lons < grid.bounds['east'])
+        if not rows_inside.any() or not cols_inside.any():
+            return self._empty
+
+        # Coarsest overview whose pixels are still no larger than the tile's
+        tile_step = 360.0 / (TILE_SIZE * 2 ** z)
+        factor, values = 1, None
+        for level_factor, level in self.overviews(raster, TILE_LAYERS[layer]['surface']):
+            if values is None or grid.lon_step * level_factor <= tile_step:
+                factor, values = level_factor, level
+
+        rows = np.floor((grid.bounds['north'] - lats) / (grid.lat_step * factor)).astype(np.int64)
+        cols = np.floor((lons - grid.bounds['west']) / (grid.lon_step * factor)).astype(np.int64)
+        rows = np.clip(rows, 0, values.shape[0] - 1)
+        cols = np.clip(cols, 0, values.shape[1] - 1)
+        sampled = np.full((TILE_SIZE, TILE_SIZE), np.nan, dtype=np.float32)
+        row_index, col_index = np.flatnonzero(rows_inside), np.flatnonzero(cols_inside)
+        sampled[np.ix_(row_index, col_index)] = values[np.ix_(rows[row_index], cols[col_index])]
+        return encode_png(colorize(sampled, layer))
+
+    def get_stats(self):
+        with self._lock:
+            return {**self.stats, 'entries': len(self._tiles), 'bytes': self._bytes, 'max_bytes': self.max_bytes}
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def get_tile_server():
+    """Return the process-wide tile server"""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = TileServer()
+        return _server
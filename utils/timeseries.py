@@ -0,0 +1,121 @@
+import numpy as np
+
+POWER_FILL_VALUE = -999.0
+
+# Indian meteorological seasons by calendar month
+SEASONS = {
+    'winter': (12, 1, 2),
+    'summer': (3, 4, 5),
+    'monsoon': (6, 7, 8, 9),
+    'post_monsoon': (10, 11)
+}
+
+
+class PowerSeries:
+    """NASA POWER daily parameters as typed NumPy columns indexed by date.
+
+    dates is a sorted datetime64[D] array and each column a float32 array of the
+    same length, with NaN where POWER reported its -999 fill value.
+    """
+
+    __slots__ = ('dates', 'columns', 'simulated', 'source')
+
+    def __init__(self, dates, columns, simulated=False, source='NASA POWER API'):
+        self.dates = dates
+        self.columns = columns
+        self.simulated = simulated
+        self.source = source
+
+    @classmethod
+    def from_response(cls, data):
+        """Parse a POWER point response (or return an existing series unchanged)"""
+        if isinstance(data, cls):
+            return data
+        data = data or {}
+        parameters = data.get('properties', {}).get('parameter', {})
+
+        keys = sorted({key for series in parameters.values() for key in series if len(key) == 8})
+        dates = np.array([f'{k[:4]}-{k[4:6]}-{k[6:]}' for k in keys], dtype='datetime64[D]')
+        position = {key: i for i, key in enumerate(keys)}
+
+        columns = {}
+        for name, series in parameters.items():
+            column = np.full(len(keys), np.nan, dtype=np.float32)
+            for key, value in series.items():
+                if key in position and value is not None and value != POWER_FILL_VALUE:
+                    column[position[key]] = value
+            columns[name] = column
+
+        return cls(
+            dates,
+            columns,
+            simulated=data.get('simulated', False),
+            source=data.get('source', 'Simulated' if data.get('simulated', False) else 'NASA POWER API')
+        )
+
+    def __contains__(self, parameter):
+        return parameter in self.columns
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __eq__(self, other):
+        if not isinstance(other, PowerSeries):
+            return NotImplemented
+        return (
+            self.simulated == other.simulated and
+            self.source == other.source and
+            np.array_equal(self.dates, other.dates) and
+            self.columns.keys() == other.columns.keys() and
+            all(np.array_equal(self.columns[name], other.columns[name], equal_nan=True) for name in self.columns)
+        )
+
+    __hash__ = None
+
+    @property
+    def nbytes(self):
+        return self.dates.nbytes + sum(column.nbytes for column in self.columns.values())
+
+    def mean(self, parameter):
+        """Mean over the full series, or None when there are no valid values"""
+        column = self.columns.get(parameter)
+        if column is None or not np.isfinite(column).any():
+            return None
+        return float(np.nanmean(column))
+
+    def monthly(self, parameter):
+        """Return (months as datetime64[M], monthly means)"""
+        months = self.dates.astype('datetime64[M]')
+        if not len(months):
+            return months, np.array([], dtype=np.float64)
+        index = (months - months[0]).astype(np.int64)
+        means = self._grouped_mean(parameter, index, index[-1] + 1)
+        return months[0] + np.arange(len(means)), means
+
+    def seasonal(self, parameter):
+        """Return {season: mean} over all years"""
+        month_of_year = self.dates.astype('datetime64[M]').astype(np.int64) % 12 + 1
+        season_of_month = np.zeros(13, dtype=np.int64)
+        for i, months in enumerate(SEASONS.values()):
+            season_of_month[list(months)] = i
+        means = self._grouped_mean(parameter, season_of_month[month_of_year], len(SEASONS))
+        return {season: (None if np.isnan(value) else round(float(value), 3)) for season, value in zip(SEASONS, means)}
+
+    def annual(self, parameter):
+        """Return {year: mean}"""
+        years = self.dates.astype('datetime64[Y]').astype(np.int64) + 1970
+        if not len(years):
+            return {}
+        index = years - years[0]
+        means = self._grouped_mean(parameter, index, index[-1] + 1)
+        return {int(years[0] + i): round(float(value), 3) for i, value in enumerate(means) if not np.isnan(value)}
+
+    def _grouped_mean(self, parameter, index, size):
+        column = self.columns.get(parameter)
+        if column is None:
+            return np.full(size, np.nan)
+        valid = np.isfinite(column)
+        sums = np.bincount(index[valid], weights=column[valid].astype(np.float64), minlength=size)
+        counts = np.bincount(index[valid], minlength=size)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, sums / counts, np.nan)
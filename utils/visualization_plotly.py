@@ -873,6 +873,18 @@ class DataVisualizerPlotly:
                            gradient={0.4: self.colors['danger'], 0.65: self.colors['warning'], 1: self.colors['success']}, 
                            min_opacity=0.5, max_opacity=0.8, radius=25, blur=15).add_to(m)
             
+            # Raster layers served as cached XYZ tiles by /tiles/<layer>/{z}/{x}/{y}.png
+            for layer, name in (('sustainability', 'Sustainability Surface'), ('ndvi', 'NDVI'), ('lst', 'Land Surface Temperature')):
+                folium.raster_layers.TileLayer(
+                    tiles=f'/tiles/{layer}/{{z}}/{{x}}/{{y}}.png',
+                    attr='NASA Earth observation data',
+                    name=name,
+                    overlay=True,
+                    control=True,
+                    show=layer == 'sustainability'
+                ).add_to(m)
+            folium.LayerControl(collapsed=True).add_to(m)
+            
             # Add colormap to map
             colormap.add_to(m)
             
@@ -1149,25 +1161,41 @@ class DataVisualizerPlotly:
         else:
             return self.colors['danger']     
     
-    def generate_trend_analysis(self, analysis_data):
-        """Generate trend analysis chart showing area progression"""
+    def generate_trend_analysis(self, analysis_data, trends=None):
+        """Generate trend analysis chart comparing current scores with the last stored period"""
         try:
             areas = [data.get('name', 'Unknown') for data in analysis_data.values()]
             
-            # Simulate trend data (in real scenario, this would come from historical data)
+            # Previous period and trend come from the historical analysis store
+            trends = trends or {}
             current_scores = [data.get('sustainability_score', 50) for data in analysis_data.values()]
-            previous_scores = [max(0, score - np.random.randint(5, 15)) for score in current_scores]
+            history = [trends.get(area_key, {}).get('sustainability_score', {}) for area_key in analysis_data]
+            previous_scores = [area_history.get('latest') for area_history in history]
+            slopes = [area_history.get('slope_per_year') for area_history in history]
             
             fig = go.Figure()
             
             # Add previous scores
-            fig.add_trace(go.Bar(
-                name='Previous Period',
-                x=areas,
-                y=previous_scores,
-                marker_color=self.colors['accent'],
-                hovertemplate='<b>%{x}</b><br>Previous Score: %{y:.1f}<extra></extra>'
-            ))
+            if any(score is not None for score in previous_scores):
+                fig.add_trace(go.Bar(
+                    name='Previous Period',
+                    x=areas,
+                    y=previous_scores,
+                    customdata=[slope if slope is not None else float('nan') for slope in slopes],
+                    marker_color=self.colors['accent'],
+                    hovertemplate='<b>%{x}</b><br>Previous Score: %{y:.1f}<br>Trend: %{customdata:+.1f}/year<extra></extra>'
+                ))
+            
+            rolling_means = [area_history.get('rolling_mean') for area_history in history]
+            if any(mean is not None for mean in rolling_means):
+                fig.add_trace(go.Scatter(
+                    name='Rolling Mean',
+                    x=areas,
+                    y=rolling_means,
+                    mode='markers',
+                    marker=dict(color=self.colors['dark'], size=10, symbol='diamond'),
+                    hovertemplate='<b>%{x}</b><br>Rolling Mean: %{y:.1f}<extra></extra>'
+                ))
             
             # Add current scores
             fig.add_trace(go.Bar(
@@ -1180,7 +1208,7 @@ class DataVisualizerPlotly:
             
             # Add improvement annotations
             for i, (prev, curr) in enumerate(zip(previous_scores, current_scores)):
-                improvement = curr - prev
+                improvement = curr - prev if prev is not None else 0
                 if improvement > 0:
                     fig.add_annotation(
                         x=areas[i],
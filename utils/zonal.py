@@ -0,0 +1,353 @@
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from config.nasa_config import NASAConfig
+from utils.memo import stable_hash
+from utils.spatial_index import PointIndex, ZoneIndex
+
+DEFAULT_PERCENTILES = (10, 25, 50, 75, 90)
+
+
+def _require_rasterio():
+    try:
+        import rasterio
+        import rasterio.warp
+        from rasterio.windows import Window
+    except ImportError:
+        raise RuntimeError('Zonal statistics over GeoTIFFs need rasterio (pip install rasterio)')
+    return rasterio, Window
+
+
+class GeoTiffGrid:
+    """Pixel grid of a GeoTIFF, or of a (row_off, col_off, height, width) window of it,
+    exposing the same centres()/to_dict() as RasterGrid"""
+
+    def __init__(self, path, tile_size=256, window=None):
+        rasterio, _ = _require_rasterio()
+        with rasterio.open(path) as src:
+            self.window = tuple(int(v) for v in window) if window is not None else (0, 0, src.height, src.width)
+            self.transform = src.transform
+            self.crs = str(src.crs)
+            self.nodata = src.nodata
+        self.rows, self.cols = self.window[2], self.window[3]
+        self.path = path
+        self.tile_size = tile_size
+
+    @classmethod
+    def for_bounds(cls, path, bounds, tile_size=256):
+        """Grid of the pixel window covering lat/lon bounds (clipped to the raster)"""
+        rasterio, _ = _require_rasterio()
+        from rasterio.windows import from_bounds
+        with rasterio.open(path) as src:
+            left, bottom, right, top = rasterio.warp.transform_bounds(
+                'EPSG:4326', src.crs, bounds['west'], bounds['south'], bounds['east'], bounds['north']
+            )
+            window = from_bounds(left, bottom, right, top, transform=src.transform)
+            row0 = max(0, int(np.floor(window.row_off)))
+            col0 = max(0, int(np.floor(window.col_off)))
+            row1 = min(src.height, int(np.ceil(window.row_off + window.height)))
+            col1 = min(src.width, int(np.ceil(window.col_off + window.width)))
+        if row1 <= row0 or col1 <= col0:
+            raise ValueError(f"{os.path.basename(path)} does not cover the requested bounds")
+        return cls(path, tile_size, (row0, col0, row1 - row0, col1 - col0))
+
+    def read(self, band=1):
+        """Band values of the grid's window"""
+        rasterio, Window = _require_rasterio()
+        row0, col0, height, width = self.window
+        with rasterio.open(self.path) as src:
+            return src.read(band, window=Window(col0, row0, width, height))
+
+    @property
+    def shape(self):
+        return self.rows, self.cols
+
+    def centres(self, r0, r1, c0, c1):
+        rasterio, _ = _require_rasterio()
+        row0, col0 = self.window[:2]
+        rows, cols = np.meshgrid(np.arange(row0 + r0, row0 + r1) + 0.5, np.arange(col0 + c0, col0 + c1) + 0.5, indexing='ij')
+        xs, ys = self.transform * (cols.ravel(), rows.ravel())
+        lons, lats = rasterio.warp.transform(self.crs, 'EPSG:4326', np.asarray(xs).tolist(), np.asarray(ys).tolist())
+        return np.asarray(lats).reshape(rows.shape), np.asarray(lons).reshape(rows.shape)
+
+    def to_dict(self):
+        return {'crs': self.crs, 'transform': list(self.transform)[:6], 'window': list(self.window)}
+
+
+class ZoneMasks:
+    """Rasterized area zones of one grid, stored as pixel indices grouped by zone.
+
+    Zone z owns the flat (row-major) pixels members[starts[z]:starts[z + 1]];
+    pixels outside every zone are not stored. Row bounds of the members let
+    callers read only the band of the raster the zones cover.
+    """
+
+    __slots__ = ('key', 'zone_keys', 'shape', 'members', 'starts', 'row_range')
+
+    def __init__(self, key, zone_keys, shape, members, starts):
+        self.key = key
+        self.zone_keys = list(zone_keys)
+        self.shape = tuple(int(n) for n in shape)
+        self.members = members
+        self.starts = starts
+        rows = members // self.shape[1]
+        self.row_range = (int(rows.min()), int(rows.max()) + 1) if len(members) else (0, 0)
+
+    @property
+    def counts(self):
+        return np.diff(self.starts)
+
+    def labels(self):
+        """Full (rows, cols) int32 label array, -1 outside every zone"""
+        labels = np.full(self.shape[0] * self.shape[1], -1, dtype=np.int32)
+        labels[self.members] = np.repeat(np.arange(len(self.zone_keys), dtype=np.int32), self.counts)
+        return labels.reshape(self.shape)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp.npz'
+        np.savez(tmp_path, key=np.array(self.key), zone_keys=np.array(self.zone_keys, dtype=str),
+                 shape=np.array(self.shape), members=self.members, starts=self.starts)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as saved:
+            return cls(str(saved['key']), saved['zone_keys'].tolist(), saved['shape'], saved['members'], saved['starts'])
+
+
+def rasterize_zones(registry, grid, radius=None, key=None):
+    """Label every grid pixel with the area zone it falls in.
+
+    Areas with a Polygon/MultiPolygon geometry own the pixels inside it.
+    Areas known only by a point own the pixels nearer to them than to any
+    other point area, up to radius degrees away, and never take pixels a
+    polygon already owns.
+    """
+    radius = NASAConfig.ZONAL_POINT_RADIUS if radius is None else radius
+    keys = list(registry)
+    polygon_rows = [row for row, area_key in enumerate(keys) if area_key in registry.geometries]
+    point_rows = np.array([row for row, area_key in enumerate(keys) if area_key not in registry.geometries], dtype=np.int64)
+
+    polygons = None
+    if polygon_rows:
+        polygons = ZoneIndex.from_geojson({'features': [
+            {'geometry': registry.geometries[keys[row]], 'properties': {'row': row}} for row in polygon_rows
+        ]}, key_property='row')
+        polygon_zone_rows = np.asarray(polygons.keys, dtype=np.int64)
+    points = None
+    if len(point_rows) and radius > 0:
+        points = PointIndex(point_rows, registry.columns['lat'][point_rows], registry.columns['lon'][point_rows])
+
+    rows, cols = grid.shape
+    band = max(1, getattr(grid, 'tile_size', 256))
+    labels = np.full(rows * cols, -1, dtype=np.int64)
+    for r0 in range(0, rows, band):
+        r1 = min(r0 + band, rows)
+        lats, lons = grid.centres(r0, r1, 0, cols)
+        lats, lons = lats.ravel(), lons.ravel()
+        window = np.full(lats.size, -1, dtype=np.int64)
+        if polygons is not None:
+            zone = polygons.locate(lats, lons)
+            window[zone >= 0] = polygon_zone_rows[zone[zone >= 0]]
+        if points is not None:
+            free = np.flatnonzero(window < 0)
+            nearest, distance = points.nearest(lats[free], lons[free])
+            near = (nearest >= 0) & (distance <= radius)
+            window[free[near]] = point_rows[nearest[near]]
+        labels[r0 * cols:r1 * cols] = window
+
+    inside = np.flatnonzero(labels >= 0)
+    order = np.argsort(labels[inside], kind='stable')
+    members = inside[order]
+    starts = np.searchsorted(labels[members], np.arange(len(keys) + 1)).astype(np.int64)
+    return ZoneMasks(key, keys, grid.shape, members, starts)
+
+
+def zonal_reduce(masks, values, row_offset=0, percentiles=DEFAULT_PERCENTILES, bins=None, value_range=None, categorical=False, nodata=None):
+    """Per-zone statistics of values as whole-array reductions.
+
+    values covers raster rows [row_offset, row_offset + len(values)) at full
+    width. Returns {zone_key: stats}; NaN and nodata pixels are skipped.
+    bins adds a histogram over common edges (an int spreads them over
+    value_range, or the min-max of all zone pixels); categorical counts
+    pixels per distinct value instead, as for class rasters.
+    """
+    n = len(masks.zone_keys)
+    flat = np.asarray(values).reshape(-1)
+    pixels = masks.counts
+    zone = np.repeat(np.arange(n), pixels)
+    v = flat[masks.members - row_offset * masks.shape[1]].astype(np.float64)
+    ok = np.isfinite(v)
+    if nodata is not None and not np.isnan(nodata):
+        ok &= v != nodata
+    zone, v = zone[ok], v[ok]
+
+    count = np.bincount(zone, minlength=n)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.bincount(zone, weights=v, minlength=n) / count
+        deviation = v - mean[zone]
+        std = np.sqrt(np.bincount(zone, weights=deviation * deviation, minlength=n) / count)
+
+    # zone is already grouped, so a stable sort by value within zone gives every order statistic
+    ordered = v[np.lexsort((v, zone))] if len(v) else np.full(1, np.nan)
+    first = np.minimum(np.cumsum(count) - count, len(ordered) - 1)
+    last = np.minimum(first + np.maximum(count - 1, 0), len(ordered) - 1)
+    has = count > 0
+    columns = {
+        'mean': mean,
+        'std': std,
+        'min': np.where(has, ordered[first], np.nan),
+        'max': np.where(has, ordered[last], np.nan)
+    }
+    for q in percentiles or ():
+        position = first + q / 100.0 * (last - first)
+        lo = np.floor(position).astype(np.int64)
+        hi = np.minimum(lo + 1, last)
+        columns[f'p{q:g}'] = np.where(has, ordered[lo] + (ordered[hi] - ordered[lo]) * (position - lo), np.nan)
+
+    histogram = None
+    if categorical:
+        classes, index = np.unique(v, return_inverse=True)
+        histogram = np.bincount(zone * len(classes) + index, minlength=n * len(classes)).reshape(n, len(classes))
+        labels = [str(int(c)) if float(c).is_integer() else str(c) for c in classes]
+    elif bins:
+        if np.ndim(bins) == 0:
+            lo_v, hi_v = value_range or ((float(v.min()), float(v.max())) if len(v) else (0.0, 1.0))
+            edges = np.linspace(lo_v, hi_v if hi_v > lo_v else lo_v + 1.0, int(bins) + 1)
+        else:
+            edges = np.asarray(bins, dtype=np.float64)
+        nb = len(edges) - 1
+        index = np.searchsorted(edges, v, side='right') - 1
+        # The last edge is inclusive, as in numpy.histogram
+        index[v == edges[-1]] = nb - 1
+        within = (index >= 0) & (index < nb)
+        histogram = np.bincount(zone[within] * nb + index[within], minlength=n * nb).reshape(n, nb)
+
+    round_or_none = lambda value: None if np.isnan(value) else round(float(value), 4)
+    stats = {}
+    for z, zone_key in enumerate(masks.zone_keys):
+        entry = {'pixels': int(pixels[z]), 'count': int(count[z])}
+        entry.update({name: round_or_none(column[z]) for name, column in columns.items()})
+        if categorical:
+            entry['classes'] = {label: int(c) for label, c in zip(labels, histogram[z]) if c}
+        elif histogram is not None:
+            entry['histogram'] = {'edges': [round(float(e), 4) for e in edges], 'counts': histogram[z].tolist()}
+        stats[zone_key] = entry
+    return stats
+
+
+def zonal_mean_stack(masks, stack, row_offset=0):
+    """NaN-aware per-zone means of a (n_steps, rows, cols) block as an (n_steps, n_zones) array"""
+    stack = np.asarray(stack, dtype=np.float64)
+    values = stack.reshape(len(stack), -1)[:, masks.members - row_offset * masks.shape[1]]
+    finite = np.isfinite(values)
+    counts = masks.counts
+    # Members are grouped by zone, so each non-empty zone is one contiguous run
+    nonempty = np.flatnonzero(counts > 0)
+    means = np.full((len(stack), len(masks.zone_keys)), np.nan)
+    if len(nonempty) and values.shape[1]:
+        starts = masks.starts[nonempty]
+        sums = np.add.reduceat(np.where(finite, values, 0.0), starts, axis=1)
+        valid = np.add.reduceat(finite, starts, axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means[:, nonempty] = np.where(valid > 0, sums / valid, np.nan)
+    return means
+
+
+class ZonalStats:
+    """Zonal statistics of rasters over a registry's areas, with masks cached per grid.
+
+    Masks are keyed on a content hash of the grid and the zone definitions,
+    kept in a small in-process LRU and saved under CACHE_DIR/zones, so a new
+    scene or render on a grid seen before goes straight to the reductions.
+    """
+
+    def __init__(self, registry, radius=None, cache_dir=None, max_grids=None):
+        self.registry = registry
+        self.radius = NASAConfig.ZONAL_POINT_RADIUS if radius is None else radius
+        self.directory = os.path.join(cache_dir or NASAConfig.CACHE_DIR, 'zones')
+        self.max_grids = max_grids or NASAConfig.ZONAL_MASK_CACHE
+        self.stats = {'hits': 0, 'disk_hits': 0, 'rasterized': 0}
+        self._masks = OrderedDict()
+        self._lock = threading.Lock()
+        self.zones_hash = stable_hash(
+            list(registry), registry.columns['lat'], registry.columns['lon'], registry.geometries, self.radius
+        )
+
+    def masks(self, grid):
+        key = stable_hash('zones', grid.to_dict(), self.zones_hash)
+        with self._lock:
+            if key in self._masks:
+                self._masks.move_to_end(key)
+                self.stats['hits'] += 1
+                return self._masks[key]
+
+        path = os.path.join(self.directory, f'{key}.npz')
+        masks = None
+        try:
+            masks = ZoneMasks.load(path)
+            kind = 'disk_hits'
+        except (OSError, KeyError, ValueError):
+            pass
+        if masks is None or masks.key != key:
+            masks = rasterize_zones(self.registry, grid, self.radius, key)
+            kind = 'rasterized'
+            try:
+                masks.save(path)
+            except OSError as e:
+                print(f"⚠️ Could not persist zone masks: {e}")
+
+        with self._lock:
+            self.stats[kind] += 1
+            self._masks[key] = masks
+            while len(self._masks) > self.max_grids:
+                self._masks.popitem(last=False)
+        return masks
+
+    def compute(self, values, grid, **options):
+        """Statistics of a (rows, cols) array or memmap on grid; see zonal_reduce for options"""
+        masks = self.masks(grid)
+        r0, r1 = masks.row_range
+        return zonal_reduce(masks, values[r0:r1], r0, **options)
+
+    def raster(self, raster, surfaces=None, **options):
+        """{surface: per-area statistics} for the surfaces of a ScoreRaster"""
+        masks = self.masks(raster.grid)
+        r0, r1 = masks.row_range
+        return {name: zonal_reduce(masks, raster.read_window(name, r0, r1, 0, raster.grid.cols), r0, **options)
+                for name in (surfaces or raster.surfaces)}
+
+    def geotiff(self, path, band=1, **options):
+        """Per-area statistics of one GeoTIFF band, reading only the rows the zones cover"""
+        rasterio, Window = _require_rasterio()
+        grid = GeoTiffGrid(path)
+        masks = self.masks(grid)
+        r0, r1 = masks.row_range
+        with rasterio.open(path) as src:
+            values = src.read(band, window=Window(0, r0, grid.cols, r1 - r0))
+        options.setdefault('nodata', grid.nodata)
+        return zonal_reduce(masks, values, r0, **options)
+
+    def get_stats(self):
+        with self._lock:
+            return {**self.stats, 'grids': len(self._masks), 'zones': len(self.registry)}
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_zonal_stats(registry):
+    """Return the process-wide ZonalStats engine for an area registry"""
+    with _engines_lock:
+        engine = _engines.get(id(registry))
+        if engine is None or engine.registry is not registry:
+            engine = _engines[id(registry)] = ZonalStats(registry)
+        return engine
+
+
+def get_zonal_engines():
+    with _engines_lock:
+        return {engine.registry.source or str(key): engine for key, engine in _engines.items()}